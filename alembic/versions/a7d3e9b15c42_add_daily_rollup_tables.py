@@ -0,0 +1,58 @@
+"""add_daily_rollup_tables
+
+Revision ID: a7d3e9b15c42
+Revises: f2a8c4e6b013
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e9b15c42'
+down_revision: Union[str, None] = 'f2a8c4e6b013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Tables start empty; populate history afterwards with
+    #   python -m app.jobs.backfill_rollups
+    op.create_table(
+        'daily_sales_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('country_code', sa.String(length=2), nullable=False),
+        sa.Column('order_type', sa.String(length=20), nullable=False),
+        sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('order_count', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('pv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('day', 'country_code', 'order_type', 'product_id'),
+    )
+    op.create_index(
+        op.f('ix_daily_sales_rollup_product_id'), 'daily_sales_rollup', ['product_id'], unique=False
+    )
+    op.create_table(
+        'daily_network_rollup',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('country_code', sa.String(length=2), nullable=False),
+        sa.Column('enrollments', sa.Integer(), nullable=False),
+        sa.Column('removals', sa.Integer(), nullable=False),
+        sa.Column('activations', sa.Integer(), nullable=False),
+        sa.Column('deactivations', sa.Integer(), nullable=False),
+        sa.Column('orders_paid', sa.Integer(), nullable=False),
+        sa.Column('sales_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'country_code'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('daily_network_rollup')
+    op.drop_index(op.f('ix_daily_sales_rollup_product_id'), table_name='daily_sales_rollup')
+    op.drop_table('daily_sales_rollup')
@@ -0,0 +1,30 @@
+"""allow_ancestry_rows_without_side
+
+Revision ID: a9d4f2c7e186
+Revises: f4b8d2a6c053
+Create Date: 2026-10-20 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d4f2c7e186'
+down_revision: Union[str, None] = 'f4b8d2a6c053'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Follow-up to b5c1e8f3d720 (affiliate_ancestors): nodes placed without a
+    # side get their ancestry rows too (side NULL at the parent); repopulate
+    # afterwards with
+    #   python -m app.jobs.rebuild_ancestry
+    op.alter_column('affiliate_ancestors', 'side', existing_type=sa.String(length=5), nullable=True)
+
+
+def downgrade() -> None:
+    op.execute("DELETE FROM affiliate_ancestors WHERE side IS NULL")
+    op.alter_column('affiliate_ancestors', 'side', existing_type=sa.String(length=5), nullable=False)
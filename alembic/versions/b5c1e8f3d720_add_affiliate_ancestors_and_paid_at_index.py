@@ -0,0 +1,54 @@
+"""add_affiliate_ancestors_and_paid_at_index
+
+Revision ID: b5c1e8f3d720
+Revises: a7d3e9b15c42
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c1e8f3d720'
+down_revision: Union[str, None] = 'a7d3e9b15c42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Starts empty; populate it afterwards with
+    #   python -m app.jobs.rebuild_ancestry
+    op.create_table(
+        'affiliate_ancestors',
+        sa.Column('ancestor_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('descendant_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('depth', sa.Integer(), nullable=False),
+        sa.Column('side', sa.String(length=5), nullable=False),
+        sa.ForeignKeyConstraint(['ancestor_id'], ['affiliates.id']),
+        sa.ForeignKeyConstraint(['descendant_id'], ['affiliates.id']),
+        sa.PrimaryKeyConstraint('ancestor_id', 'descendant_id'),
+    )
+    op.create_index(
+        'ix_affiliate_ancestors_descendant',
+        'affiliate_ancestors',
+        ['descendant_id'],
+        unique=False,
+        postgresql_include=['ancestor_id', 'side'],
+    )
+    op.create_index(
+        'ix_orders_paid_at',
+        'orders',
+        ['paid_at'],
+        unique=False,
+        postgresql_include=['affiliate_id', 'status', 'total_pv', 'total_bv'],
+        postgresql_where=sa.text('paid_at IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_orders_paid_at', table_name='orders')
+    op.drop_index('ix_affiliate_ancestors_descendant', table_name='affiliate_ancestors')
+    op.drop_table('affiliate_ancestors')
@@ -0,0 +1,88 @@
+"""add_period_snapshots
+
+Revision ID: b9f3d7c2e641
+Revises: a2d8e4b6c173
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9f3d7c2e641'
+down_revision: Union[str, None] = 'a2d8e4b6c173'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Partitions are created per period by python -m app.jobs.snapshot_period capture
+    op.create_table(
+        'period_snapshots',
+        sa.Column('period', sa.String(length=20), nullable=False),
+        sa.Column('affiliate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('sponsor_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('placement_parent_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('placement_side', sa.String(length=5), nullable=True),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('rank', sa.String(length=30), nullable=False),
+        sa.Column('pv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('left_pv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv_left', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('right_pv', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv_right', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('pv_accumulated', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('bv_left_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv_right_total', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv_left_carry', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.Column('bv_right_carry', sa.Numeric(precision=14, scale=2), nullable=False),
+        sa.PrimaryKeyConstraint('period', 'affiliate_id'),
+        postgresql_partition_by='LIST (period)',
+    )
+    op.create_index(
+        'ix_period_snapshots_parent',
+        'period_snapshots',
+        ['period', 'placement_parent_id', 'placement_side'],
+        unique=False,
+    )
+    op.create_table(
+        'snapshot_periods',
+        sa.Column('period', sa.String(length=20), nullable=False),
+        sa.Column('partition_name', sa.String(length=63), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('captured_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('detached_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('period'),
+    )
+
+    # Closed periods are immutable (Rule #12): a snapshot row is never changed
+    op.execute(
+        """
+        CREATE FUNCTION period_snapshots_immutable() RETURNS trigger AS $$
+        BEGIN
+            RAISE EXCEPTION 'period snapshots are immutable'
+                USING DETAIL = TG_OP || ' on ' || TG_TABLE_NAME;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_period_snapshots_immutable
+        BEFORE UPDATE OR DELETE ON period_snapshots
+        FOR EACH ROW EXECUTE FUNCTION period_snapshots_immutable()
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS trg_period_snapshots_immutable ON period_snapshots")
+    op.execute("DROP FUNCTION IF EXISTS period_snapshots_immutable()")
+    op.drop_table('snapshot_periods')
+    op.drop_index('ix_period_snapshots_parent', table_name='period_snapshots')
+    op.drop_table('period_snapshots')
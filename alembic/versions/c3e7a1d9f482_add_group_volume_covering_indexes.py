@@ -0,0 +1,40 @@
+"""add_group_volume_covering_indexes
+
+Revision ID: c3e7a1d9f482
+Revises: b5c1e8f3d720
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e7a1d9f482'
+down_revision: Union[str, None] = 'b5c1e8f3d720'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_orders_affiliate_paid_at',
+        'orders',
+        ['affiliate_id', 'paid_at'],
+        unique=False,
+        postgresql_include=['status', 'total_pv', 'total_bv'],
+        postgresql_where=sa.text('paid_at IS NOT NULL'),
+    )
+    op.create_index(
+        'ix_affiliate_ancestors_ancestor_side',
+        'affiliate_ancestors',
+        ['ancestor_id', 'side'],
+        unique=False,
+        postgresql_include=['descendant_id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_affiliate_ancestors_ancestor_side', table_name='affiliate_ancestors')
+    op.drop_index('ix_orders_affiliate_paid_at', table_name='orders')
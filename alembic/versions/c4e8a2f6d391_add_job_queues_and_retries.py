@@ -0,0 +1,59 @@
+"""add_job_queues_and_retries
+
+Revision ID: c4e8a2f6d391
+Revises: b9f3d7c2e641
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a2f6d391'
+down_revision: Union[str, None] = 'b9f3d7c2e641'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Claimed per queue by python -m app.worker, highest priority first
+    op.add_column('background_jobs', sa.Column('queue', sa.String(length=30), server_default='default', nullable=False))
+    op.add_column('background_jobs', sa.Column('priority', sa.SmallInteger(), server_default='0', nullable=False))
+    op.add_column('background_jobs', sa.Column('attempts', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('background_jobs', sa.Column('max_attempts', sa.Integer(), server_default='3', nullable=False))
+    op.add_column('background_jobs', sa.Column('run_after', sa.DateTime(timezone=True), nullable=True))
+    op.add_column(
+        'background_jobs',
+        sa.Column('visibility_timeout', sa.Integer(), server_default='300', nullable=False),
+    )
+    # Liquidation previews queued before this revision run on the reports queue
+    op.execute("UPDATE background_jobs SET queue = 'reports' WHERE kind = 'liquidation_preview'")
+    op.execute("UPDATE background_jobs SET attempts = 1 WHERE started_at IS NOT NULL")
+
+    op.drop_index('ix_background_jobs_unfinished', table_name='background_jobs')
+    op.create_index(
+        'ix_background_jobs_claim',
+        'background_jobs',
+        ['queue', sa.text('priority DESC'), 'created_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_background_jobs_claim', table_name='background_jobs')
+    op.create_index(
+        'ix_background_jobs_unfinished',
+        'background_jobs',
+        ['created_at'],
+        unique=False,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+    op.drop_column('background_jobs', 'visibility_timeout')
+    op.drop_column('background_jobs', 'run_after')
+    op.drop_column('background_jobs', 'max_attempts')
+    op.drop_column('background_jobs', 'attempts')
+    op.drop_column('background_jobs', 'priority')
+    op.drop_column('background_jobs', 'queue')
@@ -0,0 +1,26 @@
+"""add_outbox_retry_backoff
+
+Revision ID: d7f1b3e9a524
+Revises: c4e8a2f6d391
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f1b3e9a524'
+down_revision: Union[str, None] = 'c4e8a2f6d391'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A failed event is not claimed again before this (exponential backoff)
+    op.add_column('outbox_events', sa.Column('next_attempt_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('outbox_events', 'next_attempt_at')
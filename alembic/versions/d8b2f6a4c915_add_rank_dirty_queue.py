@@ -0,0 +1,34 @@
+"""add_rank_dirty_queue
+
+Revision ID: d8b2f6a4c915
+Revises: c3e7a1d9f482
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8b2f6a4c915'
+down_revision: Union[str, None] = 'c3e7a1d9f482'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'rank_dirty',
+        sa.Column('affiliate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('marked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['affiliate_id'], ['affiliates.id']),
+        sa.PrimaryKeyConstraint('affiliate_id'),
+    )
+    op.create_index(op.f('ix_rank_dirty_marked_at'), 'rank_dirty', ['marked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_rank_dirty_marked_at'), table_name='rank_dirty')
+    op.drop_table('rank_dirty')
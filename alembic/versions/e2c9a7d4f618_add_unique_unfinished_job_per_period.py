@@ -0,0 +1,47 @@
+"""add_unique_unfinished_job_per_period
+
+Revision ID: e2c9a7d4f618
+Revises: d7f1b3e9a524
+Create Date: 2026-10-20 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c9a7d4f618'
+down_revision: Union[str, None] = 'd7f1b3e9a524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Duplicates queued before this revision: keep the oldest per kind and period
+    op.execute(
+        """
+        UPDATE background_jobs SET status = 'cancelled', cancel_requested = true, finished_at = now()
+        WHERE id IN (
+            SELECT id FROM (
+                SELECT id, row_number() OVER (
+                    PARTITION BY kind, params ->> 'period' ORDER BY created_at
+                ) AS n
+                FROM background_jobs
+                WHERE status IN ('queued', 'running') AND params ? 'period'
+            ) ranked
+            WHERE n > 1
+        )
+        """
+    )
+    op.create_index(
+        'uq_background_jobs_unfinished_period',
+        'background_jobs',
+        ['kind', sa.text("(params ->> 'period')")],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_background_jobs_unfinished_period', table_name='background_jobs')
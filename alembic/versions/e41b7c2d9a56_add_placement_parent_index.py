@@ -0,0 +1,33 @@
+"""add_placement_parent_index
+
+Revision ID: e41b7c2d9a56
+Revises: c9f3a5e71b24
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e41b7c2d9a56'
+down_revision: Union[str, None] = 'c9f3a5e71b24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Recursive tree queries join children on placement_parent_id; without this
+    # index every level is a sequential scan of affiliates.
+    op.create_index(
+        'ix_affiliates_placement_parent_side',
+        'affiliates',
+        ['placement_parent_id', 'placement_side'],
+        unique=False,
+        postgresql_where=sa.text('deleted_at IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_affiliates_placement_parent_side', table_name='affiliates')
@@ -0,0 +1,79 @@
+"""add_outbox_and_commissions
+
+Revision ID: e5a9c3f7b218
+Revises: d8b2f6a4c915
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c3f7b218'
+down_revision: Union[str, None] = 'd8b2f6a4c915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'outbox_events',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('event_type', sa.String(length=50), nullable=False),
+        sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(op.f('ix_outbox_events_event_type'), 'outbox_events', ['event_type'], unique=False)
+    op.create_index(
+        'ix_outbox_events_pending',
+        'outbox_events',
+        ['id'],
+        unique=False,
+        postgresql_where=sa.text('processed_at IS NULL'),
+    )
+
+    op.create_table(
+        'commissions',
+        sa.Column('affiliate_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('source_affiliate_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('bonus_type', sa.String(length=30), nullable=False),
+        sa.Column('period', sa.String(length=20), nullable=False),
+        sa.Column('status', sa.String(length=30), nullable=False),
+        sa.Column('base_bv', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('rate', sa.Numeric(precision=5, scale=4), nullable=False),
+        sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=False),
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('tenant_id', postgresql.UUID(as_uuid=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint(
+            "status IN ('pending_liquidation', 'approved', 'paid', 'cancelled')",
+            name='chk_commission_status',
+        ),
+        sa.ForeignKeyConstraint(['affiliate_id'], ['affiliates.id']),
+        sa.ForeignKeyConstraint(['source_affiliate_id'], ['affiliates.id']),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('order_id', 'bonus_type', name='uq_commissions_order_bonus'),
+    )
+    op.create_index(op.f('ix_commissions_affiliate_id'), 'commissions', ['affiliate_id'], unique=False)
+    op.create_index(op.f('ix_commissions_period'), 'commissions', ['period'], unique=False)
+    op.create_index(op.f('ix_commissions_tenant_id'), 'commissions', ['tenant_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_commissions_tenant_id'), table_name='commissions')
+    op.drop_index(op.f('ix_commissions_period'), table_name='commissions')
+    op.drop_index(op.f('ix_commissions_affiliate_id'), table_name='commissions')
+    op.drop_table('commissions')
+    op.drop_index('ix_outbox_events_pending', table_name='outbox_events')
+    op.drop_index(op.f('ix_outbox_events_event_type'), table_name='outbox_events')
+    op.drop_table('outbox_events')
@@ -0,0 +1,26 @@
+"""add_commission_generation
+
+Revision ID: f1c6d2a8e937
+Revises: e5a9c3f7b218
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c6d2a8e937'
+down_revision: Union[str, None] = 'e5a9c3f7b218'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Unilevel rows are written per (payee, generation) by app.jobs.unilevel_bonus
+    op.add_column('commissions', sa.Column('generation', sa.SmallInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('commissions', 'generation')
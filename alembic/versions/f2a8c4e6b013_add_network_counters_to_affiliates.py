@@ -0,0 +1,40 @@
+"""add_network_counters_to_affiliates
+
+Revision ID: f2a8c4e6b013
+Revises: e41b7c2d9a56
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a8c4e6b013'
+down_revision: Union[str, None] = 'e41b7c2d9a56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COUNTERS = (
+    'left_leg_count',
+    'right_leg_count',
+    'left_active_count',
+    'right_active_count',
+    'active_directs_count',
+)
+
+
+def upgrade() -> None:
+    # Counters start at zero; populate existing networks afterwards with
+    #   python -m app.jobs.network_counters --fix
+    for column in COUNTERS:
+        op.add_column(
+            'affiliates',
+            sa.Column(column, sa.Integer(), server_default='0', nullable=False),
+        )
+
+
+def downgrade() -> None:
+    for column in reversed(COUNTERS):
+        op.drop_column('affiliates', column)
@@ -0,0 +1,33 @@
+"""add_inactive_counters_to_network_rollup
+
+Revision ID: f4b8d2a6c053
+Revises: e2c9a7d4f618
+Create Date: 2026-10-20 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4b8d2a6c053'
+down_revision: Union[str, None] = 'e2c9a7d4f618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Start at zero; fill them from history afterwards with
+    #   python -m app.jobs.backfill_rollups
+    op.add_column(
+        'daily_network_rollup', sa.Column('inactivations', sa.Integer(), server_default='0', nullable=False)
+    )
+    op.add_column(
+        'daily_network_rollup', sa.Column('inactive_exits', sa.Integer(), server_default='0', nullable=False)
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('daily_network_rollup', 'inactive_exits')
+    op.drop_column('daily_network_rollup', 'inactivations')
@@ -1,23 +1,59 @@
 import logging
 import uuid
+from datetime import date
+from typing import Literal
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from fastapi import HTTPException, status as http_status
 
-from app.core.deps import get_current_user, require_permission
+from app.core.cache import invalidate_on_commit, response_cache, with_etag
+from app.core.deps import get_current_user, get_network_scope, require_permission
+from app.core.loaders import Loaders, get_loaders
+from app.core.responses import model_response
 from app.db.session import get_db
 from app.models.affiliate import Affiliate
 from app.models.order import Order
 from app.models.user import User
-from app.schemas.affiliate import AffiliateListResponse, AffiliateResponse, EnrollmentRequest, TreeNodeResponse
+from app.schemas.affiliate import (
+    AffiliateListResponse,
+    AffiliateMoveRequest,
+    AffiliateResponse,
+    AffiliateStatusUpdate,
+    EnrollmentRequest,
+    FlatTreeResponse,
+    FrontierResponse,
+    GroupVolumeResponse,
+    PlacementSlotResponse,
+    SponsorTreeResponse,
+    TreeNodeResponse,
+    UplineResponse,
+)
 from app.schemas.order import EnrollmentResponse, OrderResponse
 from app.services.email import send_enrollment_notification_admin, send_welcome_distributor
 from app.models.audit_log import AuditLog
 from app.services.enrollment import enroll_affiliate
-from app.services.tree import get_binary_tree
+from app.services.group_volume import get_group_volume, visible_affiliates
+from app.services.network_stats import on_removed, on_status_changed
+from app.services.periods import parse_period, resolve_window
+from app.services.placement import PlacementStrategy, find_next_slot
+from app.services.rank_queue import mark_dirty
+from app.services.rollups import record_removal, record_status_change
+from app.services.snapshots import served_from_snapshot, snapshot_tag
+from app.services.sponsor_tree import get_sponsor_tree
+from app.services.subtree_move import move_subtree
+from app.services.tree import (
+    FLAT_MAX_DEPTH,
+    NESTED_MAX_DEPTH,
+    get_binary_tree,
+    get_flat_tree,
+    get_frontier,
+    get_snapshot_tree,
+    get_upline,
+    nest_flat_tree,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -29,29 +65,24 @@ async def enroll(
     body: EnrollmentRequest,
     current_user: User = Depends(require_permission("affiliates:create")),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """Enroll a new affiliate: creates the affiliate + enrollment order (kit purchase)."""
     affiliate, order = await enroll_affiliate(db, body, current_user.id)
 
-    # Send notification emails (non-blocking, failures are logged but don't affect response)
+    # Send notification emails (non-blocking, failures are logged but don't affect response).
+    # Enrollment already loaded the kit and the sponsor, so these come from the session.
     kit_item = order.items[0] if order.items else None
-    kit_name = kit_item.product.name if kit_item else body.kit_tier
+    kit = await loaders.products.load(kit_item.product_id) if kit_item else None
+    kit_name = kit.name if kit else body.kit_tier
     kit_price = str(order.total)
 
     placement_info = None
     if affiliate.placement_parent_id and affiliate.placement_side:
         placement_info = f"Pierna {affiliate.placement_side}"
 
-    sponsor_name = None
-    if affiliate.sponsor_id:
-        result = await db.execute(
-            select(Affiliate.first_name, Affiliate.last_name).where(
-                Affiliate.id == affiliate.sponsor_id
-            )
-        )
-        sponsor_row = result.one_or_none()
-        if sponsor_row:
-            sponsor_name = f"{sponsor_row.first_name} {sponsor_row.last_name}"
+    sponsor = await loaders.affiliates.load(affiliate.sponsor_id) if affiliate.sponsor_id else None
+    sponsor_name = f"{sponsor.first_name} {sponsor.last_name}" if sponsor else None
 
     try:
         send_welcome_distributor(
@@ -104,6 +135,30 @@ async def get_my_affiliate(
     return AffiliateResponse.model_validate(affiliate)
 
 
+def list_affiliates_query(status: str | None, skip: int, limit: int):
+    """The affiliate list page as one statement: the listed columns plus the creator's username."""
+    query = (
+        select(
+            Affiliate.id,
+            Affiliate.affiliate_code,
+            (Affiliate.first_name + " " + Affiliate.last_name).label("full_name"),
+            Affiliate.email,
+            Affiliate.status,
+            Affiliate.kit_tier,
+            Affiliate.current_rank,
+            Affiliate.enrolled_at,
+            func.coalesce(
+                func.nullif(User.username, ""), User.first_name + " " + User.last_name
+            ).label("created_by_username"),
+        )
+        .outerjoin(User, User.id == Affiliate.created_by_user_id)
+        .where(Affiliate.deleted_at.is_(None))
+    )
+    if status:
+        query = query.where(Affiliate.status == status)
+    return query.order_by(Affiliate.created_at.desc()).offset(skip).limit(limit)
+
+
 @router.get("", response_model=list[AffiliateListResponse])
 async def list_affiliates(
     current_user: User = Depends(require_permission("affiliates:read")),
@@ -113,32 +168,116 @@ async def list_affiliates(
     limit: int = Query(default=20, ge=1, le=100),
 ):
     """List affiliates with optional status filter and pagination."""
-    query = select(Affiliate).where(Affiliate.deleted_at.is_(None))
-    if status:
-        query = query.where(Affiliate.status == status)
-    query = query.order_by(Affiliate.created_at.desc()).offset(skip).limit(limit)
-
-    result = await db.execute(query)
-    affiliates = result.scalars().all()
-
-    # Batch-resolve creator usernames to avoid N+1 queries
-    creator_ids = {a.created_by_user_id for a in affiliates if a.created_by_user_id}
-    username_map: dict[uuid.UUID, str] = {}
-    if creator_ids:
-        creators = await db.execute(
-            select(User.id, User.username, User.first_name, User.last_name).where(
-                User.id.in_(creator_ids)
-            )
+    rows = (await db.execute(list_affiliates_query(status, skip, limit))).all()
+    return model_response(list[AffiliateListResponse], rows)
+
+
+MAX_FRONTIER_IDS = 200
+
+
+@router.get("/tree/frontier", response_model=FrontierResponse)
+async def get_tree_frontier(
+    request: Request,
+    current_user: User = Depends(require_permission("affiliates:read")),
+    scope_affiliate_id: uuid.UUID | None = Depends(get_network_scope),
+    db: AsyncSession = Depends(get_db),
+    ids: str = Query(description="Comma-separated affiliate ids to expand"),
+    levels: int = Query(default=1, ge=1, le=NESTED_MAX_DEPTH),
+):
+    """Next `levels` levels below a set of displayed nodes, for lazy expand/collapse.
+
+    Nodes carry has_left/has_right flags. Send the previous ETag in
+    If-None-Match to get 304 when the frontier has not changed. Distributors
+    can only expand nodes in their own downline.
+    """
+    try:
+        node_ids = [uuid.UUID(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be comma-separated UUIDs",
+        )
+    if not node_ids or len(node_ids) > MAX_FRONTIER_IDS:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Provide between 1 and {MAX_FRONTIER_IDS} ids",
         )
-        for row in creators:
-            username_map[row.id] = row.username or f"{row.first_name} {row.last_name}"
 
-    responses = []
-    for a in affiliates:
-        resp = AffiliateListResponse.model_validate(a)
-        resp.created_by_username = username_map.get(a.created_by_user_id)  # type: ignore[arg-type]
-        responses.append(resp)
-    return responses
+    async def load() -> FrontierResponse:
+        if scope_affiliate_id is not None:
+            visible = await visible_affiliates(db, node_ids, scope_affiliate_id)
+            if len(visible) != len(set(node_ids)):
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="Affiliate not found",
+                )
+        return await get_frontier(db, node_ids, levels)
+
+    response = await response_cache.cached_response(
+        "affiliates.frontier",
+        params={"ids": node_ids, "levels": levels, "scope": scope_affiliate_id},
+        user=current_user,
+        tags=["tree"],
+        response_type=FrontierResponse,
+        produce=load,
+    )
+    return with_etag(request.headers, response)
+
+
+MAX_GROUP_VOLUME_IDS = 500
+
+
+async def _group_volume_response(
+    db: AsyncSession,
+    affiliate_ids: list[uuid.UUID],
+    scope_affiliate_id: uuid.UUID | None,
+    period: str | None,
+    date_from: date | None,
+    date_to: date | None,
+) -> GroupVolumeResponse:
+    try:
+        window = resolve_window(period, date_from, date_to)
+    except ValueError as exc:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    visible = await visible_affiliates(db, affiliate_ids, scope_affiliate_id)
+    return GroupVolumeResponse(
+        period=window.key,
+        start=window.start,
+        end=window.end,
+        closed=window.closed,
+        volumes=await get_group_volume(db, visible, window),
+    )
+
+
+@router.get("/group-volume", response_model=GroupVolumeResponse)
+async def get_group_volumes(
+    current_user: User = Depends(require_permission("affiliates:read")),
+    scope_affiliate_id: uuid.UUID | None = Depends(get_network_scope),
+    db: AsyncSession = Depends(get_db),
+    ids: str = Query(description="Comma-separated affiliate ids"),
+    period: str | None = Query(default=None, description="YYYY-MM or YYYY-Www"),
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+):
+    """Group volume per leg for many affiliates at once (e.g. a rank-qualification batch).
+
+    Window: `period`, or `date_from`..`date_to` (whole days), or the current month.
+    """
+    try:
+        affiliate_ids = [uuid.UUID(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="ids must be comma-separated UUIDs",
+        )
+    if not affiliate_ids or len(affiliate_ids) > MAX_GROUP_VOLUME_IDS:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Provide between 1 and {MAX_GROUP_VOLUME_IDS} ids",
+        )
+    return await _group_volume_response(
+        db, affiliate_ids, scope_affiliate_id, period, date_from, date_to
+    )
 
 
 @router.get("/{affiliate_id}", response_model=AffiliateResponse)
@@ -146,49 +285,305 @@ async def get_affiliate(
     affiliate_id: uuid.UUID,
     current_user: User = Depends(require_permission("affiliates:read")),
     db: AsyncSession = Depends(get_db),
+    loaders: Loaders = Depends(get_loaders),
 ):
     """Get a single affiliate by ID."""
-    result = await db.execute(
-        select(Affiliate).where(
-            Affiliate.id == affiliate_id,
-            Affiliate.deleted_at.is_(None),
+
+    async def load() -> AffiliateResponse:
+        result = await db.execute(
+            select(Affiliate).where(
+                Affiliate.id == affiliate_id,
+                Affiliate.deleted_at.is_(None),
+            )
         )
+        affiliate = result.scalar_one_or_none()
+        if affiliate is None:
+            raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Affiliate not found")
+
+        response = AffiliateResponse.model_validate(affiliate)
+
+        # Resolve the username of the admin who enrolled this affiliate
+        if affiliate.created_by_user_id:
+            creator = await loaders.users.load(affiliate.created_by_user_id)
+            if creator:
+                response.created_by_username = creator.display_name
+
+        return response
+
+    return await response_cache.cached_response(
+        "affiliates.detail",
+        params={"affiliate_id": affiliate_id},
+        user=current_user,
+        tags=[f"affiliate:{affiliate_id}", "users"],
+        response_type=AffiliateResponse,
+        produce=load,
     )
-    affiliate = result.scalar_one_or_none()
-    if affiliate is None:
-        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Affiliate not found")
 
-    response = AffiliateResponse.model_validate(affiliate)
 
-    # Resolve the username of the admin who enrolled this affiliate
-    if affiliate.created_by_user_id:
-        creator = await db.execute(
-            select(User.username, User.first_name, User.last_name).where(
-                User.id == affiliate.created_by_user_id
+@router.get("/{affiliate_id}/tree", response_model=TreeNodeResponse | FlatTreeResponse)
+async def get_affiliate_tree(
+    affiliate_id: uuid.UUID,
+    current_user: User = Depends(require_permission("affiliates:read")),
+    db: AsyncSession = Depends(get_db),
+    depth: int = Query(default=3, ge=1, le=FLAT_MAX_DEPTH, description="Tree depth levels"),
+    format: Literal["nested", "flat"] = Query(default="nested", description="nested or flat (columnar)"),
+    max_nodes: int = Query(default=5000, ge=1, le=20000, description="flat only: cap, whole levels"),
+    period: str | None = Query(default=None, description="closed period (YYYY-MM or YYYY-Www): the tree as captured at its close"),
+):
+    """Get the binary tree starting from an affiliate, up to `depth` levels.
+
+    `format=flat` returns a columnar node list (up to depth 30) and stops at the
+    last whole level under `max_nodes`; expand `frontier` nodes for more.
+    With `period`, the tree comes from that closed period's snapshot: members
+    enrolled by the period's end and their volume within it, but placement,
+    status, rank and BV totals as they stood when the snapshot was captured.
+    """
+    if format == "nested" and depth > NESTED_MAX_DEPTH:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Nested trees are limited to depth {NESTED_MAX_DEPTH}; use format=flat",
+        )
+    window = None
+    if period is not None:
+        try:
+            window = parse_period(period)
+        except ValueError as exc:
+            raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    async def load_snapshot() -> FlatTreeResponse | None:
+        if not await served_from_snapshot(db, window):
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail=f"No snapshot has been captured for period {window.key}",
             )
+        return await get_snapshot_tree(
+            db, window.key, affiliate_id, depth, max_nodes if format == "flat" else None
         )
-        row = creator.one_or_none()
-        if row:
-            response.created_by_username = row.username or f"{row.first_name} {row.last_name}"
 
-    return response
+    async def load() -> TreeNodeResponse | FlatTreeResponse:
+        if window is not None:
+            tree = await load_snapshot()
+            if tree is not None and format == "nested":
+                tree = nest_flat_tree(tree)
+        elif format == "flat":
+            tree = await get_flat_tree(db, affiliate_id, depth, max_nodes)
+        else:
+            tree = await get_binary_tree(db, affiliate_id, depth)
+        if tree is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Affiliate not found",
+            )
+        return tree
+
+    return await response_cache.cached_response(
+        "affiliates.tree",
+        params={
+            "affiliate_id": affiliate_id,
+            "depth": depth,
+            "format": format,
+            "max_nodes": max_nodes if format == "flat" else None,
+            "period": window.key if window is not None else None,
+        },
+        user=current_user,
+        # A snapshot never changes, so genealogy writes don't evict it
+        tags=[snapshot_tag(window.key)] if window is not None else ["tree"],
+        response_type=FlatTreeResponse if format == "flat" else TreeNodeResponse,
+        produce=load,
+    )
 
 
-@router.get("/{affiliate_id}/tree", response_model=TreeNodeResponse)
-async def get_affiliate_tree(
+@router.get("/{affiliate_id}/upline", response_model=UplineResponse)
+async def get_affiliate_upline(
     affiliate_id: uuid.UUID,
     current_user: User = Depends(require_permission("affiliates:read")),
+    scope_affiliate_id: uuid.UUID | None = Depends(get_network_scope),
     db: AsyncSession = Depends(get_db),
-    depth: int = Query(default=3, ge=1, le=10, description="Tree depth levels"),
+    tree: Literal["placement", "sponsor"] = Query(default="placement"),
 ):
-    """Get the binary tree starting from an affiliate, up to `depth` levels."""
-    tree = await get_binary_tree(db, affiliate_id, depth)
-    if tree is None:
+    """Path from an affiliate up to the root, for highlighting its placement or sponsor line.
+
+    Distributors only see the part of the path up to their own position.
+    """
+
+    async def load() -> UplineResponse:
+        upline = await get_upline(db, affiliate_id, tree, stop_at=scope_affiliate_id)
+        if upline is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Affiliate not found",
+            )
+        return upline
+
+    return await response_cache.cached_response(
+        "affiliates.upline",
+        params={"affiliate_id": affiliate_id, "tree": tree, "scope": scope_affiliate_id},
+        user=current_user,
+        tags=["tree"],
+        response_type=UplineResponse,
+        produce=load,
+    )
+
+
+@router.get("/{affiliate_id}/sponsor-tree", response_model=SponsorTreeResponse)
+async def get_affiliate_sponsor_tree(
+    affiliate_id: uuid.UUID,
+    current_user: User = Depends(require_permission("affiliates:read")),
+    scope_affiliate_id: uuid.UUID | None = Depends(get_network_scope),
+    db: AsyncSession = Depends(get_db),
+    max_generations: int = Query(default=5, ge=1, le=15, description="Depth cap"),
+    generation: int = Query(default=1, ge=1, description="Generation to page through"),
+    after: str | None = Query(default=None, description="Cursor from the previous page"),
+    limit: int = Query(default=50, ge=1, le=200),
+):
+    """Sponsor (unilevel) downline: member count per generation plus one page of members."""
+    if generation > max_generations:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="generation cannot exceed max_generations",
+        )
+
+    async def load() -> SponsorTreeResponse:
+        if scope_affiliate_id is not None and scope_affiliate_id != affiliate_id:
+            # Distributors may only open sponsor trees inside their own sponsor line
+            if await get_upline(db, affiliate_id, "sponsor", stop_at=scope_affiliate_id) is None:
+                raise HTTPException(
+                    status_code=http_status.HTTP_404_NOT_FOUND,
+                    detail="Affiliate not found",
+                )
+        tree = await get_sponsor_tree(db, affiliate_id, max_generations, generation, after, limit)
+        if tree is None:
+            raise HTTPException(
+                status_code=http_status.HTTP_404_NOT_FOUND,
+                detail="Affiliate not found",
+            )
+        return tree
+
+    return await response_cache.cached_response(
+        "affiliates.sponsor_tree",
+        params={
+            "affiliate_id": affiliate_id,
+            "max_generations": max_generations,
+            "generation": generation,
+            "after": after,
+            "limit": limit,
+            "scope": scope_affiliate_id,
+        },
+        user=current_user,
+        tags=["tree"],
+        response_type=SponsorTreeResponse,
+        produce=load,
+    )
+
+
+@router.get("/{affiliate_id}/group-volume", response_model=GroupVolumeResponse)
+async def get_affiliate_group_volume(
+    affiliate_id: uuid.UUID,
+    current_user: User = Depends(require_permission("affiliates:read")),
+    scope_affiliate_id: uuid.UUID | None = Depends(get_network_scope),
+    db: AsyncSession = Depends(get_db),
+    period: str | None = Query(default=None, description="YYYY-MM or YYYY-Www"),
+    date_from: date | None = Query(default=None),
+    date_to: date | None = Query(default=None),
+):
+    """Group volume per leg of one affiliate within a window."""
+    response = await _group_volume_response(
+        db, [affiliate_id], scope_affiliate_id, period, date_from, date_to
+    )
+    if not response.volumes:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Affiliate not found")
+    return response
+
+
+@router.get("/{affiliate_id}/next-slot", response_model=PlacementSlotResponse)
+async def get_next_slot(
+    affiliate_id: uuid.UUID,
+    strategy: PlacementStrategy = Query(default="outer_left"),
+    current_user: User = Depends(require_permission("affiliates:create")),
+    db: AsyncSession = Depends(get_db),
+):
+    """First free position under an affiliate for the given spillover strategy."""
+    slot = await find_next_slot(db, affiliate_id, strategy)
+    if slot is None:
         raise HTTPException(
             status_code=http_status.HTTP_404_NOT_FOUND,
             detail="Affiliate not found",
         )
-    return tree
+    result = await db.execute(
+        select(Affiliate.affiliate_code).where(Affiliate.id == slot.parent_id)
+    )
+    return PlacementSlotResponse(
+        parent_id=slot.parent_id,
+        parent_affiliate_code=result.scalar_one(),
+        side=slot.side,
+        depth=slot.depth,
+        strategy=strategy,
+    )
+
+
+@router.patch("/{affiliate_id}/status", response_model=AffiliateResponse)
+async def update_affiliate_status(
+    affiliate_id: uuid.UUID,
+    request: AffiliateStatusUpdate,
+    current_user: User = Depends(require_permission("affiliates:update")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Change an affiliate's status (e.g. suspend or reactivate)."""
+    result = await db.execute(
+        select(Affiliate)
+        .where(
+            Affiliate.id == affiliate_id,
+            Affiliate.deleted_at.is_(None),
+        )
+        .with_for_update()
+    )
+    affiliate = result.scalar_one_or_none()
+    if affiliate is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Affiliate not found",
+        )
+    if affiliate.status == "pending":
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail="Pending affiliates are activated by paying their enrollment order",
+        )
+
+    old_status = affiliate.status
+    if old_status != request.status:
+        affiliate.status = request.status
+        await on_status_changed(db, affiliate, old_status)
+        await record_status_change(db, affiliate, old_status)
+        await mark_dirty(db, affiliate.id, affiliate.sponsor_id)
+        db.add(
+            AuditLog(
+                tenant_id=affiliate.tenant_id,
+                user_id=current_user.id,
+                action="affiliate.status_change",
+                resource_type="affiliate",
+                resource_id=affiliate.id,
+                old_values={"status": old_status},
+                new_values={"status": request.status},
+            )
+        )
+        await db.flush()
+        invalidate_on_commit(f"affiliate:{affiliate_id}", "tree")
+
+    return AffiliateResponse.model_validate(affiliate)
+
+
+@router.post("/{affiliate_id}/move", response_model=AffiliateResponse)
+async def move_affiliate(
+    affiliate_id: uuid.UUID,
+    request: AffiliateMoveRequest,
+    current_user: User = Depends(require_permission("affiliates:update")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Move an affiliate and its downline to another placement position."""
+    affiliate = await move_subtree(
+        db, affiliate_id, request.new_parent_id, request.new_side, current_user.id
+    )
+    return AffiliateResponse.model_validate(affiliate)
 
 
 @router.delete("/{affiliate_id}", status_code=204)
@@ -218,6 +613,9 @@ async def delete_affiliate(
         )
 
     affiliate.deleted_at = func.now()
+    await on_removed(db, affiliate)
+    await record_removal(db, affiliate)
+    await mark_dirty(db, affiliate.id, affiliate.sponsor_id)
 
     # Cancel any pending orders for this affiliate
     pending_orders = await db.execute(
@@ -229,6 +627,7 @@ async def delete_affiliate(
     cancelled_count = 0
     for order in pending_orders.scalars():
         order.status = "cancelled"
+        invalidate_on_commit(f"order:{order.id}")
         cancelled_count += 1
 
     audit = AuditLog(
@@ -245,3 +644,5 @@ async def delete_affiliate(
     )
     db.add(audit)
     await db.flush()
+
+    invalidate_on_commit(f"affiliate:{affiliate_id}", "tree")
@@ -0,0 +1,51 @@
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.core.deps import require_permission
+from app.db.session import get_db
+from app.models.user import User
+from app.schemas.dashboard import DashboardResponse
+from app.services.rollups import business_day, get_dashboard
+
+router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+
+DEFAULT_RANGE_DAYS = 30
+MAX_RANGE_DAYS = 366
+
+
+@router.get("", response_model=DashboardResponse)
+async def get_executive_dashboard(
+    date_from: date | None = Query(default=None, description="Defaults to 30 days before date_to"),
+    date_to: date | None = Query(default=None, description="Defaults to today (reporting timezone)"),
+    current_user: User = Depends(require_permission("reports:read")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Sales and network totals for a date range, read from the daily rollups."""
+    date_to = date_to or business_day()
+    date_from = date_from or date_to - timedelta(days=DEFAULT_RANGE_DAYS - 1)
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="date_from must not be after date_to",
+        )
+    if (date_to - date_from).days >= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Date range is limited to {MAX_RANGE_DAYS} days",
+        )
+
+    async def load() -> DashboardResponse:
+        return await get_dashboard(db, date_from, date_to)
+
+    return await response_cache.cached_response(
+        "dashboard",
+        params={"date_from": date_from, "date_to": date_to},
+        user=current_user,
+        tags=["dashboard"],
+        response_type=DashboardResponse,
+        produce=load,
+    )
@@ -0,0 +1,136 @@
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import require_permission
+from app.db.session import get_db
+from app.models.background_job import BackgroundJob
+from app.models.user import User
+from app.schemas.job import BackgroundJobResponse, JobEnqueueRequest
+from app.services.background_jobs import enqueue_once, job_response, job_stats, request_cancel, requeue_once
+from app.worker import KINDS
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+async def _get_job(db: AsyncSession, job_id: uuid.UUID) -> BackgroundJob:
+    job = await db.get(BackgroundJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=http_status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.get("", response_model=list[BackgroundJobResponse])
+async def list_jobs(
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+    job_status: str | None = Query(default=None, alias="status"),
+    queue: str | None = Query(default=None),
+    kind: str | None = Query(default=None),
+    skip: int = Query(default=0, ge=0),
+    limit: int = Query(default=50, ge=1, le=100),
+):
+    """Jobs of every kind, newest first, optionally filtered by status, queue and kind."""
+    query = select(BackgroundJob)
+    if job_status:
+        query = query.where(BackgroundJob.status == job_status)
+    if queue:
+        query = query.where(BackgroundJob.queue == queue)
+    if kind:
+        query = query.where(BackgroundJob.kind == kind)
+    query = query.order_by(BackgroundJob.created_at.desc()).offset(skip).limit(limit)
+    return [job_response(job) for job in (await db.execute(query)).scalars()]
+
+
+@router.get("/stats")
+async def get_job_stats(
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Per queue: jobs waiting and running, the oldest wait and the last hour's outcomes."""
+    return await job_stats(db)
+
+
+@router.post("", response_model=BackgroundJobResponse, status_code=http_status.HTTP_202_ACCEPTED)
+async def enqueue_job(
+    body: JobEnqueueRequest,
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue a job of a registered kind (e.g. unilevel_bonus with {"period": "2026-03"})."""
+    spec = KINDS.get(body.kind)
+    if spec is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown job kind '{body.kind}'; expected one of {sorted(KINDS)}",
+        )
+    try:
+        params = spec.check_params(body.params)
+    except ValueError as exc:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    job = await enqueue_once(
+        db,
+        body.kind,
+        params,
+        current_user.id,
+        queue=spec.queue,
+        priority=body.priority,
+        visibility_timeout=spec.visibility_timeout,
+    )
+    if job is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"A {body.kind} job for {params['period']} is already queued or running",
+        )
+    return job_response(job)
+
+
+@router.get("/{job_id}", response_model=BackgroundJobResponse)
+async def get_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    return job_response(await _get_job(db, job_id))
+
+
+@router.post("/{job_id}/cancel", response_model=BackgroundJobResponse)
+async def cancel_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stop a queued job now, a running one after its current chunk."""
+    job = await _get_job(db, job_id)
+    if job.status not in ("queued", "running"):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Job is already '{job.status}'",
+        )
+    request_cancel(job)
+    await db.flush()
+    return job_response(job)
+
+
+@router.post("/{job_id}/retry", response_model=BackgroundJobResponse)
+async def retry_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue a failed or cancelled job again with fresh attempts, from its last checkpoint."""
+    job = await _get_job(db, job_id)
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Only failed or cancelled jobs can be retried, this one is '{job.status}'",
+        )
+    if not await requeue_once(db, job):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Another {job.kind} job for {job.params['period']} is already queued or running",
+        )
+    return job_response(job)
@@ -0,0 +1,145 @@
+import uuid
+from pathlib import Path
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi import status as http_status
+from fastapi.responses import FileResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import require_permission
+from app.db.session import get_db
+from app.models.background_job import BackgroundJob
+from app.models.user import User
+from app.schemas.job import BackgroundJobResponse
+from app.services.background_jobs import (
+    enqueue_once,
+    find_unfinished,
+    job_response,
+    request_cancel,
+    requeue_once,
+)
+from app.services.liquidation import PREVIEW_KIND, PREVIEW_QUEUE, missing_commission_runs
+from app.services.periods import parse_period
+
+router = APIRouter(prefix="/liquidations", tags=["liquidations"])
+
+
+async def _get_preview(db: AsyncSession, job_id: uuid.UUID) -> BackgroundJob:
+    job = await db.get(BackgroundJob, job_id)
+    if job is None or job.kind != PREVIEW_KIND:
+        raise HTTPException(
+            status_code=http_status.HTTP_404_NOT_FOUND,
+            detail="Preview job not found",
+        )
+    return job
+
+
+@router.post(
+    "/{period}/preview",
+    response_model=BackgroundJobResponse,
+    status_code=http_status.HTTP_202_ACCEPTED,
+)
+async def request_preview(
+    period: str,
+    current_user: User = Depends(require_permission("liquidations:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue the pre-liquidation report for a period; poll the returned job for progress.
+
+    If one is already queued or running for the period, that job is returned.
+    Refused while the period's commissions are not all accrued, since the
+    report would understate them.
+    """
+    try:
+        window = parse_period(period)
+    except ValueError as exc:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+
+    missing = await missing_commission_runs(db, window)
+    if missing:
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Commissions for {window.key} are not complete yet: {', '.join(missing)}",
+        )
+
+    job = await find_unfinished(db, PREVIEW_KIND, window.key)
+    if job is None:
+        job = await enqueue_once(db, PREVIEW_KIND, {"period": window.key}, current_user.id, queue=PREVIEW_QUEUE)
+    if job is None:
+        # Another request queued it after our lookup
+        job = await find_unfinished(db, PREVIEW_KIND, window.key)
+    if job is None:
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"A preview for {window.key} finished while this one was being queued, request it again",
+        )
+    return job_response(job)
+
+
+@router.get("/previews/{job_id}", response_model=BackgroundJobResponse)
+async def get_preview_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("liquidations:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Status and progress of a pre-liquidation job, with its totals once completed."""
+    return job_response(await _get_preview(db, job_id))
+
+
+@router.post("/previews/{job_id}/cancel", response_model=BackgroundJobResponse)
+async def cancel_preview_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("liquidations:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ask the worker to stop the job after its current chunk (a queued job stops at once)."""
+    job = await _get_preview(db, job_id)
+    if job.status not in ("queued", "running"):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Job is already '{job.status}'",
+        )
+    request_cancel(job)
+    await db.flush()
+    return job_response(job)
+
+
+@router.post("/previews/{job_id}/resume", response_model=BackgroundJobResponse)
+async def resume_preview_job(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("liquidations:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Re-queue a failed or cancelled job; it continues from its last completed chunk."""
+    job = await _get_preview(db, job_id)
+    if job.status not in ("failed", "cancelled"):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Only failed or cancelled jobs can be resumed, this one is '{job.status}'",
+        )
+    if not await requeue_once(db, job):
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Another preview for {job.params['period']} is already queued or running",
+        )
+    return job_response(job)
+
+
+@router.get("/previews/{job_id}/report")
+async def download_preview_report(
+    job_id: uuid.UUID,
+    current_user: User = Depends(require_permission("liquidations:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """The finished report as gzip-compressed CSV, streamed from storage."""
+    job = await _get_preview(db, job_id)
+    if job.status != "completed" or not job.output_path or not Path(job.output_path).exists():
+        raise HTTPException(
+            status_code=http_status.HTTP_409_CONFLICT,
+            detail=f"Report is not available, job is '{job.status}'",
+        )
+    return FileResponse(
+        job.output_path,
+        media_type="application/gzip",
+        filename=f"pre-liquidation-{job.params['period']}.csv.gz",
+    )
@@ -5,7 +5,9 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.cache import response_cache
 from app.core.deps import require_permission
+from app.core.responses import model_response
 from app.db.session import get_db
 from app.models.affiliate import Affiliate
 from app.models.order import Order
@@ -16,6 +18,32 @@ from app.services.payment import confirm_payment
 router = APIRouter(prefix="/orders", tags=["orders"])
 
 
+def list_orders_query(order_status: str | None, skip: int, limit: int):
+    """The order list page as one statement: the listed columns plus the affiliate's name and code."""
+    query = (
+        select(
+            Order.id,
+            Order.order_number,
+            Order.affiliate_id,
+            (Affiliate.first_name + " " + Affiliate.last_name).label("affiliate_name"),
+            Affiliate.affiliate_code,
+            Order.order_type,
+            Order.status,
+            Order.total,
+            Order.total_pv,
+            Order.total_bv,
+            Order.payment_method,
+            Order.paid_at,
+            Order.created_at,
+        )
+        .join(Affiliate, Order.affiliate_id == Affiliate.id)
+        .where(Affiliate.deleted_at.is_(None))
+    )
+    if order_status:
+        query = query.where(Order.status == order_status)
+    return query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
+
+
 @router.get("", response_model=list[OrderListResponse])
 async def list_orders(
     current_user: User = Depends(require_permission("orders:read")),
@@ -26,38 +54,8 @@ async def list_orders(
 ):
     """List orders with optional status filter. Defaults to pending_payment.
     Excludes orders from soft-deleted affiliates."""
-    query = (
-        select(Order)
-        .join(Affiliate, Order.affiliate_id == Affiliate.id)
-        .where(Affiliate.deleted_at.is_(None))
-    )
-    if order_status:
-        query = query.where(Order.status == order_status)
-    query = query.order_by(Order.created_at.desc()).offset(skip).limit(limit)
-
-    result = await db.execute(query)
-    orders = result.scalars().all()
-
-    # Batch-resolve affiliate names
-    affiliate_ids = {o.affiliate_id for o in orders}
-    affiliate_map: dict[uuid.UUID, tuple[str, str]] = {}
-    if affiliate_ids:
-        aff_result = await db.execute(
-            select(Affiliate.id, Affiliate.first_name, Affiliate.last_name, Affiliate.affiliate_code).where(
-                Affiliate.id.in_(affiliate_ids)
-            )
-        )
-        for row in aff_result:
-            affiliate_map[row.id] = (f"{row.first_name} {row.last_name}", row.affiliate_code)
-
-    responses = []
-    for o in orders:
-        resp = OrderListResponse.model_validate(o)
-        name, code = affiliate_map.get(o.affiliate_id, ("", ""))
-        resp.affiliate_name = name
-        resp.affiliate_code = code
-        responses.append(resp)
-    return responses
+    rows = (await db.execute(list_orders_query(order_status, skip, limit))).all()
+    return model_response(list[OrderListResponse], rows)
 
 
 @router.get("/{order_id}", response_model=OrderResponse)
@@ -67,15 +65,26 @@ async def get_order(
     db: AsyncSession = Depends(get_db),
 ):
     """Get a single order by ID with its items."""
-    result = await db.execute(
-        select(Order)
-        .options(selectinload(Order.items))
-        .where(Order.id == order_id)
+
+    async def load() -> OrderResponse:
+        result = await db.execute(
+            select(Order)
+            .options(selectinload(Order.items))
+            .where(Order.id == order_id)
+        )
+        order = result.scalar_one_or_none()
+        if order is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
+        return OrderResponse.model_validate(order)
+
+    return await response_cache.cached_response(
+        "orders.detail",
+        params={"order_id": order_id},
+        user=current_user,
+        tags=[f"order:{order_id}"],
+        response_type=OrderResponse,
+        produce=load,
     )
-    order = result.scalar_one_or_none()
-    if order is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Order not found")
-    return OrderResponse.model_validate(order)
 
 
 @router.patch("/{order_id}/confirm-payment", response_model=OrderResponse)
@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import response_cache
 from app.core.deps import require_permission
 from app.db.session import get_db
 from app.models.product import Product
@@ -18,10 +19,21 @@ async def list_products(
     kits_only: bool = Query(default=False, description="Filter to only show enrollment kits"),
 ):
     """List active products. Use kits_only=true to see only enrollment kits."""
-    query = select(Product).where(Product.status == "active")
-    if kits_only:
-        query = query.where(Product.is_kit.is_(True))
-    query = query.order_by(Product.name)
 
-    result = await db.execute(query)
-    return [ProductResponse.model_validate(p) for p in result.scalars().all()]
+    async def load() -> list[ProductResponse]:
+        query = select(Product).where(Product.status == "active")
+        if kits_only:
+            query = query.where(Product.is_kit.is_(True))
+        query = query.order_by(Product.name)
+
+        result = await db.execute(query)
+        return [ProductResponse.model_validate(p) for p in result.scalars().all()]
+
+    return await response_cache.cached_response(
+        "products.list",
+        params={"kits_only": kits_only},
+        user=current_user,
+        tags=["products"],
+        response_type=list[ProductResponse],
+        produce=load,
+    )
@@ -0,0 +1,65 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import status as http_status
+from fastapi.responses import FileResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.deps import require_permission
+from app.db.session import get_db
+from app.models.user import User
+from app.services.periods import current_period, parse_period
+from app.services.snapshots import served_from_snapshot, snapshot_volume_query
+from app.services.volume_report import (
+    MEDIA_TYPES,
+    arrow_available,
+    stored_report_path,
+    volume_report,
+)
+
+router = APIRouter(prefix="/reports", tags=["reports"])
+
+# Captured periods never change; open ones change with every payment, and a
+# closed period is still recomputed from live data until it is captured
+IMMUTABLE = "private, max-age=31536000, immutable"
+
+
+@router.get("/volumes")
+async def get_volume_report(
+    period: str | None = Query(default=None, description="YYYY-MM or YYYY-Www; defaults to the current month"),
+    format: Literal["csv", "arrow"] = Query(default="csv", description="csv or arrow (Arrow IPC stream)"),
+    current_user: User = Depends(require_permission("reports:read")),
+    db: AsyncSession = Depends(get_db),
+):
+    """BV/PV per affiliate and leg for a period, plus the accumulated totals (streamed).
+
+    A closed period with a snapshot is read from it instead of recomputed, and
+    only that report is stored and served as immutable. Its volumes are the
+    period's; status and the BV totals are as of the snapshot's capture.
+    """
+    try:
+        window = parse_period(period) if period else current_period()
+    except ValueError as exc:
+        raise HTTPException(status_code=http_status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc))
+    if format == "arrow" and not arrow_available():
+        raise HTTPException(
+            status_code=http_status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Arrow output requires pyarrow on the server",
+        )
+
+    # Checked first: an archived period answers 410 even if a stored file is left over
+    from_snapshot = await served_from_snapshot(db, window)
+    headers = {
+        "Content-Disposition": f'attachment; filename="volumes-{window.key}.{format}"',
+        "Cache-Control": IMMUTABLE if from_snapshot else "no-store",
+    }
+    if not from_snapshot:
+        return StreamingResponse(volume_report(window, format), media_type=MEDIA_TYPES[format], headers=headers)
+    stored = stored_report_path(window, format)
+    if stored.exists():
+        return FileResponse(stored, media_type=MEDIA_TYPES[format], headers=headers)
+    return StreamingResponse(
+        volume_report(window, format, snapshot_volume_query(window)),
+        media_type=MEDIA_TYPES[format],
+        headers=headers,
+    )
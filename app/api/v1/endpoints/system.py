@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import response_cache
+from app.core.deps import require_permission
+from app.db.session import get_db
+from app.models.user import User
+from app.services.integrity import DEFAULT_LIMIT, run_integrity_check
+from app.services.outbox import outbox_backlog
+
+router = APIRouter(prefix="/system", tags=["system"])
+
+
+@router.get("/cache-stats")
+async def get_cache_stats(
+    current_user: User = Depends(require_permission("system:manage")),
+):
+    """Hit/miss counters of the response cache, per route, since process start."""
+    return {
+        "backend": type(response_cache.backend).__name__,
+        "routes": response_cache.stats(),
+    }
+
+
+@router.get("/integrity")
+async def get_integrity_report(
+    limit: int = Query(default=DEFAULT_LIMIT, ge=1, le=10_000),
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Full-network genealogy integrity report (cycles, side conflicts, orphans)."""
+    return await run_integrity_check(db, limit)
+
+
+@router.get("/outbox")
+async def get_outbox_backlog(
+    current_user: User = Depends(require_permission("system:manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """Outbox backlog: pending and parked events, consumer lag, last-minute throughput."""
+    return await outbox_backlog(db, settings.OUTBOX_MAX_ATTEMPTS)
@@ -4,6 +4,7 @@ from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import invalidate_on_commit
 from app.core.deps import require_permission
 from app.core.security import hash_password
 from app.db.session import get_db
@@ -207,6 +208,9 @@ async def update_user(
             )
         )
 
+    # Cached affiliate details embed the creator's name
+    invalidate_on_commit(f"user:{user.id}", "users")
+
     await db.commit()
     await db.refresh(user, ["roles"])
 
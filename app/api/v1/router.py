@@ -1,6 +1,17 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import affiliates, auth, orders, products, users
+from app.api.v1.endpoints import (
+    affiliates,
+    auth,
+    dashboard,
+    jobs,
+    liquidations,
+    orders,
+    products,
+    reports,
+    system,
+    users,
+)
 
 api_router = APIRouter(prefix="/api/v1")
 api_router.include_router(auth.router)
@@ -8,3 +19,8 @@ api_router.include_router(users.router)
 api_router.include_router(affiliates.router)
 api_router.include_router(products.router)
 api_router.include_router(orders.router)
+api_router.include_router(system.router)
+api_router.include_router(dashboard.router)
+api_router.include_router(reports.router)
+api_router.include_router(liquidations.router)
+api_router.include_router(jobs.router)
@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from pydantic_settings import BaseSettings
 
 
@@ -11,10 +13,76 @@ class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
     DATABASE_URL_SYNC: str
+    # Per process: a server with N workers holds up to N x (size + overflow) connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Serving (python -m app.serve)
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_WORKERS: int = 0  # 0 = one per CPU
+    WEB_GRACEFUL_TIMEOUT: int = 30  # seconds a stopping worker gets to finish in-flight requests
+    WEB_KEEPALIVE: int = 5
+    WEB_MAX_REQUESTS: int = 0  # recycle a worker after this many requests; 0 = never
+    WEB_WARMUP_CONNECTIONS: int = 2  # DB connections each worker opens before taking traffic
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
 
+    # Response cache
+    CACHE_ENABLED: bool = True
+    CACHE_BACKEND: str = "redis"  # "redis" or "memory" (single process / tests)
+    CACHE_DEFAULT_TTL: int = 60
+    CACHE_ROUTE_TTLS: dict[str, int] = {}  # e.g. {"affiliates.tree": 15}
+    GROUP_VOLUME_MEMO_TTL: int = 86400  # closed periods' group volume, per affiliate
+
+    # Coalesce identical tree builds across workers through a Redis lock
+    TREE_SINGLEFLIGHT_DISTRIBUTED: bool = False
+
+    # Business day boundaries for dashboards and reports
+    REPORTING_TIMEZONE: str = "America/El_Salvador"
+    # Closed-period report files are written here once and served from disk after
+    REPORTS_DIR: str = "var/reports"
+
+    # Rank table override: [{"name": "bronze", "min_pv": 100, "min_weak_leg_bv": 500,
+    # "min_active_legs": 2, "min_active_directs": 2}, ...] in ascending order.
+    # Empty uses app.services.ranks.DEFAULT_RANK_TABLE.
+    RANK_TABLE: list[dict] = []
+    RANK_EVAL_BATCH: int = 500  # dirty affiliates per transaction
+    RANK_WORKERS: int = 0  # processes for the full pass; 0 = one per CPU
+
+    # Direct sponsorship bonus (flujos.md §8): sponsor earns total_bv x rate
+    DIRECT_SPONSORSHIP_RATE: Decimal = Decimal("0.20")
+    DIRECT_SPONSORSHIP_MIN_PV: Decimal = Decimal("0")  # sponsor's own PV in the period
+
+    # Unilevel bonus (python -m app.jobs.unilevel_bonus): rate per sponsor generation,
+    # first generation first. Ranks listed in the depth map are paid that many
+    # generations; others get all of them.
+    UNILEVEL_RATES: list[Decimal] = [
+        Decimal("0.05"), Decimal("0.04"), Decimal("0.03"), Decimal("0.02"), Decimal("0.01")
+    ]
+    UNILEVEL_DEPTH_BY_RANK: dict[str, int] = {}
+    UNILEVEL_MIN_PV: Decimal = Decimal("0")  # earner's own PV in the period
+
+    # Outbox worker (python -m app.jobs.outbox)
+    OUTBOX_BATCH_SIZE: int = 200
+    OUTBOX_POLL_INTERVAL: float = 1.0  # seconds to sleep when the outbox is empty
+    OUTBOX_MAX_ATTEMPTS: int = 5  # failing events are parked after this many tries
+    OUTBOX_RETRY_BACKOFF: float = 30.0  # seconds before the first retry, doubled for each one after
+
+    # Background jobs (python -m app.worker)
+    JOB_POLL_INTERVAL: float = 2.0  # seconds to sleep when no job is waiting
+    JOB_STALE_AFTER: int = 300  # default visibility timeout: seconds without a heartbeat before another worker resumes a job
+    JOB_QUEUES: dict[str, int] = {"default": 2, "reports": 2, "engines": 1}  # queue -> concurrent jobs per worker
+    JOB_PROCESSES: int = 0  # process pool for CPU-bound kinds; 0 = one per CPU
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BACKOFF: float = 30.0  # seconds before the first retry, doubled for each one after
+    JOB_WAKEUP: str = "poll"  # "poll", or "redis" to wake idle workers as soon as a job is enqueued
+    LIQUIDATION_CHUNK_SIZE: int = 1000  # affiliates per pre-liquidation report chunk
+
+    # Tree compression job (python -m app.jobs.compress_tree)
+    COMPRESSION_RULE: str = "left_first"  # "left_first" or "stronger_leg"
+    COMPRESSION_CHUNK_SIZE: int = 200  # removed nodes per transaction
+
     # Security
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
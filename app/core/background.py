@@ -0,0 +1,38 @@
+"""
+Fire-and-forget work started while serving a request (after-commit hooks and
+the like). Tasks are tracked so a stopping worker can wait for them instead of
+dropping them with its event loop.
+"""
+
+import asyncio
+import logging
+from collections.abc import Coroutine
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro: Coroutine[Any, Any, Any]) -> asyncio.Task:
+    task = asyncio.get_running_loop().create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def pending() -> int:
+    return len(_tasks)
+
+
+async def drain(timeout: float) -> int:
+    """Wait up to `timeout` seconds for spawned tasks; cancel the rest. Returns how many were cancelled."""
+    if not _tasks:
+        return 0
+    _, unfinished = await asyncio.wait(set(_tasks), timeout=timeout)
+    if unfinished:
+        logger.warning("Cancelling %d background tasks at shutdown", len(unfinished))
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+    return len(unfinished)
@@ -0,0 +1,334 @@
+"""
+Response cache for read endpoints.
+
+Serialized JSON responses are stored in Redis (or an in-process dict in dev/tests)
+under a key built from the route, its parameters, the caller's permission scope
+and the current version of every tag the entry depends on. Invalidating a tag
+just bumps its version counter, so stale entries become unreachable and expire
+on their own TTL — no key scans needed.
+
+Writes never invalidate directly: services call `invalidate_on_commit()` and
+`get_db` bumps the collected tags once the transaction has committed, so a
+concurrent reader can't re-cache pre-commit data.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Awaitable, Callable, Iterable
+from contextvars import ContextVar
+from typing import Any, Protocol
+
+from fastapi import Response
+
+from app.config import settings
+from app.core.responses import adapter_for
+
+logger = logging.getLogger(__name__)
+
+# Default TTL (seconds) per cached route; override with settings.CACHE_ROUTE_TTLS
+ROUTE_TTLS: dict[str, int] = {
+    "affiliates.tree": 30,
+    "affiliates.detail": 120,
+    "products.list": 300,
+    "orders.detail": 60,
+    "affiliates.frontier": 30,
+    "affiliates.upline": 60,
+    "affiliates.sponsor_tree": 60,
+    "dashboard": 60,
+}
+
+# Tag version keys outlive any entry so a reset counter can't resurrect old entries
+TAG_VERSION_TTL = 7 * 24 * 3600
+
+# Stampede protection: how long a rebuild lock is held and how often waiters poll
+LOCK_TTL_MS = 5000
+LOCK_POLL_INTERVAL = 0.05
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]: ...
+
+    async def set(self, key: str, value: bytes, ttl: int | None) -> None: ...
+
+    async def add(self, key: str, value: bytes, ttl_ms: int) -> bool: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def incr(self, key: str, ttl: int) -> int: ...
+
+
+class InMemoryBackend:
+    """Process-local LRU backend. Good enough for dev, tests and a single worker."""
+
+    def __init__(self, max_entries: int = 10_000):
+        self._data: OrderedDict[str, tuple[bytes, float | None]] = OrderedDict()
+        self._max_entries = max_entries
+
+    def _live(self, key: str) -> bytes | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    async def get(self, key: str) -> bytes | None:
+        return self._live(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        return [self._live(k) for k in keys]
+
+    async def set(self, key: str, value: bytes, ttl: int | None) -> None:
+        expires_at = time.monotonic() + ttl if ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_entries:
+            self._data.popitem(last=False)
+
+    async def add(self, key: str, value: bytes, ttl_ms: int) -> bool:
+        if self._live(key) is not None:
+            return False
+        await self.set(key, value, max(1, ttl_ms // 1000))
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def incr(self, key: str, ttl: int) -> int:
+        current = int(self._live(key) or 0) + 1
+        await self.set(key, str(current).encode(), ttl)
+        return current
+
+
+class RedisBackend:
+    """Redis backend using the shared settings.REDIS_URL connection pool."""
+
+    def __init__(self, url: str):
+        from redis import asyncio as aioredis
+
+        self._redis = aioredis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def mget(self, keys: list[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        return await self._redis.mget(keys)
+
+    async def set(self, key: str, value: bytes, ttl: int | None) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def add(self, key: str, value: bytes, ttl_ms: int) -> bool:
+        return bool(await self._redis.set(key, value, nx=True, px=ttl_ms))
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def incr(self, key: str, ttl: int) -> int:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.incr(key)
+            pipe.expire(key, ttl)
+            version, _ = await pipe.execute()
+        return int(version)
+
+
+def create_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "memory":
+        return InMemoryBackend()
+    return RedisBackend(settings.REDIS_URL)
+
+
+def permission_scope(user: Any) -> str:
+    """Short fingerprint of what the caller is allowed to see.
+
+    Two users with the same permission set share cache entries; a superadmin
+    gets its own scope.
+    """
+    if user.is_superadmin:
+        return "su"
+    perms = ",".join(sorted(user.permissions))
+    return hashlib.sha1(perms.encode()).hexdigest()[:12]
+
+
+class ResponseCache:
+    """Tag-versioned response cache with per-route TTLs and hit/miss counters."""
+
+    def __init__(self, backend: CacheBackend | None = None):
+        self._backend = backend
+        self._local_locks: dict[str, asyncio.Lock] = {}
+        self._stats: dict[str, dict[str, int]] = defaultdict(
+            lambda: {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+        )
+
+    @property
+    def backend(self) -> CacheBackend:
+        if self._backend is None:
+            self._backend = create_backend()
+        return self._backend
+
+    def use_backend(self, backend: CacheBackend) -> None:
+        """Swap the backend (tests, or after fork in a new worker). Resets counters."""
+        self._backend = backend
+        self._local_locks.clear()
+        self._stats.clear()
+
+    async def warm_up(self) -> None:
+        """Connect to the backend before the first request needs it."""
+        try:
+            await self.tag_versions(["tree", "users"])
+        except Exception:
+            logger.warning("Cache warm-up failed", exc_info=True)
+
+    def ttl_for(self, route: str) -> int:
+        return settings.CACHE_ROUTE_TTLS.get(
+            route, ROUTE_TTLS.get(route, settings.CACHE_DEFAULT_TTL)
+        )
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        return {route: dict(counters) for route, counters in self._stats.items()}
+
+    async def tag_versions(self, tags: Iterable[str]) -> list[int]:
+        tags = list(tags)
+        raw = await self.backend.mget([f"tagv:{t}" for t in tags])
+        return [int(v) if v is not None else 0 for v in raw]
+
+    async def invalidate(self, *tags: str) -> None:
+        """Bump the version of each tag, orphaning every entry that depends on it."""
+        for tag in set(tags):
+            try:
+                await self.backend.incr(f"tagv:{tag}", TAG_VERSION_TTL)
+            except Exception:
+                logger.warning("Cache invalidation failed for tag %s", tag, exc_info=True)
+
+    async def _build_key(
+        self, route: str, params: dict[str, Any], scope: str, tags: list[str]
+    ) -> str:
+        versions = await self.tag_versions(tags)
+        material = json.dumps(
+            {"p": params, "s": scope, "v": dict(zip(tags, versions))},
+            sort_keys=True,
+            default=str,
+        )
+        return f"rc:{route}:{hashlib.sha1(material.encode()).hexdigest()}"
+
+    async def cached_response(
+        self,
+        route: str,
+        *,
+        params: dict[str, Any],
+        user: Any,
+        tags: list[str],
+        response_type: Any,
+        produce: Callable[[], Awaitable[Any]],
+    ) -> Response:
+        """Serve `route` from cache, or run `produce()` once and cache its JSON.
+
+        `response_type` is the handler's response model (e.g. `list[ProductResponse]`)
+        and is used to serialize the produced value. Exceptions raised by
+        `produce()` (404s, etc.) propagate and are never cached.
+        """
+        adapter = adapter_for(response_type)
+        if not settings.CACHE_ENABLED:
+            return _json_response(adapter.dump_json(await produce()), "BYPASS")
+
+        counters = self._stats[route]
+        try:
+            key = await self._build_key(route, params, permission_scope(user), tags)
+            body = await self.backend.get(key)
+        except Exception:
+            logger.warning("Cache lookup failed for %s", route, exc_info=True)
+            counters["errors"] += 1
+            return _json_response(adapter.dump_json(await produce()), "BYPASS")
+
+        if body is not None:
+            counters["hits"] += 1
+            return _json_response(body, "HIT")
+
+        # Stampede protection: one producer per key in this process, and one
+        # across processes via a short-lived lock key; everyone else waits for it.
+        lock = self._local_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            body = await self.backend.get(key)
+            if body is not None:
+                counters["coalesced"] += 1
+                return _json_response(body, "HIT")
+
+            lock_key = f"lock:{key}"
+            # Only the holder releases the lock; a waiter that timed out produces without it
+            locked = await self.backend.add(lock_key, b"1", LOCK_TTL_MS)
+            if not locked:
+                body = await self._wait_for(key)
+                if body is not None:
+                    counters["coalesced"] += 1
+                    return _json_response(body, "HIT")
+
+            counters["misses"] += 1
+            try:
+                body = adapter.dump_json(await produce())
+                await self.backend.set(key, body, self.ttl_for(route))
+            finally:
+                if locked:
+                    await self.backend.delete(lock_key)
+                self._local_locks.pop(key, None)
+        return _json_response(body, "MISS")
+
+    async def _wait_for(self, key: str) -> bytes | None:
+        deadline = time.monotonic() + LOCK_TTL_MS / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LOCK_POLL_INTERVAL)
+            body = await self.backend.get(key)
+            if body is not None:
+                return body
+        return None
+
+
+def _json_response(body: bytes, status: str) -> Response:
+    return Response(
+        content=body, media_type="application/json", headers={"X-Cache": status}
+    )
+
+
+def with_etag(request_headers: Any, response: Response) -> Response:
+    """Attach a content-hash ETag; answer 304 when the client already has it."""
+    etag = f'"{hashlib.sha1(response.body).hexdigest()}"'
+    if_none_match = request_headers.get("if-none-match", "")
+    if etag in {tag.strip() for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+    return response
+
+
+response_cache = ResponseCache()
+
+
+# --- Commit-time invalidation ---
+
+_pending_tags: ContextVar[set[str] | None] = ContextVar("pending_cache_tags", default=None)
+
+
+def begin_invalidation_scope() -> set[str]:
+    """Start collecting tags for the current request; returns the live set."""
+    tags: set[str] = set()
+    _pending_tags.set(tags)
+    return tags
+
+
+def invalidate_on_commit(*tags: str) -> None:
+    """Mark tags stale once the current request's transaction commits.
+
+    Outside a request (scripts, jobs) there is no scope; callers there should
+    `await response_cache.invalidate(...)` themselves after committing.
+    """
+    pending = _pending_tags.get()
+    if pending is not None:
+        pending.update(tags)
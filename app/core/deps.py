@@ -7,6 +7,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.security import decode_token
 from app.db.session import get_db
+from app.models.affiliate import Affiliate
 from app.models.user import User
 
 bearer_scheme = HTTPBearer()
@@ -60,3 +61,32 @@ def require_permission(codename: str):
         return current_user
 
     return checker
+
+
+async def get_network_scope(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> uuid.UUID | None:
+    """Affiliate id the caller's genealogy views are limited to, or None for staff.
+
+    Distributors (distributor role, no affiliates:update permission) may only
+    see their own position and what hangs below it.
+    """
+    if current_user.has_permission("affiliates:update"):
+        return None
+    if not any(role.name == "distributor" for role in current_user.roles):
+        return None
+
+    result = await db.execute(
+        select(Affiliate.id).where(
+            Affiliate.user_id == current_user.id,
+            Affiliate.deleted_at.is_(None),
+        )
+    )
+    affiliate_id = result.scalar_one_or_none()
+    if affiliate_id is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No affiliate profile linked to this user",
+        )
+    return affiliate_id
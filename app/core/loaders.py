@@ -0,0 +1,144 @@
+"""
+Request-scoped batched lookups (DataLoader).
+
+Handlers and services that need "the user / affiliate / product with this
+id" ask the request's loaders instead of writing their own query or batch
+helper:
+
+    creator = await loaders.users.load(affiliate.created_by_user_id)
+
+Keys requested in the same event-loop tick, from any number of coroutines
+(e.g. under `asyncio.gather`), are resolved together with one
+`WHERE id IN (...)` query per entity type. Every key is memoized for the
+rest of the request, so asking again costs nothing, and objects the session
+already holds (loaded earlier in the request) are served from its identity
+map without a query.
+
+The loaders share the request's AsyncSession, which runs one statement at a
+time: their queries are serialized on a lock, and a handler must not run its
+own queries concurrently with pending loads.
+"""
+
+import asyncio
+import uuid
+from collections.abc import Awaitable, Callable, Hashable, Iterable, Mapping
+from typing import Any, Generic, TypeVar
+
+from fastapi import Depends
+from sqlalchemy import inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.util import identity_key
+
+from app.db.session import get_db
+from app.models.affiliate import Affiliate
+from app.models.product import Product
+from app.models.user import User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Coalesce `load(key)` calls made in the same tick into one batch call.
+
+    `batch(keys)` receives the distinct keys not seen before and returns a
+    mapping of the ones it found; missing keys load as None.
+    """
+
+    def __init__(self, batch: Callable[[list[K]], Awaitable[Mapping[K, V]]]) -> None:
+        self._batch = batch
+        self._memo: dict[K, asyncio.Future[V | None]] = {}
+        self._queue: list[K] = []
+        self._dispatches: set[asyncio.Task] = set()
+
+    async def load(self, key: K) -> V | None:
+        future = self._memo.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._memo[key] = loop.create_future()
+            # Silence "exception never retrieved" when every waiter went away
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            if not self._queue:
+                # Runs after the coroutines already scheduled for this tick
+                # have had the chance to queue their keys too
+                loop.call_soon(self._dispatch)
+            self._queue.append(key)
+        # A cancelled waiter must not cancel the result other waiters share
+        return await asyncio.shield(future)
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        return list(await asyncio.gather(*(self.load(key) for key in keys)))
+
+    def prime(self, key: K, value: V) -> None:
+        """Memoize a value the caller already has, unless the key is already loaded or loading."""
+        if key not in self._memo:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            self._memo[key] = future
+
+    def clear(self, key: K) -> None:
+        """Forget a memoized key, e.g. after the row was changed."""
+        future = self._memo.get(key)
+        if future is not None and future.done():
+            del self._memo[key]
+
+    def _dispatch(self) -> None:
+        keys, self._queue = self._queue, []
+        task = asyncio.ensure_future(self._resolve(keys))
+        self._dispatches.add(task)
+        task.add_done_callback(self._dispatches.discard)
+
+    async def _resolve(self, keys: list[K]) -> None:
+        futures = [self._memo[key] for key in keys]
+        try:
+            found = await self._batch(keys)
+        except BaseException as exc:
+            # Not memoized: a later load retries
+            for key, future in zip(keys, futures):
+                if self._memo.get(key) is future:
+                    del self._memo[key]
+                if not future.done():
+                    if isinstance(exc, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        for key, future in zip(keys, futures):
+            if not future.done():
+                future.set_result(found.get(key))
+
+
+class Loaders:
+    """The request's loaders by entity type, all on the request's session."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self._db = db
+        self._lock = asyncio.Lock()
+        self.users: DataLoader[uuid.UUID, User] = DataLoader(self._by_id(User))
+        self.affiliates: DataLoader[uuid.UUID, Affiliate] = DataLoader(self._by_id(Affiliate))
+        self.products: DataLoader[uuid.UUID, Product] = DataLoader(self._by_id(Product))
+
+    def _by_id(self, model: Any) -> Callable[[list[uuid.UUID]], Awaitable[dict[uuid.UUID, Any]]]:
+        async def batch(ids: list[uuid.UUID]) -> dict[uuid.UUID, Any]:
+            found: dict[uuid.UUID, Any] = {}
+            missing = []
+            for id_ in ids:
+                obj = self._db.identity_map.get(identity_key(model, id_))
+                if obj is not None and not inspect(obj).expired_attributes:
+                    found[id_] = obj
+                else:
+                    missing.append(id_)
+            if missing:
+                async with self._lock:
+                    result = await self._db.execute(select(model).where(model.id.in_(missing)))
+                found.update((obj.id, obj) for obj in result.scalars())
+            return found
+
+        return batch
+
+
+async def get_loaders(db: AsyncSession = Depends(get_db)) -> Loaders:
+    """FastAPI dependency: one Loaders per request, bound to the request's session."""
+    return Loaders(db)
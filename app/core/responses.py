@@ -0,0 +1,54 @@
+"""
+JSON rendering.
+
+ORJSONResponse is the app's default response class. orjson renders several
+times faster than the stdlib encoder and handles UUID and datetime natively;
+Decimal goes through `default` as a string, which is how pydantic writes it,
+so the output is byte-for-byte what clients already get.
+
+`model_response` is the fast path for handlers that build many items (list
+endpoints): the value is validated once against the response type and
+pydantic-core writes the JSON bytes directly, skipping FastAPI's second
+validation and re-encoding of the returned objects. Keep `response_model` on
+the route for the OpenAPI schema.
+"""
+
+from decimal import Decimal
+from functools import cache
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, TypeAdapter
+
+
+@cache
+def adapter_for(response_type: Any) -> TypeAdapter:
+    """One TypeAdapter per response type; building one compiles a validator and serializer."""
+    return TypeAdapter(response_type)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def model_response(response_type: Any, value: Any, status_code: int = 200) -> Response:
+    """Validate `value` (models, ORM objects, rows or dicts) as `response_type` and render it."""
+    adapter = adapter_for(response_type)
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return Response(content=body, status_code=status_code, media_type="application/json")
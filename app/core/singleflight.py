@@ -0,0 +1,128 @@
+"""
+Single-flight call coalescing.
+
+Concurrent callers asking for the same key share one in-flight computation
+instead of each running it. `SingleFlight` coalesces within one process;
+`DistributedSingleFlight` additionally takes a short lock in the cache backend
+so only one worker process computes while the others wait for its result.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+from app.core.cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Deduplicate concurrent calls with the same key inside this process."""
+
+    def __init__(self) -> None:
+        self._inflight: dict[Hashable, asyncio.Future[T]] = {}
+
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        while True:
+            existing = self._inflight.get(key)
+            if existing is None:
+                break
+            try:
+                return await asyncio.shield(existing)
+            except asyncio.CancelledError:
+                # The leader was cancelled (client went away), not us: take over
+                if existing.cancelled():
+                    continue
+                raise
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        # Silence "exception never retrieved" when nobody else was waiting
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._inflight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+
+class DistributedSingleFlight(SingleFlight[T]):
+    """Single-flight across worker processes through a lock in the cache backend.
+
+    The process that wins the lock computes and publishes the serialized result
+    for `result_ttl` seconds; the others poll for it. If the leader dies, its
+    lock expires and a waiter computes instead.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        dumps: Callable[[T], bytes],
+        loads: Callable[[bytes], T],
+        lock_ttl_ms: int = 10_000,
+        result_ttl: int = 5,
+        poll_interval: float = 0.05,
+    ) -> None:
+        super().__init__()
+        self._namespace = namespace
+        self._dumps = dumps
+        self._loads = loads
+        self._lock_ttl_ms = lock_ttl_ms
+        self._result_ttl = result_ttl
+        self._poll_interval = poll_interval
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        return await super().do(key, lambda: self._across_workers(key, fn))
+
+    async def _across_workers(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        backend = response_cache.backend
+        base = f"sf:{self._namespace}:{_key_repr(key)}"
+        lock_key, result_key = f"{base}:lock", f"{base}:result"
+        try:
+            cached = await backend.get(result_key)
+            if cached is not None:
+                return self._loads(cached)
+            leader = await backend.add(lock_key, b"1", self._lock_ttl_ms)
+        except Exception:
+            logger.warning("Single-flight backend unavailable, computing locally", exc_info=True)
+            return await fn()
+
+        if not leader:
+            deadline = time.monotonic() + self._lock_ttl_ms / 1000
+            while time.monotonic() < deadline:
+                await asyncio.sleep(self._poll_interval)
+                cached = await backend.get(result_key)
+                if cached is not None:
+                    return self._loads(cached)
+                if await backend.get(lock_key) is None:
+                    break
+            return await fn()
+
+        try:
+            result = await fn()
+            await backend.set(result_key, self._dumps(result), self._result_ttl)
+            return result
+        finally:
+            await backend.delete(lock_key)
+
+
+def _key_repr(key: Any) -> str:
+    if isinstance(key, tuple):
+        return ":".join(str(part) for part in key)
+    return str(key)
@@ -52,6 +52,12 @@ PERMISSIONS = [
     {"codename": "roles:manage", "resource": "roles", "action": "manage", "description": "Manage role assignments"},
     # Audit
     {"codename": "audit:read", "resource": "audit", "action": "read", "description": "View audit logs"},
+    # Reports
+    {"codename": "reports:read", "resource": "reports", "action": "read", "description": "View dashboards and reports"},
+    # Liquidations
+    {"codename": "liquidations:manage", "resource": "liquidations", "action": "manage", "description": "Run pre-liquidation and liquidation reports"},
+    # System
+    {"codename": "system:manage", "resource": "system", "action": "manage", "description": "View system metrics and run maintenance"},
 ]
 
 # super_admin gets ALL permissions (users:*, affiliates:*, orders:*, etc.)
@@ -66,6 +72,8 @@ ROLE_PERMISSIONS = {
         "products:read", "products:create", "products:update",
         "roles:read",
         "audit:read",
+        "reports:read",
+        "liquidations:manage",
     ],
     "distributor": [
         "affiliates:read",
@@ -1,9 +1,16 @@
+import asyncio
+import logging
+import os
 import ssl as _ssl
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import settings
+from app.core.cache import begin_invalidation_scope, response_cache
+
+logger = logging.getLogger(__name__)
 
 
 def _clean_url(url: str) -> str:
@@ -14,24 +21,72 @@ def _clean_url(url: str) -> str:
 # Neon requires SSL; asyncpg needs it via connect_args, not query string
 _ssl_ctx = _ssl.create_default_context()
 
-engine = create_async_engine(
-    _clean_url(settings.DATABASE_URL),
-    echo=settings.DEBUG,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={"ssl": _ssl_ctx},
-)
 
-async_session_factory = async_sessionmaker(
-    engine, class_=AsyncSession, expire_on_commit=False
-)
+def make_engine(pool_size: int | None = None, max_overflow: int | None = None) -> AsyncEngine:
+    """A new engine with its own pool. Connections can't cross a process boundary,
+    so each process (job runner children included) builds its own."""
+    return create_async_engine(
+        _clean_url(settings.DATABASE_URL),
+        echo=settings.DEBUG,
+        pool_size=settings.DB_POOL_SIZE if pool_size is None else pool_size,
+        max_overflow=settings.DB_MAX_OVERFLOW if max_overflow is None else max_overflow,
+        connect_args={"ssl": _ssl_ctx},
+    )
+
+
+def make_session_factory(bind: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind, class_=AsyncSession, expire_on_commit=False)
+
+
+engine = make_engine()
+
+async_session_factory = make_session_factory(engine)
+
+
+def _rebind_after_fork() -> None:
+    """A forked child (preloaded server workers, process pools) gets an engine of its own.
+
+    The inherited pool is forgotten without closing it, since its sockets are
+    still the parent's; the shared session factory is pointed at the new engine.
+    """
+    global engine
+    engine.sync_engine.dispose(close=False)
+    engine = make_engine()
+    async_session_factory.configure(bind=engine)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_rebind_after_fork)
+
+
+async def warm_pool(connections: int) -> None:
+    """Open `connections` pooled connections up front so the first requests don't pay for them."""
+    if connections <= 0:
+        return
+
+    async def touch() -> None:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*(touch() for _ in range(connections)))
+    except Exception:
+        logger.warning("Database warm-up failed; connections will open on demand", exc_info=True)
+
+
+async def dispose_engine() -> None:
+    await engine.dispose()
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_factory() as session:
+        stale_tags = begin_invalidation_scope()
         try:
             yield session
             await session.commit()
         except Exception:
             await session.rollback()
             raise
+        # Only after a successful commit, so readers can't re-cache old rows
+        if stale_tags:
+            await response_cache.invalidate(*stale_tags)
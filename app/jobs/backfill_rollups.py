@@ -0,0 +1,182 @@
+"""
+Rollup backfill: rebuild daily_sales_rollup and daily_network_rollup from
+affiliates, orders and the audit log.
+
+The request path keeps the rollups current incrementally; run this once after
+the migration that creates them, and again for a range of days whenever they
+are suspected to be off. Days from --since onwards are deleted and rebuilt
+with a handful of GROUP BY queries, in one transaction.
+
+Orders count on the day they were paid and only while they stay in a
+credited status, so a rebuild drops orders cancelled or returned after payment.
+
+Usage:
+    python -m app.jobs.backfill_rollups                      # all history
+    python -m app.jobs.backfill_rollups --since 2026-01-01   # rebuild from a day on
+"""
+
+import argparse
+import asyncio
+import json
+from collections import defaultdict
+from datetime import date
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.db.session import async_session_factory
+from app.models.affiliate import Affiliate
+from app.models.audit_log import AuditLog
+from app.models.order import Order, OrderItem
+from app.models.rollup import DailyNetworkRollup, DailySalesRollup
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.rollups import NETWORK_COUNTERS, business_day_sql, status_deltas
+
+INSERT_CHUNK = 5_000
+
+
+def _since(stmt, day_column, since: date | None):
+    return stmt if since is None else stmt.where(day_column >= since)
+
+
+async def network_rows(db: AsyncSession, since: date | None) -> list[dict[str, Any]]:
+    """Daily network deltas per country, aggregated in the database."""
+    rows: dict[tuple[date, str], dict[str, Any]] = defaultdict(
+        lambda: {name: 0 for name in NETWORK_COUNTERS}
+    )
+
+    enrolled_day = business_day_sql(Affiliate.enrolled_at)
+    stmt = select(enrolled_day, Affiliate.country_code, func.count()).group_by(
+        enrolled_day, Affiliate.country_code
+    )
+    for day, country, count in await db.execute(_since(stmt, enrolled_day, since)):
+        rows[day, country]["enrollments"] += count
+
+    deleted_day = business_day_sql(Affiliate.deleted_at)
+    stmt = (
+        select(
+            deleted_day,
+            Affiliate.country_code,
+            func.count(),
+            func.count().filter(Affiliate.status == "active"),
+            func.count().filter(Affiliate.status == "inactive"),
+        )
+        .where(Affiliate.deleted_at.isnot(None))
+        .group_by(deleted_day, Affiliate.country_code)
+    )
+    for day, country, removed, active, inactive in await db.execute(_since(stmt, deleted_day, since)):
+        rows[day, country]["removals"] += removed
+        rows[day, country]["deactivations"] += active
+        rows[day, country]["inactive_exits"] += inactive
+
+    # Affiliates become active when their enrollment order is paid
+    paid_day = business_day_sql(Order.paid_at)
+    stmt = (
+        select(paid_day, Affiliate.country_code, func.count(Order.affiliate_id.distinct()))
+        .join(Affiliate, Affiliate.id == Order.affiliate_id)
+        .where(Order.order_type == "enrollment", Order.paid_at.isnot(None))
+        .group_by(paid_day, Affiliate.country_code)
+    )
+    for day, country, count in await db.execute(_since(stmt, paid_day, since)):
+        rows[day, country]["activations"] += count
+
+    # ...and change status afterwards only through the status endpoint
+    change_day = business_day_sql(AuditLog.created_at)
+    old_status = AuditLog.old_values["status"].astext
+    new_status = AuditLog.new_values["status"].astext
+    stmt = (
+        select(change_day, Affiliate.country_code, old_status, new_status, func.count())
+        .join(Affiliate, Affiliate.id == AuditLog.resource_id)
+        .where(AuditLog.action == "affiliate.status_change")
+        .group_by(change_day, Affiliate.country_code, old_status, new_status)
+    )
+    for day, country, old, new, count in await db.execute(_since(stmt, change_day, since)):
+        for name in status_deltas(old, new):
+            rows[day, country][name] += count
+
+    stmt = (
+        select(paid_day, Affiliate.country_code, func.count(), func.sum(Order.total))
+        .join(Affiliate, Affiliate.id == Order.affiliate_id)
+        .where(Order.status.in_(CREDITED_ORDER_STATUSES), Order.paid_at.isnot(None))
+        .group_by(paid_day, Affiliate.country_code)
+    )
+    for day, country, count, total in await db.execute(_since(stmt, paid_day, since)):
+        rows[day, country]["orders_paid"] += count
+        rows[day, country]["sales_total"] += total
+
+    return [{"day": day, "country_code": country, **counters} for (day, country), counters in rows.items()]
+
+
+async def sales_rows(db: AsyncSession, since: date | None) -> list[dict[str, Any]]:
+    paid_day = business_day_sql(Order.paid_at)
+    keys = (paid_day, Affiliate.country_code, Order.order_type, OrderItem.product_id)
+    stmt = (
+        select(
+            *keys,
+            func.count(Order.id.distinct()),
+            func.sum(OrderItem.quantity),
+            func.sum(OrderItem.line_total),
+            func.sum(OrderItem.line_pv),
+            func.sum(OrderItem.line_bv),
+        )
+        .select_from(OrderItem)
+        .join(Order, Order.id == OrderItem.order_id)
+        .join(Affiliate, Affiliate.id == Order.affiliate_id)
+        .where(Order.status.in_(CREDITED_ORDER_STATUSES), Order.paid_at.isnot(None))
+        .group_by(*keys)
+    )
+    return [
+        {
+            "day": day,
+            "country_code": country,
+            "order_type": order_type,
+            "product_id": product_id,
+            "order_count": order_count,
+            "quantity": quantity,
+            "amount": amount,
+            "pv": pv,
+            "bv": bv,
+        }
+        for day, country, order_type, product_id, order_count, quantity, amount, pv, bv in (
+            await db.execute(_since(stmt, paid_day, since))
+        )
+    ]
+
+
+async def replace_rows(db: AsyncSession, model, rows: list[dict[str, Any]], since: date | None) -> None:
+    await db.execute(_since(delete(model), model.day, since))
+    for start in range(0, len(rows), INSERT_CHUNK):
+        await db.execute(insert(model), rows[start : start + INSERT_CHUNK])
+
+
+async def backfill_rollups(db: AsyncSession, since: date | None = None) -> dict[str, Any]:
+    network = await network_rows(db, since)
+    sales = await sales_rows(db, since)
+    await replace_rows(db, DailyNetworkRollup, network, since)
+    await replace_rows(db, DailySalesRollup, sales, since)
+    await db.commit()
+    await response_cache.invalidate("dashboard")
+    return {
+        "since": since.isoformat() if since else None,
+        "network_rows": len(network),
+        "sales_rows": len(sales),
+    }
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--since", type=date.fromisoformat, help="first business day to rebuild (YYYY-MM-DD)"
+    )
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await backfill_rollups(db, args.since)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+"""
+Genealogy integrity check: scan the whole network and print a JSON report of
+cycles, over-full parents, duplicate sides and orphaned children.
+
+Usage:
+    python -m app.jobs.check_integrity [--limit N]
+
+Exits with status 1 when any issue is found, so it can gate scheduled jobs.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from app.db.session import async_session_factory
+from app.services.integrity import DEFAULT_LIMIT, run_integrity_check
+
+
+async def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="entries listed per issue")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await run_integrity_check(db, args.limit)
+
+    print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
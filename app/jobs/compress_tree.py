@@ -0,0 +1,104 @@
+"""
+Tree compression job: promote the children of cancelled and deleted affiliates
+into the positions those affiliates held.
+
+Works in short transactions of --chunk-size removed nodes each, so no lock on
+affiliates is held for long, and it is safe to stop and re-run at any time:
+every chunk re-selects what is still left to compress.
+
+Usage:
+    python -m app.jobs.compress_tree [--rule left_first|stronger_leg] [--chunk-size N] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+from typing import Any
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.cache import response_cache
+from app.db.session import async_session_factory
+from app.services.compression import CompressionRule, compress_node, removed_with_live_children
+from app.services.group_volume import PLACEMENT_TAG
+
+logger = logging.getLogger(__name__)
+
+# Give up on a chunk rather than queue behind live traffic; the next run resumes it
+LOCK_TIMEOUT = "2s"
+
+
+async def compress_chunk(
+    db: AsyncSession, rule: CompressionRule, chunk_size: int
+) -> list[dict[str, Any]]:
+    """Compress up to `chunk_size` removed nodes in the current transaction."""
+    await db.execute(text(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'"))
+    node_ids = list((await db.execute(removed_with_live_children(chunk_size))).scalars())
+    done = []
+    for node_id in node_ids:
+        moved = await compress_node(db, node_id, rule)
+        if moved is not None:
+            done.append(moved)
+    return done
+
+
+async def compress_tree(
+    session_factory: async_sessionmaker,
+    rule: CompressionRule,
+    chunk_size: int,
+) -> dict[str, Any]:
+    compressed = chunks = 0
+    interrupted = False
+    while True:
+        async with session_factory() as db:
+            try:
+                done = await compress_chunk(db, rule, chunk_size)
+                await db.commit()
+            except DBAPIError:
+                logger.warning("Compression chunk failed; re-run to resume", exc_info=True)
+                await db.rollback()
+                interrupted = True
+                break
+        if not done:
+            break
+        chunks += 1
+        compressed += len(done)
+        affected = {a for moved in done for a in moved["affected_ids"]}
+        await response_cache.invalidate("tree", PLACEMENT_TAG, *(f"affiliate:{a}" for a in affected))
+    return {
+        "rule": rule,
+        "compressed": compressed,
+        "chunks": chunks,
+        "complete": not interrupted,
+    }
+
+
+async def count_pending(db: AsyncSession) -> int:
+    pending = removed_with_live_children(limit=None).subquery()
+    return (await db.execute(select(func.count()).select_from(pending))).scalar_one()
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--rule", choices=["left_first", "stronger_leg"], default=settings.COMPRESSION_RULE
+    )
+    parser.add_argument("--chunk-size", type=int, default=settings.COMPRESSION_CHUNK_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="only count nodes to compress")
+    args = parser.parse_args(argv)
+
+    if args.dry_run:
+        async with async_session_factory() as db:
+            report = {"pending": await count_pending(db)}
+    else:
+        report = await compress_tree(async_session_factory, args.rule, args.chunk_size)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,356 @@
+"""
+Rank evaluation: drain the rank_dirty queue, or re-rank the whole network at
+period close.
+
+By default only affiliates whose inputs changed since their last evaluation
+are re-ranked (payments, status changes and moves queue them), --batch of
+them per transaction.
+
+--full loads the network into arrays, sums every node's period leg BV
+bottom-up and ranks everyone. The tree is cut at the first depth that has
+enough subtrees to keep --workers processes busy; each subtree is folded and
+ranked in a worker process, and the few nodes above the cut are finished in
+this process from the subtrees' totals. The queue is left as is: draining it
+afterwards only confirms ranks that are already current.
+
+Usage:
+    python -m app.jobs.evaluate_ranks [--period 2026-03] [--batch N]
+    python -m app.jobs.evaluate_ranks --full [--period 2026-03] [--workers N]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from array import array
+from collections import Counter
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.cache import invalidate_on_commit, response_cache
+from app.db.session import async_session_factory
+from app.jobs.rebuild_volume import load_order_volume
+from app.models.affiliate import Affiliate
+from app.models.background_job import BackgroundJob
+from app.services.background_jobs import period_params
+from app.services.network_snapshot import LEFT, NO_SIDE, NetworkArrays, load_network
+from app.services.periods import Period, current_period, parse_period
+from app.services.ranks import (
+    RankRequirement,
+    apply_ranks,
+    evaluate_dirty,
+    higher_rank,
+    qualify,
+    rank_table,
+)
+
+PARTITIONS_PER_WORKER = 4
+
+RANK_COLUMNS = (
+    Affiliate.current_rank,
+    Affiliate.highest_rank,
+    Affiliate.left_active_count,
+    Affiliate.right_active_count,
+    Affiliate.active_directs_count,
+)
+
+
+def fold_legs(
+    parent: Sequence[int],
+    side: Sequence[int],
+    own_bv: Sequence[int],
+    order: Sequence[int],
+    left: array,
+    right: array,
+    through: array,
+) -> None:
+    """Add each node's subtree BV to its parent's leg, visiting `order` (top-down) in reverse.
+
+    Same rules as rebuild_volume.fold_bv: a child without a side credits
+    neither leg but still reaches the ancestors above.
+    """
+    for i in reversed(order):
+        p = parent[i]
+        if p < 0:
+            continue
+        subtree = own_bv[i] + left[i] + right[i] + through[i]
+        if side[i] == LEFT:
+            left[p] += subtree
+        elif side[i] == NO_SIDE:
+            through[p] += subtree
+        else:
+            right[p] += subtree
+
+
+@dataclass
+class Partition:
+    """One subtree, re-indexed locally (root first, parents before children)."""
+
+    parent: array  # local position, -1 for the root
+    side: array
+    own_pv: array
+    own_bv: array
+    live: bytearray
+    active: bytearray
+    active_legs: array
+    active_directs: array
+
+
+def _zeros(n: int) -> array:
+    return array("q", bytes(8 * n))
+
+
+def evaluate_partition(
+    part: Partition, table: tuple[RankRequirement, ...]
+) -> tuple[array, array, array, array]:
+    """Worker: leg BV and rank level of every node in a subtree (-1 for deleted nodes)."""
+    n = len(part.parent)
+    left, right, through = _zeros(n), _zeros(n), _zeros(n)
+    fold_legs(part.parent, part.side, part.own_bv, range(n), left, right, through)
+    levels = array(
+        "b",
+        (
+            qualify(
+                table,
+                active=bool(part.active[i]),
+                pv=part.own_pv[i],
+                left_bv=left[i],
+                right_bv=right[i],
+                active_legs=part.active_legs[i],
+                active_directs=part.active_directs[i],
+            )
+            if part.live[i]
+            else -1
+            for i in range(n)
+        ),
+    )
+    return left, right, through, levels
+
+
+def cut_tree(net: NetworkArrays, order: array, parts_wanted: int) -> tuple[list[int], list[list[int]]]:
+    """Split `order` into the nodes above the cut and one member list per subtree below it.
+
+    The cut is the shallowest depth with at least `parts_wanted` nodes; if the
+    tree never gets that wide, everything stays above the cut.
+    """
+    depth = _zeros(len(net))
+    for i in order:
+        p = net.parent[i]
+        depth[i] = depth[p] + 1 if p >= 0 else 0
+    width = Counter(depth[i] for i in order)
+    cut = next((d for d in sorted(width) if width[d] >= parts_wanted), None)
+
+    top: list[int] = []
+    members: list[list[int]] = []
+    part_of = array("q", [-1]) * len(net)
+    for i in order:
+        if cut is None or depth[i] < cut:
+            top.append(i)
+        elif depth[i] == cut:
+            part_of[i] = len(members)
+            members.append([i])
+        else:
+            part_of[i] = part_of[net.parent[i]]
+            members[part_of[i]].append(i)
+    return top, members
+
+
+def build_partition(net: NetworkArrays, nodes: list[int], inputs: dict[str, Sequence[int]]) -> Partition:
+    local = {g: k for k, g in enumerate(nodes)}
+    return Partition(
+        parent=array("q", (local[net.parent[g]] if k else -1 for k, g in enumerate(nodes))),
+        side=array("b", (net.side[g] for g in nodes)),
+        own_pv=array("q", (inputs["own_pv"][g] for g in nodes)),
+        own_bv=array("q", (inputs["own_bv"][g] for g in nodes)),
+        live=bytearray(net.live[g] for g in nodes),
+        active=bytearray(net.active[g] for g in nodes),
+        active_legs=array("b", (inputs["active_legs"][g] for g in nodes)),
+        active_directs=array("q", (inputs["active_directs"][g] for g in nodes)),
+    )
+
+
+async def _run_partitions(
+    parts: list[Partition], table: tuple[RankRequirement, ...], workers: int
+) -> list[tuple[array, array, array, array]]:
+    if workers <= 1:
+        return [evaluate_partition(part, table) for part in parts]
+    loop = asyncio.get_running_loop()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return await asyncio.gather(
+            *(loop.run_in_executor(pool, evaluate_partition, part, table) for part in parts)
+        )
+
+
+async def rank_network(
+    net: NetworkArrays,
+    own_pv: array,
+    own_bv: array,
+    table: tuple[RankRequirement, ...],
+    workers: int,
+) -> tuple[array, int]:
+    """Rank level of every node (-1 for deleted), and how many subtrees were farmed out."""
+    n = len(net)
+    inputs = {
+        "own_pv": own_pv,
+        "own_bv": own_bv,
+        "active_legs": [
+            (left > 0) + (right > 0)
+            for left, right in zip(net.extra["left_active_count"], net.extra["right_active_count"])
+        ],
+        "active_directs": net.extra["active_directs_count"],
+    }
+    order = net.top_down_order(live_only=False)
+    top, members = cut_tree(net, order, workers * PARTITIONS_PER_WORKER if workers > 1 else n + 1)
+    results = await _run_partitions(
+        [build_partition(net, nodes, inputs) for nodes in members], table, workers
+    )
+
+    left, right, through = _zeros(n), _zeros(n), _zeros(n)
+    levels = array("b", [-1]) * n
+    for nodes, (part_left, part_right, part_through, part_levels) in zip(members, results):
+        for k, g in enumerate(nodes):
+            left[g], right[g], through[g] = part_left[k], part_right[k], part_through[k]
+            levels[g] = part_levels[k]
+        # Hand the subtree's total to the node above the cut
+        root, p = nodes[0], net.parent[nodes[0]]
+        if p >= 0:
+            subtree = own_bv[root] + part_left[0] + part_right[0] + part_through[0]
+            if net.side[root] == LEFT:
+                left[p] += subtree
+            elif net.side[root] == NO_SIDE:
+                through[p] += subtree
+            else:
+                right[p] += subtree
+
+    fold_legs(net.parent, net.side, own_bv, top, left, right, through)
+    for g in top:
+        if net.live[g]:
+            levels[g] = qualify(
+                table,
+                active=bool(net.active[g]),
+                pv=own_pv[g],
+                left_bv=left[g],
+                right_bv=right[g],
+                active_legs=inputs["active_legs"][g],
+                active_directs=inputs["active_directs"][g],
+            )
+    return levels, len(members)
+
+
+def rank_changes(
+    net: NetworkArrays, levels: array, table: tuple[RankRequirement, ...]
+) -> list[dict[str, Any]]:
+    current, highest = net.extra["current_rank"], net.extra["highest_rank"]
+    changes = []
+    for i, level in enumerate(levels):
+        if level < 0:
+            continue
+        rank = table[level].name
+        best = higher_rank(table, highest[i], rank)
+        if (rank, best) != (current[i], highest[i]):
+            changes.append(
+                {"id": net.ids[i], "current_rank": rank, "highest_rank": best, "previous_rank": current[i]}
+            )
+    return changes
+
+
+async def full_pass(
+    db: AsyncSession, period: Period, *, workers: int, sample: int = 20, commit: bool = True
+) -> dict[str, Any]:
+    """Re-rank the whole network.
+
+    With commit=False the rank updates stay in the caller's transaction (a
+    job step) and the cache tags are invalidated when the runner commits it.
+    """
+    net = await load_network(db, RANK_COLUMNS)
+    own_pv, own_bv = await load_order_volume(db, net, period)
+    table = rank_table()
+    levels, partitions = await rank_network(net, own_pv, own_bv, table, workers)
+    changes = rank_changes(net, levels, table)
+
+    if changes:
+        await apply_ranks(db, changes)
+        tags = ("tree", *(f"affiliate:{c['id']}" for c in changes))
+        if commit:
+            await db.commit()
+            await response_cache.invalidate(*tags)
+        else:
+            invalidate_on_commit(*tags)
+    return {
+        "mode": "full",
+        "period": period.key,
+        "affiliates": sum(net.live),
+        "changed": len(changes),
+        "partitions": partitions,
+        "workers": workers,
+        "sample": [
+            {"affiliate_id": str(c["id"]), "from": c["previous_rank"], "to": c["current_rank"]}
+            for c in changes[:sample]
+        ],
+    }
+
+
+def full_pass_params(params: dict[str, Any]) -> dict[str, Any]:
+    """Job params for full_pass_step: an optional period and a positive worker count."""
+    workers = params.get("workers", 1)
+    if isinstance(workers, bool) or not isinstance(workers, int) or workers < 1:
+        raise ValueError("params.workers must be a positive integer")
+    return period_params(params, required=False)
+
+
+async def full_pass_step(db: AsyncSession, job: BackgroundJob) -> bool:
+    """--full as a single chunk of a background job (python -m app.worker)."""
+    period = parse_period(job.params["period"]) if "period" in job.params else current_period()
+    job.result = await full_pass(db, period, workers=int(job.params.get("workers", 1)), commit=False)
+    return True
+
+
+async def drain_queue(
+    session_factory: async_sessionmaker, period: Period, batch: int
+) -> dict[str, Any]:
+    evaluated = changed = batches = 0
+    while True:
+        async with session_factory() as db:
+            claimed, changes = await evaluate_dirty(db, period, batch)
+            await db.commit()
+        if not claimed:
+            break
+        batches += 1
+        evaluated += claimed
+        changed += len(changes)
+        if changes:
+            await response_cache.invalidate("tree", *(f"affiliate:{c['id']}" for c in changes))
+    return {
+        "mode": "queue",
+        "period": period.key,
+        "evaluated": evaluated,
+        "changed": changed,
+        "batches": batches,
+    }
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--full", action="store_true", help="re-rank the whole network")
+    parser.add_argument("--period", type=parse_period, help="YYYY-MM or YYYY-Www (default: current month)")
+    parser.add_argument("--batch", type=int, default=settings.RANK_EVAL_BATCH)
+    parser.add_argument("--workers", type=int, default=settings.RANK_WORKERS or os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+    period = args.period or current_period()
+
+    if args.full:
+        async with async_session_factory() as db:
+            report = await full_pass(db, period, workers=args.workers)
+    else:
+        report = await drain_queue(async_session_factory, period, args.batch)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
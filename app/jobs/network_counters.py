@@ -0,0 +1,114 @@
+"""
+Network counter verification: recompute every affiliate's leg/active/direct
+counters from the tree and report (or repair) drift from the stored values.
+
+Usage:
+    python -m app.jobs.network_counters          # report only
+    python -m app.jobs.network_counters --fix    # also write the correct values
+"""
+
+import argparse
+import asyncio
+import json
+from array import array
+from typing import Any
+
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.db.session import async_session_factory
+from app.models.affiliate import Affiliate
+from app.services.network_snapshot import NetworkArrays, load_network
+from app.services.network_stats import COUNTER_COLUMNS, recompute_counters
+
+UPDATE_CHUNK = 5_000
+
+
+def find_drift(net: NetworkArrays, expected: dict[str, array]) -> list[dict[str, Any]]:
+    """Live affiliates whose stored counters differ from `expected`, with the corrections."""
+    stored = {name: net.extra[name] for name in COUNTER_COLUMNS}
+    drift = []
+    for i in range(len(net)):
+        if not net.live[i]:
+            continue
+        changes = {
+            name: (stored[name][i], expected[name][i])
+            for name in COUNTER_COLUMNS
+            if stored[name][i] != expected[name][i]
+        }
+        if changes:
+            drift.append({"index": i, "id": net.ids[i], "changes": changes})
+    return drift
+
+
+async def apply_corrections(db: AsyncSession, drift: list[dict[str, Any]]) -> None:
+    """Write expected values with bulk UPDATEs by primary key, UPDATE_CHUNK rows at a time."""
+    for start in range(0, len(drift), UPDATE_CHUNK):
+        rows = [
+            {"id": d["id"], **{name: new for name, (_, new) in d["changes"].items()}}
+            for d in drift[start : start + UPDATE_CHUNK]
+        ]
+        # Rows in a chunk may touch different column sets; group so each
+        # executemany batch has a uniform parameter shape.
+        by_shape: dict[tuple[str, ...], list[dict[str, Any]]] = {}
+        for row in rows:
+            by_shape.setdefault(tuple(sorted(row)), []).append(row)
+        for batch in by_shape.values():
+            await db.execute(update(Affiliate), batch)
+
+
+async def verify_counters(
+    db: AsyncSession, *, fix: bool = False, sample: int = 20
+) -> dict[str, Any]:
+    """Diff stored counters against a full recompute; with `fix`, commit the corrections."""
+    net = await load_network(
+        db,
+        [Affiliate.affiliate_code, *(getattr(Affiliate, name) for name in COUNTER_COLUMNS)],
+    )
+    drift = find_drift(net, recompute_counters(net))
+
+    by_column = {name: 0 for name in COUNTER_COLUMNS}
+    for d in drift:
+        for name in d["changes"]:
+            by_column[name] += 1
+
+    if fix and drift:
+        await apply_corrections(db, drift)
+        await db.commit()
+        await response_cache.invalidate("tree", *(f"affiliate:{d['id']}" for d in drift))
+
+    codes = net.extra["affiliate_code"]
+    return {
+        "checked": sum(net.live),
+        "drifted": len(drift),
+        "by_column": by_column,
+        "fixed": fix and bool(drift),
+        "sample": [
+            {
+                "affiliate_id": str(d["id"]),
+                "affiliate_code": codes[d["index"]],
+                "changes": {
+                    name: {"stored": old, "expected": new}
+                    for name, (old, new) in d["changes"].items()
+                },
+            }
+            for d in drift[:sample]
+        ],
+    }
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--fix", action="store_true", help="write corrected counters")
+    parser.add_argument("--sample", type=int, default=20, help="drifted rows to list")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await verify_counters(db, fix=args.fix, sample=args.sample)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
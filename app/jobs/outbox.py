@@ -0,0 +1,143 @@
+"""
+Outbox worker: deliver the events that write paths recorded with
+`app.services.outbox.emit` to their handlers.
+
+`run` claims --batch events at a time (FOR UPDATE SKIP LOCKED, so several
+workers can run side by side), hands each event type's batch to its handlers
+and commits; it polls every --poll-interval seconds once the queue is empty
+and logs throughput as it goes. Events whose handler failed are retried
+after an exponential backoff (OUTBOX_RETRY_BACKOFF) until
+OUTBOX_MAX_ATTEMPTS and then parked. `replay` puts processed or parked
+events back in the queue; `stats` prints the backlog.
+
+Usage:
+    python -m app.jobs.outbox run [--once] [--batch N] [--poll-interval S]
+    python -m app.jobs.outbox replay [--since 2026-03-01T00:00:00+00:00] [--type order.paid] [--id N ...]
+    python -m app.jobs.outbox stats
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.db.session import async_session_factory
+from app.services.commissions import accrue_direct_sponsorship
+from app.services.outbox import (
+    BatchResult,
+    EventHandler,
+    outbox_backlog,
+    process_batch,
+    replay_events,
+)
+
+logger = logging.getLogger(__name__)
+
+HANDLERS: dict[str, list[EventHandler]] = {
+    "order.paid": [accrue_direct_sponsorship],
+}
+
+LOG_EVERY = 30.0
+
+
+@dataclass
+class Throughput:
+    processed: int = 0
+    failed: int = 0
+    batches: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    def add(self, result: BatchResult) -> None:
+        self.processed += result.processed
+        self.failed += result.failed
+        self.batches += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "processed": self.processed,
+            "failed": self.failed,
+            "batches": self.batches,
+            "seconds": round(elapsed, 3),
+            "events_per_second": round(self.processed / elapsed, 1),
+        }
+
+
+async def run_worker(
+    session_factory: async_sessionmaker,
+    *,
+    batch: int,
+    poll_interval: float,
+    max_attempts: int,
+    once: bool = False,
+) -> dict[str, Any]:
+    """Process batches until stopped, or with `once` until the queue is empty."""
+    stats = Throughput()
+    last_log = time.monotonic()
+    while True:
+        async with session_factory() as db:
+            result = await process_batch(db, HANDLERS, batch, max_attempts)
+            await db.commit()
+        if result.claimed:
+            stats.add(result)
+        if time.monotonic() - last_log >= LOG_EVERY:
+            logger.info("outbox throughput: %s", stats.as_dict())
+            last_log = time.monotonic()
+        if result.claimed < batch:
+            if once:
+                break
+            await asyncio.sleep(poll_interval)
+    return stats.as_dict()
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="process events")
+    run.add_argument("--once", action="store_true", help="stop when the queue is empty")
+    run.add_argument("--batch", type=int, default=settings.OUTBOX_BATCH_SIZE)
+    run.add_argument("--poll-interval", type=float, default=settings.OUTBOX_POLL_INTERVAL)
+
+    replay = commands.add_parser("replay", help="re-queue processed or parked events")
+    replay.add_argument("--since", type=datetime.fromisoformat)
+    replay.add_argument("--type", dest="event_type")
+    replay.add_argument("--id", dest="ids", type=int, action="append")
+
+    commands.add_parser("stats", help="print the backlog")
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        logging.basicConfig(level=logging.INFO)
+        report = await run_worker(
+            async_session_factory,
+            batch=args.batch,
+            poll_interval=args.poll_interval,
+            max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+            once=args.once,
+        )
+    elif args.command == "replay":
+        if not (args.since or args.event_type or args.ids):
+            parser.error("replay needs at least one of --since, --type, --id")
+        async with async_session_factory() as db:
+            result = await db.execute(
+                replay_events(since=args.since, event_type=args.event_type, ids=args.ids)
+            )
+            await db.commit()
+        report = {"requeued": result.rowcount}
+    else:
+        async with async_session_factory() as db:
+            report = await outbox_backlog(db, settings.OUTBOX_MAX_ATTEMPTS)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
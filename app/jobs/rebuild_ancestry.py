@@ -0,0 +1,48 @@
+"""
+Ancestry rebuild: repopulate the affiliate_ancestors closure table from the
+placement links.
+
+Enrollment and moves keep the table current; run this once after the
+migration that creates it, or to repair it. The whole rebuild is one
+INSERT ... SELECT over a recursive CTE, under a SHARE lock on affiliates so
+no placement changes while it runs.
+
+Usage:
+    python -m app.jobs.rebuild_ancestry
+"""
+
+import argparse
+import asyncio
+import json
+from typing import Any
+
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import async_session_factory
+from app.models.ancestry import AffiliateAncestor
+from app.services.ancestry import COLUMNS, all_ancestry_rows
+
+
+async def rebuild_ancestry(db: AsyncSession) -> dict[str, Any]:
+    await db.execute(text("LOCK TABLE affiliates IN SHARE MODE"))
+    await db.execute(delete(AffiliateAncestor))
+    result = await db.execute(
+        insert(AffiliateAncestor).from_select(COLUMNS, all_ancestry_rows())
+    )
+    await db.commit()
+    return {"rows": result.rowcount}
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await rebuild_ancestry(db)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,213 @@
+"""
+Volume rebuild: recompute pv_current_period and bv_left_total/bv_right_total
+from paid orders and correct the stored accumulators.
+
+confirm_payment only ever adds to these columns, so a broken tree link or a
+manual DB fix leaves them wrong for good. This job rebuilds them from scratch:
+one aggregate query over paid orders, one bottom-up pass over the in-memory
+placement tree, and chunked set-based UPDATEs for the rows that differ.
+
+Usage:
+    python -m app.jobs.rebuild_volume --dry-run   # report the diff only
+    python -m app.jobs.rebuild_volume             # apply corrections
+"""
+
+import argparse
+import asyncio
+import json
+import uuid
+from array import array
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import bindparam, func, select, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, NUMERIC, UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import response_cache
+from app.db.session import async_session_factory
+from app.models.affiliate import Affiliate
+from app.models.order import Order
+from app.services.network_snapshot import LEFT, NO_SIDE, NetworkArrays, load_network
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.periods import Period
+
+VOLUME_COLUMNS = ("pv_current_period", "bv_left_total", "bv_right_total")
+UPDATE_CHUNK = 50_000
+
+# Amounts are Numeric(_, 2); folding them as integer cents keeps the pass exact and fast
+CENTS = Decimal(100)
+
+
+def to_cents(amount: Decimal | None) -> int:
+    return int((amount or 0) * CENTS)
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(cents) / CENTS
+
+
+async def load_order_volume(
+    db: AsyncSession, net: NetworkArrays, period: Period | None = None
+) -> tuple[array, array]:
+    """Own PV and BV (in cents) per affiliate position, summed in the database.
+
+    With `period`, only orders paid within it count.
+    """
+    pv = array("q", bytes(8 * len(net)))
+    bv = array("q", bytes(8 * len(net)))
+    stmt = (
+        select(Order.affiliate_id, func.sum(Order.total_pv), func.sum(Order.total_bv))
+        .where(Order.status.in_(CREDITED_ORDER_STATUSES))
+        .group_by(Order.affiliate_id)
+        .execution_options(yield_per=50_000)
+    )
+    if period is not None:
+        stmt = stmt.where(Order.paid_at >= period.start, Order.paid_at < period.end)
+    result = await db.stream(stmt)
+    async for affiliate_id, total_pv, total_bv in result:
+        i = net.index.get(affiliate_id)
+        if i is not None:
+            pv[i] = to_cents(total_pv)
+            bv[i] = to_cents(total_bv)
+    return pv, bv
+
+
+def fold_bv(net: NetworkArrays, own_bv: array) -> tuple[array, array]:
+    """BV per leg for every node, folding children into parents bottom-up.
+
+    Mirrors confirm_payment's upline walk: deleted nodes still pass volume up,
+    and a child without a placement side credits neither leg of its parent but
+    still reaches the ancestors above it.
+    """
+    n = len(net)
+    left = array("q", bytes(8 * n))
+    right = array("q", bytes(8 * n))
+    through = array("q", bytes(8 * n))  # volume passing a node without landing in a leg
+    parent, side = net.parent, net.side
+    for i in reversed(net.top_down_order(live_only=False)):
+        p = parent[i]
+        if p < 0:
+            continue
+        subtree = own_bv[i] + left[i] + right[i] + through[i]
+        if side[i] == LEFT:
+            left[p] += subtree
+        elif side[i] == NO_SIDE:
+            through[p] += subtree
+        else:
+            right[p] += subtree
+    return left, right
+
+
+def diff_volume(net: NetworkArrays, expected: dict[str, array]) -> list[dict[str, Any]]:
+    """Rows whose stored accumulators differ from `expected` (all amounts in cents)."""
+    stored = {name: net.extra[name] for name in VOLUME_COLUMNS}
+    diff = []
+    for i in range(len(net)):
+        changes = {}
+        for name in VOLUME_COLUMNS:
+            old = to_cents(stored[name][i])
+            new = expected[name][i]
+            if old != new:
+                changes[name] = (old, new)
+        if changes:
+            diff.append({"index": i, "id": net.ids[i], "changes": changes})
+    return diff
+
+
+def volume_update(ids: list[uuid.UUID], values: dict[str, list[Decimal]]):
+    """One UPDATE ... FROM unnest(...) writing every accumulator for a batch of rows."""
+    rows = func.unnest(
+        bindparam("ids", ids, type_=ARRAY(UUID(as_uuid=True))),
+        *(
+            bindparam(name, values[name], type_=ARRAY(NUMERIC(14, 2)))
+            for name in VOLUME_COLUMNS
+        ),
+    ).table_valued("id", *VOLUME_COLUMNS).render_derived(name="v")
+    return (
+        update(Affiliate)
+        .where(Affiliate.id == rows.c.id)
+        .values({name: rows.c[name] for name in VOLUME_COLUMNS})
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def apply_volume(
+    db: AsyncSession,
+    net: NetworkArrays,
+    diff: list[dict[str, Any]],
+    expected: dict[str, array],
+) -> None:
+    for start in range(0, len(diff), UPDATE_CHUNK):
+        positions = [d["index"] for d in diff[start : start + UPDATE_CHUNK]]
+        await db.execute(
+            volume_update(
+                [net.ids[i] for i in positions],
+                {
+                    name: [from_cents(expected[name][i]) for i in positions]
+                    for name in VOLUME_COLUMNS
+                },
+            )
+        )
+
+
+async def rebuild_volume(
+    db: AsyncSession, *, dry_run: bool = False, sample: int = 20
+) -> dict[str, Any]:
+    """Recompute every accumulator; unless `dry_run`, write and commit the differences."""
+    if not dry_run:
+        # Hold off payments (and their incremental accrual) until the rebuild commits
+        await db.execute(text("LOCK TABLE orders IN SHARE MODE"))
+        await db.execute(text("LOCK TABLE affiliates IN SHARE ROW EXCLUSIVE MODE"))
+
+    net = await load_network(
+        db,
+        [Affiliate.affiliate_code, *(getattr(Affiliate, name) for name in VOLUME_COLUMNS)],
+    )
+    own_pv, own_bv = await load_order_volume(db, net)
+    bv_left, bv_right = fold_bv(net, own_bv)
+    expected = {
+        "pv_current_period": own_pv,
+        "bv_left_total": bv_left,
+        "bv_right_total": bv_right,
+    }
+    diff = diff_volume(net, expected)
+
+    if not dry_run and diff:
+        await apply_volume(db, net, diff, expected)
+        await db.commit()
+        await response_cache.invalidate("tree", *(f"affiliate:{d['id']}" for d in diff))
+
+    codes = net.extra["affiliate_code"]
+    return {
+        "affiliates": len(net),
+        "changed": len(diff),
+        "applied": not dry_run and bool(diff),
+        "sample": [
+            {
+                "affiliate_id": str(d["id"]),
+                "affiliate_code": codes[d["index"]],
+                "changes": {
+                    name: {"stored": str(from_cents(old)), "rebuilt": str(from_cents(new))}
+                    for name, (old, new) in d["changes"].items()
+                },
+            }
+            for d in diff[:sample]
+        ],
+    }
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--dry-run", action="store_true", help="report the diff, write nothing")
+    parser.add_argument("--sample", type=int, default=20, help="changed rows to list")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await rebuild_volume(db, dry_run=args.dry_run, sample=args.sample)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Period snapshot job: freeze a closed period into its own partition of
+period_snapshots, or archive an old one.
+
+`capture` computes the period's volume per affiliate and leg in the database
+and writes it with the placement, rank and carry-over as they stand now, so
+run it right after the period closes (before the next period's activity
+moves the accumulators). A period can only be captured once. `detach`
+removes a period's partition from the partitioned table and optionally
+moves it to another tablespace; reads for that period then answer 410.
+`list` prints the captured periods.
+
+Usage:
+    python -m app.jobs.snapshot_period capture [--period 2026-03]
+    python -m app.jobs.snapshot_period detach --period 2026-03 [--tablespace cold]
+    python -m app.jobs.snapshot_period list
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app.core.cache import response_cache
+from app.db.session import async_session_factory
+from app.models.snapshot import SnapshotPeriod
+from app.services.periods import Period, current_period, parse_period
+from app.services.snapshots import capture_period, detach_period, snapshot_tag
+
+
+def previous_month() -> Period:
+    return current_period(current_period().start - timedelta(microseconds=1))
+
+
+def _describe(snapshot: SnapshotPeriod) -> dict:
+    return {
+        "period": snapshot.period,
+        "partition": snapshot.partition_name,
+        "rows": snapshot.row_count,
+        "captured_at": snapshot.captured_at.isoformat() if snapshot.captured_at else None,
+        "detached_at": snapshot.detached_at.isoformat() if snapshot.detached_at else None,
+    }
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("capture", help="snapshot a closed period")
+    capture.add_argument("--period", type=parse_period, help="YYYY-MM or YYYY-Www (default: last month)")
+
+    detach = commands.add_parser("detach", help="archive a captured period")
+    detach.add_argument("--period", required=True, type=parse_period)
+    detach.add_argument("--tablespace", help="move the detached partition to this tablespace")
+
+    commands.add_parser("list", help="print the captured periods")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        if args.command == "capture":
+            started = time.perf_counter()
+            try:
+                snapshot = await capture_period(db, args.period or previous_month())
+            except ValueError as exc:
+                parser.error(str(exc))
+            await db.commit()
+            report = {
+                "period": snapshot.period,
+                "partition": snapshot.partition_name,
+                "rows": snapshot.row_count,
+                "seconds": round(time.perf_counter() - started, 2),
+            }
+        elif args.command == "detach":
+            try:
+                snapshot = await detach_period(db, args.period.key, args.tablespace)
+            except ValueError as exc:
+                parser.error(str(exc))
+            await db.commit()
+            # No request scope here to pick up invalidate_on_commit
+            await response_cache.invalidate(snapshot_tag(snapshot.period))
+            report = _describe(snapshot)
+        else:
+            result = await db.execute(select(SnapshotPeriod).order_by(SnapshotPeriod.period))
+            report = [_describe(s) for s in result.scalars()]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,155 @@
+"""
+Unilevel bonus job: compute a period's unilevel commissions for the whole
+network in one pass and write them to the commissions table.
+
+Loads the network and the period's BV into arrays, computes every payout
+with app.services.unilevel, then replaces the period's unilevel rows that
+are still pending liquidation, in bulk. Re-running a period recomputes it;
+once any of its unilevel rows is approved or paid the period is left alone.
+
+Usage:
+    python -m app.jobs.unilevel_bonus [--period 2026-03] [--dry-run]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from collections.abc import Iterable
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import async_session_factory
+from app.jobs.rebuild_volume import load_order_volume
+from app.models.affiliate import Affiliate
+from app.models.background_job import BackgroundJob
+from app.models.commission import Commission
+from app.services.network_snapshot import NetworkArrays, load_network
+from app.services.periods import Period, current_period, parse_period
+from app.services.ranks import to_cents
+from app.services.unilevel import (
+    UNILEVEL,
+    generation_volume,
+    paid_depths,
+    rate_units,
+    unilevel_payouts,
+)
+
+INSERT_CHUNK = 10_000
+
+
+def _money(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def commission_rows(
+    net: NetworkArrays,
+    payouts: Iterable[tuple[int, int, int, int]],
+    rates: list[Decimal],
+    period: Period,
+) -> list[dict[str, Any]]:
+    tenants = net.extra["tenant_id"]
+    return [
+        {
+            "id": uuid.uuid4(),
+            "tenant_id": tenants[i],
+            "affiliate_id": net.ids[i],
+            "bonus_type": UNILEVEL,
+            "generation": generation,
+            "period": period.key,
+            "status": "pending_liquidation",
+            "base_bv": _money(base),
+            "rate": rates[generation - 1],
+            "amount": _money(amount),
+        }
+        for i, generation, base, amount in payouts
+    ]
+
+
+async def replace_period(db: AsyncSession, period: Period, rows: list[dict[str, Any]]) -> bool:
+    """Swap the period's pending unilevel rows for `rows`; False if the period is locked."""
+    of_period = (Commission.bonus_type == UNILEVEL, Commission.period == period.key)
+    locked = await db.execute(
+        select(func.count()).where(*of_period, Commission.status != "pending_liquidation")
+    )
+    if locked.scalar_one():
+        return False
+    await db.execute(delete(Commission).where(*of_period))
+    for start in range(0, len(rows), INSERT_CHUNK):
+        await db.execute(insert(Commission), rows[start : start + INSERT_CHUNK])
+    return True
+
+
+async def unilevel_bonus(
+    db: AsyncSession, period: Period, *, dry_run: bool = False, commit: bool = True
+) -> dict[str, Any]:
+    """Compute and write the period's unilevel rows.
+
+    With commit=False the write stays in the caller's transaction (a job
+    step, which the runner commits together with its result).
+    """
+    rates = [Decimal(str(r)) for r in settings.UNILEVEL_RATES]
+    started = time.monotonic()
+    net = await load_network(db, (Affiliate.current_rank, Affiliate.tenant_id))
+    own_pv, own_bv = await load_order_volume(db, net, period)
+    loaded = time.monotonic()
+
+    volume = generation_volume(net.sponsor, own_bv, len(rates))
+    depths = paid_depths(
+        net,
+        own_pv,
+        len(rates),
+        min_pv=to_cents(settings.UNILEVEL_MIN_PV),
+        depth_by_rank=settings.UNILEVEL_DEPTH_BY_RANK,
+    )
+    rows = commission_rows(net, unilevel_payouts(volume, rate_units(rates), depths), rates, period)
+    computed = time.monotonic()
+
+    written = False
+    if not dry_run:
+        written = await replace_period(db, period, rows)
+        if commit:
+            await db.commit()
+    return {
+        "period": period.key,
+        "members": len(net),
+        "generations": len(rates),
+        "payees": len({r["affiliate_id"] for r in rows}),
+        "rows": len(rows),
+        "total": str(sum((r["amount"] for r in rows), Decimal("0.00"))),
+        "written": written,
+        "locked": not dry_run and not written,
+        "seconds": {
+            "load": round(loaded - started, 3),
+            "compute": round(computed - loaded, 3),
+            "write": round(time.monotonic() - computed, 3),
+        },
+    }
+
+
+async def unilevel_step(db: AsyncSession, job: BackgroundJob) -> bool:
+    """The whole period as a single chunk of a background job (python -m app.worker)."""
+    period = parse_period(job.params["period"])
+    job.result = await unilevel_bonus(db, period, dry_run=bool(job.params.get("dry_run")), commit=False)
+    return True
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--period", type=parse_period, help="YYYY-MM or YYYY-Www (default: current month)")
+    parser.add_argument("--dry-run", action="store_true", help="compute and report, write nothing")
+    args = parser.parse_args(argv)
+
+    async with async_session_factory() as db:
+        report = await unilevel_bonus(db, args.period or current_period(), dry_run=args.dry_run)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
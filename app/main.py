@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
 from app.config import settings
+from app.core import background
+from app.core.cache import response_cache
+from app.core.responses import ORJSONResponse
+from app.db.session import dispose_engine, warm_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Per worker: warm the pools before taking traffic; on shutdown, once the
+    server has finished in-flight requests, drain spawned tasks and close the pool."""
+    await warm_pool(settings.WEB_WARMUP_CONNECTIONS)
+    await response_cache.warm_up()
+    yield
+    await background.drain(settings.WEB_GRACEFUL_TIMEOUT)
+    await dispose_engine()
 
 
 def create_app() -> FastAPI:
@@ -11,6 +28,8 @@ def create_app() -> FastAPI:
         version=settings.APP_VERSION,
         docs_url="/docs" if settings.DEBUG else None,
         redoc_url="/redoc" if settings.DEBUG else None,
+        lifespan=lifespan,
+        default_response_class=ORJSONResponse,
     )
 
     app.add_middleware(
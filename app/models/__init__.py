@@ -1,19 +1,35 @@
 from app.models.affiliate import Affiliate
+from app.models.ancestry import AffiliateAncestor
 from app.models.associations import role_permissions, user_roles
 from app.models.audit_log import AuditLog
+from app.models.background_job import BackgroundJob
+from app.models.commission import Commission
 from app.models.order import Order, OrderItem
+from app.models.outbox import OutboxEvent
 from app.models.product import Product
+from app.models.rank import RankDirty
 from app.models.role import Permission, Role
+from app.models.rollup import DailyNetworkRollup, DailySalesRollup
+from app.models.snapshot import PeriodSnapshot, SnapshotPeriod
 from app.models.user import User
 
 __all__ = [
     "Affiliate",
+    "AffiliateAncestor",
     "AuditLog",
+    "BackgroundJob",
+    "Commission",
+    "DailyNetworkRollup",
+    "DailySalesRollup",
     "Order",
     "OrderItem",
+    "OutboxEvent",
+    "PeriodSnapshot",
     "Permission",
     "Product",
+    "RankDirty",
     "Role",
+    "SnapshotPeriod",
     "User",
     "user_roles",
     "role_permissions",
@@ -7,9 +7,12 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
+    Integer,
     Numeric,
     String,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -27,6 +30,13 @@ class Affiliate(BaseModel):
         CheckConstraint("kit_tier IN ('ESP1', 'ESP2', 'ESP3')", name="chk_kit_tier"),
         CheckConstraint("sponsor_id IS DISTINCT FROM id", name="chk_no_self_sponsor"),
         CheckConstraint("placement_parent_id IS DISTINCT FROM id", name="chk_no_self_placement"),
+        # Drives every downward tree walk (recursive CTEs join on placement_parent_id)
+        Index(
+            "ix_affiliates_placement_parent_side",
+            "placement_parent_id",
+            "placement_side",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
     )
 
     # Link to admin user (optional 1:1)
@@ -89,6 +99,14 @@ class Affiliate(BaseModel):
     bv_left_carry: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
     bv_right_carry: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
 
+    # Network counters (denormalized, maintained by app.services.network_stats).
+    # Legs count the live placement subtree on each side; directs are sponsees.
+    left_leg_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    right_leg_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    left_active_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    right_active_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    active_directs_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     # Soft delete
     deleted_at: Mapped[datetime | None] = mapped_column(
         DateTime(timezone=True), nullable=True
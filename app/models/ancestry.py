@@ -0,0 +1,43 @@
+import uuid
+
+from sqlalchemy import ForeignKey, Index, Integer, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class AffiliateAncestor(Base):
+    """Closure table of the placement tree: one row per (ancestor, descendant) pair.
+
+    Covers deleted affiliates too, since volume still flows through them.
+    Maintained by app.services.ancestry; rebuilt by app.jobs.rebuild_ancestry.
+    """
+
+    __tablename__ = "affiliate_ancestors"
+    __table_args__ = (
+        # Orders -> every ancestor of the buyer, without touching the heap
+        Index(
+            "ix_affiliate_ancestors_descendant",
+            "descendant_id",
+            postgresql_include=["ancestor_id", "side"],
+        ),
+        # Ancestor -> every descendant with its leg (group volume), index-only
+        Index(
+            "ix_affiliate_ancestors_ancestor_side",
+            "ancestor_id",
+            "side",
+            postgresql_include=["descendant_id"],
+        ),
+    )
+
+    ancestor_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("affiliates.id"), primary_key=True
+    )
+    descendant_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("affiliates.id"), primary_key=True
+    )
+    depth: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Leg of the ancestor the descendant sits in; NULL below a child placed
+    # without a side, whose volume reaches only the ancestors above
+    side: Mapped[str | None] = mapped_column(String(5), nullable=True)
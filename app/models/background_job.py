@@ -0,0 +1,85 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import (
+    Boolean,
+    CheckConstraint,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import BaseModel
+
+
+class BackgroundJob(BaseModel):
+    """Long-running work requested over HTTP and carried out by the job worker.
+
+    The worker runs a job chunk by chunk, committing `checkpoint` and
+    progress after each one, so a job interrupted by a restart resumes from
+    its last chunk once its heartbeat is older than `visibility_timeout`.
+    Workers take jobs per `queue`, highest `priority` first; a failed job is
+    queued again after a backoff (`run_after`) until `max_attempts`.
+    """
+
+    __tablename__ = "background_jobs"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ('queued', 'running', 'completed', 'failed', 'cancelled')",
+            name="chk_background_job_status",
+        ),
+        # Workers only look at unfinished jobs, per queue in claim order
+        Index(
+            "ix_background_jobs_claim",
+            "queue",
+            text("priority DESC"),
+            "created_at",
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+        # At most one unfinished job per kind and period, however many requests race to enqueue it
+        Index(
+            "uq_background_jobs_unfinished_period",
+            "kind",
+            text("(params ->> 'period')"),
+            unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    kind: Mapped[str] = mapped_column(String(50), nullable=False, index=True)
+    params: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued")
+    queue: Mapped[str] = mapped_column(String(30), nullable=False, default="default")
+    priority: Mapped[int] = mapped_column(SmallInteger, nullable=False, default=0)  # higher runs first
+
+    progress_done: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    progress_total: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    checkpoint: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    output_path: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)  # claims so far
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    # Not claimable before this (retry backoff)
+    run_after: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Set by the worker that claimed the job; another worker only takes over once
+    # heartbeat_at is more than visibility_timeout seconds old
+    visibility_timeout: Mapped[int] = mapped_column(Integer, nullable=False, default=300)
+    claim_token: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    heartbeat_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+    created_by_user_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=True
+    )
@@ -0,0 +1,41 @@
+import uuid
+from decimal import Decimal
+
+from sqlalchemy import CheckConstraint, ForeignKey, Numeric, SmallInteger, String, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import BaseModel
+
+
+class Commission(BaseModel):
+    """A bonus earned by an affiliate, pending until the period's liquidation."""
+
+    __tablename__ = "commissions"
+    __table_args__ = (
+        # Re-processing an order's events can never pay the same bonus twice
+        UniqueConstraint("order_id", "bonus_type", name="uq_commissions_order_bonus"),
+        CheckConstraint(
+            "status IN ('pending_liquidation', 'approved', 'paid', 'cancelled')",
+            name="chk_commission_status",
+        ),
+    )
+
+    affiliate_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("affiliates.id"), nullable=False, index=True
+    )
+    source_affiliate_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("affiliates.id"), nullable=True
+    )
+    order_id: Mapped[uuid.UUID | None] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("orders.id"), nullable=True
+    )
+    bonus_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    # Sponsor generation the volume came from, for generational (unilevel) bonuses
+    generation: Mapped[int | None] = mapped_column(SmallInteger, nullable=True)
+    period: Mapped[str] = mapped_column(String(20), nullable=False, index=True)
+    status: Mapped[str] = mapped_column(String(30), nullable=False, default="pending_liquidation")
+
+    base_bv: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    rate: Mapped[Decimal] = mapped_column(Numeric(5, 4), nullable=False)
+    amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
@@ -6,10 +6,12 @@ from sqlalchemy import (
     CheckConstraint,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     Numeric,
     String,
     Text,
+    text,
 )
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
@@ -28,6 +30,21 @@ class Order(BaseModel):
             "status IN ('pending_payment', 'paid', 'in_preparation', 'shipped', 'delivered', 'cancelled', 'returned')",
             name="chk_order_status",
         ),
+        # Time-windowed volume reads (period reports) scan paid orders by paid_at only
+        Index(
+            "ix_orders_paid_at",
+            "paid_at",
+            postgresql_include=["affiliate_id", "status", "total_pv", "total_bv"],
+            postgresql_where=text("paid_at IS NOT NULL"),
+        ),
+        # Group volume: a descendant's orders in a window, answered from the index alone
+        Index(
+            "ix_orders_affiliate_paid_at",
+            "affiliate_id",
+            "paid_at",
+            postgresql_include=["status", "total_pv", "total_bv"],
+            postgresql_where=text("paid_at IS NOT NULL"),
+        ),
     )
 
     order_number: Mapped[str] = mapped_column(
@@ -0,0 +1,25 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class RankDirty(Base):
+    """Affiliates whose rank inputs changed since their last evaluation.
+
+    Filled by payments, status changes and moves; drained by
+    `python -m app.jobs.evaluate_ranks`.
+    """
+
+    __tablename__ = "rank_dirty"
+
+    affiliate_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("affiliates.id"), primary_key=True
+    )
+    marked_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now(), index=True
+    )
@@ -0,0 +1,50 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from sqlalchemy import Date, ForeignKey, Integer, Numeric, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class DailySalesRollup(Base):
+    """Paid sales per business day, country, order type and product (maintained by app.services.rollups)."""
+
+    __tablename__ = "daily_sales_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    country_code: Mapped[str] = mapped_column(String(2), primary_key=True)
+    order_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    product_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("products.id"), primary_key=True, index=True
+    )
+
+    order_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    quantity: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    amount: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    pv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+    bv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
+
+
+class DailyNetworkRollup(Base):
+    """Network movements and order totals per business day and country.
+
+    Rows hold deltas, so current head counts are sums over all days.
+    """
+
+    __tablename__ = "daily_network_rollup"
+
+    day: Mapped[date] = mapped_column(Date, primary_key=True)
+    country_code: Mapped[str] = mapped_column(String(2), primary_key=True)
+
+    enrollments: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    removals: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    activations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    deactivations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    # Into and out of the 'inactive' status (activations/deactivations: 'active')
+    inactivations: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    inactive_exits: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    orders_paid: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    sales_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False, default=0)
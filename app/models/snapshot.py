@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from sqlalchemy import DateTime, Index, Integer, Numeric, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class PeriodSnapshot(Base):
+    """Every live affiliate's placement, standing and volume as of a closed period.
+
+    Partitioned by LIST (period), one partition per period, written once by
+    app.services.snapshots and never updated (a trigger rejects UPDATE and
+    DELETE, Rule #12). Old partitions can be detached to cold storage.
+    """
+
+    __tablename__ = "period_snapshots"
+    __table_args__ = (
+        # Historic tree walks: children of a node within one period
+        Index("ix_period_snapshots_parent", "period", "placement_parent_id", "placement_side"),
+        {"postgresql_partition_by": "LIST (period)"},
+    )
+
+    period: Mapped[str] = mapped_column(String(20), primary_key=True)
+    affiliate_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    tenant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+
+    sponsor_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    placement_parent_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    placement_side: Mapped[str | None] = mapped_column(String(5), nullable=True)
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+    rank: Mapped[str] = mapped_column(String(30), nullable=False)
+
+    # Volume of orders paid within the period: own, and per leg
+    pv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    left_pv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv_left: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    right_pv: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv_right: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+    # PV accumulated within the period; BV totals and carry-over as they stood at capture
+    pv_accumulated: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False)
+    bv_left_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv_right_total: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv_left_carry: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+    bv_right_carry: Mapped[Decimal] = mapped_column(Numeric(14, 2), nullable=False)
+
+
+class SnapshotPeriod(Base):
+    """One row per captured period: where its snapshot lives and whether it was archived."""
+
+    __tablename__ = "snapshot_periods"
+
+    period: Mapped[str] = mapped_column(String(20), primary_key=True)
+    partition_name: Mapped[str] = mapped_column(String(63), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    captured_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False, server_default=func.now()
+    )
+    # Set once the partition is detached from period_snapshots (cold storage)
+    detached_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
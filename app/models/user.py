@@ -47,6 +47,10 @@ class User(BaseModel):
     def full_name(self) -> str:
         return f"{self.first_name} {self.last_name}"
 
+    @property
+    def display_name(self) -> str:
+        return self.username or self.full_name
+
     @property
     def permissions(self) -> set[str]:
         perms: set[str] = set()
@@ -30,10 +30,12 @@ class EnrollmentRequest(BaseModel):
     state_province: str | None = Field(default=None, max_length=100)
     postal_code: str | None = Field(default=None, max_length=20)
 
-    # MLM placement
+    # MLM placement — either an explicit position or a strategy to find one
+    # (searched under placement_parent_id if given, else under the sponsor)
     sponsor_id: uuid.UUID | None = None
     placement_parent_id: uuid.UUID | None = None
     placement_side: Literal["left", "right"] | None = None
+    placement_strategy: Literal["outer_left", "outer_right", "weaker_leg", "bfs_first_empty"] | None = None
 
     # Kit selection
     kit_tier: Literal["ESP1", "ESP2", "ESP3"]
@@ -51,6 +53,12 @@ class EnrollmentRequest(BaseModel):
 
     @model_validator(mode="after")
     def validate_placement(self):
+        if self.placement_strategy:
+            if not self.sponsor_id:
+                raise ValueError("placement_strategy requires sponsor_id")
+            if self.placement_side:
+                raise ValueError("placement_side cannot be combined with placement_strategy")
+            return self
         if self.sponsor_id:
             if not self.placement_parent_id:
                 raise ValueError("placement_parent_id is required when sponsor_id is provided")
@@ -61,6 +69,17 @@ class EnrollmentRequest(BaseModel):
         return self
 
 
+class AffiliateStatusUpdate(BaseModel):
+    """Manual status change. Activation of pending affiliates only happens via payment."""
+    status: Literal["active", "inactive", "suspended", "cancelled"]
+
+
+class AffiliateMoveRequest(BaseModel):
+    """Re-place an affiliate, with its whole downline, under another parent."""
+    new_parent_id: uuid.UUID
+    new_side: Literal["left", "right"]
+
+
 class AffiliateResponse(BaseModel):
     id: uuid.UUID
     affiliate_code: str
@@ -80,6 +99,11 @@ class AffiliateResponse(BaseModel):
     pv_current_period: Decimal
     bv_left_total: Decimal
     bv_right_total: Decimal
+    left_leg_count: int
+    right_leg_count: int
+    left_active_count: int
+    right_active_count: int
+    active_directs_count: int
     created_by_user_id: uuid.UUID | None
     created_by_username: str | None = None
     enrolled_at: datetime
@@ -115,3 +139,123 @@ class TreeNodeResponse(BaseModel):
     enrolled_at: datetime
     left_child: "TreeNodeResponse | None" = None
     right_child: "TreeNodeResponse | None" = None
+
+
+class FlatTreeNodes(BaseModel):
+    """Columnar node list: entry i of every column describes the same node."""
+    id: list[uuid.UUID]
+    parent_index: list[int]  # position of the parent in these columns, -1 for the root
+    side: list[Literal["left", "right"] | None]
+    level: list[int]
+    affiliate_code: list[str]
+    full_name: list[str]
+    status: list[str]
+    current_rank: list[str]
+    pv_current_period: list[Decimal]
+    bv_left_total: list[Decimal]
+    bv_right_total: list[Decimal]
+    enrolled_at: list[datetime]
+
+
+class FlatTreeResponse(BaseModel):
+    """Binary tree as an adjacency list (`?format=flat`)."""
+    root_id: uuid.UUID
+    depth: int  # deepest level included
+    truncated: bool  # True if max_nodes cut the tree short before `depth`
+    frontier: list[uuid.UUID]  # nodes of the last level; expand these next
+    nodes: FlatTreeNodes
+
+
+class FrontierNodes(BaseModel):
+    """Columnar nodes below a frontier; parents are referenced by id."""
+    id: list[uuid.UUID]
+    parent_id: list[uuid.UUID]
+    side: list[Literal["left", "right"]]
+    level: list[int]  # 1 = direct child of a requested node
+    has_left: list[bool]
+    has_right: list[bool]
+    affiliate_code: list[str]
+    full_name: list[str]
+    status: list[str]
+    current_rank: list[str]
+    pv_current_period: list[Decimal]
+    bv_left_total: list[Decimal]
+    bv_right_total: list[Decimal]
+    enrolled_at: list[datetime]
+
+
+class FrontierResponse(BaseModel):
+    """Next levels below a set of already-displayed nodes."""
+    ids: list[uuid.UUID]  # requested nodes that exist (and are not deleted)
+    levels: int
+    nodes: FrontierNodes
+
+
+class UplineNode(BaseModel):
+    """One ancestor on the path from a node up to the root."""
+    id: uuid.UUID
+    affiliate_code: str
+    full_name: str
+    status: str
+    current_rank: str
+    distance: int  # 1 = direct parent/sponsor
+    side: Literal["left", "right"] | None  # leg of this ancestor the path runs through (placement only)
+
+
+class UplineResponse(BaseModel):
+    affiliate_id: uuid.UUID
+    tree: Literal["placement", "sponsor"]
+    ancestors: list[UplineNode]  # nearest first
+    cut_at_viewer: bool  # True if the chain stops at the caller's own position
+
+
+class SponsorGeneration(BaseModel):
+    generation: int  # 1 = personally sponsored
+    count: int
+
+
+class SponsorTreeMember(BaseModel):
+    id: uuid.UUID
+    affiliate_code: str
+    full_name: str
+    status: str
+    current_rank: str
+    sponsor_id: uuid.UUID
+    enrolled_at: datetime
+    active_directs: int
+
+
+class SponsorTreeResponse(BaseModel):
+    """Sponsor (unilevel) downline: counts per generation plus one page of one generation."""
+    affiliate_id: uuid.UUID
+    max_generations: int
+    generations: list[SponsorGeneration]
+    generation: int
+    members: list[SponsorTreeMember]
+    next_cursor: str | None  # pass as `after` for the next page of this generation
+
+
+class PlacementSlotResponse(BaseModel):
+    """Next free position found by a placement strategy."""
+    parent_id: uuid.UUID
+    parent_affiliate_code: str
+    side: Literal["left", "right"]
+    depth: int  # levels below the searched affiliate
+    strategy: str
+
+
+class GroupVolume(BaseModel):
+    """Downline volume (paid orders) of one affiliate per leg, within a window."""
+    affiliate_id: uuid.UUID
+    left_pv: Decimal = Decimal("0")
+    left_bv: Decimal = Decimal("0")
+    right_pv: Decimal = Decimal("0")
+    right_bv: Decimal = Decimal("0")
+
+
+class GroupVolumeResponse(BaseModel):
+    period: str  # "2026-03", "2026-W10" or "2026-03-01..2026-03-15"
+    start: datetime
+    end: datetime  # exclusive
+    closed: bool
+    volumes: list[GroupVolume]  # requested affiliates that exist, in request order
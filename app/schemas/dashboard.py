@@ -0,0 +1,42 @@
+import uuid
+from datetime import date
+from decimal import Decimal
+
+from pydantic import BaseModel
+
+
+class TopProduct(BaseModel):
+    product_id: uuid.UUID
+    sku: str
+    name: str
+    quantity: int
+    amount: Decimal
+
+
+class CountryBreakdown(BaseModel):
+    country_code: str
+    enrollments: int = 0
+    members: int = 0
+    active: int = 0
+    inactive: int = 0
+    orders_paid: int = 0
+    sales_total: Decimal = Decimal("0")
+
+
+class DashboardResponse(BaseModel):
+    """Executive dashboard: movements within the range, head counts as of its last day.
+
+    `inactive` counts members in the 'inactive' status only; pending, suspended
+    and cancelled members are in `members` but neither `active` nor `inactive`.
+    """
+    date_from: date
+    date_to: date
+    enrollments: int
+    members: int
+    active: int
+    inactive: int
+    orders_paid: int
+    sales_total: Decimal
+    average_ticket: Decimal
+    top_products: list[TopProduct]
+    countries: list[CountryBreakdown]
@@ -0,0 +1,34 @@
+import uuid
+from datetime import datetime
+from typing import Any
+
+from pydantic import BaseModel, Field
+
+
+class BackgroundJobResponse(BaseModel):
+    id: uuid.UUID
+    kind: str
+    status: str
+    queue: str
+    priority: int
+    params: dict[str, Any]
+    progress_done: int
+    progress_total: int | None = None
+    progress: float | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    attempts: int
+    max_attempts: int
+    run_after: datetime | None = None
+    cancel_requested: bool
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = {"from_attributes": True}
+
+
+class JobEnqueueRequest(BaseModel):
+    kind: str
+    params: dict[str, Any] = Field(default_factory=dict)
+    priority: int = Field(default=0, ge=-100, le=100)
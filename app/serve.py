@@ -0,0 +1,107 @@
+"""
+Production server: the API on --workers processes.
+
+With gunicorn installed (the Docker image), the app is imported once in the
+master (preload_app) and forked into uvicorn workers, which share the loaded
+code copy-on-write and start in milliseconds; each worker builds its own
+database engine after the fork (app.db.session) and warms it in the app's
+lifespan before taking traffic. A crashed worker is replaced by the master.
+Without gunicorn (e.g. on Windows) uvicorn's own supervisor spawns the
+workers instead, each importing the app itself.
+
+On SIGTERM workers stop accepting connections, get --graceful-timeout
+seconds to finish in-flight requests, then drain the tasks those requests
+spawned and close their pools.
+
+Usage:
+    python -m app.serve [--workers N] [--bind 0.0.0.0:8000] [--graceful-timeout 30]
+"""
+
+import argparse
+import os
+from typing import Any
+
+from app.config import settings
+
+
+def gunicorn_available() -> bool:
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def gunicorn_options(
+    workers: int, bind: str, graceful_timeout: int, keepalive: int, max_requests: int
+) -> dict[str, Any]:
+    return {
+        "bind": bind,
+        "workers": workers,
+        "worker_class": "uvicorn.workers.UvicornWorker",
+        "preload_app": True,
+        "graceful_timeout": graceful_timeout,
+        # A worker that doesn't check in for this long is killed and replaced
+        "timeout": graceful_timeout + 30,
+        "keepalive": keepalive,
+        "max_requests": max_requests,
+        "max_requests_jitter": max_requests // 10,
+        "accesslog": "-",
+        "forwarded_allow_ips": "*",
+    }
+
+
+def run_gunicorn(options: dict[str, Any]) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+
+            return app
+
+    Server().run()
+
+
+def run_uvicorn(workers: int, bind: str, graceful_timeout: int, keepalive: int) -> None:
+    import uvicorn
+
+    host, _, port = bind.rpartition(":")
+    uvicorn.run(
+        "app.main:app",
+        host=host or "0.0.0.0",
+        port=int(port),
+        workers=workers,
+        timeout_graceful_shutdown=graceful_timeout,
+        timeout_keep_alive=keepalive,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+    )
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, default=settings.WEB_WORKERS or os.cpu_count() or 1)
+    parser.add_argument("--bind", default=settings.WEB_BIND, help="HOST:PORT")
+    parser.add_argument("--graceful-timeout", type=int, default=settings.WEB_GRACEFUL_TIMEOUT)
+    parser.add_argument(
+        "--no-gunicorn", action="store_true", help="use uvicorn's supervisor even if gunicorn is installed"
+    )
+    args = parser.parse_args(argv)
+
+    if gunicorn_available() and not args.no_gunicorn:
+        run_gunicorn(
+            gunicorn_options(
+                args.workers, args.bind, args.graceful_timeout, settings.WEB_KEEPALIVE, settings.WEB_MAX_REQUESTS
+            )
+        )
+    else:
+        run_uvicorn(args.workers, args.bind, args.graceful_timeout, settings.WEB_KEEPALIVE)
+
+
+if __name__ == "__main__":
+    main()
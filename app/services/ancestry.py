@@ -0,0 +1,112 @@
+"""
+Placement-tree closure table (affiliate_ancestors).
+
+Every (ancestor, descendant) pair is stored with the ancestor's leg, so
+"all volume in X's left leg during March" is an index join from orders to
+affiliate_ancestors instead of a recursive walk. Enrollment attaches the new
+node below its parent's ancestors; a move detaches the whole subtree from the
+old path and attaches it to the new one, each with one set-based statement.
+
+A node placed without a side still gets a row for every ancestor: side NULL
+at its parent (on neither leg), and the parent's leg at each ancestor above,
+the way the full pass folds its volume.
+"""
+
+import uuid
+
+from sqlalchemy import String, delete, insert, literal, or_, select, true, union_all
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.affiliate import Affiliate
+from app.models.ancestry import AffiliateAncestor
+from app.services.tree import MAX_UPLINE_DEPTH
+
+COLUMNS = ["ancestor_id", "descendant_id", "depth", "side"]
+
+
+def _uuid(value: uuid.UUID):
+    return literal(value, type_=UUID(as_uuid=True))
+
+
+async def attach_ancestry(
+    db: AsyncSession, affiliate_id: uuid.UUID, parent_id: uuid.UUID | None, side: str | None
+) -> None:
+    """Link `affiliate_id` and its whole subtree to the ancestors of (parent_id, side)."""
+    if parent_id is None:
+        return
+    path = union_all(
+        select(
+            _uuid(parent_id).label("ancestor_id"),
+            literal(1).label("depth"),
+            literal(side, type_=String).label("side"),
+        ),
+        select(
+            AffiliateAncestor.ancestor_id,
+            AffiliateAncestor.depth + 1,
+            AffiliateAncestor.side,
+        ).where(AffiliateAncestor.descendant_id == parent_id),
+    ).subquery("path")
+    subtree = union_all(
+        select(_uuid(affiliate_id).label("descendant_id"), literal(0).label("depth")),
+        select(AffiliateAncestor.descendant_id, AffiliateAncestor.depth).where(
+            AffiliateAncestor.ancestor_id == affiliate_id
+        ),
+    ).subquery("subtree")
+    await db.execute(
+        insert(AffiliateAncestor).from_select(
+            COLUMNS,
+            select(
+                path.c.ancestor_id,
+                subtree.c.descendant_id,
+                path.c.depth + subtree.c.depth,
+                path.c.side,
+            ).select_from(path.join(subtree, true())),
+        )
+    )
+
+
+async def detach_ancestry(db: AsyncSession, affiliate_id: uuid.UUID) -> None:
+    """Drop the links from `affiliate_id`'s subtree to everything above it."""
+    above = select(AffiliateAncestor.ancestor_id).where(
+        AffiliateAncestor.descendant_id == affiliate_id
+    )
+    below = select(AffiliateAncestor.descendant_id).where(
+        AffiliateAncestor.ancestor_id == affiliate_id
+    )
+    await db.execute(
+        delete(AffiliateAncestor).where(
+            AffiliateAncestor.ancestor_id.in_(above.scalar_subquery()),
+            or_(
+                AffiliateAncestor.descendant_id == affiliate_id,
+                AffiliateAncestor.descendant_id.in_(below.scalar_subquery()),
+            ),
+        )
+    )
+
+
+def all_ancestry_rows():
+    """SELECT of the full closure, derived from placement links (for rebuilds)."""
+    links = (
+        select(
+            Affiliate.placement_parent_id.label("ancestor_id"),
+            Affiliate.id.label("descendant_id"),
+            literal(1).label("depth"),
+            Affiliate.placement_side.label("side"),
+        )
+        .where(Affiliate.placement_parent_id.isnot(None))
+        .cte("links", recursive=True)
+    )
+    parent = aliased(Affiliate)
+    links = links.union_all(
+        select(
+            parent.placement_parent_id,
+            links.c.descendant_id,
+            links.c.depth + 1,
+            parent.placement_side,
+        )
+        .join(parent, parent.id == links.c.ancestor_id)
+        .where(parent.placement_parent_id.isnot(None), links.c.depth < MAX_UPLINE_DEPTH)
+    )
+    return select(links.c.ancestor_id, links.c.descendant_id, links.c.depth, links.c.side)
@@ -0,0 +1,378 @@
+"""
+Background jobs: work that would time out inside an HTTP request, and the
+batch engines.
+
+An endpoint (or an admin through /jobs) enqueues a BackgroundJob row on a
+queue and returns its id; the runner (`python -m app.worker`) claims it and
+calls the kind's step function repeatedly, one chunk per transaction, until
+the step reports it is done. Each step commits its checkpoint and progress
+with the job row, so nothing is lost to a restart: a job whose heartbeat is
+older than its visibility timeout is claimed again and continues from its
+last committed chunk. A step that raises puts the job back in the queue
+after a backoff until it has used up its attempts. Cancellation is a flag
+checked between chunks; the row lock is only held for that check, and a
+chunk's commit is fenced by the claim token instead.
+
+A kind checks its params before anything is queued (a JobParams function,
+e.g. period_params), so a job never fails on input it was given. A kind
+has at most one unfinished job per period, enforced by a partial unique
+index: enqueue_once and requeue_once return None / False instead of
+a second one, so concurrent requests can't both get past a lookup.
+
+Postgres is the only broker: claims are `FOR UPDATE SKIP LOCKED`, highest
+priority first. With JOB_WAKEUP=redis, enqueueing also pushes a wake-up to
+Redis once the transaction commits so idle workers don't wait out their poll.
+"""
+
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import and_, event, func, literal_column, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.config import settings
+from app.core.background import spawn
+from app.core.cache import begin_invalidation_scope, response_cache
+from app.models.background_job import BackgroundJob
+from app.schemas.job import BackgroundJobResponse
+from app.services.periods import parse_period
+
+logger = logging.getLogger(__name__)
+
+UNFINISHED = ("queued", "running")
+
+# One chunk of a job in the runner's transaction (steps must not commit); True once the job is complete
+JobStep = Callable[[AsyncSession, BackgroundJob], Awaitable[bool]]
+# A kind's params as they will be stored, checked at enqueue time; ValueError if unusable
+JobParams = Callable[[dict[str, Any]], dict[str, Any]]
+
+_SECOND = literal_column("interval '1 second'")
+_redis = None
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def period_params(params: dict[str, Any], *, required: bool = True) -> dict[str, Any]:
+    """`params` once its period parses; with required=False the period may be left out."""
+    if "period" not in params:
+        if required:
+            raise ValueError("params.period is required (YYYY-MM or YYYY-Www)")
+        return params
+    if not isinstance(params["period"], str):
+        raise ValueError("params.period must be a string (YYYY-MM or YYYY-Www)")
+    try:
+        period = parse_period(params["period"])
+    except ValueError as exc:
+        raise ValueError(f"params.period: {exc}") from exc
+    return {**params, "period": period.key}
+
+
+def wakeup_key(queue: str) -> str:
+    return f"jobs:wakeup:{queue}"
+
+
+def redis_client():
+    """The shared Redis connection for job wake-ups (JOB_WAKEUP=redis)."""
+    global _redis
+    if _redis is None:
+        from redis import asyncio as aioredis
+
+        _redis = aioredis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+async def _push_wakeup(queue: str) -> None:
+    try:
+        async with redis_client().pipeline(transaction=False) as pipe:
+            pipe.lpush(wakeup_key(queue), 1)
+            pipe.ltrim(wakeup_key(queue), 0, 99)  # nobody listening: don't grow
+            await pipe.execute()
+    except Exception:
+        # Workers still find the job on their next poll
+        logger.warning("Job wake-up for queue %s failed", queue, exc_info=True)
+
+
+def _wake_on_commit(db: AsyncSession, queue: str) -> None:
+    @event.listens_for(db.sync_session, "after_commit", once=True)
+    def _wake(session) -> None:
+        spawn(_push_wakeup(queue))
+
+
+def enqueue(
+    db: AsyncSession,
+    kind: str,
+    params: dict[str, Any],
+    user_id: uuid.UUID | None = None,
+    *,
+    queue: str = "default",
+    priority: int = 0,
+    max_attempts: int | None = None,
+    visibility_timeout: int | None = None,
+) -> BackgroundJob:
+    job = BackgroundJob(
+        kind=kind,
+        params=params,
+        status="queued",
+        queue=queue,
+        priority=priority,
+        progress_done=0,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        visibility_timeout=visibility_timeout or settings.JOB_STALE_AFTER,
+        cancel_requested=False,
+        created_by_user_id=user_id,
+    )
+    db.add(job)
+    if settings.JOB_WAKEUP == "redis":
+        _wake_on_commit(db, queue)
+    return job
+
+
+async def find_unfinished(db: AsyncSession, kind: str, period: str) -> BackgroundJob | None:
+    """The queued or running job of `kind` for `period`, if any."""
+    result = await db.execute(
+        select(BackgroundJob).where(
+            BackgroundJob.kind == kind,
+            BackgroundJob.params["period"].astext == period,
+            BackgroundJob.status.in_(UNFINISHED),
+        )
+    )
+    return result.scalar_one_or_none()
+
+
+async def enqueue_once(
+    db: AsyncSession, kind: str, params: dict[str, Any], user_id: uuid.UUID | None = None, **options: Any
+) -> BackgroundJob | None:
+    """enqueue() and flush; None (nothing written) if the kind has an unfinished job for the period."""
+    try:
+        async with db.begin_nested():
+            job = enqueue(db, kind, params, user_id, **options)
+            await db.flush()
+    except IntegrityError:
+        return None
+    return job
+
+
+def claimable(queue: str, kinds: list[str]):
+    """The next job of `queue`: highest priority, then oldest.
+
+    Queued jobs count once their retry backoff is over; running ones once
+    their worker stopped sending heartbeats for the job's visibility timeout.
+    """
+    now = func.now()
+    return (
+        select(BackgroundJob)
+        .where(
+            BackgroundJob.queue == queue,
+            BackgroundJob.kind.in_(kinds),
+            or_(
+                and_(
+                    BackgroundJob.status == "queued",
+                    or_(BackgroundJob.run_after.is_(None), BackgroundJob.run_after <= now),
+                ),
+                and_(
+                    BackgroundJob.status == "running",
+                    BackgroundJob.heartbeat_at < now - BackgroundJob.visibility_timeout * _SECOND,
+                ),
+            ),
+        )
+        .order_by(BackgroundJob.priority.desc(), BackgroundJob.created_at)
+        .limit(1)
+        .with_for_update(skip_locked=True)
+    )
+
+
+async def claim_job(db: AsyncSession, queue: str, kinds: list[str]) -> BackgroundJob | None:
+    while True:
+        job = (await db.execute(claimable(queue, kinds))).scalar_one_or_none()
+        if job is None:
+            return None
+        if job.status == "running":
+            if job.attempts >= job.max_attempts:
+                logger.error("Job %s timed out on its last attempt", job.id)
+                job.status = "failed"
+                job.error = f"No heartbeat for {job.visibility_timeout}s on attempt {job.attempts}"
+                job.finished_at = _now()
+                continue
+            logger.warning("Resuming job %s from its last checkpoint", job.id)
+        job.status = "running"
+        job.attempts += 1
+        job.run_after = None
+        job.claim_token = uuid.uuid4()
+        job.heartbeat_at = _now()
+        job.started_at = job.started_at or job.heartbeat_at
+        return job
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next try of a job that has failed `attempts` times."""
+    return timedelta(seconds=settings.JOB_RETRY_BACKOFF * 2 ** max(attempts - 1, 0))
+
+
+def request_cancel(job: BackgroundJob) -> None:
+    """Stop a queued job now, a running one after its current chunk."""
+    job.cancel_requested = True
+    if job.status == "queued":
+        job.status = "cancelled"
+        job.finished_at = _now()
+
+
+def requeue(job: BackgroundJob) -> None:
+    """Queue a failed or cancelled job again, with fresh attempts; it continues from its checkpoint."""
+    job.status = "queued"
+    job.cancel_requested = False
+    job.attempts = 0
+    job.run_after = None
+    job.error = None
+    job.finished_at = None
+
+
+async def requeue_once(db: AsyncSession, job: BackgroundJob) -> bool:
+    """requeue() and flush; False (job unchanged) if its kind has another unfinished job for the period."""
+    try:
+        async with db.begin_nested():
+            requeue(job)
+            await db.flush()
+    except IntegrityError:
+        await db.refresh(job)
+        return False
+    return True
+
+
+def progress(job: BackgroundJob) -> float | None:
+    if not job.progress_total:
+        return 1.0 if job.status == "completed" else None
+    return min(job.progress_done / job.progress_total, 1.0)
+
+
+def job_response(job: BackgroundJob) -> BackgroundJobResponse:
+    response = BackgroundJobResponse.model_validate(job)
+    response.progress = progress(job)
+    return response
+
+
+async def run_job(
+    session_factory: async_sessionmaker, job_id: uuid.UUID, token: uuid.UUID, step: JobStep
+) -> str:
+    """Run a claimed job to the end, one committed chunk at a time.
+
+    Returns its final status, or "retrying" if it failed and was queued again.
+    Stops quietly if another worker took the job over (its token changed).
+
+    The job row is locked only while checking the claim and cancellation
+    before each chunk; the chunk runs in a transaction of its own that
+    commits only if the claim is still ours, so a long chunk doesn't block
+    /cancel and a worker that lost the job can't commit over its new owner.
+    """
+    while True:
+        async with session_factory() as db:
+            job = await db.get(BackgroundJob, job_id, with_for_update=True)
+            if job is None or job.claim_token != token or job.status != "running":
+                return job.status if job is not None else "missing"
+            if job.cancel_requested:
+                job.status = "cancelled"
+                job.finished_at = _now()
+                await db.commit()
+                return "cancelled"
+            job.heartbeat_at = _now()
+            await db.commit()
+
+        async with session_factory() as db:
+            # Steps mark cache tags with invalidate_on_commit, as in a request
+            stale_tags = begin_invalidation_scope()
+            job = await db.get(BackgroundJob, job_id)
+            try:
+                done = await step(db, job)
+            except Exception as exc:
+                logger.exception("Job %s failed", job_id)
+                await db.rollback()
+                return await _fail(session_factory, job_id, token, repr(exc))
+            if not await _commit_if_claimed(db, job_id, token, done):
+                status = await db.scalar(select(BackgroundJob.status).where(BackgroundJob.id == job_id))
+                logger.warning("Job %s was taken over; its chunk was discarded", job_id)
+                return status or "missing"
+        if stale_tags:
+            await response_cache.invalidate(*stale_tags)
+        if done:
+            return "completed"
+
+
+async def _commit_if_claimed(db: AsyncSession, job_id: uuid.UUID, token: uuid.UUID, done: bool) -> bool:
+    """Commit a chunk with its heartbeat if `token` still holds the job; roll it back otherwise."""
+    now = _now()
+    values: dict[str, Any] = {"heartbeat_at": now}
+    if done:
+        values.update(status="completed", finished_at=now)
+    fenced = await db.execute(
+        update(BackgroundJob)
+        .where(
+            BackgroundJob.id == job_id,
+            BackgroundJob.claim_token == token,
+            BackgroundJob.status == "running",
+        )
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if fenced.rowcount != 1:
+        await db.rollback()
+        return False
+    await db.commit()
+    return True
+
+
+async def _fail(session_factory: async_sessionmaker, job_id: uuid.UUID, token: uuid.UUID, error: str) -> str:
+    async with session_factory() as db:
+        job = await db.get(BackgroundJob, job_id, with_for_update=True)
+        if job is None or job.claim_token != token or job.status != "running":
+            # Another worker owns the job now; its outcome is not ours to record
+            return job.status if job is not None else "missing"
+        job.error = error[:2000]
+        if job.attempts < job.max_attempts and not job.cancel_requested:
+            job.status = "queued"
+            job.claim_token = None
+            job.run_after = _now() + retry_delay(job.attempts)
+            outcome = "retrying"
+        else:
+            job.status = "failed"
+            job.finished_at = _now()
+            outcome = "failed"
+        await db.commit()
+        return outcome
+
+
+async def job_stats(db: AsyncSession) -> dict[str, Any]:
+    """Per queue: jobs waiting and running, the oldest wait, and the last hour's outcomes."""
+    now = _now()
+    result = await db.execute(
+        select(
+            BackgroundJob.queue,
+            BackgroundJob.status,
+            func.count(),
+            func.min(BackgroundJob.created_at),
+        )
+        .where(
+            or_(
+                BackgroundJob.status.in_(UNFINISHED),
+                BackgroundJob.finished_at >= now - timedelta(hours=1),
+            )
+        )
+        .group_by(BackgroundJob.queue, BackgroundJob.status)
+    )
+    queues: dict[str, dict[str, Any]] = {
+        queue: {"concurrency": slots} for queue, slots in settings.JOB_QUEUES.items()
+    }
+    for queue, status, count, oldest in result.all():
+        stats = queues.setdefault(queue, {"concurrency": 0})
+        if status in UNFINISHED:
+            stats[status] = count
+            if status == "queued":
+                stats["oldest_queued_seconds"] = round((now - oldest).total_seconds(), 1)
+        else:
+            stats[f"{status}_last_hour"] = count
+    return {"queues": queues}
@@ -0,0 +1,122 @@
+"""
+Commission accrual.
+
+Direct sponsorship (flujos.md §8): when an enrollment order is paid, its
+sponsor earns total_bv x DIRECT_SPONSORSHIP_RATE as a commission pending
+liquidation, provided the sponsor is active and has the minimum own PV in
+the period. Runs from the outbox worker, a batch of `order.paid` events at a
+time; the unique (order_id, bonus_type) key makes re-delivery harmless.
+"""
+
+import uuid
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.affiliate import Affiliate
+from app.models.commission import Commission
+from app.models.order import Order
+from app.models.outbox import OutboxEvent
+from app.services.network_stats import is_active
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.periods import parse_period
+
+DIRECT_SPONSORSHIP = "direct_sponsorship"
+CENT = Decimal("0.01")
+
+
+def commission_amount(base: Decimal, rate: Decimal) -> Decimal:
+    return (base * rate).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+async def insert_commissions(db: AsyncSession, rows: list[dict[str, Any]]) -> None:
+    """Bulk insert; rows for an (order, bonus type) that already has one are skipped."""
+    if not rows:
+        return
+    await db.execute(
+        insert(Commission)
+        .values(rows)
+        .on_conflict_do_nothing(index_elements=["order_id", "bonus_type"])
+    )
+
+
+async def _own_pv(db: AsyncSession, affiliate_ids: set[uuid.UUID], period_key: str) -> dict[uuid.UUID, Decimal]:
+    period = parse_period(period_key)
+    result = await db.execute(
+        select(Order.affiliate_id, func.sum(Order.total_pv))
+        .where(
+            Order.affiliate_id.in_(affiliate_ids),
+            Order.paid_at >= period.start,
+            Order.paid_at < period.end,
+            Order.status.in_(CREDITED_ORDER_STATUSES),
+        )
+        .group_by(Order.affiliate_id)
+    )
+    return dict(result.all())
+
+
+def direct_sponsorship_rows(
+    payloads: list[dict[str, Any]],
+    eligible: set[tuple[uuid.UUID, str]],
+    rate: Decimal,
+) -> list[dict[str, Any]]:
+    """Commission rows for enrollment payloads whose (sponsor, period) is eligible."""
+    rows = []
+    for p in payloads:
+        sponsor_id = uuid.UUID(p["sponsor_id"])
+        if (sponsor_id, p["period"]) not in eligible:
+            continue
+        base = Decimal(p["total_bv"])
+        rows.append(
+            {
+                "id": uuid.uuid4(),
+                "tenant_id": uuid.UUID(p["tenant_id"]) if p.get("tenant_id") else None,
+                "affiliate_id": sponsor_id,
+                "source_affiliate_id": uuid.UUID(p["affiliate_id"]),
+                "order_id": uuid.UUID(p["order_id"]),
+                "bonus_type": DIRECT_SPONSORSHIP,
+                "period": p["period"],
+                "status": "pending_liquidation",
+                "base_bv": base,
+                "rate": rate,
+                "amount": commission_amount(base, rate),
+            }
+        )
+    return rows
+
+
+async def accrue_direct_sponsorship(db: AsyncSession, events: list[OutboxEvent]) -> None:
+    """Outbox handler for `order.paid`: direct sponsorship bonus for enrollment orders."""
+    payloads = [
+        e.payload
+        for e in events
+        if e.payload.get("order_type") == "enrollment" and e.payload.get("sponsor_id")
+    ]
+    if not payloads:
+        return
+
+    sponsor_ids = {uuid.UUID(p["sponsor_id"]) for p in payloads}
+    result = await db.execute(
+        select(Affiliate.id, Affiliate.status).where(
+            Affiliate.id.in_(sponsor_ids), Affiliate.deleted_at.is_(None)
+        )
+    )
+    active = {affiliate_id for affiliate_id, status in result.all() if is_active(status)}
+
+    min_pv = settings.DIRECT_SPONSORSHIP_MIN_PV
+    eligible: set[tuple[uuid.UUID, str]] = set()
+    for period_key in {p["period"] for p in payloads}:
+        if min_pv > 0:
+            pv = await _own_pv(db, active, period_key)
+            qualified = {a for a in active if pv.get(a, 0) >= min_pv}
+        else:
+            qualified = active
+        eligible.update((a, period_key) for a in qualified)
+
+    await insert_commissions(
+        db, direct_sponsorship_rows(payloads, eligible, settings.DIRECT_SPONSORSHIP_RATE)
+    )
@@ -0,0 +1,168 @@
+"""
+Tree compression: close the holes that cancelled and deleted affiliates leave
+in the binary tree.
+
+A removed node keeps its position, and tree walks never descend through a
+deleted one, so its downline disappears from its upline's view. Compressing
+a node promotes one of its live children into its position (by a
+configurable rule), re-places the other child under the promoted one and
+detaches the removed node. If a newer node was placed in the removed
+node's slot meanwhile, the promoted child goes to the bottom of that same
+leg instead. Volume and counters are re-attributed with the
+same set-based upline shifts as an admin move.
+"""
+
+import uuid
+from collections.abc import Mapping
+from decimal import Decimal
+from typing import Any, Literal
+
+from sqlalchemy import exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.cache import invalidate_on_commit
+from app.models.affiliate import Affiliate
+from app.models.audit_log import AuditLog
+from app.models.order import Order
+from app.services.group_volume import PLACEMENT_TAG
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.placement import bottom_of_outer_leg
+from app.services.subtree_move import lock_paths, reattach
+
+CompressionRule = Literal["left_first", "stronger_leg"]
+
+# Live affiliates in these statuses are compressed like deleted ones
+REMOVED_STATUSES = ("cancelled",)
+
+
+def removed_with_live_children(limit: int | None):
+    """Removed nodes that still hide at least one live child, at most `limit` of them (all with None).
+
+    Compressing a node removes it from this selection, so re-running the
+    query is how the job resumes.
+    """
+    child = aliased(Affiliate)
+    return (
+        select(Affiliate.id)
+        .where(
+            or_(Affiliate.deleted_at.isnot(None), Affiliate.status.in_(REMOVED_STATUSES)),
+            exists().where(
+                child.placement_parent_id == Affiliate.id,
+                child.deleted_at.is_(None),
+            ),
+        )
+        .order_by(Affiliate.id)
+        .limit(limit)
+    )
+
+
+def pick_promoted(
+    children: list[Affiliate], rule: CompressionRule, own_bv: Mapping[uuid.UUID, Decimal] | None = None
+) -> Affiliate:
+    """The child that takes the removed node's position.
+
+    stronger_leg compares the volume each child brings along: its own
+    credited BV (`own_bv`) plus both of its legs.
+    """
+    if rule == "stronger_leg":
+        own_bv = own_bv or {}
+        return max(children, key=lambda c: own_bv.get(c.id, 0) + c.bv_left_total + c.bv_right_total)
+    return next((c for c in children if c.placement_side == "left"), children[0])
+
+
+async def own_credited_bvs(db: AsyncSession, affiliate_ids: list[uuid.UUID]) -> dict[uuid.UUID, Decimal]:
+    """Lifetime credited BV of each affiliate's own orders (subtree_move.own_credited_bv for many)."""
+    result = await db.execute(
+        select(Order.affiliate_id, func.sum(Order.total_bv))
+        .where(Order.affiliate_id.in_(affiliate_ids), Order.status.in_(CREDITED_ORDER_STATUSES))
+        .group_by(Order.affiliate_id)
+    )
+    return dict(result.all())
+
+
+async def compress_node(
+    db: AsyncSession,
+    node_id: uuid.UUID,
+    rule: CompressionRule,
+    user_id: uuid.UUID | None = None,
+) -> dict[str, Any] | None:
+    """Compress one removed node. Returns what moved, or None if nothing is left to do."""
+    result = await db.execute(select(Affiliate).where(Affiliate.id == node_id).with_for_update())
+    node = result.scalar_one_or_none()
+    if node is None:
+        return None
+    result = await db.execute(
+        select(Affiliate)
+        .where(Affiliate.placement_parent_id == node_id, Affiliate.deleted_at.is_(None))
+        .order_by(Affiliate.placement_side)
+        .with_for_update()
+    )
+    children = list(result.scalars())
+    if not children:
+        return None
+
+    parent_id, side = node.placement_parent_id, node.placement_side
+    locked = await lock_paths(db, (parent_id, side))
+    # Placement treats a deleted node's slot as free, so a newer live node may hold it
+    occupant = None
+    if parent_id is not None and side is not None:
+        result = await db.execute(
+            select(Affiliate.id)
+            .where(
+                Affiliate.placement_parent_id == parent_id,
+                Affiliate.placement_side == side,
+                Affiliate.deleted_at.is_(None),
+                Affiliate.id != node.id,
+            )
+            .with_for_update()
+        )
+        occupant = result.scalar_one_or_none()
+
+    own_bv = await own_credited_bvs(db, [c.id for c in children]) if rule == "stronger_leg" else None
+    promoted = pick_promoted(children, rule, own_bv)
+    await reattach(db, node, None, None)
+    if occupant is None:
+        promoted_to = {"parent_id": str(parent_id) if parent_id else None, "side": side}
+        await reattach(db, promoted, parent_id, side)
+    else:
+        # Same leg of the parent, below the node that took the slot
+        slot = await bottom_of_outer_leg(db, occupant, side)
+        promoted_to = {"parent_id": str(slot.parent_id), "side": slot.side}
+        await reattach(db, promoted, slot.parent_id, slot.side)
+    relocated = []
+    for other in children:
+        if other is promoted:
+            continue
+        slot = await bottom_of_outer_leg(db, promoted.id, other.placement_side)
+        await reattach(db, other, slot.parent_id, slot.side)
+        relocated.append(
+            {"affiliate_id": str(other.id), "parent_id": str(slot.parent_id), "side": slot.side}
+        )
+
+    changes = {
+        "promoted_id": str(promoted.id),
+        "promoted_to": promoted_to,
+        "relocated": relocated,
+        "rule": rule,
+    }
+    db.add(
+        AuditLog(
+            tenant_id=node.tenant_id,
+            user_id=user_id,
+            action="affiliate.compress",
+            resource_type="affiliate",
+            resource_id=node.id,
+            old_values={
+                "placement_parent_id": str(parent_id) if parent_id else None,
+                "placement_side": side,
+            },
+            new_values={"placement_parent_id": None, "placement_side": None, **changes},
+        )
+    )
+    await db.flush()
+    invalidate_on_commit(PLACEMENT_TAG)
+    return {
+        **changes,
+        "affected_ids": [node.id, *(c.id for c in children), *locked, *filter(None, [occupant])],
+    }
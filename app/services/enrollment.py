@@ -10,7 +10,12 @@ from fastapi import HTTPException, status
 from sqlalchemy import select, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import invalidate_on_commit
 from app.core.security import hash_password
+from app.services.ancestry import attach_ancestry
+from app.services.network_stats import on_enrolled
+from app.services.placement import reserve_slot
+from app.services.rollups import record_enrollment
 from app.services.username import generate_username
 from app.models.affiliate import Affiliate
 from app.models.associations import user_roles
@@ -86,14 +91,24 @@ async def enroll_affiliate(
                 detail="Sponsor is required",
             )
 
-    # 2. Validate placement position is available (if provided)
-    if request.placement_parent_id:
-        # Check parent exists
+    # 2. Resolve the placement position: auto-place by strategy (locks the
+    #    chosen parent row) or validate the explicit one
+    placement_parent_id = request.placement_parent_id
+    placement_side = request.placement_side
+    if request.placement_strategy:
+        slot = await reserve_slot(
+            db, request.placement_parent_id or request.sponsor_id, request.placement_strategy
+        )
+        placement_parent_id, placement_side = slot.parent_id, slot.side
+    elif placement_parent_id:
+        # Check parent exists; lock it so a concurrent enrollment can't take the same side
         result = await db.execute(
-            select(Affiliate).where(
-                Affiliate.id == request.placement_parent_id,
+            select(Affiliate)
+            .where(
+                Affiliate.id == placement_parent_id,
                 Affiliate.deleted_at.is_(None),
             )
+            .with_for_update()
         )
         parent = result.scalar_one_or_none()
         if parent is None:
@@ -105,15 +120,15 @@ async def enroll_affiliate(
         # Check position is not taken
         result = await db.execute(
             select(Affiliate).where(
-                Affiliate.placement_parent_id == request.placement_parent_id,
-                Affiliate.placement_side == request.placement_side,
+                Affiliate.placement_parent_id == placement_parent_id,
+                Affiliate.placement_side == placement_side,
                 Affiliate.deleted_at.is_(None),
             )
         )
         if result.scalar_one_or_none() is not None:
             raise HTTPException(
                 status_code=status.HTTP_409_CONFLICT,
-                detail=f"Position '{request.placement_side}' under this parent is already taken",
+                detail=f"Position '{placement_side}' under this parent is already taken",
             )
 
     # 3. Check email uniqueness (in both users and affiliates tables)
@@ -206,13 +221,16 @@ async def enroll_affiliate(
         state_province=request.state_province,
         postal_code=request.postal_code,
         sponsor_id=request.sponsor_id,
-        placement_parent_id=request.placement_parent_id,
-        placement_side=request.placement_side,
+        placement_parent_id=placement_parent_id,
+        placement_side=placement_side,
         kit_tier=request.kit_tier,
         status="pending",
     )
     db.add(affiliate)
     await db.flush()  # get affiliate.id
+    await on_enrolled(db, affiliate)
+    await attach_ancestry(db, affiliate.id, placement_parent_id, placement_side)
+    await record_enrollment(db, affiliate)
 
     # 8. Create enrollment order
     order_item = OrderItem(
@@ -252,6 +270,9 @@ async def enroll_affiliate(
             "email": request.email,
             "kit_tier": request.kit_tier,
             "sponsor_id": str(request.sponsor_id) if request.sponsor_id else None,
+            "placement_parent_id": str(placement_parent_id) if placement_parent_id else None,
+            "placement_side": placement_side,
+            "placement_strategy": request.placement_strategy,
             "order_number": order_number,
         },
     )
@@ -259,6 +280,8 @@ async def enroll_affiliate(
 
     await db.flush()
 
+    invalidate_on_commit("tree")
+
     # Refresh to eager-load relationships (items -> product) for serialization
     await db.refresh(order, ["items"])
     for item in order.items:
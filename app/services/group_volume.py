@@ -0,0 +1,148 @@
+"""
+Group volume (GV): the PV/BV of paid orders placed anywhere in an affiliate's
+left and right legs within a time window.
+
+One grouped query per request, for any number of affiliates: the closure
+table yields each affiliate's descendants with their leg, and the covering
+index on orders(affiliate_id, paid_at) answers the window from the index
+alone. Closed periods only change when the tree is re-shaped: they are read
+from the period snapshot once one is captured, and until then memoized per
+affiliate in the cache backend for GROUP_VOLUME_MEMO_TTL. Only named periods
+are memoized (a custom range would let callers mint keys at will), and the
+keys carry the version of the "placement" tag, which moves and compression
+bump.
+"""
+
+import logging
+import uuid
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import response_cache
+from app.models.affiliate import Affiliate
+from app.models.ancestry import AffiliateAncestor
+from app.models.order import Order
+from app.schemas.affiliate import GroupVolume
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.periods import Period, parse_period
+from app.services.snapshots import served_from_snapshot, snapshot_group_volume
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever a subtree changes position, which re-shapes historic legs
+PLACEMENT_TAG = "placement"
+
+
+def group_volume_query(affiliate_ids: list[uuid.UUID], period: Period):
+    return (
+        select(
+            AffiliateAncestor.ancestor_id,
+            AffiliateAncestor.side,
+            func.sum(Order.total_pv),
+            func.sum(Order.total_bv),
+        )
+        .join(
+            Order,
+            and_(
+                Order.affiliate_id == AffiliateAncestor.descendant_id,
+                Order.paid_at >= period.start,
+                Order.paid_at < period.end,
+                Order.status.in_(CREDITED_ORDER_STATUSES),
+            ),
+        )
+        .where(AffiliateAncestor.ancestor_id.in_(affiliate_ids), AffiliateAncestor.side.isnot(None))
+        .group_by(AffiliateAncestor.ancestor_id, AffiliateAncestor.side)
+    )
+
+
+async def compute_group_volume(
+    db: AsyncSession, affiliate_ids: list[uuid.UUID], period: Period
+) -> dict[uuid.UUID, GroupVolume]:
+    volumes = {a: GroupVolume(affiliate_id=a) for a in affiliate_ids}
+    if not affiliate_ids:
+        return volumes
+    for ancestor_id, side, pv, bv in await db.execute(group_volume_query(affiliate_ids, period)):
+        setattr(volumes[ancestor_id], f"{side}_pv", pv)
+        setattr(volumes[ancestor_id], f"{side}_bv", bv)
+    return volumes
+
+
+def _memo_key(period: Period, version: int, affiliate_id: uuid.UUID) -> str:
+    return f"gv:{period.key}:{version}:{affiliate_id}"
+
+
+def _named(period: Period) -> bool:
+    try:
+        parse_period(period.key)
+    except ValueError:
+        return False
+    return True
+
+
+async def visible_affiliates(
+    db: AsyncSession, affiliate_ids: list[uuid.UUID], scope_affiliate_id: uuid.UUID | None
+) -> list[uuid.UUID]:
+    """The requested affiliates that exist and, for a distributor, sit in their downline."""
+    stmt = select(Affiliate.id).where(
+        Affiliate.id.in_(affiliate_ids), Affiliate.deleted_at.is_(None)
+    )
+    if scope_affiliate_id is not None:
+        stmt = stmt.where(
+            or_(
+                Affiliate.id == scope_affiliate_id,
+                exists().where(
+                    AffiliateAncestor.ancestor_id == scope_affiliate_id,
+                    AffiliateAncestor.descendant_id == Affiliate.id,
+                ),
+            )
+        )
+    found = set((await db.execute(stmt)).scalars())
+    return [a for a in dict.fromkeys(affiliate_ids) if a in found]
+
+
+async def get_group_volume(
+    db: AsyncSession, affiliate_ids: list[uuid.UUID], period: Period
+) -> list[GroupVolume]:
+    """GV per affiliate for `period`, in input order.
+
+    Closed periods come from their snapshot, or are memoized if none was taken.
+    """
+    if not period.closed:
+        volumes = await compute_group_volume(db, affiliate_ids, period)
+        return [volumes[a] for a in affiliate_ids]
+    if await served_from_snapshot(db, period):
+        return await snapshot_group_volume(db, affiliate_ids, period)
+    if not _named(period):
+        volumes = await compute_group_volume(db, affiliate_ids, period)
+        return [volumes[a] for a in affiliate_ids]
+
+    backend = response_cache.backend
+    try:
+        (version,) = await response_cache.tag_versions([PLACEMENT_TAG])
+        stored = await backend.mget([_memo_key(period, version, a) for a in affiliate_ids])
+    except Exception:
+        logger.warning("Group volume memo lookup failed", exc_info=True)
+        version, stored = None, [None] * len(affiliate_ids)
+
+    volumes = {
+        a: GroupVolume.model_validate_json(raw)
+        for a, raw in zip(affiliate_ids, stored)
+        if raw is not None
+    }
+    missing = [a for a in affiliate_ids if a not in volumes]
+    computed = await compute_group_volume(db, missing, period)
+    if version is not None:
+        for affiliate_id, volume in computed.items():
+            try:
+                await backend.set(
+                    _memo_key(period, version, affiliate_id),
+                    volume.model_dump_json().encode(),
+                    settings.GROUP_VOLUME_MEMO_TTL,
+                )
+            except Exception:
+                logger.warning("Group volume memo write failed", exc_info=True)
+                break
+    volumes.update(computed)
+    return [volumes[a] for a in affiliate_ids]
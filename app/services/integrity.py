@@ -0,0 +1,129 @@
+"""
+Genealogy integrity checks.
+
+The schema only rejects self-sponsorship and self-placement. Everything else
+that breaks the binary tree — cycles, a third child, two children on the same
+side, live children under a deleted parent — is found here, in linear time
+over the in-memory network and without recursion, so arbitrarily deep trees
+are fine.
+"""
+
+import asyncio
+import uuid
+from array import array
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.network_snapshot import LEFT, NO_SIDE, NetworkArrays, load_network
+
+# Each issue list in the report is cut to this many entries (counts stay exact)
+DEFAULT_LIMIT = 100
+
+_NEW, _ON_PATH, _DONE = 0, 1, 2
+
+
+def find_cycles(links: array) -> list[list[int]]:
+    """Every cycle in a parent-pointer array (-1 = no parent), each as a list of positions.
+
+    Walks each unvisited node up its chain, marking the path; reaching a node
+    already on the current path closes a cycle. Every node is visited once.
+    """
+    state = bytearray(len(links))
+    cycles = []
+    for start in range(len(links)):
+        if state[start] != _NEW:
+            continue
+        path = []
+        node = start
+        while node >= 0 and state[node] == _NEW:
+            state[node] = _ON_PATH
+            path.append(node)
+            node = links[node]
+        if node >= 0 and state[node] == _ON_PATH:
+            cycles.append(path[path.index(node) :])
+        for visited in path:
+            state[visited] = _DONE
+    return cycles
+
+
+def check_network(net: NetworkArrays, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+    """Machine-readable report of every structural problem in `net`."""
+    n = len(net)
+    parent, side, live = net.parent, net.side, net.live
+    ids = net.ids
+
+    # Per parent: live children seen so far, and which sides they took (bit 1 left, 2 right)
+    child_count = array("q", bytes(8 * n))
+    sides_taken = bytearray(n)
+    duplicate_sides = []
+    orphans = []
+    inconsistent_side = []
+    for i in range(n):
+        p = parent[i]
+        if p < 0:
+            if side[i] != NO_SIDE:
+                inconsistent_side.append(
+                    {"affiliate_id": ids[i], "problem": "side_without_parent"}
+                )
+            continue
+        if not live[i]:
+            continue
+        if not live[p]:
+            orphans.append({"affiliate_id": ids[i], "deleted_parent_id": ids[p]})
+        child_count[p] += 1
+        if side[i] == NO_SIDE:
+            inconsistent_side.append({"affiliate_id": ids[i], "problem": "parent_without_side"})
+            continue
+        bit = 1 if side[i] == LEFT else 2
+        if sides_taken[p] & bit:
+            duplicate_sides.append(
+                {
+                    "parent_id": ids[p],
+                    "affiliate_id": ids[i],
+                    "side": "left" if side[i] == LEFT else "right",
+                }
+            )
+        sides_taken[p] |= bit
+
+    too_many_children = [
+        {"parent_id": ids[p], "children": child_count[p]} for p in range(n) if child_count[p] > 2
+    ]
+    placement_cycles = [[ids[i] for i in cycle] for cycle in find_cycles(parent)]
+    sponsor_cycles = [[ids[i] for i in cycle] for cycle in find_cycles(net.sponsor)]
+
+    issues = {
+        "placement_cycles": placement_cycles,
+        "sponsor_cycles": sponsor_cycles,
+        "too_many_children": too_many_children,
+        "duplicate_sides": duplicate_sides,
+        "children_of_deleted_parents": orphans,
+        "inconsistent_side": inconsistent_side,
+    }
+    return {
+        "checked_at": datetime.now(timezone.utc).isoformat(),
+        "affiliates": n,
+        "live_affiliates": sum(live),
+        "ok": not any(issues.values()),
+        "issues": {
+            name: {"count": len(items), "items": _jsonable(items[:limit])}
+            for name, items in issues.items()
+        },
+    }
+
+
+async def run_integrity_check(db: AsyncSession, limit: int = DEFAULT_LIMIT) -> dict[str, Any]:
+    """Load the network, then check it in a worker thread so the event loop keeps serving."""
+    net = await load_network(db)
+    return await asyncio.to_thread(check_network, net, limit)
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    return value
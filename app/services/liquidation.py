@@ -0,0 +1,187 @@
+"""
+Pre-liquidation report (modulos.md §5.2, step 5): what every live affiliate
+would be paid for a period, per bonus type, for review before approval.
+
+Built by the background job worker in chunks of LIQUIDATION_CHUNK_SIZE
+affiliates in id order. Each chunk is rendered as CSV and appended to the
+output file as its own gzip member (concatenated members are still one valid
+.csv.gz), and the file offset after it is saved in the job's checkpoint. A
+resumed job truncates the file back to that offset first, so a chunk that
+was written but never committed is simply written again.
+
+The report only pivots commissions already in the table, so a preview is
+refused (missing_commission_runs) until the period's bonuses have been
+accrued: every `order.paid` event of the period delivered, and the unilevel
+job run to completion.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import os
+import uuid
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import and_, exists, func, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.affiliate import Affiliate
+from app.models.background_job import BackgroundJob
+from app.models.commission import Commission
+from app.models.outbox import OutboxEvent
+from app.services.commissions import DIRECT_SPONSORSHIP
+from app.services.periods import Period, parse_period
+from app.services.unilevel import UNILEVEL, UNILEVEL_KIND
+
+PREVIEW_KIND = "liquidation_preview"
+PREVIEW_QUEUE = "reports"
+
+# One report column per bonus type; anything else lands in "other"
+BONUS_TYPES = (DIRECT_SPONSORSHIP, UNILEVEL)
+PAYABLE_STATUSES = ("pending_liquidation", "approved")
+
+TEXT_COLUMNS = ("affiliate_id", "affiliate_code", "first_name", "last_name", "status", "current_rank")
+AMOUNT_COLUMNS = (*BONUS_TYPES, "other", "total")
+
+
+def preview_path(job: BackgroundJob) -> Path:
+    return Path(settings.REPORTS_DIR) / "liquidations" / f"{job.params['period']}-{job.id}.csv.gz"
+
+
+async def missing_commission_runs(db: AsyncSession, period: Period) -> list[str]:
+    """Bonus types whose commissions for the period are not all written yet.
+
+    Direct sponsorship is incomplete while any of the period's `order.paid`
+    events is undelivered (or parked). Unilevel is accrued once a job of its
+    kind completed a written run for the period, which also covers a run that
+    paid nobody; a period that already has unilevel rows (written from the
+    command line, or locked by approval) counts as accrued too.
+    """
+    undelivered = exists().where(
+        OutboxEvent.event_type == "order.paid",
+        OutboxEvent.processed_at.is_(None),
+        OutboxEvent.payload["period"].astext == period.key,
+    )
+    unilevel_run = exists().where(
+        BackgroundJob.kind == UNILEVEL_KIND,
+        BackgroundJob.status == "completed",
+        BackgroundJob.params["period"].astext == period.key,
+        BackgroundJob.result["written"].as_boolean().is_(True),
+    )
+    unilevel_rows = exists().where(Commission.bonus_type == UNILEVEL, Commission.period == period.key)
+    unilevel = or_(unilevel_run, unilevel_rows)
+    row = (await db.execute(select(undelivered.label("undelivered"), unilevel.label("unilevel")))).one()
+    missing = []
+    if row.undelivered:
+        missing.append(DIRECT_SPONSORSHIP)
+    if not row.unilevel:
+        missing.append(UNILEVEL)
+    return missing
+
+
+def preview_chunk_query(period: Period, after: str | None, limit: int):
+    """Live affiliates after `after` (by id) with their payable commissions pivoted by bonus type."""
+    amount = func.coalesce(func.sum(Commission.amount), 0)
+    by_type = [
+        func.coalesce(func.sum(Commission.amount).filter(Commission.bonus_type == t), 0).label(t)
+        for t in BONUS_TYPES
+    ]
+    other = func.coalesce(
+        func.sum(Commission.amount).filter(Commission.bonus_type.notin_(BONUS_TYPES)), 0
+    ).label("other")
+    stmt = (
+        select(
+            Affiliate.id,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            Affiliate.status,
+            Affiliate.current_rank,
+            *by_type,
+            other,
+            amount.label("total"),
+        )
+        .outerjoin(
+            Commission,
+            and_(
+                Commission.affiliate_id == Affiliate.id,
+                Commission.period == period.key,
+                Commission.status.in_(PAYABLE_STATUSES),
+            ),
+        )
+        .where(Affiliate.deleted_at.is_(None))
+        .group_by(Affiliate.id)
+        .order_by(Affiliate.id)
+        .limit(limit)
+    )
+    if after is not None:
+        stmt = stmt.where(Affiliate.id > uuid.UUID(after))
+    return stmt
+
+
+def render_chunk(rows: list[Any], header: bool) -> bytes:
+    """One gzip member holding the chunk's CSV lines."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(TEXT_COLUMNS + AMOUNT_COLUMNS)
+    writer.writerows(rows)
+    return gzip.compress(buffer.getvalue().encode("utf-8"))
+
+
+def append_at(path: Path, offset: int, data: bytes) -> int:
+    """Cut the file back to `offset`, append `data` durably and return the new size."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "r+b" if path.exists() else "w+b") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+        return f.tell()
+
+
+def _add_totals(totals: dict[str, str], rows: list[Any]) -> dict[str, str]:
+    start = len(TEXT_COLUMNS)
+    sums = {name: Decimal(totals.get(name, "0")) for name in AMOUNT_COLUMNS}
+    payees = int(totals.get("payees", 0))
+    for row in rows:
+        for k, name in enumerate(AMOUNT_COLUMNS):
+            sums[name] += row[start + k]
+        payees += row[-1] > 0
+    return {**{name: str(value) for name, value in sums.items()}, "payees": payees}
+
+
+async def preview_step(db: AsyncSession, job: BackgroundJob) -> bool:
+    """Render the next chunk of the report; True once every affiliate is in it."""
+    period = parse_period(job.params["period"])
+    checkpoint = job.checkpoint or {"after": None, "offset": 0, "totals": {}}
+    if job.progress_total is None:
+        job.progress_total = (
+            await db.execute(select(func.count()).where(Affiliate.deleted_at.is_(None)))
+        ).scalar_one()
+
+    chunk = settings.LIQUIDATION_CHUNK_SIZE
+    rows = list((await db.execute(preview_chunk_query(period, checkpoint["after"], chunk))).all())
+    path = preview_path(job)
+    data = render_chunk(rows, header=checkpoint["offset"] == 0)
+    offset = await asyncio.to_thread(append_at, path, checkpoint["offset"], data)
+
+    totals = _add_totals(checkpoint["totals"], rows)
+    # Reassigned, not mutated, so the JSONB column is flagged dirty
+    job.checkpoint = {
+        "after": str(rows[-1][0]) if rows else checkpoint["after"],
+        "offset": offset,
+        "totals": totals,
+    }
+    job.progress_done += len(rows)
+    if len(rows) == chunk:
+        return False
+
+    job.output_path = str(path)
+    job.result = {"period": period.key, "affiliates": job.progress_done, "bytes": offset, **totals}
+    return True
@@ -0,0 +1,145 @@
+"""
+Compact in-memory copy of the whole network for bulk jobs.
+
+Recomputing counters, rebuilding volume or checking tree integrity one
+recursive query per affiliate doesn't scale to a million nodes. Instead the
+jobs stream the affiliates table once into flat typed arrays indexed by row
+position (parent, side, sponsor, flags) and walk those in linear time.
+"""
+
+import uuid
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.affiliate import Affiliate
+
+# Encoding of placement_side in NetworkArrays.side
+NO_SIDE, LEFT, RIGHT = -1, 0, 1
+_SIDES = {None: NO_SIDE, "left": LEFT, "right": RIGHT}
+
+STREAM_BATCH = 50_000
+
+
+@dataclass
+class NetworkArrays:
+    """The network as parallel arrays; index -1 means "none"."""
+
+    ids: list[uuid.UUID]
+    index: dict[uuid.UUID, int]
+    parent: array  # placement parent position
+    side: array  # NO_SIDE / LEFT / RIGHT
+    sponsor: array  # sponsor position
+    live: bytearray  # 1 unless soft-deleted
+    active: bytearray  # 1 if status == 'active'
+    extra: dict[str, list[Any]] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _linked(self, i: int, live_only: bool) -> bool:
+        return not live_only or (self.live[i] and self.live[self.parent[i]])
+
+    def children(self, live_only: bool = True) -> tuple[array, array]:
+        """Placement children as CSR: children of i are child[offset[i]:offset[i + 1]].
+
+        With `live_only`, links from or to a deleted node are left out.
+        """
+        n = len(self)
+        offset = array("q", bytes(8 * (n + 1)))
+        for i in range(n):
+            p = self.parent[i]
+            if p >= 0 and self._linked(i, live_only):
+                offset[p + 1] += 1
+        for i in range(n):
+            offset[i + 1] += offset[i]
+        fill = array("q", offset)
+        child = array("q", bytes(8 * offset[n]))
+        for i in range(n):
+            p = self.parent[i]
+            if p >= 0 and self._linked(i, live_only):
+                child[fill[p]] = i
+                fill[p] += 1
+        return offset, child
+
+    def roots(self, live_only: bool = True) -> list[int]:
+        """Nodes with no placement parent (with `live_only`: live nodes with no live parent)."""
+        if not live_only:
+            return [i for i in range(len(self)) if self.parent[i] < 0]
+        return [
+            i
+            for i in range(len(self))
+            if self.live[i] and (self.parent[i] < 0 or not self.live[self.parent[i]])
+        ]
+
+    def top_down_order(self, live_only: bool = True) -> array:
+        """Breadth-first order from the roots: every node after its parent.
+
+        Nodes caught in a placement cycle are never reached.
+        """
+        offset, child = self.children(live_only)
+        order = array("q", self.roots(live_only))
+        head = 0
+        while head < len(order):
+            i = order[head]
+            head += 1
+            order.extend(child[offset[i] : offset[i + 1]])
+        return order
+
+
+async def load_network(
+    db: AsyncSession,
+    extra_columns: Sequence[Any] = (),
+    *,
+    batch_size: int = STREAM_BATCH,
+) -> NetworkArrays:
+    """Stream every affiliate (deleted ones included) into NetworkArrays.
+
+    `extra_columns` are added to the same scan and kept as plain lists under
+    their column key in `extra` (e.g. the stored counters to diff against).
+    """
+    ids: list[uuid.UUID] = []
+    parent_ids: list[uuid.UUID | None] = []
+    sponsor_ids: list[uuid.UUID | None] = []
+    side = array("b")
+    live = bytearray()
+    active = bytearray()
+    extra: dict[str, list[Any]] = {col.key: [] for col in extra_columns}
+    extra_lists = list(extra.values())
+
+    stmt = select(
+        Affiliate.id,
+        Affiliate.placement_parent_id,
+        Affiliate.placement_side,
+        Affiliate.sponsor_id,
+        Affiliate.status,
+        Affiliate.deleted_at.is_(None),
+        *extra_columns,
+    ).execution_options(yield_per=batch_size)
+    result = await db.stream(stmt)
+    async for partition in result.partitions():
+        for row in partition:
+            ids.append(row[0])
+            parent_ids.append(row[1])
+            side.append(_SIDES.get(row[2], NO_SIDE))
+            sponsor_ids.append(row[3])
+            active.append(row[4] == "active")
+            live.append(bool(row[5]))
+            for values, value in zip(extra_lists, row[6:]):
+                values.append(value)
+
+    index = {affiliate_id: i for i, affiliate_id in enumerate(ids)}
+    return NetworkArrays(
+        ids=ids,
+        index=index,
+        parent=array("q", (index.get(p, -1) if p is not None else -1 for p in parent_ids)),
+        side=side,
+        sponsor=array("q", (index.get(s, -1) if s is not None else -1 for s in sponsor_ids)),
+        live=live,
+        active=active,
+        extra=extra,
+    )
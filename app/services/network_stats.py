@@ -0,0 +1,191 @@
+"""
+Network counters: leg sizes, actives per leg and active direct sponsees.
+
+Every affiliate stores counters for its live placement subtree, so qualification
+checks ("one active per leg") and the viewers never have to scan a subtree.
+They are kept current incrementally: each event touches only the ancestor
+chain, with one set-based UPDATE over a recursive CTE, and marks the cached
+detail of every affiliate it touched stale. `recompute_counters`
+rebuilds them from scratch for the drift check in `app.jobs.network_counters`.
+
+A soft-deleted affiliate drops out of the tree together with everything placed
+below it (tree walks never descend through a deleted node), so removal
+subtracts the node's whole subtree from its ancestors. A node placed without
+a side is in neither leg of its parent, and neither it nor anything below it
+is counted by the ancestors above.
+"""
+
+import uuid
+from array import array
+
+from sqlalchemy import String, case, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.core.cache import invalidate_on_commit
+from app.models.affiliate import Affiliate
+from app.services.network_snapshot import LEFT, NO_SIDE, NetworkArrays
+from app.services.tree import MAX_UPLINE_DEPTH
+
+COUNTER_COLUMNS = (
+    "left_leg_count",
+    "right_leg_count",
+    "left_active_count",
+    "right_active_count",
+    "active_directs_count",
+)
+
+
+def is_active(status: str | None) -> bool:
+    return status == "active"
+
+
+def upline_legs(
+    parent_id: uuid.UUID, side: str | None, *, live_only: bool = True, name: str = "upline_legs"
+):
+    """Recursive CTE of every ancestor from `parent_id` up, with the leg
+    (`side`) through which a node placed at (parent_id, side) reaches it.
+
+    With `live_only` the walk stops at a deleted ancestor, since anything
+    above it no longer sees the subtree, and above a node placed without a
+    side (the counters' view). Volume follows confirm_payment instead, which
+    credits through deleted nodes.
+    """
+    seed = select(
+        Affiliate.id,
+        Affiliate.placement_parent_id.label("parent_id"),
+        Affiliate.placement_side.label("own_side"),
+        literal(side, type_=String).label("side"),
+        literal(1).label("distance"),
+    ).where(Affiliate.id == parent_id)
+    if live_only:
+        seed = seed.where(Affiliate.deleted_at.is_(None))
+    chain = seed.cte(name, recursive=True)
+    ancestor = aliased(Affiliate)
+    step = (
+        select(
+            ancestor.id,
+            ancestor.placement_parent_id,
+            ancestor.placement_side,
+            chain.c.own_side,
+            chain.c.distance + 1,
+        )
+        .join(chain, ancestor.id == chain.c.parent_id)
+        .where(chain.c.distance < MAX_UPLINE_DEPTH)
+    )
+    if live_only:
+        step = step.where(ancestor.deleted_at.is_(None), chain.c.own_side.isnot(None))
+    return chain.union_all(step)
+
+
+async def shift_upline(
+    db: AsyncSession,
+    parent_id: uuid.UUID | None,
+    side: str | None,
+    *,
+    legs: int,
+    actives: int,
+) -> None:
+    """Add `legs`/`actives` to the matching leg of every ancestor in one UPDATE."""
+    if parent_id is None or side is None or (legs == 0 and actives == 0):
+        return
+    chain = upline_legs(parent_id, side)
+    on_left, on_right = chain.c.side == "left", chain.c.side == "right"
+    result = await db.execute(
+        update(Affiliate)
+        .where(Affiliate.id == chain.c.id)
+        .values(
+            left_leg_count=Affiliate.left_leg_count + case((on_left, legs), else_=0),
+            right_leg_count=Affiliate.right_leg_count + case((on_right, legs), else_=0),
+            left_active_count=Affiliate.left_active_count + case((on_left, actives), else_=0),
+            right_active_count=Affiliate.right_active_count + case((on_right, actives), else_=0),
+        )
+        .returning(Affiliate.id)
+        .execution_options(synchronize_session=False)
+    )
+    # The counters are part of each ancestor's cached detail
+    invalidate_on_commit(*(f"affiliate:{ancestor_id}" for ancestor_id in result.scalars()))
+
+
+async def shift_active_directs(
+    db: AsyncSession, sponsor_id: uuid.UUID | None, delta: int
+) -> None:
+    if sponsor_id is None or delta == 0:
+        return
+    await db.execute(
+        update(Affiliate)
+        .where(Affiliate.id == sponsor_id)
+        .values(active_directs_count=Affiliate.active_directs_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+    invalidate_on_commit(f"affiliate:{sponsor_id}")
+
+
+async def on_enrolled(db: AsyncSession, affiliate: Affiliate) -> None:
+    """A new affiliate was placed: one more node (and maybe one more active) per ancestor leg."""
+    active = int(is_active(affiliate.status))
+    await shift_upline(
+        db, affiliate.placement_parent_id, affiliate.placement_side, legs=1, actives=active
+    )
+    await shift_active_directs(db, affiliate.sponsor_id, active)
+
+
+async def on_status_changed(db: AsyncSession, affiliate: Affiliate, old_status: str) -> None:
+    """Only a change in and out of 'active' moves the counters."""
+    delta = int(is_active(affiliate.status)) - int(is_active(old_status))
+    if delta == 0:
+        return
+    await shift_upline(
+        db, affiliate.placement_parent_id, affiliate.placement_side, legs=0, actives=delta
+    )
+    await shift_active_directs(db, affiliate.sponsor_id, delta)
+
+
+async def on_removed(db: AsyncSession, affiliate: Affiliate) -> None:
+    """Soft delete: the node and its whole live subtree leave every ancestor's leg."""
+    active = int(is_active(affiliate.status))
+    await shift_upline(
+        db,
+        affiliate.placement_parent_id,
+        affiliate.placement_side,
+        legs=-(1 + affiliate.left_leg_count + affiliate.right_leg_count),
+        actives=-(active + affiliate.left_active_count + affiliate.right_active_count),
+    )
+    await shift_active_directs(db, affiliate.sponsor_id, -active)
+
+
+def recompute_counters(net: NetworkArrays) -> dict[str, array]:
+    """Counters for every node from scratch, in one bottom-up pass over the live tree.
+
+    Live nodes unreachable from a root (placement cycles) keep zero counters
+    and contribute to nobody.
+    """
+    n = len(net)
+    counters = {name: array("q", bytes(8 * n)) for name in COUNTER_COLUMNS}
+    left_legs, right_legs = counters["left_leg_count"], counters["right_leg_count"]
+    left_act, right_act = counters["left_active_count"], counters["right_active_count"]
+    directs = counters["active_directs_count"]
+
+    parent, side, active = net.parent, net.side, net.active
+    order = net.top_down_order()
+    for i in reversed(order):
+        p = parent[i]
+        if p < 0 or not net.live[p]:
+            continue
+        legs = 1 + left_legs[i] + right_legs[i]
+        actives = active[i] + left_act[i] + right_act[i]
+        if side[i] == LEFT:
+            left_legs[p] += legs
+            left_act[p] += actives
+        elif side[i] == NO_SIDE:
+            # In neither leg, and hidden from everything above (like shift_upline)
+            continue
+        else:
+            right_legs[p] += legs
+            right_act[p] += actives
+
+    for i in range(n):
+        s = net.sponsor[i]
+        if active[i] and net.live[i] and s >= 0:
+            directs[s] += 1
+    return counters
@@ -0,0 +1,150 @@
+"""
+Transactional outbox.
+
+Write paths record what happened as an OutboxEvent in their own transaction
+(`emit`), so the event exists if and only if the change committed, and slow
+follow-up work (commission accrual, notifications) runs later in
+`app.jobs.outbox` instead of on the request. Handlers receive events in
+batches and must be idempotent: an event can be delivered again after a
+crash or a replay. A failed event waits out an exponential backoff
+(OUTBOX_RETRY_BACKOFF, doubled per attempt) before it is claimed again, so a
+short downstream outage doesn't use up its attempts within seconds.
+"""
+
+import logging
+from collections import defaultdict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy import func, or_, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.outbox import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+EventHandler = Callable[[AsyncSession, list[OutboxEvent]], Awaitable[None]]
+
+
+def emit(db: AsyncSession, event_type: str, payload: dict[str, Any]) -> None:
+    """Record an event in the caller's transaction."""
+    db.add(OutboxEvent(event_type=event_type, payload=payload))
+
+
+def pending_events(limit: int, max_attempts: int):
+    """Oldest unprocessed events due for delivery, skipping rows another worker has claimed."""
+    return (
+        select(OutboxEvent)
+        .where(
+            OutboxEvent.processed_at.is_(None),
+            OutboxEvent.attempts < max_attempts,
+            or_(OutboxEvent.next_attempt_at.is_(None), OutboxEvent.next_attempt_at <= func.now()),
+        )
+        .order_by(OutboxEvent.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Backoff before the next delivery of an event that has failed `attempts` times."""
+    return timedelta(seconds=settings.OUTBOX_RETRY_BACKOFF * 2 ** max(attempts - 1, 0))
+
+
+@dataclass
+class BatchResult:
+    claimed: int = 0
+    processed: int = 0
+    failed: int = 0
+
+
+async def process_batch(
+    db: AsyncSession,
+    handlers: dict[str, list[EventHandler]],
+    limit: int,
+    max_attempts: int,
+) -> BatchResult:
+    """Run the handlers for one batch of events; the caller commits.
+
+    Each event type runs in its own savepoint, so a failing handler only
+    holds back the events of that type (attempts + 1, error kept, retried
+    after a backoff) and the rest of the batch is still marked processed.
+    """
+    events = list((await db.execute(pending_events(limit, max_attempts))).scalars())
+    result = BatchResult(claimed=len(events))
+    by_type: dict[str, list[OutboxEvent]] = defaultdict(list)
+    for event in events:
+        by_type[event.event_type].append(event)
+
+    now = datetime.now(timezone.utc)
+    for event_type, group in by_type.items():
+        try:
+            async with db.begin_nested():
+                for handler in handlers.get(event_type, []):
+                    await handler(db, group)
+        except Exception as exc:
+            logger.exception("Outbox handler failed for %d %s events", len(group), event_type)
+            for event in group:
+                event.attempts += 1
+                event.last_error = repr(exc)[:2000]
+                event.next_attempt_at = now + retry_delay(event.attempts)
+            result.failed += len(group)
+            continue
+        for event in group:
+            event.processed_at = now
+        result.processed += len(group)
+
+    await db.flush()
+    return result
+
+
+async def outbox_backlog(db: AsyncSession, max_attempts: int) -> dict[str, Any]:
+    """Queue depth, consumer lag and recent throughput, for monitoring."""
+    pending = OutboxEvent.processed_at.is_(None)
+    row = (
+        await db.execute(
+            select(
+                func.count().filter(pending, OutboxEvent.attempts < max_attempts).label("pending"),
+                func.count().filter(pending, OutboxEvent.attempts >= max_attempts).label("parked"),
+                func.min(OutboxEvent.created_at).filter(pending).label("oldest_pending"),
+                func.count()
+                .filter(OutboxEvent.processed_at >= func.now() - text("interval '1 minute'"))
+                .label("processed_last_minute"),
+            )
+        )
+    ).one()
+    lag = (
+        (datetime.now(timezone.utc) - row.oldest_pending).total_seconds()
+        if row.oldest_pending
+        else 0.0
+    )
+    return {
+        "pending": row.pending,
+        "parked": row.parked,
+        "lag_seconds": round(lag, 3),
+        "processed_last_minute": row.processed_last_minute,
+    }
+
+
+def replay_events(
+    *,
+    since: datetime | None = None,
+    event_type: str | None = None,
+    ids: list[int] | None = None,
+):
+    """Put already processed or parked events back in the queue.
+
+    Safe because handlers are idempotent; it is how a fixed handler is re-run
+    over the events it failed or mis-handled.
+    """
+    stmt = update(OutboxEvent).values(processed_at=None, attempts=0, last_error=None, next_attempt_at=None)
+    if since is not None:
+        stmt = stmt.where(OutboxEvent.created_at >= since)
+    if event_type is not None:
+        stmt = stmt.where(OutboxEvent.event_type == event_type)
+    if ids:
+        stmt = stmt.where(OutboxEvent.id.in_(ids))
+    return stmt
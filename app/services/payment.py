@@ -13,9 +13,18 @@ from fastapi import HTTPException, status
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import invalidate_on_commit
 from app.models.affiliate import Affiliate
 from app.models.audit_log import AuditLog
 from app.models.order import Order
+from app.services.network_stats import on_status_changed
+from app.services.outbox import emit
+from app.services.periods import current_period
+from app.services.rank_queue import mark_dirty
+from app.services.rollups import record_payment, record_status_change
+
+# Orders whose volume was credited at payment and never taken back
+CREDITED_ORDER_STATUSES = ("paid", "in_preparation", "shipped", "delivered")
 
 
 async def confirm_payment(
@@ -34,6 +43,7 @@ async def confirm_payment(
     4. Accrue BV upward through the binary tree to all ancestors.
     5. If enrollment order: activate the affiliate (pending -> active).
     6. Audit log.
+    7. Emit `order.paid` to the outbox; commissions are accrued from it.
 
     Returns the updated order.
     """
@@ -74,6 +84,12 @@ async def confirm_payment(
     # 5. Activate affiliate if this is an enrollment order
     if order.order_type == "enrollment" and affiliate.status == "pending":
         affiliate.status = "active"
+        await on_status_changed(db, affiliate, "pending")
+        await record_status_change(db, affiliate, "pending")
+        # Activation also counts toward the sponsor's active directs
+        await mark_dirty(db, affiliate.id, affiliate.sponsor_id)
+    else:
+        await mark_dirty(db, affiliate.id)
 
     # 6. Audit log
     audit = AuditLog(
@@ -94,13 +110,34 @@ async def confirm_payment(
     )
     db.add(audit)
 
+    # 7. Bonus accrual runs off the request, in the outbox worker
+    emit(
+        db,
+        "order.paid",
+        {
+            "order_id": str(order.id),
+            "tenant_id": str(affiliate.tenant_id) if affiliate.tenant_id else None,
+            "affiliate_id": str(affiliate.id),
+            "sponsor_id": str(affiliate.sponsor_id) if affiliate.sponsor_id else None,
+            "order_type": order.order_type,
+            "total_pv": str(order.total_pv),
+            "total_bv": str(order.total_bv),
+            "paid_at": order.paid_at.isoformat(),
+            "period": current_period(order.paid_at).key,
+        },
+    )
+
     await db.flush()
 
+    invalidate_on_commit(f"order:{order.id}", f"affiliate:{affiliate.id}", "tree")
+
     # Refresh order with items for response serialization
     await db.refresh(order, ["items"])
     for item in order.items:
         await db.refresh(item, ["product"])
 
+    await record_payment(db, order, affiliate.country_code)
+
     return order
 
 
@@ -143,6 +180,7 @@ async def _accrue_bv_to_upline(
             parent.bv_left_total += bv_amount
         elif side == "right":
             parent.bv_right_total += bv_amount
+        invalidate_on_commit(f"affiliate:{parent.id}")
 
         # Move up
         current = parent
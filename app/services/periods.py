@@ -0,0 +1,75 @@
+"""
+Reporting periods: calendar months ("2026-03") and ISO weeks ("2026-W10"),
+bounded at midnight in the reporting timezone.
+"""
+
+import re
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+_MONTH = re.compile(r"^(\d{4})-(\d{2})$")
+_WEEK = re.compile(r"^(\d{4})-W(\d{2})$")
+
+
+@dataclass(frozen=True)
+class Period:
+    key: str
+    start: datetime  # inclusive, timezone-aware
+    end: datetime  # exclusive
+
+    @property
+    def closed(self) -> bool:
+        """True once the period is over; its volume can no longer change."""
+        return self.end <= datetime.now(timezone.utc)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=ZoneInfo(settings.REPORTING_TIMEZONE))
+
+
+def parse_period(key: str) -> Period:
+    """Period for "YYYY-MM" or "YYYY-Www". Raises ValueError for anything else."""
+    if match := _MONTH.match(key):
+        year, month = int(match[1]), int(match[2])
+        start = date(year, month, 1)
+        end = date(year + month // 12, month % 12 + 1, 1)
+    elif match := _WEEK.match(key):
+        start = date.fromisocalendar(int(match[1]), int(match[2]), 1)
+        end = start + timedelta(days=7)
+    else:
+        raise ValueError(f"Invalid period '{key}': expected YYYY-MM or YYYY-Www")
+    return Period(key=key, start=_midnight(start), end=_midnight(end))
+
+
+def current_period(moment: datetime | None = None) -> Period:
+    """The calendar month containing `moment` (default: now)."""
+    moment = moment or datetime.now(timezone.utc)
+    local = moment.astimezone(ZoneInfo(settings.REPORTING_TIMEZONE))
+    return parse_period(f"{local.year:04d}-{local.month:02d}")
+
+
+def date_range(date_from: date, date_to: date) -> Period:
+    """Ad-hoc window covering the whole days date_from..date_to (inclusive)."""
+    if date_from > date_to:
+        raise ValueError("date_from must not be after date_to")
+    return Period(
+        key=f"{date_from.isoformat()}..{date_to.isoformat()}",
+        start=_midnight(date_from),
+        end=_midnight(date_to + timedelta(days=1)),
+    )
+
+
+def resolve_window(period: str | None, date_from: date | None, date_to: date | None) -> Period:
+    """A named period, an explicit date range, or by default the current month."""
+    if period is not None:
+        if date_from is not None or date_to is not None:
+            raise ValueError("Use either period or date_from/date_to, not both")
+        return parse_period(period)
+    if date_from is not None and date_to is not None:
+        return date_range(date_from, date_to)
+    if date_from is not None or date_to is not None:
+        raise ValueError("date_from and date_to must be given together")
+    return current_period()
@@ -0,0 +1,172 @@
+"""
+Placement service: finds the next free position in the binary tree.
+
+Every strategy is a single query that walks down the placement tree through
+the (placement_parent_id, placement_side) index, instead of staff paging
+through the tree by hand:
+
+- outer_left / outer_right: bottom of the outermost left/right leg.
+- weaker_leg: bottom of the outer edge of the leg with less BV.
+- bfs_first_empty: shallowest open position, left to right.
+"""
+
+import uuid
+from dataclasses import dataclass
+from typing import Literal
+
+from fastapi import HTTPException, status
+from sqlalchemy import String, case, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.affiliate import Affiliate
+from app.services.tree import has_child
+
+PlacementStrategy = Literal["outer_left", "outer_right", "weaker_leg", "bfs_first_empty"]
+
+# Breadth-first search never looks deeper than this below the search root
+BFS_MAX_DEPTH = 30
+# Outer legs can be very long in spillover-heavy networks; this only guards cycles
+OUTER_MAX_DEPTH = 10_000
+# Attempts to reserve a slot when concurrent enrollments race for the same one
+RESERVE_ATTEMPTS = 3
+
+
+@dataclass
+class PlacementSlot:
+    parent_id: uuid.UUID
+    side: str
+    depth: int  # levels below the search root where the new affiliate would land
+
+
+async def find_next_slot(
+    db: AsyncSession,
+    root_id: uuid.UUID,
+    strategy: PlacementStrategy,
+) -> PlacementSlot | None:
+    """First free position under root_id for `strategy`, or None if root_id doesn't exist."""
+    if strategy == "bfs_first_empty":
+        return await _first_empty_breadth_first(db, root_id)
+
+    if strategy == "weaker_leg":
+        result = await db.execute(
+            select(Affiliate.bv_left_total, Affiliate.bv_right_total).where(
+                Affiliate.id == root_id, Affiliate.deleted_at.is_(None)
+            )
+        )
+        row = result.one_or_none()
+        if row is None:
+            return None
+        side = "left" if row.bv_left_total <= row.bv_right_total else "right"
+    else:
+        side = "left" if strategy == "outer_left" else "right"
+
+    return await bottom_of_outer_leg(db, root_id, side)
+
+
+async def bottom_of_outer_leg(
+    db: AsyncSession, root_id: uuid.UUID, side: str
+) -> PlacementSlot | None:
+    """Follow only `side` children from root_id; the last one has that side free."""
+    leg = (
+        select(Affiliate.id, literal(0).label("depth"))
+        .where(Affiliate.id == root_id, Affiliate.deleted_at.is_(None))
+        .cte("outer_leg", recursive=True)
+    )
+    child = aliased(Affiliate)
+    leg = leg.union_all(
+        select(child.id, leg.c.depth + 1)
+        .join(leg, child.placement_parent_id == leg.c.id)
+        .where(
+            child.placement_side == side,
+            child.deleted_at.is_(None),
+            leg.c.depth < OUTER_MAX_DEPTH,
+        )
+    )
+    result = await db.execute(
+        select(leg.c.id, leg.c.depth).order_by(leg.c.depth.desc()).limit(1)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return PlacementSlot(parent_id=row.id, side=side, depth=row.depth + 1)
+
+
+def _side_digit(side_column):
+    return case((side_column == "left", "0"), else_="1")
+
+
+async def _first_empty_breadth_first(
+    db: AsyncSession, root_id: uuid.UUID
+) -> PlacementSlot | None:
+    """Shallowest node with a free side; ties go to the leftmost path ('0' < '1')."""
+    subtree = (
+        select(
+            Affiliate.id,
+            literal(0).label("level"),
+            literal("", type_=String).label("path"),
+        )
+        .where(Affiliate.id == root_id, Affiliate.deleted_at.is_(None))
+        .cte("bfs_subtree", recursive=True)
+    )
+    child = aliased(Affiliate)
+    subtree = subtree.union_all(
+        select(
+            child.id,
+            subtree.c.level + 1,
+            subtree.c.path + _side_digit(child.placement_side),
+        )
+        .join(subtree, child.placement_parent_id == subtree.c.id)
+        .where(child.deleted_at.is_(None), subtree.c.level < BFS_MAX_DEPTH)
+    )
+    has_left = has_child(subtree.c.id, "left")
+    has_right = has_child(subtree.c.id, "right")
+    result = await db.execute(
+        select(subtree.c.id, subtree.c.level, has_left.label("has_left"))
+        .where(~(has_left & has_right))
+        .order_by(subtree.c.level, subtree.c.path)
+        .limit(1)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return PlacementSlot(
+        parent_id=row.id, side="right" if row.has_left else "left", depth=row.level + 1
+    )
+
+
+async def reserve_slot(
+    db: AsyncSession,
+    root_id: uuid.UUID,
+    strategy: PlacementStrategy,
+) -> PlacementSlot:
+    """Find a slot and lock its parent row for the rest of the transaction.
+
+    The parent row lock serializes concurrent enrollments aiming at the same
+    position; after acquiring it the position is re-checked and, if someone
+    else took it meanwhile, the search runs again.
+    """
+    for _ in range(RESERVE_ATTEMPTS):
+        slot = await find_next_slot(db, root_id, strategy)
+        if slot is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Placement root not found",
+            )
+        await db.execute(
+            select(Affiliate.id).where(Affiliate.id == slot.parent_id).with_for_update()
+        )
+        taken = await db.execute(
+            select(Affiliate.id).where(
+                Affiliate.placement_parent_id == slot.parent_id,
+                Affiliate.placement_side == slot.side,
+                Affiliate.deleted_at.is_(None),
+            )
+        )
+        if taken.first() is None:
+            return slot
+
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Could not reserve a placement position, please retry",
+    )
@@ -0,0 +1,46 @@
+"""
+Rank re-evaluation queue (rank_dirty).
+
+Kept apart from app.services.ranks so the write paths that feed it (payment,
+status changes, moves) don't import the rank engine.
+"""
+
+import uuid
+
+from sqlalchemy import delete, literal, select, union
+from sqlalchemy.dialects.postgresql import UUID, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ancestry import AffiliateAncestor
+from app.models.rank import RankDirty
+
+
+def _uuid(value: uuid.UUID):
+    return literal(value, type_=UUID(as_uuid=True)).label("affiliate_id")
+
+
+async def mark_dirty(db: AsyncSession, affiliate_id: uuid.UUID, *also: uuid.UUID | None) -> None:
+    """Queue an affiliate, its whole placement upline and `also` (e.g. its sponsor)."""
+    rows = union(
+        select(_uuid(affiliate_id)),
+        select(AffiliateAncestor.ancestor_id).where(AffiliateAncestor.descendant_id == affiliate_id),
+        *(select(_uuid(extra)) for extra in also if extra is not None),
+    )
+    await db.execute(
+        insert(RankDirty).from_select(["affiliate_id"], rows).on_conflict_do_nothing()
+    )
+
+
+def claim_dirty(limit: int):
+    """Take up to `limit` queued affiliates off the queue (skipping ones another worker holds)."""
+    oldest = (
+        select(RankDirty.affiliate_id)
+        .order_by(RankDirty.marked_at)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    return (
+        delete(RankDirty)
+        .where(RankDirty.affiliate_id.in_(oldest.scalar_subquery()))
+        .returning(RankDirty.affiliate_id)
+    )
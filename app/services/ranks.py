@@ -0,0 +1,178 @@
+"""
+Rank qualification.
+
+A rank is earned by meeting every minimum of its row in the rank table:
+personal PV and weak-leg BV within the period, legs with at least one active
+affiliate, and active personally sponsored affiliates. The table comes from
+settings.RANK_TABLE (DEFAULT_RANK_TABLE if empty), lowest rank first.
+
+Ranks are re-evaluated incrementally: payments, status changes and moves
+queue the affected affiliate and its whole upline in rank_dirty, and
+`app.jobs.evaluate_ranks` drains that queue in small batches. The same job
+runs a full parallel pass at period close.
+"""
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.affiliate import Affiliate
+from app.models.order import Order
+from app.services.group_volume import compute_group_volume
+from app.services.network_stats import is_active
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.periods import Period
+from app.services.rank_queue import claim_dirty
+
+UPDATE_CHUNK = 5_000
+
+# Placeholder thresholds until the compensation plan fixes them; override with RANK_TABLE
+DEFAULT_RANK_TABLE: list[dict[str, Any]] = [
+    {"name": "affiliate"},
+    {"name": "bronze", "min_pv": 50, "min_weak_leg_bv": 250, "min_active_legs": 1, "min_active_directs": 1},
+    {"name": "silver", "min_pv": 100, "min_weak_leg_bv": 1_000, "min_active_legs": 2, "min_active_directs": 2},
+    {"name": "gold", "min_pv": 100, "min_weak_leg_bv": 3_000, "min_active_legs": 2, "min_active_directs": 3},
+    {"name": "platinum", "min_pv": 100, "min_weak_leg_bv": 7_500, "min_active_legs": 2, "min_active_directs": 4},
+    {"name": "diamond", "min_pv": 150, "min_weak_leg_bv": 15_000, "min_active_legs": 2, "min_active_directs": 5},
+    {"name": "double_diamond", "min_pv": 150, "min_weak_leg_bv": 30_000, "min_active_legs": 2, "min_active_directs": 6},
+    {"name": "crown", "min_pv": 200, "min_weak_leg_bv": 60_000, "min_active_legs": 2, "min_active_directs": 8},
+    {"name": "royal_crown", "min_pv": 200, "min_weak_leg_bv": 120_000, "min_active_legs": 2, "min_active_directs": 10},
+    {"name": "ambassador", "min_pv": 200, "min_weak_leg_bv": 250_000, "min_active_legs": 2, "min_active_directs": 12},
+]
+
+
+def to_cents(amount: Any) -> int:
+    return int(Decimal(str(amount or 0)) * 100)
+
+
+@dataclass(frozen=True)
+class RankRequirement:
+    """One row of the rank table; amounts in cents so bulk passes compare integers."""
+
+    name: str
+    min_pv: int = 0
+    min_weak_leg_bv: int = 0
+    min_active_legs: int = 0
+    min_active_directs: int = 0
+
+    @classmethod
+    def from_config(cls, row: dict[str, Any]) -> "RankRequirement":
+        return cls(
+            name=row["name"],
+            min_pv=to_cents(row.get("min_pv")),
+            min_weak_leg_bv=to_cents(row.get("min_weak_leg_bv")),
+            min_active_legs=int(row.get("min_active_legs", 0)),
+            min_active_directs=int(row.get("min_active_directs", 0)),
+        )
+
+
+def rank_table() -> tuple[RankRequirement, ...]:
+    return tuple(
+        RankRequirement.from_config(row) for row in settings.RANK_TABLE or DEFAULT_RANK_TABLE
+    )
+
+
+def qualify(
+    table: tuple[RankRequirement, ...],
+    *,
+    active: bool,
+    pv: int,
+    left_bv: int,
+    right_bv: int,
+    active_legs: int,
+    active_directs: int,
+) -> int:
+    """Index in `table` of the highest rank met (0 for inactive affiliates)."""
+    if not active:
+        return 0
+    weak_leg = min(left_bv, right_bv)
+    for level in range(len(table) - 1, 0, -1):
+        req = table[level]
+        if (
+            pv >= req.min_pv
+            and weak_leg >= req.min_weak_leg_bv
+            and active_legs >= req.min_active_legs
+            and active_directs >= req.min_active_directs
+        ):
+            return level
+    return 0
+
+
+def higher_rank(table: tuple[RankRequirement, ...], a: str, b: str) -> str:
+    order = {req.name: level for level, req in enumerate(table)}
+    return a if order.get(a, -1) >= order.get(b, -1) else b
+
+
+async def apply_ranks(db: AsyncSession, changes: list[dict[str, Any]]) -> None:
+    for start in range(0, len(changes), UPDATE_CHUNK):
+        await db.execute(
+            update(Affiliate),
+            [
+                {"id": c["id"], "current_rank": c["current_rank"], "highest_rank": c["highest_rank"]}
+                for c in changes[start : start + UPDATE_CHUNK]
+            ],
+        )
+
+
+async def evaluate_dirty(db: AsyncSession, period: Period, limit: int) -> tuple[int, list[dict[str, Any]]]:
+    """Re-evaluate one batch from the queue. Returns (claimed, rank changes written)."""
+    claimed = list((await db.execute(claim_dirty(limit))).scalars())
+    if not claimed:
+        return 0, []
+
+    result = await db.execute(
+        select(
+            Affiliate.id,
+            Affiliate.status,
+            Affiliate.current_rank,
+            Affiliate.highest_rank,
+            Affiliate.left_active_count,
+            Affiliate.right_active_count,
+            Affiliate.active_directs_count,
+        )
+        .where(Affiliate.id.in_(claimed), Affiliate.deleted_at.is_(None))
+        .order_by(Affiliate.id)
+        .with_for_update()
+    )
+    affiliates = result.all()
+    ids = [row.id for row in affiliates]
+    own_pv = dict(
+        (
+            await db.execute(
+                select(Order.affiliate_id, func.sum(Order.total_pv))
+                .where(
+                    Order.affiliate_id.in_(ids),
+                    Order.paid_at >= period.start,
+                    Order.paid_at < period.end,
+                    Order.status.in_(CREDITED_ORDER_STATUSES),
+                )
+                .group_by(Order.affiliate_id)
+            )
+        ).all()
+    )
+    legs = await compute_group_volume(db, ids, period)
+
+    table = rank_table()
+    changes = []
+    for row in affiliates:
+        level = qualify(
+            table,
+            active=is_active(row.status),
+            pv=to_cents(own_pv.get(row.id)),
+            left_bv=to_cents(legs[row.id].left_bv),
+            right_bv=to_cents(legs[row.id].right_bv),
+            active_legs=(row.left_active_count > 0) + (row.right_active_count > 0),
+            active_directs=row.active_directs_count,
+        )
+        rank = table[level].name
+        highest = higher_rank(table, row.highest_rank, rank)
+        if (rank, highest) != (row.current_rank, row.highest_rank):
+            changes.append(
+                {"id": row.id, "current_rank": rank, "highest_rank": highest, "previous_rank": row.current_rank}
+            )
+    await apply_ranks(db, changes)
+    return len(claimed), changes
@@ -0,0 +1,243 @@
+"""
+Daily rollups behind the executive dashboard.
+
+Enrollment, payment, status changes and deletion each add their deltas to the
+row for (business day, country[, order type, product]) with an upsert, so the
+dashboard sums a few hundred rollup rows instead of scanning orders, items
+and affiliates. `app.jobs.backfill_rollups` rebuilds the same rows from
+history.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.core.cache import invalidate_on_commit
+from app.models.affiliate import Affiliate
+from app.models.order import Order
+from app.models.product import Product
+from app.models.rollup import DailyNetworkRollup, DailySalesRollup
+from app.schemas.dashboard import (
+    CountryBreakdown,
+    DashboardResponse,
+    TopProduct,
+)
+
+TOP_PRODUCTS = 10
+
+NETWORK_COUNTERS = (
+    "enrollments",
+    "removals",
+    "activations",
+    "deactivations",
+    "inactivations",
+    "inactive_exits",
+    "orders_paid",
+    "sales_total",
+)
+# Statuses with a head count: the counters for entering and for leaving each.
+# Pending, suspended and cancelled members are in neither.
+STATUS_COUNTERS = {
+    "active": ("activations", "deactivations"),
+    "inactive": ("inactivations", "inactive_exits"),
+}
+SALES_COUNTERS = ("order_count", "quantity", "amount", "pv", "bv")
+
+
+def business_day(moment: datetime | None = None) -> date:
+    """Calendar day of `moment` (default: now) in the reporting timezone."""
+    moment = moment or datetime.now(timezone.utc)
+    return moment.astimezone(ZoneInfo(settings.REPORTING_TIMEZONE)).date()
+
+
+def business_day_sql(column):
+    """SQL counterpart of business_day() for a timestamptz column."""
+    return func.date(func.timezone(settings.REPORTING_TIMEZONE, column))
+
+
+def status_deltas(old_status: str | None, new_status: str | None) -> dict[str, int]:
+    """Counters moved by a status change; None stands for not (or no longer) a member."""
+    deltas = {}
+    for status, (entered, left) in STATUS_COUNTERS.items():
+        if new_status == status and old_status != status:
+            deltas[entered] = 1
+        elif old_status == status and new_status != status:
+            deltas[left] = 1
+    return deltas
+
+
+def upsert_adding(model, rows: list[dict[str, Any]], keys: tuple[str, ...], counters: tuple[str, ...]):
+    """INSERT rows, or add their counters to the existing row with the same key."""
+    stmt = insert(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={name: getattr(model, name) + stmt.excluded[name] for name in counters},
+    )
+
+
+async def bump_network(db: AsyncSession, day: date, country_code: str, **deltas: int | Decimal) -> None:
+    row = {name: 0 for name in NETWORK_COUNTERS} | deltas
+    await db.execute(
+        upsert_adding(
+            DailyNetworkRollup,
+            [{"day": day, "country_code": country_code, **row}],
+            ("day", "country_code"),
+            tuple(deltas),
+        )
+    )
+    invalidate_on_commit("dashboard")
+
+
+async def record_enrollment(db: AsyncSession, affiliate: Affiliate) -> None:
+    await bump_network(db, business_day(), affiliate.country_code, enrollments=1)
+
+
+async def record_status_change(db: AsyncSession, affiliate: Affiliate, old_status: str) -> None:
+    deltas = status_deltas(old_status, affiliate.status)
+    if deltas:
+        await bump_network(db, business_day(), affiliate.country_code, **deltas)
+
+
+async def record_removal(db: AsyncSession, affiliate: Affiliate) -> None:
+    deltas = {"removals": 1, **status_deltas(affiliate.status, None)}
+    await bump_network(db, business_day(), affiliate.country_code, **deltas)
+
+
+async def record_payment(db: AsyncSession, order: Order, country_code: str) -> None:
+    """Add a paid order (with its items loaded) to both rollups."""
+    day = business_day(order.paid_at)
+    await bump_network(
+        db, day, country_code, orders_paid=1, sales_total=order.total
+    )
+
+    per_product: dict[Any, dict[str, Any]] = defaultdict(
+        lambda: {"order_count": 1, "quantity": 0, "amount": 0, "pv": 0, "bv": 0}
+    )
+    for item in order.items:
+        line = per_product[item.product_id]
+        line["quantity"] += item.quantity
+        line["amount"] += item.line_total
+        line["pv"] += item.line_pv
+        line["bv"] += item.line_bv
+    if not per_product:
+        return
+    await db.execute(
+        upsert_adding(
+            DailySalesRollup,
+            [
+                {
+                    "day": day,
+                    "country_code": country_code,
+                    "order_type": order.order_type,
+                    "product_id": product_id,
+                    **line,
+                }
+                for product_id, line in per_product.items()
+            ],
+            ("day", "country_code", "order_type", "product_id"),
+            SALES_COUNTERS,
+        )
+    )
+
+
+async def get_dashboard(db: AsyncSession, date_from: date, date_to: date) -> DashboardResponse:
+    """Dashboard totals for [date_from, date_to], read from the rollups only."""
+    net = DailyNetworkRollup
+    in_range = net.day.between(date_from, date_to)
+
+    period_rows = (
+        await db.execute(
+            select(
+                net.country_code,
+                func.sum(net.enrollments).label("enrollments"),
+                func.sum(net.orders_paid).label("orders_paid"),
+                func.sum(net.sales_total).label("sales_total"),
+            )
+            .where(in_range)
+            .group_by(net.country_code)
+        )
+    ).all()
+    # Head counts are running sums of the daily deltas up to the end of the range
+    headcount_rows = (
+        await db.execute(
+            select(
+                net.country_code,
+                func.sum(net.enrollments - net.removals).label("members"),
+                func.sum(net.activations - net.deactivations).label("active"),
+                func.sum(net.inactivations - net.inactive_exits).label("inactive"),
+            )
+            .where(net.day <= date_to)
+            .group_by(net.country_code)
+        )
+    ).all()
+
+    sales = DailySalesRollup
+    product_rows = (
+        await db.execute(
+            select(
+                sales.product_id,
+                Product.sku,
+                Product.name,
+                func.sum(sales.quantity).label("quantity"),
+                func.sum(sales.amount).label("amount"),
+            )
+            .join(Product, Product.id == sales.product_id)
+            .where(sales.day.between(date_from, date_to))
+            .group_by(sales.product_id, Product.sku, Product.name)
+            .order_by(func.sum(sales.amount).desc())
+            .limit(TOP_PRODUCTS)
+        )
+    ).all()
+
+    countries: dict[str, CountryBreakdown] = {}
+    for row in headcount_rows:
+        countries[row.country_code] = CountryBreakdown(
+            country_code=row.country_code,
+            members=row.members,
+            active=row.active,
+            inactive=row.inactive,
+        )
+    for row in period_rows:
+        entry = countries.setdefault(
+            row.country_code, CountryBreakdown(country_code=row.country_code)
+        )
+        entry.enrollments = row.enrollments
+        entry.orders_paid = row.orders_paid
+        entry.sales_total = row.sales_total
+
+    members = sum(c.members for c in countries.values())
+    active = sum(c.active for c in countries.values())
+    inactive = sum(c.inactive for c in countries.values())
+    orders_paid = sum(c.orders_paid for c in countries.values())
+    sales_total = sum((c.sales_total for c in countries.values()), Decimal("0"))
+    return DashboardResponse(
+        date_from=date_from,
+        date_to=date_to,
+        enrollments=sum(c.enrollments for c in countries.values()),
+        members=members,
+        active=active,
+        inactive=inactive,
+        orders_paid=orders_paid,
+        sales_total=sales_total,
+        average_ticket=(sales_total / orders_paid).quantize(Decimal("0.01"))
+        if orders_paid
+        else Decimal("0.00"),
+        top_products=[
+            TopProduct(
+                product_id=row.product_id,
+                sku=row.sku,
+                name=row.name,
+                quantity=row.quantity,
+                amount=row.amount,
+            )
+            for row in product_rows
+        ],
+        countries=sorted(countries.values(), key=lambda c: c.country_code),
+    )
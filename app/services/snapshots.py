@@ -0,0 +1,208 @@
+"""
+Period snapshots (flujos.md §9 step 1): freeze every affiliate enrolled by
+the end of a period with their placement, status, rank, period volume per
+leg and carry-over when the period closes. Volumes come from the period's
+orders; the rest is read at capture time (see capture_query).
+
+A capture creates the period's partition of period_snapshots and fills it
+with one INSERT ... SELECT computed in the database, so nothing crosses the
+wire. From then on historic reads of that period (volume report, group
+volume, genealogy) come from the snapshot and are never recomputed; closed
+periods are immutable (Rule #12), which a trigger on the table enforces.
+Old periods can be detached from the partitioned table and moved to a cold
+tablespace; reads for them then answer 410.
+"""
+
+import re
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import HTTPException, status
+from sqlalchemy import insert, literal, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidate_on_commit
+from app.models.affiliate import Affiliate
+from app.models.snapshot import PeriodSnapshot, SnapshotPeriod
+from app.schemas.affiliate import GroupVolume
+from app.services.periods import Period, parse_period
+from app.services.volume_report import discard_stored_reports, period_volume, zero
+
+_IDENTIFIER = re.compile(r"^[a-z_][a-z0-9_]*$")
+
+CAPTURED_COLUMNS = (
+    "period",
+    "affiliate_id",
+    "tenant_id",
+    "sponsor_id",
+    "placement_parent_id",
+    "placement_side",
+    "status",
+    "rank",
+    "pv",
+    "bv",
+    "left_pv",
+    "bv_left",
+    "right_pv",
+    "bv_right",
+    "pv_accumulated",
+    "bv_left_total",
+    "bv_right_total",
+    "bv_left_carry",
+    "bv_right_carry",
+)
+
+
+def snapshot_tag(period_key: str) -> str:
+    """Cache tag of the responses read from a period's snapshot."""
+    return f"snapshot:{period_key}"
+
+
+def partition_name(period_key: str) -> str:
+    """period_snapshots_2026_03, period_snapshots_2026_w10."""
+    return "period_snapshots_" + period_key.lower().replace("-", "_")
+
+
+def capture_query(period: Period):
+    """The network as of `period`, in CAPTURED_COLUMNS order.
+
+    Affiliates enrolled after the period ended are left out, and the period
+    and accumulated PV come from the orders paid within the period. Status,
+    rank, placement and the BV totals and carry-over have no history to read
+    from, so they are taken as they stand at capture: capture right after
+    the period closes (app.jobs.snapshot_period).
+    """
+    own, legs = period_volume(period)
+    return (
+        select(
+            literal(period.key),
+            Affiliate.id,
+            Affiliate.tenant_id,
+            Affiliate.sponsor_id,
+            Affiliate.placement_parent_id,
+            Affiliate.placement_side,
+            Affiliate.status,
+            Affiliate.current_rank,
+            zero(own.c.pv, "pv"),
+            zero(own.c.bv, "bv"),
+            zero(legs.c.left_pv, "left_pv"),
+            zero(legs.c.left_bv, "bv_left"),
+            zero(legs.c.right_pv, "right_pv"),
+            zero(legs.c.right_bv, "bv_right"),
+            zero(own.c.pv, "pv_accumulated"),
+            Affiliate.bv_left_total,
+            Affiliate.bv_right_total,
+            Affiliate.bv_left_carry,
+            Affiliate.bv_right_carry,
+        )
+        .outerjoin(own, own.c.affiliate_id == Affiliate.id)
+        .outerjoin(legs, legs.c.ancestor_id == Affiliate.id)
+        .where(Affiliate.deleted_at.is_(None), Affiliate.enrolled_at < period.end)
+    )
+
+
+async def capture_period(db: AsyncSession, period: Period) -> SnapshotPeriod:
+    """Write the period's snapshot partition. Raises ValueError if it can't or already exists."""
+    # Only named periods have a partition; their keys are safe to inline in DDL
+    parse_period(period.key)
+    if not period.closed:
+        raise ValueError(f"Period {period.key} is still open")
+    if await db.get(SnapshotPeriod, period.key) is not None:
+        raise ValueError(f"Period {period.key} is already captured; closed periods are immutable")
+
+    name = partition_name(period.key)
+    await db.execute(
+        text(f"CREATE TABLE {name} PARTITION OF period_snapshots FOR VALUES IN ('{period.key}')")
+    )
+    result = await db.execute(
+        insert(PeriodSnapshot).from_select(CAPTURED_COLUMNS, capture_query(period))
+    )
+    snapshot = SnapshotPeriod(period=period.key, partition_name=name, row_count=result.rowcount)
+    db.add(snapshot)
+    await db.flush()
+    # A report stored before the capture was computed from live data
+    discard_stored_reports(period)
+    return snapshot
+
+
+async def detach_period(
+    db: AsyncSession, period_key: str, tablespace: str | None = None
+) -> SnapshotPeriod:
+    """Detach a period's partition, optionally moving it to `tablespace`."""
+    snapshot = await db.get(SnapshotPeriod, period_key, with_for_update=True)
+    if snapshot is None:
+        raise ValueError(f"Period {period_key} has no snapshot")
+    if snapshot.detached_at is not None:
+        raise ValueError(f"Period {period_key} is already detached")
+    if tablespace is not None and not _IDENTIFIER.match(tablespace):
+        raise ValueError(f"Invalid tablespace name '{tablespace}'")
+
+    await db.execute(text(f"ALTER TABLE period_snapshots DETACH PARTITION {snapshot.partition_name}"))
+    if tablespace is not None:
+        await db.execute(text(f"ALTER TABLE {snapshot.partition_name} SET TABLESPACE {tablespace}"))
+    snapshot.detached_at = datetime.now(timezone.utc)
+    await db.flush()
+    discard_stored_reports(parse_period(period_key))
+    # Cached genealogy of the period must answer 410 from now on
+    invalidate_on_commit(snapshot_tag(period_key))
+    return snapshot
+
+
+async def served_from_snapshot(db: AsyncSession, period: Period) -> bool:
+    """True if `period` has a snapshot to read from; 410 if it was archived."""
+    if not period.closed:
+        return False
+    snapshot = await db.get(SnapshotPeriod, period.key)
+    if snapshot is None:
+        return False
+    if snapshot.detached_at is not None:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=f"Period {period.key} was archived to cold storage",
+        )
+    return True
+
+
+def snapshot_volume_query(period: Period):
+    """The volume report's columns, read from the period's snapshot."""
+    snap = PeriodSnapshot
+    return (
+        select(
+            snap.affiliate_id,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            snap.status,
+            snap.pv,
+            snap.bv,
+            snap.left_pv,
+            snap.bv_left,
+            snap.right_pv,
+            snap.bv_right,
+            snap.pv_accumulated,
+            snap.bv_left_total,
+            snap.bv_right_total,
+        )
+        .join(Affiliate, Affiliate.id == snap.affiliate_id)
+        .where(snap.period == period.key)
+        .order_by(Affiliate.affiliate_code)
+    )
+
+
+async def snapshot_group_volume(
+    db: AsyncSession, affiliate_ids: list[uuid.UUID], period: Period
+) -> list[GroupVolume]:
+    """Per-leg group volume of a captured period, in input order."""
+    snap = PeriodSnapshot
+    result = await db.execute(
+        select(snap.affiliate_id, snap.left_pv, snap.bv_left, snap.right_pv, snap.bv_right).where(
+            snap.period == period.key, snap.affiliate_id.in_(affiliate_ids)
+        )
+    )
+    volumes = {
+        affiliate_id: GroupVolume(
+            affiliate_id=affiliate_id, left_pv=left_pv, left_bv=left_bv, right_pv=right_pv, right_bv=right_bv
+        )
+        for affiliate_id, left_pv, left_bv, right_pv, right_bv in result.all()
+    }
+    return [volumes.get(a) or GroupVolume(affiliate_id=a) for a in affiliate_ids]
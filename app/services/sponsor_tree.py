@@ -0,0 +1,147 @@
+"""
+Sponsor tree service: the unilevel view of who sponsored whom (`sponsor_id`).
+
+Unlike the binary tree this one is unbounded in width, so it is never returned
+whole: one recursive CTE (capped at `max_generations`) yields the member count
+of every generation plus one keyset page of the requested generation.
+"""
+
+import base64
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Integer, String, and_, func, literal, null, or_, select
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+
+from app.models.affiliate import Affiliate
+from app.schemas.affiliate import SponsorGeneration, SponsorTreeMember, SponsorTreeResponse
+
+
+def encode_cursor(enrolled_at: datetime, affiliate_id: uuid.UUID) -> str:
+    raw = f"{enrolled_at.isoformat()}|{affiliate_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        enrolled_at, affiliate_id = raw.split("|")
+        return datetime.fromisoformat(enrolled_at), uuid.UUID(affiliate_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor",
+        )
+
+
+async def get_sponsor_tree(
+    db: AsyncSession,
+    root_id: uuid.UUID,
+    max_generations: int,
+    generation: int = 1,
+    after: str | None = None,
+    limit: int = 50,
+) -> SponsorTreeResponse | None:
+    """Generation counts below root_id plus a page of `generation`, ordered by enrollment.
+
+    Returns None if the root affiliate does not exist.
+    """
+    downline = (
+        select(Affiliate.id, literal(0).label("generation"))
+        .where(Affiliate.id == root_id, Affiliate.deleted_at.is_(None))
+        .cte("sponsor_downline", recursive=True)
+    )
+    member = aliased(Affiliate)
+    downline = downline.union_all(
+        select(member.id, downline.c.generation + 1)
+        .join(downline, member.sponsor_id == downline.c.id)
+        .where(member.deleted_at.is_(None), downline.c.generation < max_generations)
+    )
+
+    # Both halves read the same (materialized) CTE: "count" rows carry the
+    # per-generation totals, "member" rows the requested page.
+    counts = select(
+        literal("count").label("kind"),
+        downline.c.generation,
+        func.count().label("member_count"),
+        null().cast(UUID(as_uuid=True)).label("id"),
+        null().cast(String).label("affiliate_code"),
+        null().cast(String).label("first_name"),
+        null().cast(String).label("last_name"),
+        null().cast(String).label("status"),
+        null().cast(String).label("current_rank"),
+        null().cast(UUID(as_uuid=True)).label("sponsor_id"),
+        null().cast(DateTime(timezone=True)).label("enrolled_at"),
+        null().cast(Integer).label("active_directs"),
+    ).group_by(downline.c.generation)
+
+    page = (
+        select(
+            literal("member").label("kind"),
+            downline.c.generation,
+            null().cast(Integer).label("member_count"),
+            Affiliate.id,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            Affiliate.status,
+            Affiliate.current_rank,
+            Affiliate.sponsor_id,
+            Affiliate.enrolled_at,
+            Affiliate.active_directs_count.label("active_directs"),
+        )
+        .join(Affiliate, Affiliate.id == downline.c.id)
+        .where(downline.c.generation == generation)
+    )
+    if after is not None:
+        after_enrolled, after_id = decode_cursor(after)
+        page = page.where(
+            or_(
+                Affiliate.enrolled_at > after_enrolled,
+                and_(Affiliate.enrolled_at == after_enrolled, Affiliate.id > after_id),
+            )
+        )
+    page = page.order_by(Affiliate.enrolled_at, Affiliate.id).limit(limit + 1)
+
+    rows = (await db.execute(counts.union_all(page.subquery().select()))).all()
+
+    count_rows = sorted((r for r in rows if r.kind == "count"), key=lambda r: r.generation)
+    if not count_rows:
+        return None
+    member_rows = sorted(
+        (r for r in rows if r.kind == "member"), key=lambda r: (r.enrolled_at, r.id)
+    )
+
+    next_cursor = None
+    if len(member_rows) > limit:
+        member_rows = member_rows[:limit]
+        last = member_rows[-1]
+        next_cursor = encode_cursor(last.enrolled_at, last.id)
+
+    return SponsorTreeResponse(
+        affiliate_id=root_id,
+        max_generations=max_generations,
+        generations=[
+            SponsorGeneration(generation=r.generation, count=r.member_count)
+            for r in count_rows
+            if r.generation > 0
+        ],
+        generation=generation,
+        members=[
+            SponsorTreeMember(
+                id=r.id,
+                affiliate_code=r.affiliate_code,
+                full_name=f"{r.first_name} {r.last_name}",
+                status=r.status,
+                current_rank=r.current_rank,
+                sponsor_id=r.sponsor_id,
+                enrolled_at=r.enrolled_at,
+                active_directs=r.active_directs,
+            )
+            for r in member_rows
+        ],
+        next_cursor=next_cursor,
+    )
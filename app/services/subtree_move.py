@@ -0,0 +1,223 @@
+"""
+Subtree move: re-place an affiliate (and everything below it) under a new parent.
+
+Moving a subtree changes the leg volume, counters and closure-table rows of
+every ancestor on both the old and the new path. Instead of a rebuild, the
+subtree's totals are subtracted from the old upline and added to the new one
+with one set-based UPDATE per path, after locking just the rows on those two
+paths.
+"""
+
+import uuid
+from decimal import Decimal
+
+from fastapi import HTTPException, status
+from sqlalchemy import case, func, select, union, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import invalidate_on_commit
+from app.models.affiliate import Affiliate
+from app.models.audit_log import AuditLog
+from app.models.order import Order
+from app.services.ancestry import attach_ancestry, detach_ancestry
+from app.services.group_volume import PLACEMENT_TAG
+from app.services.network_stats import is_active, shift_upline, upline_legs
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.rank_queue import mark_dirty
+
+
+async def shift_upline_bv(
+    db: AsyncSession, parent_id: uuid.UUID | None, side: str | None, amount: Decimal
+) -> None:
+    """Add `amount` BV to the matching leg of every ancestor, like confirm_payment's walk."""
+    if parent_id is None or side is None or not amount:
+        return
+    chain = upline_legs(parent_id, side, live_only=False)
+    await db.execute(
+        update(Affiliate)
+        .where(Affiliate.id == chain.c.id)
+        .values(
+            bv_left_total=Affiliate.bv_left_total
+            + case((chain.c.side == "left", amount), else_=0),
+            bv_right_total=Affiliate.bv_right_total
+            + case((chain.c.side == "right", amount), else_=0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def own_credited_bv(db: AsyncSession, affiliate_id: uuid.UUID) -> Decimal:
+    result = await db.execute(
+        select(func.coalesce(func.sum(Order.total_bv), 0)).where(
+            Order.affiliate_id == affiliate_id,
+            Order.status.in_(CREDITED_ORDER_STATUSES),
+        )
+    )
+    return result.scalar_one()
+
+
+async def lock_paths(
+    db: AsyncSession, *starts: tuple[uuid.UUID | None, str | None]
+) -> list[uuid.UUID]:
+    """Row-lock every ancestor on the given paths, in id order to avoid deadlocks."""
+    chains = [
+        select(upline_legs(parent_id, side, live_only=False, name=f"path_{n}").c.id)
+        for n, (parent_id, side) in enumerate(starts)
+        if parent_id is not None
+    ]
+    if not chains:
+        return []
+    result = await db.execute(
+        select(Affiliate.id)
+        .where(Affiliate.id.in_(union(*chains) if len(chains) > 1 else chains[0]))
+        .order_by(Affiliate.id)
+        .with_for_update()
+    )
+    return list(result.scalars())
+
+
+async def reattach(
+    db: AsyncSession,
+    affiliate: Affiliate,
+    new_parent_id: uuid.UUID | None,
+    new_side: str | None,
+) -> dict[str, str | int]:
+    """Re-place `affiliate` and shift its subtree's volume and counters between uplines.
+
+    Callers validate the target and lock the paths first. Returns what moved.
+    """
+    subtree_bv = (
+        await own_credited_bv(db, affiliate.id)
+        + affiliate.bv_left_total
+        + affiliate.bv_right_total
+    )
+    if affiliate.deleted_at is None:
+        legs = 1 + affiliate.left_leg_count + affiliate.right_leg_count
+        actives = (
+            int(is_active(affiliate.status))
+            + affiliate.left_active_count
+            + affiliate.right_active_count
+        )
+    else:
+        # A deleted node's subtree already left the counters when it was deleted
+        legs = actives = 0
+    old_parent_id, old_side = affiliate.placement_parent_id, affiliate.placement_side
+
+    await shift_upline_bv(db, old_parent_id, old_side, -subtree_bv)
+    await shift_upline(db, old_parent_id, old_side, legs=-legs, actives=-actives)
+
+    # Both uplines' leg volume changes; queue the old one while it is still linked
+    await mark_dirty(db, affiliate.id)
+    await detach_ancestry(db, affiliate.id)
+
+    affiliate.placement_parent_id = new_parent_id
+    affiliate.placement_side = new_side
+    await db.flush()
+
+    await attach_ancestry(db, affiliate.id, new_parent_id, new_side)
+    await mark_dirty(db, affiliate.id)
+
+    await shift_upline_bv(db, new_parent_id, new_side, subtree_bv)
+    await shift_upline(db, new_parent_id, new_side, legs=legs, actives=actives)
+    return {"bv_moved": str(subtree_bv), "nodes_moved": legs}
+
+
+async def move_subtree(
+    db: AsyncSession,
+    affiliate_id: uuid.UUID,
+    new_parent_id: uuid.UUID,
+    new_side: str,
+    moved_by_user_id: uuid.UUID,
+) -> Affiliate:
+    """Move an affiliate's whole placement subtree to (new_parent_id, new_side).
+
+    In a single transaction:
+    1. Lock the affiliate and validate the target (exists, free, not inside the subtree).
+    2. Lock the ancestors on the old and new paths.
+    3. Re-attribute subtree BV and counters from the old upline to the new one.
+    4. Audit log with before and after.
+    """
+    result = await db.execute(
+        select(Affiliate)
+        .where(Affiliate.id == affiliate_id, Affiliate.deleted_at.is_(None))
+        .with_for_update()
+    )
+    affiliate = result.scalar_one_or_none()
+    if affiliate is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Affiliate not found",
+        )
+    if affiliate.placement_parent_id == new_parent_id and affiliate.placement_side == new_side:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Affiliate is already in that position",
+        )
+
+    result = await db.execute(
+        select(Affiliate.id).where(Affiliate.id == new_parent_id, Affiliate.deleted_at.is_(None))
+    )
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="New placement parent not found",
+        )
+
+    # The new parent must not sit inside the subtree being moved
+    new_path = upline_legs(new_parent_id, new_side, live_only=False)
+    result = await db.execute(select(new_path.c.id).where(new_path.c.id == affiliate_id))
+    if result.first() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Cannot move an affiliate under its own downline",
+        )
+
+    locked = await lock_paths(
+        db,
+        (affiliate.placement_parent_id, affiliate.placement_side),
+        (new_parent_id, new_side),
+    )
+
+    result = await db.execute(
+        select(Affiliate.id).where(
+            Affiliate.placement_parent_id == new_parent_id,
+            Affiliate.placement_side == new_side,
+            Affiliate.deleted_at.is_(None),
+        )
+    )
+    if result.first() is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Position '{new_side}' under the new parent is already taken",
+        )
+
+    before = {
+        "placement_parent_id": str(affiliate.placement_parent_id)
+        if affiliate.placement_parent_id
+        else None,
+        "placement_side": affiliate.placement_side,
+    }
+    moved = await reattach(db, affiliate, new_parent_id, new_side)
+
+    db.add(
+        AuditLog(
+            tenant_id=affiliate.tenant_id,
+            user_id=moved_by_user_id,
+            action="affiliate.move",
+            resource_type="affiliate",
+            resource_id=affiliate.id,
+            old_values=before,
+            new_values={
+                "placement_parent_id": str(new_parent_id),
+                "placement_side": new_side,
+                **moved,
+            },
+        )
+    )
+    await db.flush()
+
+    invalidate_on_commit(
+        "tree", PLACEMENT_TAG, f"affiliate:{affiliate.id}", *(f"affiliate:{a}" for a in locked)
+    )
+    await db.refresh(affiliate)
+    return affiliate
@@ -1,14 +1,69 @@
 """
 Binary tree service: builds the genealogy tree structure for visualization.
+
+Trees are read with one recursive CTE into a columnar (flat) result; the nested
+TreeNodeResponse format is derived from it. Tree reads are single-flighted:
+concurrent requests for the same (root_id, depth, data version) await one
+computation instead of each rebuilding the tree. The data version is the
+response cache's "tree" tag, which every genealogy write bumps on commit.
 """
 
+import logging
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import and_, exists, literal, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from app.config import settings
+from app.core.cache import response_cache
+from app.core.singleflight import DistributedSingleFlight, SingleFlight
 from app.models.affiliate import Affiliate
-from app.schemas.affiliate import TreeNodeResponse
+from app.models.snapshot import PeriodSnapshot
+from app.schemas.affiliate import (
+    FlatTreeNodes,
+    FlatTreeResponse,
+    FrontierNodes,
+    FrontierResponse,
+    TreeNodeResponse,
+    UplineNode,
+    UplineResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# Nested responses are recursive Pydantic models; past this depth use format=flat
+NESTED_MAX_DEPTH = 10
+FLAT_MAX_DEPTH = 30
+
+# Safety cap for upward walks, so a corrupted (cyclic) chain can't loop forever
+MAX_UPLINE_DEPTH = 10_000
+
+
+def _dump_tree(tree: FlatTreeResponse | None) -> bytes:
+    return tree.model_dump_json().encode() if tree is not None else b"null"
+
+
+def _load_tree(raw: bytes) -> FlatTreeResponse | None:
+    return None if raw == b"null" else FlatTreeResponse.model_validate_json(raw)
+
+
+_tree_flights: SingleFlight[FlatTreeResponse | None] = (
+    DistributedSingleFlight("tree", dumps=_dump_tree, loads=_load_tree)
+    if settings.TREE_SINGLEFLIGHT_DISTRIBUTED
+    else SingleFlight()
+)
+
+
+async def tree_data_version() -> int:
+    """Current version of the genealogy data (bumped on every committed tree write)."""
+    try:
+        (version,) = await response_cache.tag_versions(["tree"])
+    except Exception:
+        logger.warning("Could not read tree data version", exc_info=True)
+        return -1
+    return version
 
 
 async def get_binary_tree(
@@ -21,54 +76,398 @@ async def get_binary_tree(
     Returns a TreeNodeResponse with nested left_child/right_child,
     or None if the root affiliate is not found.
     """
-    result = await db.execute(
-        select(Affiliate).where(
-            Affiliate.id == root_id,
-            Affiliate.deleted_at.is_(None),
+    flat = await get_flat_tree(db, root_id, depth)
+    if flat is None:
+        return None
+    return nest_flat_tree(flat)
+
+
+async def get_flat_tree(
+    db: AsyncSession,
+    root_id: uuid.UUID,
+    depth: int = 3,
+    max_nodes: int | None = None,
+) -> FlatTreeResponse | None:
+    """Columnar (adjacency-list) tree below root_id, or None if the root is not found.
+
+    Nodes are ordered by level, then parent, then side (left first). When
+    `max_nodes` would be exceeded only whole levels are returned, and the nodes
+    of the last returned level are listed in `frontier` for lazy expansion.
+    """
+    version = await tree_data_version()
+    return await _tree_flights.do(
+        (root_id, depth, max_nodes, version),
+        lambda: _build_flat_tree(db, root_id, depth, max_nodes),
+    )
+
+
+def subtree_query(root_ids: list[uuid.UUID], depth: int):
+    """Recursive CTE walking the placement tree below `root_ids`, at most `depth` levels.
+
+    Rows carry (id, placement_parent_id, placement_side, level, root_id); soft-deleted
+    affiliates and everything under them are skipped, as in the tree views.
+    """
+    subtree = (
+        select(
+            Affiliate.id,
+            Affiliate.placement_parent_id,
+            Affiliate.placement_side,
+            literal(0).label("level"),
+            Affiliate.id.label("root_id"),
+        )
+        .where(Affiliate.id.in_(root_ids), Affiliate.deleted_at.is_(None))
+        .cte("subtree", recursive=True)
+    )
+    child = aliased(Affiliate)
+    return subtree.union_all(
+        select(
+            child.id,
+            child.placement_parent_id,
+            child.placement_side,
+            subtree.c.level + 1,
+            subtree.c.root_id,
+        )
+        .join(subtree, child.placement_parent_id == subtree.c.id)
+        .where(child.deleted_at.is_(None), subtree.c.level < depth)
+    )
+
+
+async def _build_flat_tree(
+    db: AsyncSession,
+    root_id: uuid.UUID,
+    depth: int,
+    max_nodes: int | None,
+) -> FlatTreeResponse | None:
+    subtree = subtree_query([root_id], depth)
+    query = (
+        select(
+            subtree.c.id,
+            subtree.c.placement_parent_id,
+            subtree.c.placement_side,
+            subtree.c.level,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            Affiliate.status,
+            Affiliate.current_rank,
+            Affiliate.pv_current_period,
+            Affiliate.bv_left_total,
+            Affiliate.bv_right_total,
+            Affiliate.enrolled_at,
         )
+        .join(Affiliate, Affiliate.id == subtree.c.id)
+        .order_by(subtree.c.level)
     )
-    root = result.scalar_one_or_none()
-    if root is None:
+    return await _fetch_flat_tree(db, root_id, query, max_nodes)
+
+
+async def _fetch_flat_tree(
+    db: AsyncSession, root_id: uuid.UUID, query, max_nodes: int | None
+) -> FlatTreeResponse | None:
+    if max_nodes is not None:
+        # One extra row tells us whether the next level was cut off
+        query = query.limit(max_nodes + 1)
+    rows = (await db.execute(query)).all()
+    if not rows:
         return None
 
-    return await _build_node(db, root, depth)
+    truncated = False
+    if max_nodes is not None and len(rows) > max_nodes:
+        truncated = True
+        cut_level = rows[max_nodes].level
+        rows = [r for r in rows if r.level < cut_level]
+
+    return _to_columns(root_id, rows, truncated)
 
 
-async def _build_node(
+async def get_snapshot_tree(
     db: AsyncSession,
-    affiliate: Affiliate,
-    remaining_depth: int,
-) -> TreeNodeResponse:
-    """Recursively build a tree node with its children."""
-    left_child = None
-    right_child = None
-
-    if remaining_depth > 0:
-        # Query both children in a single query
-        result = await db.execute(
-            select(Affiliate).where(
-                Affiliate.placement_parent_id == affiliate.id,
-                Affiliate.deleted_at.is_(None),
+    period_key: str,
+    root_id: uuid.UUID,
+    depth: int = 3,
+    max_nodes: int | None = None,
+) -> FlatTreeResponse | None:
+    """The tree below root_id as captured when `period_key` closed (see app.services.snapshots).
+
+    Same layout as get_flat_tree; status, rank, the period's PV and the leg
+    totals are the snapshot's. Names and codes are today's.
+    """
+    snap = PeriodSnapshot
+    subtree = (
+        select(
+            snap.affiliate_id.label("id"),
+            snap.placement_parent_id,
+            snap.placement_side,
+            literal(0).label("level"),
+        )
+        .where(snap.period == period_key, snap.affiliate_id == root_id)
+        .cte("snapshot_subtree", recursive=True)
+    )
+    child = aliased(snap)
+    subtree = subtree.union_all(
+        select(child.affiliate_id, child.placement_parent_id, child.placement_side, subtree.c.level + 1)
+        .join(subtree, child.placement_parent_id == subtree.c.id)
+        .where(child.period == period_key, subtree.c.level < depth)
+    )
+    query = (
+        select(
+            subtree.c.id,
+            subtree.c.placement_parent_id,
+            subtree.c.placement_side,
+            subtree.c.level,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            snap.status,
+            snap.rank.label("current_rank"),
+            snap.pv.label("pv_current_period"),
+            snap.bv_left_total,
+            snap.bv_right_total,
+            Affiliate.enrolled_at,
+        )
+        .join(snap, and_(snap.period == period_key, snap.affiliate_id == subtree.c.id))
+        .join(Affiliate, Affiliate.id == subtree.c.id)
+        .order_by(subtree.c.level)
+    )
+    return await _fetch_flat_tree(db, root_id, query, max_nodes)
+
+
+def _order_by_level(rows, position: dict[uuid.UUID, int]) -> list:
+    """Order level-sorted rows by (level, parent position, side), left first.
+
+    `position` seeds the parents' positions and is extended with each row's
+    place in the output, so every level sorts under the order of the one above.
+    """
+    ordered: list = []
+    level_rows: list = []
+
+    def flush_level():
+        level_rows.sort(
+            key=lambda r: (position.get(r.placement_parent_id, -1), r.placement_side != "left")
+        )
+        for r in level_rows:
+            position[r.id] = len(ordered)
+            ordered.append(r)
+        level_rows.clear()
+
+    for row in rows:
+        if level_rows and row.level != level_rows[0].level:
+            flush_level()
+        level_rows.append(row)
+    flush_level()
+    return ordered
+
+
+def _to_columns(root_id: uuid.UUID, rows, truncated: bool) -> FlatTreeResponse:
+    """Order rows by (level, parent position, side) and lay them out as columns."""
+    index_of: dict[uuid.UUID, int] = {}
+    ordered = _order_by_level(rows, index_of)
+
+    last_level = ordered[-1].level
+    nodes = FlatTreeNodes(
+        id=[r.id for r in ordered],
+        parent_index=[
+            index_of.get(r.placement_parent_id, -1) if r.level > 0 else -1 for r in ordered
+        ],
+        side=[r.placement_side if r.level > 0 else None for r in ordered],
+        level=[r.level for r in ordered],
+        affiliate_code=[r.affiliate_code for r in ordered],
+        full_name=[f"{r.first_name} {r.last_name}" for r in ordered],
+        status=[r.status for r in ordered],
+        current_rank=[r.current_rank for r in ordered],
+        pv_current_period=[r.pv_current_period for r in ordered],
+        bv_left_total=[r.bv_left_total for r in ordered],
+        bv_right_total=[r.bv_right_total for r in ordered],
+        enrolled_at=[r.enrolled_at for r in ordered],
+    )
+    return FlatTreeResponse(
+        root_id=root_id,
+        depth=last_level,
+        truncated=truncated,
+        frontier=[r.id for r in ordered if r.level == last_level],
+        nodes=nodes,
+    )
+
+
+def has_child(parent_id_column, side: str):
+    """EXISTS clause: the node has a live child on `side` (index-backed)."""
+    child = aliased(Affiliate)
+    return exists().where(
+        child.placement_parent_id == parent_id_column,
+        child.placement_side == side,
+        child.deleted_at.is_(None),
+    )
+
+
+async def get_frontier(
+    db: AsyncSession,
+    ids: list[uuid.UUID],
+    levels: int = 1,
+) -> FrontierResponse:
+    """The `levels` levels below each of `ids`, in one query.
+
+    Every node carries has_left/has_right so the viewer knows which nodes can
+    be expanded further without fetching them.
+    """
+    subtree = subtree_query(ids, levels)
+    rows = (
+        await db.execute(
+            select(
+                subtree.c.id,
+                subtree.c.placement_parent_id,
+                subtree.c.placement_side,
+                subtree.c.level,
+                has_child(subtree.c.id, "left").label("has_left"),
+                has_child(subtree.c.id, "right").label("has_right"),
+                Affiliate.affiliate_code,
+                Affiliate.first_name,
+                Affiliate.last_name,
+                Affiliate.status,
+                Affiliate.current_rank,
+                Affiliate.pv_current_period,
+                Affiliate.bv_left_total,
+                Affiliate.bv_right_total,
+                Affiliate.enrolled_at,
             )
+            .join(Affiliate, Affiliate.id == subtree.c.id)
+            .order_by(subtree.c.level)
         )
-        children = result.scalars().all()
-
-        for child in children:
-            if child.placement_side == "left":
-                left_child = await _build_node(db, child, remaining_depth - 1)
-            elif child.placement_side == "right":
-                right_child = await _build_node(db, child, remaining_depth - 1)
-
-    return TreeNodeResponse(
-        id=affiliate.id,
-        affiliate_code=affiliate.affiliate_code,
-        full_name=affiliate.full_name,
-        status=affiliate.status,
-        current_rank=affiliate.current_rank,
-        pv_current_period=affiliate.pv_current_period,
-        bv_left_total=affiliate.bv_left_total,
-        bv_right_total=affiliate.bv_right_total,
-        enrolled_at=affiliate.enrolled_at,
-        left_child=left_child,
-        right_child=right_child,
+    ).all()
+
+    # Seeds (level 0) only anchor the ordering; the viewer already shows them
+    seeds = {r.id for r in rows if r.level == 0}
+    found = [i for i in dict.fromkeys(ids) if i in seeds]
+    position = {seed: i - len(found) for i, seed in enumerate(found)}
+    ordered = _order_by_level([r for r in rows if r.level > 0], position)
+
+    nodes = FrontierNodes(
+        id=[r.id for r in ordered],
+        parent_id=[r.placement_parent_id for r in ordered],
+        side=[r.placement_side for r in ordered],
+        level=[r.level for r in ordered],
+        has_left=[r.has_left for r in ordered],
+        has_right=[r.has_right for r in ordered],
+        affiliate_code=[r.affiliate_code for r in ordered],
+        full_name=[f"{r.first_name} {r.last_name}" for r in ordered],
+        status=[r.status for r in ordered],
+        current_rank=[r.current_rank for r in ordered],
+        pv_current_period=[r.pv_current_period for r in ordered],
+        bv_left_total=[r.bv_left_total for r in ordered],
+        bv_right_total=[r.bv_right_total for r in ordered],
+        enrolled_at=[r.enrolled_at for r in ordered],
     )
+    return FrontierResponse(ids=found, levels=levels, nodes=nodes)
+
+
+async def get_upline(
+    db: AsyncSession,
+    affiliate_id: uuid.UUID,
+    tree: str = "placement",
+    stop_at: uuid.UUID | None = None,
+) -> UplineResponse | None:
+    """Ancestor chain of `affiliate_id` up to the root, from one recursive query.
+
+    `tree` selects the placement (binary) or sponsor line. If `stop_at` is
+    given the walk ends at that affiliate; a chain that never reaches it means
+    the node is outside the caller's network and None is returned, as for a
+    missing node.
+    """
+    parent_col = Affiliate.placement_parent_id if tree == "placement" else Affiliate.sponsor_id
+    chain = (
+        select(
+            Affiliate.id,
+            parent_col.label("parent_id"),
+            Affiliate.placement_side.label("own_side"),
+            literal(0).label("distance"),
+        )
+        .where(Affiliate.id == affiliate_id, Affiliate.deleted_at.is_(None))
+        .cte("upline", recursive=True)
+    )
+    ancestor = aliased(Affiliate)
+    ancestor_parent = ancestor.placement_parent_id if tree == "placement" else ancestor.sponsor_id
+    recursive = (
+        select(ancestor.id, ancestor_parent, ancestor.placement_side, chain.c.distance + 1)
+        .join(chain, ancestor.id == chain.c.parent_id)
+        .where(chain.c.distance < MAX_UPLINE_DEPTH)
+    )
+    if stop_at is not None:
+        recursive = recursive.where(chain.c.id != stop_at)
+    chain = chain.union_all(recursive)
+
+    rows = (
+        await db.execute(
+            select(
+                chain.c.id,
+                chain.c.own_side,
+                chain.c.distance,
+                Affiliate.affiliate_code,
+                Affiliate.first_name,
+                Affiliate.last_name,
+                Affiliate.status,
+                Affiliate.current_rank,
+            )
+            .join(Affiliate, Affiliate.id == chain.c.id)
+            .order_by(chain.c.distance)
+        )
+    ).all()
+    if not rows:
+        return None
+    if stop_at is not None and rows[-1].id != stop_at:
+        return None
+
+    ancestors = [
+        UplineNode(
+            id=row.id,
+            affiliate_code=row.affiliate_code,
+            full_name=f"{row.first_name} {row.last_name}",
+            status=row.status,
+            current_rank=row.current_rank,
+            distance=row.distance,
+            # The path reaches this ancestor through the leg its child sits on
+            side=child.own_side if tree == "placement" else None,
+        )
+        for child, row in zip(rows, rows[1:])
+    ]
+    return UplineResponse(
+        affiliate_id=affiliate_id,
+        tree=tree,
+        ancestors=ancestors,
+        cut_at_viewer=stop_at is not None and stop_at != affiliate_id,
+    )
+
+
+def nest_flat_tree(flat: FlatTreeResponse) -> TreeNodeResponse:
+    """Turn the columnar tree into nested TreeNodeResponse objects.
+
+    Children always come after their parent, so one reverse pass builds every
+    subtree before the node that owns it.
+    """
+    n = flat.nodes
+    count = len(n.id)
+    left: list[TreeNodeResponse | None] = [None] * count
+    right: list[TreeNodeResponse | None] = [None] * count
+    built: TreeNodeResponse | None = None
+
+    for i in range(count - 1, -1, -1):
+        built = TreeNodeResponse(
+            id=n.id[i],
+            affiliate_code=n.affiliate_code[i],
+            full_name=n.full_name[i],
+            status=n.status[i],
+            current_rank=n.current_rank[i],
+            pv_current_period=n.pv_current_period[i],
+            bv_left_total=n.bv_left_total[i],
+            bv_right_total=n.bv_right_total[i],
+            enrolled_at=n.enrolled_at[i],
+            left_child=left[i],
+            right_child=right[i],
+        )
+        parent = n.parent_index[i]
+        if parent >= 0:
+            if n.side[i] == "left":
+                left[parent] = built
+            elif n.side[i] == "right":
+                right[parent] = built
+
+    assert built is not None
+    return built
@@ -0,0 +1,90 @@
+"""
+Unilevel bonus over the sponsor tree (modulos.md §5.2).
+
+Every member's period BV pays a percentage to each of the N sponsors above
+it, generation by generation. Instead of walking N sponsors up from every
+member, the engine propagates per-generation sums up the sponsor tree: the
+BV k + 1 generations below a sponsor is the sum of its direct recruits' BV
+k generations below them. N linear sweeps over the sponsor array build
+those sums for everyone, and payouts are read off them. Everything is
+integer cents and positions in NetworkArrays.
+"""
+
+from array import array
+from collections.abc import Iterator, Mapping, Sequence
+from decimal import Decimal
+
+from app.services.network_snapshot import NetworkArrays
+
+UNILEVEL = "unilevel"
+# Background job kind that runs app.jobs.unilevel_bonus for a period
+UNILEVEL_KIND = "unilevel_bonus"
+
+# Rates are applied in ten-thousandths, the precision of commissions.rate
+RATE_SCALE = 10_000
+
+
+def _zeros(n: int) -> array:
+    return array("q", bytes(8 * n))
+
+
+def generation_volume(sponsor: Sequence[int], own_bv: Sequence[int], generations: int) -> list[array]:
+    """volume[k][i]: BV of the members exactly k + 1 sponsor generations below i.
+
+    Each generation is one sweep that hands every member's previous-generation
+    sum to its sponsor, so no upline is ever walked and no traversal order is
+    needed. (A sponsor cycle, which the integrity report flags, would only
+    recirculate volume within `generations` steps.)
+    """
+    n = len(sponsor)
+    volume = []
+    below = own_bv
+    for _ in range(generations):
+        level = _zeros(n)
+        for s, bv in zip(sponsor, below):
+            if bv and s >= 0:
+                level[s] += bv
+        volume.append(level)
+        below = level
+    return volume
+
+
+def rate_units(rates: Sequence[Decimal]) -> list[int]:
+    return [int(Decimal(str(r)) * RATE_SCALE) for r in rates]
+
+
+def paid_depths(
+    net: NetworkArrays,
+    own_pv: Sequence[int],
+    generations: int,
+    *,
+    min_pv: int = 0,
+    depth_by_rank: Mapping[str, int] | None = None,
+) -> array:
+    """How many generations each member is paid: 0 unless live, active and at min PV."""
+    ranks = net.extra.get("current_rank")
+    depth_by_rank = depth_by_rank or {}
+    depths = array("b", bytes(len(net)))
+    for i in range(len(net)):
+        if not (net.live[i] and net.active[i] and own_pv[i] >= min_pv):
+            continue
+        depth = depth_by_rank.get(ranks[i], generations) if ranks is not None else generations
+        depths[i] = min(depth, generations)
+    return depths
+
+
+def unilevel_payouts(
+    volume: list[array], rates: Sequence[int], depths: Sequence[int]
+) -> Iterator[tuple[int, int, int, int]]:
+    """(position, generation, base cents, amount cents) for every non-zero payout.
+
+    `rates` are in RATE_SCALE units; amounts round half up to the cent.
+    """
+    half = RATE_SCALE // 2
+    for k, level in enumerate(volume):
+        rate = rates[k]
+        for i, base in enumerate(level):
+            if base > 0 and depths[i] > k:
+                amount = (base * rate + half) // RATE_SCALE
+                if amount:
+                    yield i, k + 1, base, amount
@@ -0,0 +1,216 @@
+"""
+BV/PV-per-leg report: every live affiliate with own and per-leg volume for a
+period, next to the stored accumulators.
+
+Period volume comes from paid orders in the window (ix_orders_paid_at)
+joined to the buyer's ancestors in affiliate_ancestors, grouped per ancestor
+and leg in the database. Rows are read through a server-side cursor and
+rendered chunk by chunk, so the response starts streaming right away and
+memory stays flat whatever the network size. A captured period's snapshot
+can't change, so its report is written to REPORTS_DIR on first request and
+served from there; capturing or archiving the period discards that file.
+"""
+
+import csv
+import io
+import os
+import uuid
+from collections.abc import AsyncIterator, Sequence
+from pathlib import Path
+from typing import Any, Literal
+
+from sqlalchemy import case, func, select
+
+from app.config import settings
+from app.db.session import async_session_factory
+from app.models.affiliate import Affiliate
+from app.models.ancestry import AffiliateAncestor
+from app.models.order import Order
+from app.services.payment import CREDITED_ORDER_STATUSES
+from app.services.periods import Period
+
+ReportFormat = Literal["csv", "arrow"]
+
+MEDIA_TYPES: dict[str, str] = {
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+STREAM_BATCH = 5_000
+
+TEXT_COLUMNS = ("affiliate_id", "affiliate_code", "first_name", "last_name", "status")
+VOLUME_COLUMNS = (
+    "pv_period",
+    "bv_period",
+    "left_pv_period",
+    "left_bv_period",
+    "right_pv_period",
+    "right_bv_period",
+    "pv_accumulated",
+    "bv_left_accumulated",
+    "bv_right_accumulated",
+)
+COLUMNS = TEXT_COLUMNS + VOLUME_COLUMNS
+
+
+def period_volume(period: Period):
+    """Own and per-leg volume per affiliate from the orders paid within the period.
+
+    Returns two subqueries: own (affiliate_id, pv, bv) and legs (ancestor_id,
+    left_pv, left_bv, right_pv, right_bv).
+    """
+    in_window = (
+        Order.paid_at >= period.start,
+        Order.paid_at < period.end,
+        Order.status.in_(CREDITED_ORDER_STATUSES),
+    )
+    own = (
+        select(
+            Order.affiliate_id,
+            func.sum(Order.total_pv).label("pv"),
+            func.sum(Order.total_bv).label("bv"),
+        )
+        .where(*in_window)
+        .group_by(Order.affiliate_id)
+        .subquery("own")
+    )
+
+    def leg_sum(side: str, column):
+        return func.sum(case((AffiliateAncestor.side == side, column), else_=0))
+
+    legs = (
+        select(
+            AffiliateAncestor.ancestor_id,
+            leg_sum("left", Order.total_pv).label("left_pv"),
+            leg_sum("left", Order.total_bv).label("left_bv"),
+            leg_sum("right", Order.total_pv).label("right_pv"),
+            leg_sum("right", Order.total_bv).label("right_bv"),
+        )
+        .join(Order, Order.affiliate_id == AffiliateAncestor.descendant_id)
+        .where(*in_window)
+        .group_by(AffiliateAncestor.ancestor_id)
+        .subquery("legs")
+    )
+    return own, legs
+
+
+def zero(column, name: str):
+    return func.coalesce(column, 0).label(name)
+
+
+def volume_report_query(period: Period):
+    own, legs = period_volume(period)
+    return (
+        select(
+            Affiliate.id,
+            Affiliate.affiliate_code,
+            Affiliate.first_name,
+            Affiliate.last_name,
+            Affiliate.status,
+            zero(own.c.pv, "pv_period"),
+            zero(own.c.bv, "bv_period"),
+            zero(legs.c.left_pv, "left_pv_period"),
+            zero(legs.c.left_bv, "left_bv_period"),
+            zero(legs.c.right_pv, "right_pv_period"),
+            zero(legs.c.right_bv, "right_bv_period"),
+            Affiliate.pv_current_period,
+            Affiliate.bv_left_total,
+            Affiliate.bv_right_total,
+        )
+        .outerjoin(own, own.c.affiliate_id == Affiliate.id)
+        .outerjoin(legs, legs.c.ancestor_id == Affiliate.id)
+        .where(Affiliate.deleted_at.is_(None))
+        .order_by(Affiliate.affiliate_code)
+    )
+
+
+async def stream_rows(stmt) -> AsyncIterator[Sequence[Any]]:
+    """Row batches through a server-side cursor, in a session of their own.
+
+    The request's session is closed before a streamed body is sent, so the
+    stream can't borrow it.
+    """
+    async with async_session_factory() as db:
+        result = await db.stream(stmt.execution_options(yield_per=STREAM_BATCH))
+        async for partition in result.partitions():
+            yield partition
+
+
+async def render_csv(batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    yield buffer.getvalue().encode()
+    async for batch in batches:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(batch)
+        yield buffer.getvalue().encode()
+
+
+def arrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def render_arrow(batches: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """Arrow IPC stream, one record batch per cursor batch (needs pyarrow)."""
+    import pyarrow as pa
+
+    schema = pa.schema(
+        [(name, pa.string()) for name in TEXT_COLUMNS]
+        + [(name, pa.decimal128(18, 2)) for name in VOLUME_COLUMNS]
+    )
+    buffer = io.BytesIO()
+    writer = pa.ipc.new_stream(buffer, schema)
+    async for batch in batches:
+        columns = list(zip(*batch))
+        columns[0] = [str(v) for v in columns[0]]
+        writer.write_batch(pa.record_batch(columns, schema=schema))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    writer.close()
+    yield buffer.getvalue()
+
+
+RENDERERS = {"csv": render_csv, "arrow": render_arrow}
+
+
+def stored_report_path(period: Period, fmt: ReportFormat) -> Path:
+    return Path(settings.REPORTS_DIR) / "volumes" / f"{period.key}.{fmt}"
+
+
+async def write_through(chunks: AsyncIterator[bytes], path: Path) -> AsyncIterator[bytes]:
+    """Pass `chunks` on while saving them; the file only appears once complete."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.name}.{uuid.uuid4().hex}.part")
+    try:
+        with partial.open("wb") as out:
+            async for chunk in chunks:
+                out.write(chunk)
+                yield chunk
+        os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+
+
+def discard_stored_reports(period: Period) -> None:
+    """Remove the period's stored reports so the next request rebuilds them."""
+    for fmt in RENDERERS:
+        stored_report_path(period, fmt).unlink(missing_ok=True)
+
+
+def volume_report(period: Period, fmt: ReportFormat, snapshot_stmt=None) -> AsyncIterator[bytes]:
+    """Byte stream of the report.
+
+    `snapshot_stmt` (a captured period's snapshot query, yielding the same
+    columns) replaces the computed query; only those reports are stored for
+    later requests, since live data keeps changing after a period closes.
+    """
+    if snapshot_stmt is None:
+        return RENDERERS[fmt](stream_rows(volume_report_query(period)))
+    return write_through(RENDERERS[fmt](stream_rows(snapshot_stmt)), stored_report_path(period, fmt))
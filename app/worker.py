@@ -0,0 +1,209 @@
+"""
+Job runner: execute the jobs in background_jobs, for every queue at once.
+
+Each queue in JOB_QUEUES (or --queue NAME=N) gets N slots in this process;
+a slot claims the queue's next job (highest priority first, FOR UPDATE SKIP
+LOCKED, so any number of runners can share the table) and runs it chunk by
+chunk from its last checkpoint. I/O-bound kinds run on the event loop.
+CPU-bound kinds (the network engines) are sent to a process pool of
+--processes workers, each running the job in its own event loop with its own
+database engine, so one long pass doesn't stall the other queues.
+
+A job whose runner stops heartbeating for the job's visibility timeout is
+resumed by another slot; a job whose step raises is retried after a backoff
+until its max_attempts (app.services.background_jobs). SIGTERM/SIGINT stop
+claiming and let running jobs finish their current chunk.
+
+Usage:
+    python -m app.worker [--queue reports=4 --queue engines=1 ...] [--processes N] [--once]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import signal
+import uuid
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import settings
+from app.db.session import async_session_factory, make_engine, make_session_factory
+from app.jobs.evaluate_ranks import full_pass_params, full_pass_step
+from app.jobs.unilevel_bonus import unilevel_step
+from app.services.background_jobs import (
+    JobParams,
+    JobStep,
+    claim_job,
+    period_params,
+    redis_client,
+    run_job,
+    wakeup_key,
+)
+from app.services.liquidation import PREVIEW_KIND, PREVIEW_QUEUE, preview_step
+from app.services.unilevel import UNILEVEL_KIND
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class JobKind:
+    step: JobStep
+    check_params: JobParams = period_params  # run by POST /jobs before queueing
+    queue: str = "default"
+    cpu: bool = False  # run in the process pool
+    visibility_timeout: int | None = None  # seconds; default JOB_STALE_AFTER
+
+
+KINDS: dict[str, JobKind] = {
+    PREVIEW_KIND: JobKind(preview_step, queue=PREVIEW_QUEUE),
+    # One chunk each: the heartbeat only moves when the whole pass is done
+    UNILEVEL_KIND: JobKind(unilevel_step, queue="engines", cpu=True, visibility_timeout=1800),
+    "rank_full_pass": JobKind(
+        full_pass_step,
+        check_params=full_pass_params,
+        queue="engines",
+        cpu=True,
+        visibility_timeout=1800,
+    ),
+}
+
+
+def run_in_process(job_id: str, token: str, kind: str) -> str:
+    """Process-pool entry point: run one claimed job to the end in this process."""
+    return asyncio.run(_run_isolated(uuid.UUID(job_id), uuid.UUID(token), kind))
+
+
+async def _run_isolated(job_id: uuid.UUID, token: uuid.UUID, kind: str) -> str:
+    engine = make_engine(pool_size=1, max_overflow=1)
+    try:
+        return await run_job(make_session_factory(engine), job_id, token, KINDS[kind].step)
+    finally:
+        await engine.dispose()
+
+
+class Worker:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        concurrency: dict[str, int],
+        *,
+        processes: int,
+        poll_interval: float,
+        wakeup: str = "poll",
+    ):
+        self.session_factory = session_factory
+        self.concurrency = {q: n for q, n in concurrency.items() if n > 0}
+        self.processes = processes
+        self.poll_interval = poll_interval
+        self.wakeup = wakeup
+        self.finished: Counter[str] = Counter()
+        self._stopping = asyncio.Event()
+        self._pool: ProcessPoolExecutor | None = None
+
+    def stop(self) -> None:
+        """Stop claiming; running jobs end after their current chunk."""
+        self._stopping.set()
+
+    async def run(self, *, once: bool = False) -> dict[str, Any]:
+        """Serve every queue until stopped, or with `once` until they are all empty."""
+        if any(k.cpu for k in KINDS.values()) and self.processes > 0:
+            # spawn: a forked child would inherit the parent's event loop and pooled connections
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.processes, mp_context=multiprocessing.get_context("spawn")
+            )
+        try:
+            await asyncio.gather(
+                *(
+                    self._serve(queue, once)
+                    for queue, slots in self.concurrency.items()
+                    for _ in range(slots)
+                )
+            )
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+        return {"queues": self.concurrency, "processes": self.processes, "finished": dict(self.finished)}
+
+    async def _serve(self, queue: str, once: bool) -> None:
+        kinds = [name for name, kind in KINDS.items() if kind.queue == queue]
+        if not kinds:
+            logger.warning("No job kind runs on queue %s", queue)
+            return
+        while not self._stopping.is_set():
+            async with self.session_factory() as db:
+                job = await claim_job(db, queue, kinds)
+                claimed = (job.id, job.claim_token, job.kind) if job is not None else None
+                await db.commit()
+            if claimed is None:
+                if once:
+                    return
+                await self._idle(queue)
+                continue
+            job_id, token, kind = claimed
+            logger.info("Running %s job %s on %s", kind, job_id, queue)
+            outcome = await self._execute(job_id, token, kind)
+            logger.info("Job %s %s", job_id, outcome)
+            self.finished[outcome] += 1
+
+    async def _execute(self, job_id: uuid.UUID, token: uuid.UUID, kind: str) -> str:
+        spec = KINDS[kind]
+        if spec.cpu and self._pool is not None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._pool, run_in_process, str(job_id), str(token), kind)
+        return await run_job(self.session_factory, job_id, token, spec.step)
+
+    async def _idle(self, queue: str) -> None:
+        if self.wakeup == "redis":
+            try:
+                await redis_client().blpop([wakeup_key(queue)], timeout=self.poll_interval)
+                return
+            except Exception:
+                logger.warning("Redis wake-up failed, polling instead", exc_info=True)
+        try:
+            await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+        except TimeoutError:
+            pass
+
+
+def _queue_arg(value: str) -> tuple[str, int]:
+    name, _, slots = value.partition("=")
+    if not name or not slots.isdigit():
+        raise argparse.ArgumentTypeError(f"expected NAME=N, got '{value}'")
+    return name, int(slots)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--queue", dest="queues", type=_queue_arg, action="append",
+        help="NAME=N concurrent jobs (repeatable; default JOB_QUEUES)",
+    )
+    parser.add_argument("--processes", type=int, default=settings.JOB_PROCESSES or os.cpu_count() or 1)
+    parser.add_argument("--poll-interval", type=float, default=settings.JOB_POLL_INTERVAL)
+    parser.add_argument("--once", action="store_true", help="stop when no job is waiting")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    worker = Worker(
+        async_session_factory,
+        dict(args.queues) if args.queues else settings.JOB_QUEUES,
+        processes=args.processes,
+        poll_interval=args.poll_interval,
+        wakeup=settings.JOB_WAKEUP,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    report = await worker.run(once=args.once)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
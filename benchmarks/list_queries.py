@@ -0,0 +1,290 @@
+"""
+List endpoint query benchmark: ORM entities vs projected rows.
+
+Times one page (--limit rows) of the affiliate and order lists, from
+executing the query to the rendered JSON body, three ways:
+
+- entities: `select(Affiliate)` / `select(Order)` loaded as ORM objects into
+  the session's identity map, a second IN query for the creator username or
+  affiliate name, then one response model per object (the original handlers)
+- two_queries: only the listed columns as rows, names still resolved with a
+  second IN query
+- projected: the handlers' current single statement (list_affiliates_query,
+  list_orders_query) with the names joined in, rendered from the rows by
+  model_response
+
+Memory is the tracemalloc peak for one page, so it covers the row buffers,
+entity state and response objects alive at the same time. Each page uses a
+fresh Session, like a request does.
+
+By default runs on an in-memory SQLite database seeded with --rows
+affiliates and orders (shipping_address and notes filled in, as in
+production). Pass --database-url with a sync URL (e.g. DATABASE_URL_SYNC)
+to run against an existing, seeded Postgres database instead; no data is
+written there.
+
+Usage:
+    python -m benchmarks.list_queries [--rows 2000] [--limit 100] [--repeat 50]
+        [--database-url postgresql://...]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Callable
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+
+from app.api.v1.endpoints.affiliates import list_affiliates_query
+from app.api.v1.endpoints.orders import list_orders_query
+from app.core.responses import adapter_for, model_response
+from app.db.base import Base
+from app.models.affiliate import Affiliate
+from app.models.order import Order
+from app.models.user import User
+from app.schemas.affiliate import AffiliateListResponse
+from app.schemas.order import OrderListResponse
+
+NOW = datetime(2026, 3, 14, 12, 30, tzinfo=timezone.utc)
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_on_sqlite(type_, compiler, **kw) -> str:
+    return "JSON"
+
+
+def seed(engine: Engine, rows: int) -> None:
+    Base.metadata.create_all(engine, tables=[User.__table__, Affiliate.__table__, Order.__table__])
+    creators = [
+        User(
+            id=uuid.uuid4(),
+            email=f"admin{i}@example.com",
+            password_hash="x",
+            first_name="Admin",
+            last_name=str(i),
+            username=f"admin{i}" if i % 2 else None,
+            created_at=NOW,
+            updated_at=NOW,
+        )
+        for i in range(5)
+    ]
+    affiliates = [
+        Affiliate(
+            id=uuid.uuid4(),
+            created_by_user_id=creators[i % 5].id,
+            affiliate_code=f"GH-SV-{i:06d}",
+            first_name="Ana",
+            last_name=f"Diaz {i}",
+            email=f"ana{i}@example.com",
+            phone="+503 7000 0000",
+            id_doc_type="DUI",
+            id_doc_number=f"{i:08d}-0",
+            address_line1="Calle La Mascota #123, Colonia San Benito",
+            city="San Salvador",
+            state_province="San Salvador",
+            kit_tier="ESP2",
+            status="active",
+            enrolled_at=NOW,
+            created_at=NOW,
+            updated_at=NOW,
+        )
+        for i in range(rows)
+    ]
+    orders = [
+        Order(
+            id=uuid.uuid4(),
+            order_number=f"ORD-2026-{i:06d}",
+            affiliate_id=affiliates[i].id,
+            order_type="repurchase",
+            status="paid",
+            subtotal=Decimal("125.50"),
+            total=Decimal("125.50"),
+            total_pv=Decimal("100.00"),
+            total_bv=Decimal("80.00"),
+            payment_method="transfer",
+            paid_at=NOW,
+            shipping_address={
+                "line1": "Calle La Mascota #123, Colonia San Benito",
+                "city": "San Salvador",
+                "country": "SV",
+                "phone": "+503 7000 0000",
+            },
+            notes="Deliver after 2pm. " * 10,
+            created_by=creators[0].id,
+            created_at=NOW,
+            updated_at=NOW,
+        )
+        for i in range(rows)
+    ]
+    with Session(engine) as db:
+        db.add_all(creators + affiliates + orders)
+        db.commit()
+
+
+# -- affiliates ---------------------------------------------------------------
+
+
+def _creator_names(db: Session, ids: set) -> dict:
+    if not ids:
+        return {}
+    rows = db.execute(select(User.id, User.username, User.first_name, User.last_name).where(User.id.in_(ids)))
+    return {r.id: r.username or f"{r.first_name} {r.last_name}" for r in rows}
+
+
+def affiliates_entities(db: Session, limit: int) -> bytes:
+    query = select(Affiliate).where(Affiliate.deleted_at.is_(None)).order_by(Affiliate.created_at.desc()).limit(limit)
+    affiliates = db.execute(query).scalars().all()
+    names = _creator_names(db, {a.created_by_user_id for a in affiliates if a.created_by_user_id})
+    responses = []
+    for a in affiliates:
+        resp = AffiliateListResponse.model_validate(a)
+        resp.created_by_username = names.get(a.created_by_user_id)
+        responses.append(resp)
+    return adapter_for(list[AffiliateListResponse]).dump_json(responses)
+
+
+def affiliates_two_queries(db: Session, limit: int) -> bytes:
+    query = (
+        select(
+            Affiliate.id,
+            Affiliate.affiliate_code,
+            (Affiliate.first_name + " " + Affiliate.last_name).label("full_name"),
+            Affiliate.email,
+            Affiliate.status,
+            Affiliate.kit_tier,
+            Affiliate.current_rank,
+            Affiliate.enrolled_at,
+            Affiliate.created_by_user_id,
+        )
+        .where(Affiliate.deleted_at.is_(None))
+        .order_by(Affiliate.created_at.desc())
+        .limit(limit)
+    )
+    rows = db.execute(query).all()
+    names = _creator_names(db, {r.created_by_user_id for r in rows if r.created_by_user_id})
+    items = [{**r._mapping, "created_by_username": names.get(r.created_by_user_id)} for r in rows]
+    return model_response(list[AffiliateListResponse], items).body
+
+
+def affiliates_projected(db: Session, limit: int) -> bytes:
+    rows = db.execute(list_affiliates_query(None, 0, limit)).all()
+    return model_response(list[AffiliateListResponse], rows).body
+
+
+# -- orders -------------------------------------------------------------------
+
+
+def _affiliate_names(db: Session, ids: set) -> dict:
+    if not ids:
+        return {}
+    rows = db.execute(
+        select(Affiliate.id, Affiliate.first_name, Affiliate.last_name, Affiliate.affiliate_code).where(
+            Affiliate.id.in_(ids)
+        )
+    )
+    return {r.id: (f"{r.first_name} {r.last_name}", r.affiliate_code) for r in rows}
+
+
+def orders_entities(db: Session, limit: int) -> bytes:
+    query = (
+        select(Order)
+        .join(Affiliate, Order.affiliate_id == Affiliate.id)
+        .where(Affiliate.deleted_at.is_(None), Order.status == "paid")
+        .order_by(Order.created_at.desc())
+        .limit(limit)
+    )
+    orders = db.execute(query).scalars().all()
+    names = _affiliate_names(db, {o.affiliate_id for o in orders})
+    responses = []
+    for o in orders:
+        resp = OrderListResponse.model_validate(o)
+        resp.affiliate_name, resp.affiliate_code = names.get(o.affiliate_id, ("", ""))
+        responses.append(resp)
+    return adapter_for(list[OrderListResponse]).dump_json(responses)
+
+
+def orders_two_queries(db: Session, limit: int) -> bytes:
+    query = list_orders_query("paid", 0, limit)
+    query = query.with_only_columns(
+        *(c for c in query.selected_columns if c.key not in ("affiliate_name", "affiliate_code")),
+        maintain_column_froms=True,
+    )
+    rows = db.execute(query).all()
+    names = _affiliate_names(db, {r.affiliate_id for r in rows})
+    items = []
+    for r in rows:
+        name, code = names.get(r.affiliate_id, ("", ""))
+        items.append({**r._mapping, "affiliate_name": name, "affiliate_code": code})
+    return model_response(list[OrderListResponse], items).body
+
+
+def orders_projected(db: Session, limit: int) -> bytes:
+    rows = db.execute(list_orders_query("paid", 0, limit)).all()
+    return model_response(list[OrderListResponse], rows).body
+
+
+# -- harness ------------------------------------------------------------------
+
+
+def page(engine: Engine, fn: Callable[[Session, int], bytes], limit: int) -> bytes:
+    with Session(engine) as db:
+        return fn(db, limit)
+
+
+def measure(engine: Engine, fn: Callable[[Session, int], bytes], limit: int, repeat: int) -> dict[str, Any]:
+    page(engine, fn, limit)  # warm-up: statement cache, adapters, connection
+    start = time.perf_counter()
+    for _ in range(repeat):
+        page(engine, fn, limit)
+    elapsed = (time.perf_counter() - start) / repeat
+
+    tracemalloc.start()
+    page(engine, fn, limit)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"ms": round(elapsed * 1000, 3), "peak_kib": round(peak / 1024, 1)}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--rows", type=int, default=2000, help="rows to seed (SQLite only)")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--database-url", default=None, help="sync URL of a seeded database")
+    args = parser.parse_args(argv)
+
+    if args.database_url:
+        engine = create_engine(args.database_url)
+    else:
+        engine = create_engine("sqlite://")
+        seed(engine, args.rows)
+
+    cases = {
+        "affiliates": (affiliates_entities, affiliates_two_queries, affiliates_projected),
+        "orders": (orders_entities, orders_two_queries, orders_projected),
+    }
+    report: dict[str, Any] = {"backend": engine.dialect.name, "limit": args.limit}
+    for name, fns in cases.items():
+        bodies = [sorted(json.loads(page(engine, fn, args.limit)), key=lambda item: item["id"]) for fn in fns]
+        assert bodies[0] == bodies[1] == bodies[2], name
+        results = {fn.__name__.split("_", 1)[1]: measure(engine, fn, args.limit, args.repeat) for fn in fns}
+        entities, projected = results["entities"], results["projected"]
+        report[name] = {
+            **results,
+            "speedup": round(entities["ms"] / projected["ms"], 2),
+            "memory_ratio": round(entities["peak_kib"] / projected["peak_kib"], 2),
+        }
+    engine.dispose()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
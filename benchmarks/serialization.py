@@ -0,0 +1,167 @@
+"""
+Response serialization microbenchmark (no database needed).
+
+Times turning ORM-shaped objects into a JSON response body, the way a
+handler does it, for 100 order list items, 100 affiliate list items and a
+full depth-10 binary tree (2047 nodes):
+
+- fastapi: model_validate per object, then FastAPI's response_model
+  validation and encoding rendered with the stdlib JSON encoder (the old path)
+- orjson: the same, rendered with app.core.responses.ORJSONResponse
+- direct: app.core.responses.model_response (one validation, bytes written
+  by pydantic-core)
+- new_adapter: a TypeAdapter built per call, as the response cache used to
+  do for every cached route (tree, detail, products)
+
+Usage:
+    python -m benchmarks.serialization [--repeat 200]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from functools import cache
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+from pydantic import TypeAdapter
+
+from app.core.responses import ORJSONResponse, model_response
+from app.schemas.affiliate import AffiliateListResponse, TreeNodeResponse
+from app.schemas.order import OrderListResponse
+
+NOW = datetime(2026, 3, 14, 12, 30, tzinfo=timezone.utc)
+
+
+def order_rows(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "order_number": f"ORD-2026-{i:06d}",
+            "affiliate_id": uuid.uuid4(),
+            "affiliate_name": "Ana Diaz",
+            "affiliate_code": f"GH-SV-{i:06d}",
+            "order_type": "repurchase",
+            "status": "paid",
+            "total": Decimal("125.50"),
+            "total_pv": Decimal("100.00"),
+            "total_bv": Decimal("80.00"),
+            "payment_method": "transfer",
+            "paid_at": NOW,
+            "created_at": NOW,
+        }
+        for i in range(n)
+    ]
+
+
+def affiliate_rows(n: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "id": uuid.uuid4(),
+            "affiliate_code": f"GH-SV-{i:06d}",
+            "full_name": "Ana Diaz",
+            "email": f"ana{i}@example.com",
+            "status": "active",
+            "kit_tier": "gold",
+            "current_rank": "silver",
+            "created_by_username": "admin",
+            "enrolled_at": NOW,
+        }
+        for i in range(n)
+    ]
+
+
+def tree(depth: int) -> TreeNodeResponse:
+    """Built as models, like app.services.tree does."""
+    return TreeNodeResponse(
+        id=uuid.uuid4(),
+        affiliate_code="GH-SV-000001",
+        full_name="Ana Diaz",
+        status="active",
+        current_rank="silver",
+        pv_current_period=Decimal("100.00"),
+        bv_left_total=Decimal("2500.00"),
+        bv_right_total=Decimal("1800.00"),
+        enrolled_at=NOW,
+        left_child=tree(depth - 1) if depth > 1 else None,
+        right_child=tree(depth - 1) if depth > 1 else None,
+    )
+
+
+@cache
+def response_field(response_type: Any):
+    """Built once per route by FastAPI at startup."""
+    return create_model_field(name="Response", type_=response_type, mode="serialization")
+
+
+async def fastapi_path(response_type: Any, value: Any, response_class: type[JSONResponse]) -> bytes:
+    field = response_field(response_type)
+    if isinstance(value, list):
+        model = response_type.__args__[0]
+        content = [model.model_validate(v) for v in value]
+    else:
+        content = value
+    encoded = await serialize_response(field=field, response_content=content)
+    return response_class(encoded).body
+
+
+def direct_path(response_type: Any, value: Any) -> bytes:
+    return model_response(response_type, value).body
+
+
+def new_adapter_path(response_type: Any, value: Any) -> bytes:
+    adapter = TypeAdapter(response_type)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+
+
+def timed(fn, repeat: int) -> float:
+    fn()  # warm-up: adapters and validators are built on first use
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cases = {
+        "orders_x100": (list[OrderListResponse], order_rows(100)),
+        "affiliates_x100": (list[AffiliateListResponse], affiliate_rows(100)),
+        "tree_depth10": (TreeNodeResponse, tree(10)),
+    }
+    loop = asyncio.new_event_loop()
+    report = {}
+    for name, (response_type, value) in cases.items():
+        stdlib = loop.run_until_complete(fastapi_path(response_type, value, JSONResponse))
+        fast = direct_path(response_type, value)
+        assert json.loads(stdlib) == json.loads(fast), name
+        ms = {
+            "fastapi": timed(
+                lambda: loop.run_until_complete(fastapi_path(response_type, value, JSONResponse)), args.repeat
+            ),
+            "orjson": timed(
+                lambda: loop.run_until_complete(fastapi_path(response_type, value, ORJSONResponse)), args.repeat
+            ),
+            "direct": timed(lambda: direct_path(response_type, value), args.repeat),
+            "new_adapter": timed(lambda: new_adapter_path(response_type, value), args.repeat),
+        }
+        report[name] = {
+            "bytes": len(fast),
+            **{f"{k}_ms": round(v, 3) for k, v in ms.items()},
+            "speedup": round(ms["fastapi"] / ms["direct"], 1),
+        }
+    loop.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
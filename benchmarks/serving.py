@@ -0,0 +1,139 @@
+"""
+Serving benchmark: throughput and latency of the API with 1 worker vs N.
+
+For each --workers count, starts `python -m app.serve` on a local port,
+waits for /health, then drives --path from --clients load-generator
+processes (--concurrency connections each) for --seconds and reports
+requests/s and latency percentiles. The default path needs no database;
+point --path at a real endpoint (with --header "Authorization: Bearer ...")
+against a seeded database to measure the workloads that matter, e.g.
+/api/v1/affiliates/<id>/tree?depth=8&format=nested.
+
+Usage:
+    python -m benchmarks.serving [--workers 1 4] [--path /health] [--seconds 10]
+        [--clients 4] [--concurrency 32] [--header "Authorization: Bearer ..."] [--no-gunicorn]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(workers: int, port: int, no_gunicorn: bool) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "app.serve", "--workers", str(workers), "--bind", f"127.0.0.1:{port}"]
+    if no_gunicorn:
+        cmd.append("--no-gunicorn")
+    env = {"WEB_WARMUP_CONNECTIONS": "0", "DEBUG": "false", **os.environ}
+    return subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def wait_ready(base_url: str, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"server at {base_url} did not become ready")
+
+
+async def _drive(url: str, headers: dict[str, str], seconds: float, concurrency: int) -> tuple[list[float], int]:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(headers=headers, limits=limits, timeout=30.0) as client:
+
+        async def loop() -> None:
+            nonlocal errors
+            while (start := time.perf_counter()) < deadline:
+                try:
+                    response = await client.get(url)
+                    if response.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(loop() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def load_process(url: str, headers: dict[str, str], seconds: float, concurrency: int) -> tuple[list[float], int]:
+    return asyncio.run(_drive(url, headers, seconds, concurrency))
+
+
+def percentile(ordered: list[float], p: float) -> float:
+    return ordered[min(int(len(ordered) * p), len(ordered) - 1)]
+
+
+def measure(workers: int, args: argparse.Namespace, headers: dict[str, str]) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(workers, port, args.no_gunicorn)
+    try:
+        wait_ready(base_url)
+        # Warm every worker's connection handling before the timed run
+        load_process(base_url + args.path, headers, 1.0, args.concurrency)
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            results = list(
+                pool.map(
+                    load_process,
+                    *zip(*[(base_url + args.path, headers, args.seconds, args.concurrency)] * args.clients),
+                )
+            )
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = sorted(lat for lats, _ in results for lat in lats)
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(errors for _, errors in results),
+        "rps": round(len(latencies) / args.seconds, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 2])
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--clients", type=int, default=4, help="load-generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load generator")
+    parser.add_argument("--header", action="append", default=[], help="'Name: value' (repeatable)")
+    parser.add_argument("--no-gunicorn", action="store_true")
+    args = parser.parse_args(argv)
+    headers = dict(h.split(": ", 1) for h in args.header)
+
+    runs = [measure(workers, args, headers) for workers in args.workers]
+    base = runs[0]["rps"] or 1
+    for run in runs:
+        run["speedup"] = round(run["rps"] / base, 2)
+    print(json.dumps({"path": args.path, "runs": runs}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
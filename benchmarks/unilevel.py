@@ -0,0 +1,117 @@
+"""
+Unilevel engine benchmark on a synthetic sponsor tree (no database needed).
+
+Builds --members members, each sponsored by an earlier one (mostly a recent
+enrollee, so the tree is deep like a real network, sometimes anyone), gives
+a share of them period BV and times the bulk engine. With --naive it also
+times walking every member's upline one sponsor at a time and checks that
+both produce the same payouts.
+
+Usage:
+    python -m benchmarks.unilevel [--members 1000000] [--generations 5] [--seed 7] [--naive]
+"""
+
+import argparse
+import json
+import random
+import time
+import uuid
+from array import array
+from collections import defaultdict
+from decimal import Decimal
+
+from app.services.network_snapshot import NetworkArrays
+from app.services.unilevel import (
+    RATE_SCALE,
+    generation_volume,
+    paid_depths,
+    rate_units,
+    unilevel_payouts,
+)
+
+RATES = [Decimal("0.05"), Decimal("0.04"), Decimal("0.03"), Decimal("0.02"), Decimal("0.01")]
+RECENT_WINDOW = 500
+BV_CHOICES = (0, 0, 0, 5_000, 10_000, 25_000)  # cents
+
+
+def synthetic_network(members: int, seed: int) -> tuple[NetworkArrays, array, array]:
+    rng = random.Random(seed)
+    sponsor = array("q", [-1])
+    for i in range(1, members):
+        if rng.random() < 0.8:
+            sponsor.append(rng.randrange(max(0, i - RECENT_WINDOW), i))
+        else:
+            sponsor.append(rng.randrange(i))
+    own_bv = array("q", (rng.choice(BV_CHOICES) for _ in range(members)))
+    own_pv = array("q", (bv // 2 for bv in own_bv))
+    ids = [uuid.UUID(int=i) for i in range(members)]
+    net = NetworkArrays(
+        ids=ids,
+        index={},
+        parent=array("q", [-1]) * members,
+        side=array("b", [-1]) * members,
+        sponsor=sponsor,
+        live=bytearray(b"\x01") * members,
+        active=bytearray(rng.random() < 0.8 for _ in range(members)),
+    )
+    return net, own_pv, own_bv
+
+
+def naive_payouts(
+    sponsor: array, own_bv: array, rates: list[int], depths: array
+) -> dict[tuple[int, int], int]:
+    """Walk every member's upline: the per-row approach the engine replaces."""
+    base: dict[tuple[int, int], int] = defaultdict(int)
+    for i, bv in enumerate(own_bv):
+        if not bv:
+            continue
+        s = sponsor[i]
+        for generation in range(1, len(rates) + 1):
+            if s < 0:
+                break
+            if depths[s] >= generation:
+                base[s, generation] += bv
+            s = sponsor[s]
+    half = RATE_SCALE // 2
+    return {
+        key: (b * rates[key[1] - 1] + half) // RATE_SCALE
+        for key, b in base.items()
+        if (b * rates[key[1] - 1] + half) // RATE_SCALE
+    }
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--members", type=int, default=1_000_000)
+    parser.add_argument("--generations", type=int, default=len(RATES))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--naive", action="store_true", help="also time the per-member upline walk")
+    args = parser.parse_args(argv)
+    rates = rate_units((RATES * args.generations)[: args.generations])
+
+    started = time.perf_counter()
+    net, own_pv, own_bv = synthetic_network(args.members, args.seed)
+    built = time.perf_counter()
+
+    volume = generation_volume(net.sponsor, own_bv, args.generations)
+    depths = paid_depths(net, own_pv, args.generations)
+    payouts = {(i, g): amount for i, g, _, amount in unilevel_payouts(volume, rates, depths)}
+    engine = time.perf_counter()
+
+    report = {
+        "members": args.members,
+        "generations": args.generations,
+        "payout_rows": len(payouts),
+        "total_cents": sum(payouts.values()),
+        "seconds": {"build_tree": round(built - started, 3), "engine": round(engine - built, 3)},
+    }
+    if args.naive:
+        reference = naive_payouts(net.sponsor, own_bv, rates, depths)
+        report["seconds"]["naive"] = round(time.perf_counter() - engine, 3)
+        report["matches_naive"] = reference == payouts
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""Tree compression tests — promotion rules, node compression and the resumable job."""
+
+import uuid
+from contextlib import asynccontextmanager
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import ANY, AsyncMock, MagicMock, call, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.jobs.compress_tree import compress_tree
+from app.services.compression import compress_node, pick_promoted, removed_with_live_children
+from app.services.placement import PlacementSlot
+
+
+def _child(side, bv="0"):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        placement_side=side,
+        bv_left_total=Decimal(bv),
+        bv_right_total=Decimal("0"),
+    )
+
+
+def test_left_first_promotes_left_child():
+    left, right = _child("left"), _child("right", "900")
+    assert pick_promoted([left, right], "left_first") is left
+    assert pick_promoted([right], "left_first") is right
+
+
+def test_stronger_leg_promotes_child_with_more_volume():
+    left, right = _child("left", "100"), _child("right", "900")
+    assert pick_promoted([left, right], "stronger_leg") is right
+
+
+def test_stronger_leg_counts_the_childs_own_volume():
+    left, right = _child("left", "100"), _child("right", "900")
+    assert pick_promoted([left, right], "stronger_leg", {left.id: Decimal("850")}) is left
+
+
+def test_candidates_include_deleted_and_cancelled_nodes():
+    sql = str(removed_with_live_children(50).compile(dialect=postgresql.dialect()))
+    assert "affiliates.deleted_at IS NOT NULL OR affiliates.status IN" in sql
+    assert "EXISTS" in sql
+    assert "LIMIT" in sql
+    assert "LIMIT" not in str(removed_with_live_children(None).compile(dialect=postgresql.dialect()))
+
+
+def _result(*, scalar=None, scalars=None):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = scalar
+    result.scalars.return_value = scalars or []
+    return result
+
+
+async def test_compress_node_promotes_and_relocates():
+    node = SimpleNamespace(
+        id=uuid.uuid4(),
+        tenant_id=None,
+        placement_parent_id=uuid.uuid4(),
+        placement_side="right",
+    )
+    left, right = _child("left"), _child("right")
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.side_effect = [_result(scalar=node), _result(scalars=[left, right]), _result()]
+    slot = PlacementSlot(parent_id=uuid.uuid4(), side="right", depth=3)
+
+    with (
+        patch("app.services.compression.lock_paths", AsyncMock(return_value=[])),
+        patch("app.services.compression.reattach", AsyncMock()) as reattach,
+        patch("app.services.compression.bottom_of_outer_leg", AsyncMock(return_value=slot)),
+    ):
+        moved = await compress_node(db, node.id, "left_first")
+
+    assert reattach.call_args_list == [
+        call(ANY, node, None, None),
+        call(ANY, left, node.placement_parent_id, "right"),
+        call(ANY, right, slot.parent_id, "right"),
+    ]
+    assert moved["promoted_id"] == str(left.id)
+    assert db.add.call_args.args[0].action == "affiliate.compress"
+
+
+async def test_reused_slot_sends_the_promoted_child_below_its_new_occupant():
+    node = SimpleNamespace(
+        id=uuid.uuid4(),
+        tenant_id=None,
+        placement_parent_id=uuid.uuid4(),
+        placement_side="left",
+    )
+    child = _child("right")
+    occupant_id = uuid.uuid4()
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.side_effect = [_result(scalar=node), _result(scalars=[child]), _result(scalar=occupant_id)]
+    slot = PlacementSlot(parent_id=uuid.uuid4(), side="left", depth=4)
+
+    with (
+        patch("app.services.compression.lock_paths", AsyncMock(return_value=[])),
+        patch("app.services.compression.reattach", AsyncMock()) as reattach,
+        patch("app.services.compression.bottom_of_outer_leg", AsyncMock(return_value=slot)) as bottom,
+    ):
+        moved = await compress_node(db, node.id, "left_first")
+
+    bottom.assert_awaited_once_with(db, occupant_id, "left")
+    assert reattach.call_args_list == [call(ANY, node, None, None), call(ANY, child, slot.parent_id, "left")]
+    assert moved["promoted_to"] == {"parent_id": str(slot.parent_id), "side": "left"}
+    assert occupant_id in moved["affected_ids"]
+    sql = str(db.execute.call_args_list[2].args[0].compile(dialect=postgresql.dialect()))
+    assert "affiliates.placement_side = " in sql and "FOR UPDATE" in sql
+
+
+async def test_stronger_leg_compression_loads_the_childrens_own_bv():
+    node = SimpleNamespace(id=uuid.uuid4(), tenant_id=None, placement_parent_id=None, placement_side=None)
+    left, right = _child("left", "100"), _child("right", "900")
+    own = MagicMock()
+    own.all.return_value = [(left.id, Decimal("850"))]
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.execute.side_effect = [_result(scalar=node), _result(scalars=[left, right]), own]
+    slot = PlacementSlot(parent_id=uuid.uuid4(), side="right", depth=3)
+
+    with (
+        patch("app.services.compression.lock_paths", AsyncMock(return_value=[])),
+        patch("app.services.compression.reattach", AsyncMock()),
+        patch("app.services.compression.bottom_of_outer_leg", AsyncMock(return_value=slot)),
+    ):
+        moved = await compress_node(db, node.id, "stronger_leg")
+
+    assert moved["promoted_id"] == str(left.id)
+    sql = str(db.execute.call_args_list[2].args[0].compile(dialect=postgresql.dialect()))
+    assert "sum(orders.total_bv)" in sql and "GROUP BY orders.affiliate_id" in sql
+
+
+async def test_node_without_live_children_is_skipped():
+    db = AsyncMock()
+    db.execute.side_effect = [_result(scalar=SimpleNamespace(id=uuid.uuid4())), _result()]
+    assert await compress_node(db, uuid.uuid4(), "left_first") is None
+
+
+def _session_factory(db):
+    @asynccontextmanager
+    async def factory():
+        yield db
+
+    return factory
+
+
+async def test_job_runs_chunks_until_nothing_is_left():
+    db = AsyncMock()
+    chunks = [
+        [{"affected_ids": [uuid.uuid4()]}] * 2,
+        [{"affected_ids": [uuid.uuid4()]}],
+        [],
+    ]
+    with patch("app.jobs.compress_tree.compress_chunk", AsyncMock(side_effect=chunks)):
+        report = await compress_tree(_session_factory(db), "left_first", 2)
+
+    assert report == {"rule": "left_first", "compressed": 3, "chunks": 2, "complete": True}
+    assert db.commit.await_count == 3
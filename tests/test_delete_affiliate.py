@@ -19,6 +19,9 @@ def _mock_db_with_affiliate():
     affiliate.tenant_id = uuid.uuid4()
     affiliate.affiliate_code = "SV-0001"
     affiliate.email = "affiliate@example.com"
+    affiliate.status = "active"
+    affiliate.left_leg_count = affiliate.right_leg_count = 0
+    affiliate.left_active_count = affiliate.right_active_count = 0
     result = MagicMock()
     result.scalar_one_or_none.return_value = affiliate
     db.execute.return_value = result
@@ -0,0 +1,166 @@
+"""Group volume tests — windows, the closure-table query, closed-period memo and endpoints."""
+
+import uuid
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.schemas.affiliate import GroupVolume
+from app.services.group_volume import PLACEMENT_TAG, get_group_volume, group_volume_query
+from app.services.periods import current_period, parse_period, resolve_window
+from tests.conftest import make_fake_user
+
+
+def test_window_resolution():
+    assert resolve_window("2026-03", None, None).key == "2026-03"
+    custom = resolve_window(None, date(2026, 3, 1), date(2026, 3, 15))
+    assert custom.key == "2026-03-01..2026-03-15"
+    assert (custom.end - custom.start).days == 15
+    assert resolve_window(None, None, None).key == current_period().key
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ("2026-03", date(2026, 3, 1), None),
+        (None, date(2026, 3, 1), None),
+        (None, date(2026, 3, 2), date(2026, 3, 1)),
+    ],
+)
+def test_invalid_windows(args):
+    with pytest.raises(ValueError):
+        resolve_window(*args)
+
+
+def test_query_groups_descendant_orders_per_leg():
+    sql = str(
+        group_volume_query([uuid.uuid4()], parse_period("2026-03")).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "JOIN orders ON orders.affiliate_id = affiliate_ancestors.descendant_id" in sql
+    assert "affiliate_ancestors.ancestor_id IN" in sql
+    assert "GROUP BY affiliate_ancestors.ancestor_id, affiliate_ancestors.side" in sql
+
+
+async def test_closed_period_is_computed_once_per_affiliate():
+    a, b = uuid.uuid4(), uuid.uuid4()
+    db = AsyncMock()
+    db.get.return_value = None  # no snapshot captured
+    db.execute.return_value = [(a, "left", Decimal("10.00"), Decimal("8.00"))]
+    period = parse_period("2020-01")
+
+    first = await get_group_volume(db, [a, b], period)
+    assert first[0].left_bv == Decimal("8.00")
+    assert first[1] == GroupVolume(affiliate_id=b)
+
+    second = await get_group_volume(db, [b, a], period)
+    assert [v.affiliate_id for v in second] == [b, a]
+    assert second[1].left_pv == Decimal("10.00")
+    assert db.execute.await_count == 1
+
+
+async def test_memo_expires_and_follows_placement_changes(fresh_cache):
+    a = uuid.uuid4()
+    db = AsyncMock()
+    db.get.return_value = None
+    db.execute.return_value = [(a, "left", Decimal("10.00"), Decimal("8.00"))]
+    period = parse_period("2020-01")
+
+    with patch.object(fresh_cache.backend, "set", wraps=fresh_cache.backend.set) as stored:
+        await get_group_volume(db, [a], period)
+    assert stored.call_args.args[2] == settings.GROUP_VOLUME_MEMO_TTL
+
+    # A move or compression re-shapes historic legs
+    await fresh_cache.invalidate(PLACEMENT_TAG)
+    await get_group_volume(db, [a], period)
+    assert db.execute.await_count == 2
+
+
+async def test_closed_custom_range_is_not_memoized():
+    a = uuid.uuid4()
+    db = AsyncMock()
+    db.get.return_value = None
+    db.execute.return_value = []
+    window = resolve_window(None, date(2020, 1, 3), date(2020, 1, 9))
+
+    for _ in range(2):
+        await get_group_volume(db, [a], window)
+    assert db.execute.await_count == 2
+
+
+async def test_open_period_is_always_computed():
+    a = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.return_value = [(a, "right", Decimal("5"), Decimal("4"))]
+
+    for _ in range(2):
+        volumes = await get_group_volume(db, [a], current_period())
+    assert volumes[0].right_bv == Decimal("4")
+    assert db.execute.await_count == 2
+
+
+def _visible(*ids):
+    result = MagicMock()
+    result.scalars.return_value = list(ids)
+    return result
+
+
+async def test_single_affiliate_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    affiliate_id = uuid.uuid4()
+    db = AsyncMock()
+    db.get.return_value = None  # no snapshot captured
+    db.execute.side_effect = [_visible(affiliate_id), [(affiliate_id, "left", Decimal("1.00"), Decimal("2.00"))]]
+    override_db(db)
+
+    resp = await client.get(f"/api/v1/affiliates/{affiliate_id}/group-volume?period=2026-W10")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["period"] == "2026-W10"
+    assert body["volumes"][0]["left_bv"] == "2.00"
+
+
+async def test_single_affiliate_not_found(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    db = AsyncMock()
+    db.execute.return_value = _visible()
+    override_db(db)
+
+    resp = await client.get(f"/api/v1/affiliates/{uuid.uuid4()}/group-volume")
+    assert resp.status_code == 404
+
+
+async def test_batch_endpoint_validates_ids(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.get("/api/v1/affiliates/group-volume?ids=not-a-uuid")
+    assert resp.status_code == 422
+
+
+async def test_batch_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+    ids = [uuid.uuid4(), uuid.uuid4()]
+
+    with (
+        patch("app.api.v1.endpoints.affiliates.visible_affiliates", AsyncMock(return_value=ids)),
+        patch(
+            "app.api.v1.endpoints.affiliates.get_group_volume",
+            AsyncMock(return_value=[GroupVolume(affiliate_id=i) for i in ids]),
+        ) as load,
+    ):
+        resp = await client.get(
+            "/api/v1/affiliates/group-volume",
+            params={"ids": ",".join(map(str, ids)), "date_from": "2026-03-01", "date_to": "2026-03-07"},
+        )
+
+    assert resp.status_code == 200
+    assert len(resp.json()["volumes"]) == 2
+    assert load.call_args.args[2].key == "2026-03-01..2026-03-07"
@@ -0,0 +1,109 @@
+"""Genealogy integrity checker tests."""
+
+import threading
+from array import array
+from unittest.mock import AsyncMock, patch
+
+from app.services.integrity import check_network, find_cycles, run_integrity_check
+from app.services.network_snapshot import LEFT, NO_SIDE, RIGHT
+from tests.conftest import make_fake_user, make_network
+
+
+def test_clean_tree_is_ok():
+    net = make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),
+            (0, LEFT, 0, 1, 1),
+            (0, RIGHT, 0, 1, 1),
+            (1, LEFT, 1, 1, 1),
+        ]
+    )
+    report = check_network(net)
+    assert report["ok"] is True
+    assert all(issue["count"] == 0 for issue in report["issues"].values())
+
+
+def test_finds_every_kind_of_problem():
+    net = make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),  # 0 root
+            (0, LEFT, 0, 1, 1),  # 1
+            (0, LEFT, 0, 1, 1),  # 2 duplicate left under 0
+            (0, RIGHT, 0, 1, 1),  # 3 third child of 0
+            (1, LEFT, 0, 0, 1),  # 4 deleted
+            (4, LEFT, 0, 1, 1),  # 5 live child of deleted 4
+            (7, LEFT, 7, 1, 1),  # 6 \ placement and sponsor cycle
+            (6, RIGHT, 6, 1, 1),  # 7 /
+            (1, NO_SIDE, 0, 1, 1),  # 8 parent without side
+        ]
+    )
+    issues = check_network(net)["issues"]
+
+    assert issues["duplicate_sides"]["items"] == [
+        {"parent_id": str(net.ids[0]), "affiliate_id": str(net.ids[2]), "side": "left"}
+    ]
+    assert issues["too_many_children"]["items"] == [{"parent_id": str(net.ids[0]), "children": 3}]
+    assert issues["children_of_deleted_parents"]["items"][0]["affiliate_id"] == str(net.ids[5])
+    assert sorted(issues["placement_cycles"]["items"][0]) == sorted(str(net.ids[i]) for i in (6, 7))
+    assert issues["sponsor_cycles"]["count"] == 1
+    assert issues["inconsistent_side"]["items"][0]["affiliate_id"] == str(net.ids[8])
+
+
+def test_cycle_detection_handles_deep_chains_without_recursion():
+    depth = 200_000
+    links = [i - 1 for i in range(depth)]  # a single 200k-deep chain
+    links[0] = depth - 1  # close it into one big cycle
+    cycles = find_cycles(array("q", links))
+    assert len(cycles) == 1
+    assert len(cycles[0]) == depth
+
+
+def test_tail_into_cycle_is_not_part_of_it():
+    # 3 -> 2 -> 0 <-> 1
+    cycles = find_cycles(array("q", [1, 0, 0, 2]))
+    assert [sorted(c) for c in cycles] == [[0, 1]]
+
+
+def test_report_lists_are_capped():
+    nodes = [(-1, NO_SIDE, -1, 1, 1)] + [(0, LEFT, -1, 1, 1)] * 10
+    issues = check_network(make_network(nodes), limit=3)["issues"]
+    assert issues["duplicate_sides"]["count"] == 9
+    assert len(issues["duplicate_sides"]["items"]) == 3
+
+
+async def test_integrity_endpoint_requires_system_manage(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.get("/api/v1/system/integrity")
+    assert resp.status_code == 403
+
+
+async def test_integrity_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    override_db(AsyncMock())
+    net = make_network([(-1, NO_SIDE, -1, 1, 1)])
+
+    with patch("app.services.integrity.load_network", AsyncMock(return_value=net)):
+        resp = await client.get("/api/v1/system/integrity")
+
+    assert resp.status_code == 200
+    assert resp.json()["ok"] is True
+
+
+async def test_integrity_check_runs_off_the_event_loop_thread():
+    net = make_network([(-1, NO_SIDE, -1, 1, 1)])
+    threads = []
+
+    def check(net, limit):
+        threads.append(threading.get_ident())
+        return check_network(net, limit)
+
+    with (
+        patch("app.services.integrity.load_network", AsyncMock(return_value=net)),
+        patch("app.services.integrity.check_network", check),
+    ):
+        report = await run_integrity_check(AsyncMock())
+
+    assert report["ok"] is True
+    assert threads and threads[0] != threading.get_ident()
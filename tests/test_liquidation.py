@@ -0,0 +1,291 @@
+"""Pre-liquidation job tests — chunked gzip output, resume, worker loop and endpoints."""
+
+import gzip
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.core.cache import invalidate_on_commit
+from app.services.background_jobs import enqueue, run_job
+from app.services.commissions import DIRECT_SPONSORSHIP
+from app.services.liquidation import missing_commission_runs, preview_step
+from app.services.periods import parse_period
+from app.services.unilevel import UNILEVEL, UNILEVEL_KIND
+from tests.conftest import make_fake_user
+
+
+def _row(n, unilevel="0"):
+    amount = Decimal(unilevel)
+    return (uuid.UUID(int=n), f"GH{n}", "Ana", "Diaz", "active", "affiliate", Decimal("0"), amount, Decimal("0"), amount)
+
+
+def _job(**extra):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        params={"period": "2026-03"},
+        checkpoint=None,
+        progress_total=None,
+        progress_done=0,
+        output_path=None,
+        result=None,
+        **extra,
+    )
+
+
+def _db(*results):
+    db = AsyncMock()
+    mocks = []
+    for value in results:
+        result = MagicMock()
+        result.scalar_one.return_value = value
+        result.all.return_value = value
+        mocks.append(result)
+    db.execute.side_effect = mocks
+    return db
+
+
+async def test_preview_writes_gzip_chunks_and_totals(tmp_path):
+    job = _job()
+    settings = SimpleNamespace(REPORTS_DIR=str(tmp_path), LIQUIDATION_CHUNK_SIZE=2)
+    with patch("app.services.liquidation.settings", settings):
+        assert await preview_step(_db(3, [_row(1, "10.50"), _row(2)]), job) is False
+        assert job.checkpoint["after"] == str(uuid.UUID(int=2))
+        assert job.progress_done == 2
+        assert await preview_step(_db([_row(3, "4.50")]), job) is True
+
+    lines = gzip.decompress((tmp_path / "liquidations" / f"2026-03-{job.id}.csv.gz").read_bytes())
+    lines = lines.decode().splitlines()
+    assert lines[0].startswith("affiliate_id,affiliate_code")
+    assert len(lines) == 4
+    assert job.result["total"] == "15.00"
+    assert job.result["unilevel"] == "15.00"
+    assert job.result["payees"] == 2
+    assert job.result["affiliates"] == 3
+
+
+async def test_resumed_chunk_overwrites_uncommitted_output(tmp_path):
+    job = _job()
+    settings = SimpleNamespace(REPORTS_DIR=str(tmp_path), LIQUIDATION_CHUNK_SIZE=2)
+    with patch("app.services.liquidation.settings", settings):
+        await preview_step(_db(3, [_row(1), _row(2)]), job)
+        path = tmp_path / "liquidations" / f"2026-03-{job.id}.csv.gz"
+        # A chunk that reached the file but whose checkpoint never committed
+        with open(path, "ab") as f:
+            f.write(gzip.compress(b"stale\n"))
+        await preview_step(_db([_row(3)]), job)
+
+    text = gzip.decompress(path.read_bytes()).decode()
+    assert "stale" not in text
+    assert len(text.splitlines()) == 4
+
+
+def _factory(*jobs, claimed=True):
+    sessions = []
+
+    @asynccontextmanager
+    async def factory():
+        db = AsyncMock()
+        db.get.return_value = jobs[min(len(sessions), len(jobs) - 1)]
+        db.execute.return_value = MagicMock(rowcount=1 if claimed else 0)
+        sessions.append(db)
+        yield db
+
+    factory.sessions = sessions
+    return factory
+
+
+async def test_run_job_stops_on_cancel_between_chunks():
+    token = uuid.uuid4()
+    job = SimpleNamespace(claim_token=token, status="running", cancel_requested=False)
+    step = AsyncMock(side_effect=lambda db, j: setattr(j, "cancel_requested", True) or False)
+
+    factory = _factory(job)
+    assert await run_job(factory, uuid.uuid4(), token, step) == "cancelled"
+    assert step.await_count == 1
+    assert job.status == "cancelled"
+    # The step ran in its own session, without the row lock of the claim check
+    check, chunk = factory.sessions[:2]
+    assert check.get.call_args.kwargs == {"with_for_update": True}
+    assert chunk.get.call_args.kwargs == {}
+
+
+async def test_run_job_marks_failure_and_keeps_checkpoint():
+    token = uuid.uuid4()
+    job = SimpleNamespace(
+        claim_token=token,
+        status="running",
+        cancel_requested=False,
+        checkpoint={"offset": 10},
+        attempts=3,
+        max_attempts=3,
+    )
+    factory = _factory(job)
+
+    outcome = await run_job(factory, uuid.uuid4(), token, AsyncMock(side_effect=RuntimeError("disk full")))
+
+    assert outcome == "failed"
+    assert job.status == "failed"
+    assert "disk full" in job.error
+    assert job.checkpoint == {"offset": 10}
+    factory.sessions[1].rollback.assert_awaited_once()
+
+
+async def test_chunk_is_discarded_when_the_claim_was_lost_meanwhile():
+    token = uuid.uuid4()
+    job = SimpleNamespace(claim_token=token, status="running", cancel_requested=False)
+    factory = _factory(job, claimed=False)
+
+    async def step(db, j):
+        db.scalar.return_value = "failed"  # timed out and failed by another worker's claim
+        return True
+
+    assert await run_job(factory, uuid.uuid4(), token, step) == "failed"
+    chunk = factory.sessions[1]
+    fence = str(chunk.execute.call_args.args[0].compile())
+    assert "background_jobs.claim_token = :claim_token_1" in fence
+    chunk.rollback.assert_awaited_once()
+    chunk.commit.assert_not_awaited()
+
+
+async def test_step_invalidations_apply_after_the_chunk_commits():
+    token = uuid.uuid4()
+    job = SimpleNamespace(claim_token=token, status="running", cancel_requested=False)
+
+    async def step(db, j):
+        invalidate_on_commit("tree")
+        return True
+
+    with patch("app.services.background_jobs.response_cache.invalidate", AsyncMock()) as invalidate:
+        assert await run_job(_factory(job), uuid.uuid4(), token, step) == "completed"
+    invalidate.assert_awaited_once_with("tree")
+
+
+async def test_run_job_yields_to_a_worker_that_took_over():
+    job = SimpleNamespace(claim_token=uuid.uuid4(), status="running", cancel_requested=False)
+    step = AsyncMock()
+    assert await run_job(_factory(job), uuid.uuid4(), uuid.uuid4(), step) == "running"
+    step.assert_not_awaited()
+
+
+def _enqueue_db(conflict=False):
+    db = AsyncMock()
+    db.add = MagicMock()
+
+    @asynccontextmanager
+    async def savepoint():
+        yield
+
+    async def flush():
+        if conflict:
+            raise IntegrityError("INSERT INTO background_jobs", {}, Exception("duplicate key"))
+        job = db.add.call_args.args[0]
+        job.id = uuid.uuid4()
+        job.created_at = datetime.now(timezone.utc)
+
+    db.begin_nested = MagicMock(side_effect=savepoint)
+    db.flush.side_effect = flush
+    return db
+
+
+async def test_preview_endpoint_enqueues_job(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"liquidations:manage"}))
+    override_db(_enqueue_db())
+
+    with (
+        patch("app.api.v1.endpoints.liquidations.missing_commission_runs", AsyncMock(return_value=[])),
+        patch("app.api.v1.endpoints.liquidations.find_unfinished", AsyncMock(return_value=None)),
+    ):
+        resp = await client.post("/api/v1/liquidations/2026-03/preview")
+
+    assert resp.status_code == 202
+    body = resp.json()
+    assert body["status"] == "queued"
+    assert body["params"] == {"period": "2026-03"}
+    assert body["kind"] == "liquidation_preview"
+
+
+async def test_preview_endpoint_returns_the_job_a_concurrent_request_queued(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"liquidations:manage"}))
+    override_db(_enqueue_db(conflict=True))
+    winner = enqueue(MagicMock(), "liquidation_preview", {"period": "2026-03"}, queue="reports")
+    winner.id, winner.created_at = uuid.uuid4(), datetime.now(timezone.utc)
+    lookups = AsyncMock(side_effect=[None, winner])
+
+    with (
+        patch("app.api.v1.endpoints.liquidations.missing_commission_runs", AsyncMock(return_value=[])),
+        patch("app.api.v1.endpoints.liquidations.find_unfinished", lookups),
+    ):
+        resp = await client.post("/api/v1/liquidations/2026-03/preview")
+
+    assert resp.status_code == 202
+    assert resp.json()["id"] == str(winner.id)
+    assert lookups.await_count == 2
+
+
+async def test_preview_refused_until_the_periods_commissions_are_accrued(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"liquidations:manage"}))
+    db = _enqueue_db()
+    override_db(db)
+
+    with patch(
+        "app.api.v1.endpoints.liquidations.missing_commission_runs", AsyncMock(return_value=[UNILEVEL])
+    ):
+        resp = await client.post("/api/v1/liquidations/2026-03/preview")
+
+    assert resp.status_code == 409
+    assert "unilevel" in resp.json()["detail"]
+    db.add.assert_not_called()
+
+
+async def test_missing_commission_runs_checks_outbox_and_unilevel_rows():
+    db = AsyncMock()
+    db.execute.return_value.one = MagicMock(return_value=SimpleNamespace(undelivered=True, unilevel=False))
+
+    missing = await missing_commission_runs(db, parse_period("2026-03"))
+
+    assert missing == [DIRECT_SPONSORSHIP, UNILEVEL]
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "outbox_events.processed_at IS NULL" in sql
+    assert "outbox_events.payload ->> " in sql
+    assert "commissions.bonus_type = " in sql
+
+
+async def test_completed_unilevel_run_that_paid_nobody_counts_as_accrued():
+    db = AsyncMock()
+    # No unilevel rows were written, but the period's unilevel job completed
+    db.execute.return_value.one = MagicMock(return_value=SimpleNamespace(undelivered=False, unilevel=True))
+
+    missing = await missing_commission_runs(db, parse_period("2026-03"))
+
+    assert missing == []
+    stmt = db.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "background_jobs.status = " in sql
+    assert "background_jobs.params ->> " in sql
+    assert "CAST((background_jobs.result ->> " in sql
+    assert " OR (EXISTS (SELECT " in sql
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    assert UNILEVEL_KIND in params.values()
+    assert "completed" in params.values()
+
+
+async def test_preview_endpoint_rejects_bad_period(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"liquidations:manage"}))
+    override_db(AsyncMock())
+    resp = await client.post("/api/v1/liquidations/2026-13/preview")
+    assert resp.status_code == 422
+
+
+async def test_report_unavailable_until_completed(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"liquidations:manage"}))
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(kind="liquidation_preview", status="running", output_path=None)
+    override_db(db)
+    resp = await client.get(f"/api/v1/liquidations/previews/{uuid.uuid4()}/report")
+    assert resp.status_code == 409
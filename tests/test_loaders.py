@@ -0,0 +1,125 @@
+"""Request-scoped DataLoader — per-tick batching, memo, identity map and the endpoints using it."""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm.util import identity_key
+
+from app.core.loaders import DataLoader, Loaders
+from app.models.user import User
+from tests.conftest import make_affiliate, make_fake_user
+
+
+def _recording_batch(values: dict):
+    calls: list[list] = []
+
+    async def batch(keys):
+        calls.append(list(keys))
+        await asyncio.sleep(0)
+        return {k: values[k] for k in keys if k in values}
+
+    return batch, calls
+
+
+async def test_loads_in_the_same_tick_share_one_batch():
+    batch, calls = _recording_batch({"a": 1, "b": 2, "c": 3})
+    loader = DataLoader(batch)
+
+    async def next_tick(key):
+        await asyncio.sleep(0)
+        return await loader.load(key)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"), next_tick("c"))
+
+    assert results == [1, 2, 1, 3]
+    assert calls == [["a", "b"], ["c"]]
+
+
+async def test_memo_and_missing_keys():
+    batch, calls = _recording_batch({"a": 1})
+    loader = DataLoader(batch)
+
+    assert await loader.load_many(["a", "x"]) == [1, None]
+    assert await loader.load("a") == 1
+    assert await loader.load("x") is None
+    assert calls == [["a", "x"]]
+
+    loader.clear("a")
+    loader.prime("p", 9)
+    assert await loader.load_many(["a", "p"]) == [1, 9]
+    assert calls == [["a", "x"], ["a"]]
+
+
+async def test_failed_batch_reaches_every_waiter_and_is_retried():
+    attempts = []
+
+    async def batch(keys):
+        attempts.append(keys)
+        if len(attempts) == 1:
+            raise RuntimeError("db down")
+        return {k: k.upper() for k in keys}
+
+    loader = DataLoader(batch)
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+    assert await loader.load("a") == "A"
+    assert attempts == [["a", "b"], ["a"]]
+
+
+async def test_cancelled_waiter_does_not_cancel_the_others():
+    batch, _ = _recording_batch({"a": 1})
+    loader = DataLoader(batch)
+    first = asyncio.ensure_future(loader.load("a"))
+    second = asyncio.ensure_future(loader.load("a"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await second == 1
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_loaders_use_identity_map_then_one_in_query():
+    held = User(id=uuid.uuid4(), first_name="Ana", last_name="Diaz", username=None)
+    fetched = User(id=uuid.uuid4(), first_name="Luis", last_name="Paz", username="lpaz")
+    db = AsyncMock()
+    db.identity_map = {identity_key(User, held.id): held}
+    result = MagicMock()
+    result.scalars.return_value = [fetched]
+    db.execute.return_value = result
+    loaders = Loaders(db)
+
+    users = await asyncio.gather(
+        loaders.users.load(held.id), loaders.users.load(fetched.id), loaders.users.load(uuid.uuid4())
+    )
+
+    assert users == [held, fetched, None]
+    assert [u.display_name for u in users[:2]] == ["Ana Diaz", "lpaz"]
+    db.execute.assert_awaited_once()
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "users.id IN" in sql
+
+
+async def test_get_affiliate_resolves_creator_through_loader(client, override_auth, override_db):
+    affiliate = make_affiliate()
+    affiliate.created_by_user_id = uuid.uuid4()
+    creator = User(id=affiliate.created_by_user_id, first_name="Ana", last_name="Diaz", username="admin")
+    found = MagicMock()
+    found.scalar_one_or_none.return_value = affiliate
+    creators = MagicMock()
+    creators.scalars.return_value = [creator]
+    db = AsyncMock()
+    db.identity_map = {}
+    db.execute.side_effect = [found, creators]
+    override_db(db)
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+
+    resp = await client.get(f"/api/v1/affiliates/{affiliate.id}")
+
+    assert resp.status_code == 200
+    assert resp.json()["created_by_username"] == "admin"
+    assert db.execute.await_count == 2
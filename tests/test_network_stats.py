@@ -0,0 +1,197 @@
+"""Network counter tests — bulk recompute, drift detection and incremental hooks."""
+
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.core.cache import begin_invalidation_scope
+from app.jobs.network_counters import apply_corrections, find_drift
+from app.services.network_snapshot import LEFT, NO_SIDE, RIGHT, NetworkArrays
+from app.services.network_stats import (
+    COUNTER_COLUMNS,
+    on_removed,
+    recompute_counters,
+    shift_active_directs,
+    shift_upline,
+)
+from tests.conftest import make_affiliate, make_fake_user, make_network
+
+def _sample_network(**extra) -> NetworkArrays:
+    """A(0) has B(1) left and C(2) right; D(3) is B's right child. E(4), C's
+    left child, is deleted, which hides its child F(5). All sponsored by A."""
+    return make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),  # A
+            (0, LEFT, 0, 1, 1),  # B active
+            (0, RIGHT, 0, 1, 0),  # C pending
+            (1, RIGHT, 0, 1, 1),  # D active
+            (2, LEFT, 0, 0, 1),  # E deleted
+            (4, LEFT, 0, 1, 1),  # F active, under a deleted node
+        ],
+        **extra,
+    )
+
+
+def test_recompute_counts_live_subtree_per_leg():
+    counters = recompute_counters(_sample_network())
+
+    assert counters["left_leg_count"][0] == 2
+    assert counters["right_leg_count"][0] == 1
+    assert counters["left_active_count"][0] == 2
+    assert counters["right_active_count"][0] == 0
+    assert counters["right_leg_count"][1] == 1
+    assert counters["left_leg_count"][2] == 0  # E is deleted
+    # F sits below a deleted node but is still an active, live sponsee of A
+    assert counters["active_directs_count"][0] == 3
+    assert counters["left_leg_count"][4] == 0  # deleted nodes count nothing
+
+
+def test_child_without_side_counts_in_no_leg():
+    net = make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),
+            (0, LEFT, -1, 1, 1),
+            (1, NO_SIDE, -1, 1, 1),  # placed below 1 without a side
+            (2, RIGHT, -1, 1, 1),
+        ]
+    )
+    counters = recompute_counters(net)
+
+    assert (counters["left_leg_count"][1], counters["right_leg_count"][1]) == (0, 0)
+    assert (counters["left_active_count"][1], counters["right_active_count"][1]) == (0, 0)
+    assert counters["right_leg_count"][2] == 1
+    assert counters["left_leg_count"][0] == 1
+
+
+def test_placement_cycle_is_left_out():
+    net = make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),
+            (2, LEFT, -1, 1, 1),  # 1 and 2 point at each other
+            (1, LEFT, -1, 1, 1),
+        ]
+    )
+    assert list(net.top_down_order()) == [0]
+    assert recompute_counters(net)["left_leg_count"][1] == 0
+
+
+def test_find_drift_reports_only_changed_live_rows():
+    stored = {name: [0] * 6 for name in COUNTER_COLUMNS}
+    net = _sample_network(**stored)
+    expected = recompute_counters(net)
+    stored["left_leg_count"][0] = 2
+    stored["right_leg_count"][0] = 1
+    stored["left_active_count"][0] = 2
+    stored["active_directs_count"][0] = 3
+    stored["left_leg_count"][4] = 99  # deleted: ignored
+
+    drift = find_drift(net, expected)
+
+    assert [d["index"] for d in drift] == [1]
+    assert drift[0]["changes"] == {"right_leg_count": (0, 1), "right_active_count": (0, 1)}
+
+
+async def test_corrections_are_batched_by_column_set():
+    db = AsyncMock()
+    a, b, c = (uuid.uuid4() for _ in range(3))
+    drift = [
+        {"index": 0, "id": a, "changes": {"left_leg_count": (0, 2)}},
+        {"index": 1, "id": b, "changes": {"active_directs_count": (1, 0)}},
+        {"index": 2, "id": c, "changes": {"left_leg_count": (5, 4)}},
+    ]
+
+    await apply_corrections(db, drift)
+
+    batches = [call.args[1] for call in db.execute.call_args_list]
+    assert sorted(len(batch) for batch in batches) == [1, 2]
+    assert {"id": a, "left_leg_count": 2} in batches[0] + batches[1]
+
+
+async def test_shift_upline_is_one_update_over_the_ancestor_cte():
+    ancestors = [uuid.uuid4(), uuid.uuid4()]
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(scalars=MagicMock(return_value=ancestors))
+    stale = begin_invalidation_scope()
+    await shift_upline(db, uuid.uuid4(), "left", legs=1, actives=0)
+
+    stmt = db.execute.call_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH RECURSIVE upline_legs")
+    assert "UPDATE affiliates SET" in sql
+    assert "FROM upline_legs" in sql
+    # The walk stops above a node placed without a side
+    assert "upline_legs.own_side IS NOT NULL" in sql
+    assert "RETURNING affiliates.id" in sql
+    assert stale == {f"affiliate:{a}" for a in ancestors}
+
+
+async def test_active_directs_change_invalidates_the_sponsor():
+    sponsor_id = uuid.uuid4()
+    stale = begin_invalidation_scope()
+    await shift_active_directs(AsyncMock(), sponsor_id, 1)
+    assert stale == {f"affiliate:{sponsor_id}"}
+
+
+async def test_shift_upline_skips_roots():
+    db = AsyncMock()
+    await shift_upline(db, None, None, legs=1, actives=1)
+    db.execute.assert_not_called()
+
+
+async def test_removal_subtracts_whole_subtree():
+    affiliate = SimpleNamespace(
+        status="active",
+        placement_parent_id=uuid.uuid4(),
+        placement_side="right",
+        sponsor_id=uuid.uuid4(),
+        left_leg_count=3,
+        right_leg_count=2,
+        left_active_count=1,
+        right_active_count=1,
+    )
+    with (
+        patch("app.services.network_stats.shift_upline", AsyncMock()) as upline,
+        patch("app.services.network_stats.shift_active_directs", AsyncMock()) as directs,
+    ):
+        await on_removed(AsyncMock(), affiliate)
+
+    assert upline.call_args.kwargs == {"legs": -6, "actives": -3}
+    assert directs.call_args.args[1:] == (affiliate.sponsor_id, -1)
+
+
+def _db_returning(affiliate) -> AsyncMock:
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = affiliate
+    db.execute.return_value = result
+    db.add = MagicMock()
+    return db
+
+
+async def test_status_change_moves_counters(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:update"}))
+    affiliate = make_affiliate("active")
+    override_db(_db_returning(affiliate))
+
+    with patch("app.api.v1.endpoints.affiliates.on_status_changed", AsyncMock()) as hook:
+        resp = await client.patch(
+            f"/api/v1/affiliates/{affiliate.id}/status", json={"status": "suspended"}
+        )
+
+    assert resp.status_code == 200
+    assert resp.json()["status"] == "suspended"
+    hook.assert_awaited_once()
+    assert hook.call_args.args[2] == "active"
+
+
+async def test_pending_affiliate_cannot_be_activated_by_hand(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:update"}))
+    affiliate = make_affiliate("pending")
+    override_db(_db_returning(affiliate))
+
+    resp = await client.patch(
+        f"/api/v1/affiliates/{affiliate.id}/status", json={"status": "active"}
+    )
+    assert resp.status_code == 409
@@ -0,0 +1,191 @@
+"""Outbox tests — batch processing, direct sponsorship accrual, worker and replay."""
+
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.jobs.outbox import run_worker
+from app.services.commissions import (
+    DIRECT_SPONSORSHIP,
+    accrue_direct_sponsorship,
+    commission_amount,
+    direct_sponsorship_rows,
+)
+from app.services.outbox import BatchResult, pending_events, process_batch, replay_events
+from tests.conftest import make_fake_user
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _payload(sponsor_id, order_type="enrollment", bv="250.00"):
+    return {
+        "order_id": str(uuid.uuid4()),
+        "tenant_id": None,
+        "affiliate_id": str(uuid.uuid4()),
+        "sponsor_id": str(sponsor_id) if sponsor_id else None,
+        "order_type": order_type,
+        "total_pv": "100.00",
+        "total_bv": bv,
+        "paid_at": "2026-03-14T10:00:00+00:00",
+        "period": "2026-03",
+    }
+
+
+def _event(event_type="order.paid", payload=None):
+    return SimpleNamespace(
+        event_type=event_type,
+        payload=payload or {},
+        attempts=0,
+        last_error=None,
+        processed_at=None,
+        next_attempt_at=None,
+    )
+
+
+def _db(events):
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value = events
+    db.execute.return_value = result
+
+    @asynccontextmanager
+    async def savepoint():
+        yield
+
+    db.begin_nested = MagicMock(side_effect=savepoint)
+    return db
+
+
+def test_claim_skips_locked_rows_oldest_first():
+    sql = _sql(pending_events(100, 5))
+    assert "outbox_events.processed_at IS NULL" in sql
+    assert "outbox_events.next_attempt_at IS NULL OR outbox_events.next_attempt_at <= now()" in sql
+    assert "ORDER BY outbox_events.id" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+async def test_batch_marks_processed_and_isolates_failing_types():
+    paid = [_event(), _event()]
+    other = _event("affiliate.moved")
+    handler = AsyncMock()
+    broken = AsyncMock(side_effect=RuntimeError("boom"))
+    db = _db([paid[0], other, paid[1]])
+
+    result = await process_batch(
+        db, {"order.paid": [handler], "affiliate.moved": [broken]}, 10, 5
+    )
+
+    assert result == BatchResult(claimed=3, processed=2, failed=1)
+    handler.assert_awaited_once_with(db, paid)
+    assert all(e.processed_at is not None for e in paid)
+    assert other.processed_at is None
+    assert other.attempts == 1
+    assert "boom" in other.last_error
+    assert all(e.next_attempt_at is None for e in paid)
+
+
+async def test_failed_events_back_off_exponentially():
+    event = _event()
+    event.attempts = 2
+    broken = AsyncMock(side_effect=RuntimeError("downstream unavailable"))
+    before = datetime.now(timezone.utc)
+
+    with patch("app.services.outbox.settings", SimpleNamespace(OUTBOX_RETRY_BACKOFF=30.0)):
+        await process_batch(_db([event]), {"order.paid": [broken]}, 10, 5)
+
+    assert event.attempts == 3
+    assert 119 <= (event.next_attempt_at - before).total_seconds() <= 121
+
+
+async def test_events_without_handlers_are_consumed():
+    event = _event("affiliate.enrolled")
+    result = await process_batch(_db([event]), {}, 10, 5)
+    assert result.processed == 1
+    assert event.processed_at is not None
+
+
+def test_commission_amount_rounds_to_cents():
+    assert commission_amount(Decimal("33.33"), Decimal("0.2000")) == Decimal("6.67")
+
+
+def test_rows_only_for_eligible_sponsors():
+    good, bad = uuid.uuid4(), uuid.uuid4()
+    rows = direct_sponsorship_rows(
+        [_payload(good), _payload(bad)], {(good, "2026-03")}, Decimal("0.20")
+    )
+    assert len(rows) == 1
+    assert rows[0]["affiliate_id"] == good
+    assert rows[0]["bonus_type"] == DIRECT_SPONSORSHIP
+    assert rows[0]["amount"] == Decimal("50.00")
+    assert rows[0]["status"] == "pending_liquidation"
+
+
+async def test_accrual_skips_inactive_sponsors_and_is_idempotent():
+    active, inactive = uuid.uuid4(), uuid.uuid4()
+    events = [
+        _event(payload=_payload(active)),
+        _event(payload=_payload(inactive)),
+        _event(payload=_payload(active, order_type="repurchase")),
+        _event(payload=_payload(None)),
+    ]
+    sponsors = MagicMock()
+    sponsors.all.return_value = [(active, "active"), (inactive, "inactive")]
+    db = AsyncMock()
+    db.execute.side_effect = [sponsors, MagicMock()]
+
+    await accrue_direct_sponsorship(db, events)
+
+    insert_stmt = db.execute.await_args_list[1].args[0]
+    sql = _sql(insert_stmt)
+    assert "ON CONFLICT (order_id, bonus_type) DO NOTHING" in sql
+    assert sql.count("VALUES") == 1 and "%(affiliate_id_m1)s" not in sql
+
+
+async def test_accrual_without_enrollments_does_not_query():
+    db = AsyncMock()
+    await accrue_direct_sponsorship(db, [_event(payload=_payload(uuid.uuid4(), "repurchase"))])
+    db.execute.assert_not_awaited()
+
+
+def test_replay_resets_matching_events():
+    sql = _sql(replay_events(event_type="order.paid", ids=[1, 2]))
+    assert sql.startswith("UPDATE outbox_events SET processed_at=")
+    assert "attempts=" in sql and "last_error=" in sql and "next_attempt_at=" in sql
+    assert "outbox_events.event_type =" in sql
+    assert "outbox_events.id IN" in sql
+
+
+async def test_worker_drains_queue_once():
+    db = AsyncMock()
+
+    @asynccontextmanager
+    async def factory():
+        yield db
+
+    batches = [BatchResult(2, 2, 0), BatchResult(1, 0, 1)]
+    with patch("app.jobs.outbox.process_batch", AsyncMock(side_effect=batches)):
+        report = await run_worker(factory, batch=2, poll_interval=0, max_attempts=5, once=True)
+
+    assert report["processed"] == 2
+    assert report["failed"] == 1
+    assert report["batches"] == 2
+    assert db.commit.await_count == 2
+
+
+async def test_outbox_backlog_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    override_db(AsyncMock())
+    backlog = {"pending": 3, "parked": 0, "lag_seconds": 1.5, "processed_last_minute": 40}
+    with patch(
+        "app.api.v1.endpoints.system.outbox_backlog", AsyncMock(return_value=backlog)
+    ):
+        resp = await client.get("/api/v1/system/outbox")
+    assert resp.status_code == 200
+    assert resp.json() == backlog
@@ -0,0 +1,131 @@
+"""Spillover placement tests — strategy selection, slot reservation and the next-slot endpoint."""
+
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.placement import PlacementSlot, find_next_slot, reserve_slot
+from tests.conftest import make_fake_user
+
+
+def _result(*, one=None, first=None):
+    result = MagicMock()
+    result.one_or_none.return_value = one
+    result.first.return_value = first
+    return result
+
+
+def _compiled(db, call_index=0) -> str:
+    stmt = db.execute.call_args_list[call_index].args[0]
+    return str(stmt.compile(compile_kwargs={"literal_binds": False}))
+
+
+async def test_outer_left_follows_only_left_children():
+    parent = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.return_value = _result(one=SimpleNamespace(id=parent, depth=4))
+
+    slot = await find_next_slot(db, uuid.uuid4(), "outer_left")
+
+    assert slot == PlacementSlot(parent_id=parent, side="left", depth=5)
+    sql = _compiled(db)
+    assert "RECURSIVE outer_leg" in sql
+    assert "placement_side = " in sql
+
+
+async def test_weaker_leg_picks_side_with_less_volume():
+    parent = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result(one=SimpleNamespace(bv_left_total=Decimal("900"), bv_right_total=Decimal("150"))),
+        _result(one=SimpleNamespace(id=parent, depth=2)),
+    ]
+
+    slot = await find_next_slot(db, uuid.uuid4(), "weaker_leg")
+
+    assert slot.side == "right"
+    assert slot.parent_id == parent
+
+
+async def test_bfs_uses_free_side_of_shallowest_node():
+    parent = uuid.uuid4()
+    db = AsyncMock()
+    db.execute.return_value = _result(one=SimpleNamespace(id=parent, level=1, has_left=True))
+
+    slot = await find_next_slot(db, uuid.uuid4(), "bfs_first_empty")
+
+    assert slot == PlacementSlot(parent_id=parent, side="right", depth=2)
+    assert "RECURSIVE bfs_subtree" in _compiled(db)
+
+
+async def test_missing_root_returns_none():
+    db = AsyncMock()
+    db.execute.return_value = _result(one=None)
+
+    assert await find_next_slot(db, uuid.uuid4(), "outer_right") is None
+
+
+async def test_reserve_retries_when_slot_was_taken():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    slots = [
+        PlacementSlot(parent_id=first, side="left", depth=1),
+        PlacementSlot(parent_id=second, side="left", depth=2),
+    ]
+    db = AsyncMock()
+    db.execute.side_effect = [
+        MagicMock(), _result(first=(uuid.uuid4(),)),  # lock, then taken by someone else
+        MagicMock(), _result(first=None),             # lock, free
+    ]
+
+    with patch("app.services.placement.find_next_slot", AsyncMock(side_effect=slots)):
+        slot = await reserve_slot(db, uuid.uuid4(), "outer_left")
+
+    assert slot.parent_id == second
+    assert "FOR UPDATE" in _compiled(db, 2)
+
+
+async def test_reserve_gives_up_with_conflict():
+    slot = PlacementSlot(parent_id=uuid.uuid4(), side="left", depth=1)
+    db = AsyncMock()
+    db.execute.return_value = _result(first=(uuid.uuid4(),))
+
+    with patch("app.services.placement.find_next_slot", AsyncMock(return_value=slot)):
+        with pytest.raises(HTTPException) as exc:
+            await reserve_slot(db, uuid.uuid4(), "outer_left")
+
+    assert exc.value.status_code == 409
+
+
+async def test_next_slot_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:create"}))
+    parent = uuid.uuid4()
+    db = AsyncMock()
+    code = MagicMock()
+    code.scalar_one.return_value = "SV-000042"
+    db.execute.return_value = code
+    override_db(db)
+
+    slot = PlacementSlot(parent_id=parent, side="right", depth=3)
+    with patch("app.api.v1.endpoints.affiliates.find_next_slot", AsyncMock(return_value=slot)):
+        resp = await client.get(
+            f"/api/v1/affiliates/{uuid.uuid4()}/next-slot?strategy=outer_right"
+        )
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["parent_id"] == str(parent)
+    assert body["parent_affiliate_code"] == "SV-000042"
+    assert body["side"] == "right"
+    assert body["strategy"] == "outer_right"
+
+
+async def test_next_slot_rejects_unknown_strategy(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:create"}))
+    override_db(AsyncMock())
+
+    resp = await client.get(f"/api/v1/affiliates/{uuid.uuid4()}/next-slot?strategy=random")
+    assert resp.status_code == 422
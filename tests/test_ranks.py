@@ -0,0 +1,157 @@
+"""Rank engine tests — qualification, the dirty queue and the partitioned full pass."""
+
+import uuid
+from array import array
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.jobs.evaluate_ranks import cut_tree, rank_changes, rank_network
+from app.schemas.affiliate import GroupVolume
+from app.services.network_snapshot import LEFT, NO_SIDE, RIGHT
+from app.services.periods import parse_period
+from app.services.rank_queue import claim_dirty, mark_dirty
+from app.services.ranks import evaluate_dirty, higher_rank, qualify, rank_table
+from tests.conftest import make_network
+
+TABLE = rank_table()
+LEVEL = {req.name: level for level, req in enumerate(TABLE)}
+
+
+def _qualify(**overrides):
+    inputs = dict(
+        active=True, pv=10_000, left_bv=100_000, right_bv=100_000, active_legs=2, active_directs=2
+    )
+    return TABLE[qualify(TABLE, **(inputs | overrides))].name
+
+
+def test_highest_rank_whose_minimums_are_all_met():
+    assert _qualify() == "silver"
+    assert _qualify(active_directs=3, left_bv=300_000, right_bv=900_000) == "gold"
+    # The weaker leg decides
+    assert _qualify(active_directs=3, left_bv=900_000, right_bv=100_000) == "silver"
+    assert _qualify(active_legs=1) == "bronze"
+
+
+def test_inactive_affiliates_fall_to_the_base_rank():
+    assert _qualify(active=False) == "affiliate"
+
+
+def test_rank_table_comes_from_settings(monkeypatch):
+    monkeypatch.setattr(
+        settings,
+        "RANK_TABLE",
+        [{"name": "member"}, {"name": "leader", "min_pv": "12.50", "min_active_directs": 1}],
+    )
+    table = rank_table()
+    assert [r.name for r in table] == ["member", "leader"]
+    assert table[1].min_pv == 1_250
+
+
+def test_highest_rank_never_goes_down():
+    assert higher_rank(TABLE, "gold", "silver") == "gold"
+    assert higher_rank(TABLE, "silver", "gold") == "gold"
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+async def test_mark_dirty_queues_whole_upline_and_extras():
+    db = AsyncMock()
+    await mark_dirty(db, uuid.uuid4(), uuid.uuid4(), None)
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert sql.startswith("INSERT INTO rank_dirty (affiliate_id)")
+    assert "affiliate_ancestors.descendant_id" in sql
+    assert sql.count("UNION") == 2
+    assert sql.rstrip().endswith("ON CONFLICT DO NOTHING")
+
+
+def test_claim_skips_rows_held_by_other_workers():
+    sql = _compiled(claim_dirty(100))
+    assert sql.startswith("DELETE FROM rank_dirty")
+    assert "FOR UPDATE SKIP LOCKED" in sql
+    assert "RETURNING rank_dirty.affiliate_id" in sql
+
+
+async def test_evaluate_dirty_writes_only_changed_ranks():
+    promoted, unchanged = uuid.uuid4(), uuid.uuid4()
+
+    def row(affiliate_id, rank):
+        return MagicMock(
+            id=affiliate_id,
+            status="active",
+            current_rank=rank,
+            highest_rank=rank,
+            left_active_count=1,
+            right_active_count=1,
+            active_directs_count=2,
+        )
+
+    claimed, affiliates, pv = MagicMock(), MagicMock(), MagicMock()
+    claimed.scalars.return_value = [promoted, unchanged]
+    affiliates.all.return_value = [row(promoted, "affiliate"), row(unchanged, "silver")]
+    pv.all.return_value = [(promoted, Decimal("100")), (unchanged, Decimal("100"))]
+    db = AsyncMock()
+    db.execute.side_effect = [claimed, affiliates, pv, None]
+    legs = {
+        a: GroupVolume(affiliate_id=a, left_bv=Decimal("1000"), right_bv=Decimal("1000"))
+        for a in (promoted, unchanged)
+    }
+
+    with patch("app.services.ranks.compute_group_volume", AsyncMock(return_value=legs)):
+        count, changes = await evaluate_dirty(db, parse_period("2026-03"), 100)
+
+    assert count == 2
+    assert [(c["id"], c["current_rank"]) for c in changes] == [(promoted, "silver")]
+    assert db.execute.call_args.args[1] == [
+        {"id": promoted, "current_rank": "silver", "highest_rank": "silver"}
+    ]
+
+
+def _wide_network():
+    """Root 0 with a full binary tree of depth 3 (15 nodes) and one deleted
+    node (5) that still passes volume up."""
+    nodes = [(-1, NO_SIDE, -1, 1, 1)]
+    for i in range(1, 15):
+        nodes.append(((i - 1) // 2, LEFT if i % 2 else RIGHT, 0, int(i != 5), 1))
+    n = len(nodes)
+    return make_network(
+        nodes,
+        current_rank=["affiliate"] * n,
+        highest_rank=["affiliate"] * n,
+        left_active_count=[1] * n,
+        right_active_count=[1] * n,
+        active_directs_count=[2] * n,
+    )
+
+
+def test_cut_tree_splits_at_first_wide_enough_level():
+    net = _wide_network()
+    top, members = cut_tree(net, net.top_down_order(live_only=False), 4)
+    assert top == [0, 1, 2]
+    assert [m[0] for m in members] == [3, 4, 5, 6]
+    assert sorted(g for m in members for g in m) == list(range(3, 15))
+
+
+async def test_partitioned_pass_matches_single_process():
+    net = _wide_network()
+    own_pv = array("q", [10_000] * 15)
+    own_bv = array("q", [50_000 * (i + 1) for i in range(15)])
+
+    single, parts = await rank_network(net, own_pv, own_bv, TABLE, workers=1)
+    assert parts == 0
+    with patch("app.jobs.evaluate_ranks.PARTITIONS_PER_WORKER", 2):
+        parallel, parts = await rank_network(net, own_pv, own_bv, TABLE, workers=2)
+    assert parts == 4
+    assert list(parallel) == list(single)
+    assert single[5] == -1  # deleted
+    assert single[0] == LEVEL["silver"]  # capped by two active directs
+    assert single[14] == LEVEL["affiliate"]  # a leaf has no leg volume
+
+    changes = rank_changes(net, single, TABLE)
+    assert {c["id"] for c in changes} >= {net.ids[0]}
+    assert net.ids[5] not in {c["id"] for c in changes}
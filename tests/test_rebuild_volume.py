@@ -0,0 +1,96 @@
+"""Volume rebuild tests — bottom-up BV fold, diff and the bulk UPDATE."""
+
+import uuid
+from array import array
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.jobs.rebuild_volume import (
+    VOLUME_COLUMNS,
+    diff_volume,
+    fold_bv,
+    rebuild_volume,
+    volume_update,
+)
+from app.services.network_snapshot import LEFT, NO_SIDE, RIGHT
+from tests.conftest import make_network
+
+
+def _sample(**extra):
+    """A(0) has B(1) left and C(2) right; D(3) is B's right child and deleted;
+    E(4) hangs under C with no side recorded."""
+    return make_network(
+        [
+            (-1, NO_SIDE, -1, 1, 1),
+            (0, LEFT, -1, 1, 1),
+            (0, RIGHT, -1, 1, 1),
+            (1, RIGHT, -1, 0, 1),
+            (2, NO_SIDE, -1, 1, 1),
+        ],
+        **extra,
+    )
+
+
+def test_fold_credits_each_ancestor_leg():
+    own = array("q", [100, 1_000, 20_000, 300_000, 4_000_000])
+    left, right = fold_bv(_sample(), own)
+
+    assert left[0] == 1_000 + 300_000  # deleted D still passes volume up
+    assert right[0] == 20_000 + 4_000_000  # E reaches A through C's passthrough
+    assert right[1] == 300_000
+    assert (left[2], right[2]) == (0, 0)  # E credits neither of C's legs
+
+
+def test_diff_compares_in_cents():
+    stored = {
+        "pv_current_period": [Decimal("1.00"), Decimal("0"), Decimal("0"), Decimal("0"), Decimal("0")],
+        "bv_left_total": [Decimal("0")] * 5,
+        "bv_right_total": [Decimal("0")] * 5,
+    }
+    net = _sample(**stored)
+    zeros = array("q", [0] * 5)
+    expected = {
+        "pv_current_period": array("q", [100, 0, 0, 0, 0]),
+        "bv_left_total": zeros,
+        "bv_right_total": array("q", [0, 0, 0, 0, 250]),
+    }
+
+    diff = diff_volume(net, expected)
+
+    assert [d["index"] for d in diff] == [4]
+    assert diff[0]["changes"] == {"bv_right_total": (0, 250)}
+
+
+def test_bulk_update_is_a_single_unnest_statement():
+    stmt = volume_update(
+        [uuid.uuid4(), uuid.uuid4()],
+        {name: [Decimal("1.00"), Decimal("2.50")] for name in VOLUME_COLUMNS},
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE affiliates SET pv_current_period=v.pv_current_period")
+    assert "FROM unnest(" in sql
+    assert "AS v(id, pv_current_period, bv_left_total, bv_right_total)" in sql
+
+
+async def test_dry_run_reports_without_writing():
+    net = _sample(
+        affiliate_code=["A", "B", "C", "D", "E"],
+        **{name: [Decimal("0")] * 5 for name in VOLUME_COLUMNS},
+    )
+    own_pv = array("q", [0, 5_000, 0, 0, 0])
+    own_bv = array("q", [0, 5_000, 0, 0, 0])
+    db = AsyncMock()
+
+    with (
+        patch("app.jobs.rebuild_volume.load_network", AsyncMock(return_value=net)),
+        patch("app.jobs.rebuild_volume.load_order_volume", AsyncMock(return_value=(own_pv, own_bv))),
+    ):
+        report = await rebuild_volume(db, dry_run=True)
+
+    assert report["changed"] == 2  # B's own PV and A's left leg
+    assert report["applied"] is False
+    assert report["sample"][0]["changes"]["bv_left_total"] == {"stored": "0", "rebuilt": "50"}
+    db.execute.assert_not_called()
+    db.commit.assert_not_called()
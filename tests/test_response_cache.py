@@ -0,0 +1,155 @@
+"""Response cache: hits, tag invalidation, scoping and stampede protection."""
+
+import asyncio
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.cache import begin_invalidation_scope, invalidate_on_commit
+from app.schemas.product import ProductResponse
+from tests.conftest import make_fake_user
+
+URL = "/api/v1/products"
+
+
+def _product(**overrides):
+    data = {
+        "id": uuid.uuid4(),
+        "sku": "KIT-ESP1",
+        "name": "Kit Especial 1",
+        "description": None,
+        "category": "kit",
+        "price_public": Decimal("195.00"),
+        "price_distributor": Decimal("195.00"),
+        "currency": "USD",
+        "pv": Decimal("100.00"),
+        "bv": Decimal("100.00"),
+        "is_kit": True,
+        "kit_tier": "ESP1",
+        "status": "active",
+    }
+    return SimpleNamespace(**{**data, **overrides})
+
+
+def _mock_db_with_products(products):
+    db = AsyncMock()
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = products
+    db.execute.return_value = result
+    return db
+
+
+async def test_second_request_is_a_hit(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"products:read"}))
+    db = _mock_db_with_products([_product()])
+    override_db(db)
+
+    first = await client.get(URL)
+    second = await client.get(URL)
+
+    assert first.headers["X-Cache"] == "MISS"
+    assert second.headers["X-Cache"] == "HIT"
+    assert first.json() == second.json()
+    assert first.json()[0]["price_public"] == "195.00"
+    assert db.execute.await_count == 1
+
+
+async def test_invalidating_tag_forces_miss(client, override_auth, override_db, fresh_cache):
+    override_auth(make_fake_user(permissions={"products:read"}))
+    override_db(_mock_db_with_products([_product()]))
+
+    await client.get(URL)
+    await fresh_cache.invalidate("products")
+    resp = await client.get(URL)
+
+    assert resp.headers["X-Cache"] == "MISS"
+    assert fresh_cache.stats()["products.list"]["misses"] == 2
+
+
+async def test_entries_are_scoped_by_permissions(client, override_auth, override_db):
+    override_db(_mock_db_with_products([_product()]))
+
+    override_auth(make_fake_user(permissions={"products:read"}))
+    await client.get(URL)
+    override_auth(make_fake_user(is_superadmin=True))
+    resp = await client.get(URL)
+
+    assert resp.headers["X-Cache"] == "MISS"
+
+
+async def test_concurrent_misses_produce_once(fresh_cache):
+    calls = 0
+
+    async def produce():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return [ProductResponse.model_validate(_product())]
+
+    user = make_fake_user(is_superadmin=True)
+    responses = await asyncio.gather(*[
+        fresh_cache.cached_response(
+            "products.list",
+            params={"kits_only": False},
+            user=user,
+            tags=["products"],
+            response_type=list[ProductResponse],
+            produce=produce,
+        )
+        for _ in range(10)
+    ])
+
+    assert calls == 1
+    assert len({r.body for r in responses}) == 1
+
+
+async def test_waiter_that_times_out_leaves_the_other_producers_lock(fresh_cache):
+    backend = fresh_cache.backend
+    # Another process holds the lock and has not produced within the wait
+    backend.add = AsyncMock(return_value=False)
+    backend.delete = AsyncMock(wraps=backend.delete)
+    fresh_cache._wait_for = AsyncMock(return_value=None)
+
+    async def produce():
+        return [ProductResponse.model_validate(_product())]
+
+    response = await fresh_cache.cached_response(
+        "products.list",
+        params={"kits_only": False},
+        user=make_fake_user(is_superadmin=True),
+        tags=["products"],
+        response_type=list[ProductResponse],
+        produce=produce,
+    )
+
+    assert response.headers["X-Cache"] == "MISS"
+    backend.delete.assert_not_called()
+
+
+async def test_errors_are_not_cached(fresh_cache):
+    async def produce():
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    user = make_fake_user(is_superadmin=True)
+    for _ in range(2):
+        with pytest.raises(HTTPException):
+            await fresh_cache.cached_response(
+                "orders.detail",
+                params={"order_id": "x"},
+                user=user,
+                tags=["order:x"],
+                response_type=ProductResponse,
+                produce=produce,
+            )
+    assert fresh_cache.stats()["orders.detail"]["misses"] == 2
+
+
+def test_invalidate_on_commit_collects_tags():
+    tags = begin_invalidation_scope()
+    invalidate_on_commit("tree", "affiliate:1")
+    invalidate_on_commit("tree")
+    assert tags == {"tree", "affiliate:1"}
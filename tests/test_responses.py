@@ -0,0 +1,82 @@
+"""JSON rendering — orjson default response, the model_response fast path and the list endpoints."""
+
+import json
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.dialects import postgresql
+
+from app.api.v1.endpoints.affiliates import list_affiliates_query
+from app.core.responses import ORJSONResponse, adapter_for, model_response
+from app.schemas.order import OrderListResponse
+from tests.conftest import make_fake_user
+
+NOW = datetime(2026, 3, 14, 12, 30, tzinfo=timezone.utc)
+
+
+def _row(**values):
+    return SimpleNamespace(_mapping=values, **values)
+
+
+def _order(**extra):
+    return {
+        "id": uuid.uuid4(),
+        "order_number": "ORD-2026-000001",
+        "affiliate_id": uuid.uuid4(),
+        "order_type": "repurchase",
+        "status": "paid",
+        "total": Decimal("125.50"),
+        "total_pv": Decimal("100.00"),
+        "total_bv": Decimal("80.00"),
+        "payment_method": None,
+        "paid_at": NOW,
+        "created_at": NOW,
+        **extra,
+    }
+
+
+def test_orjson_response_matches_pydantic_json():
+    model = OrderListResponse(**_order(affiliate_name="Ana Diaz"))
+    rendered = json.loads(ORJSONResponse({"order": model, "amount": Decimal("1.50")}).body)
+    assert rendered["order"] == json.loads(model.model_dump_json())
+    assert rendered["amount"] == "1.50"
+
+
+def test_model_response_renders_rows_like_fastapi():
+    row = _order(affiliate_name="Ana Diaz", affiliate_code="GH1", notes="ignored")
+    response = model_response(list[OrderListResponse], [row])
+    expected = jsonable_encoder([OrderListResponse.model_validate(row)])
+    assert json.loads(response.body) == json.loads(json.dumps(expected))
+    assert response.media_type == "application/json"
+    assert adapter_for(list[OrderListResponse]) is adapter_for(list[OrderListResponse])
+
+
+async def test_list_orders_is_one_projected_statement(client, override_auth, override_db):
+    listed = MagicMock()
+    listed.all.return_value = [_row(**_order(affiliate_name="Ana Diaz", affiliate_code="GH1"))]
+    db = AsyncMock()
+    db.execute.return_value = listed
+    override_db(db)
+    override_auth(make_fake_user(permissions={"orders:read"}))
+
+    resp = await client.get("/api/v1/orders")
+
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body[0]["affiliate_name"] == "Ana Diaz"
+    assert body[0]["total"] == "125.50"
+    db.execute.assert_awaited_once()
+    sql = str(db.execute.call_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "shipping_address" not in sql and "notes" not in sql
+    assert "JOIN affiliates" in sql
+
+
+def test_list_affiliates_joins_creator_username():
+    sql = str(list_affiliates_query("active", 0, 20).compile(dialect=postgresql.dialect()))
+    assert "LEFT OUTER JOIN users" in sql
+    assert "coalesce(nullif(users.username" in sql
+    assert "address_line1" not in sql and "id_doc_number" not in sql
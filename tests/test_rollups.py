@@ -0,0 +1,165 @@
+"""Daily rollup tests — business days, upserts, backfill and the dashboard endpoint."""
+
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.jobs.backfill_rollups import sales_rows
+from app.schemas.dashboard import DashboardResponse
+from app.services.rollups import (
+    business_day,
+    get_dashboard,
+    record_payment,
+    record_removal,
+    record_status_change,
+    status_deltas,
+)
+from tests.conftest import make_fake_user
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_business_day_uses_reporting_timezone():
+    # 03:00 UTC is still the previous evening in El Salvador (UTC-6)
+    assert business_day(datetime(2026, 3, 2, 3, 0, tzinfo=timezone.utc)) == date(2026, 3, 1)
+    assert business_day(datetime(2026, 3, 2, 7, 0, tzinfo=timezone.utc)) == date(2026, 3, 2)
+
+
+async def test_payment_adds_to_both_rollups():
+    product_id = uuid.uuid4()
+    order = SimpleNamespace(
+        paid_at=datetime(2026, 3, 2, 15, 0, tzinfo=timezone.utc),
+        total=Decimal("90.00"),
+        order_type="repurchase",
+        items=[
+            SimpleNamespace(
+                product_id=product_id,
+                quantity=q,
+                line_total=Decimal("30.00") * q,
+                line_pv=Decimal("10") * q,
+                line_bv=Decimal("8") * q,
+            )
+            for q in (1, 2)
+        ],
+    )
+    db = AsyncMock()
+    await record_payment(db, order, "SV")
+
+    network_sql, sales_sql = (_compiled(c.args[0]) for c in db.execute.call_args_list)
+    assert "ON CONFLICT (day, country_code) DO UPDATE SET orders_paid" in network_sql
+    assert "sales_total = (daily_network_rollup.sales_total + excluded.sales_total)" in network_sql
+    assert "enrollments" not in network_sql.split("DO UPDATE")[1]
+
+    params = db.execute.call_args_list[1].args[0].compile().params
+    # Both lines of the same product fold into one row
+    assert params["quantity_m0"] == 3
+    assert params["amount_m0"] == Decimal("90.00")
+    assert params["order_count_m0"] == 1
+    assert "amount = (daily_sales_rollup.amount + excluded.amount)" in sales_sql
+
+
+def test_status_deltas_track_active_and_inactive_only():
+    assert status_deltas("pending", "active") == {"activations": 1}
+    assert status_deltas("active", "inactive") == {"deactivations": 1, "inactivations": 1}
+    assert status_deltas("inactive", "suspended") == {"inactive_exits": 1}
+    assert status_deltas("inactive", None) == {"inactive_exits": 1}
+    assert status_deltas("pending", "suspended") == {}
+
+
+async def test_status_change_counts_only_tracked_flips():
+    db = AsyncMock()
+    affiliate = SimpleNamespace(status="suspended", country_code="SV")
+    await record_status_change(db, affiliate, "pending")
+    db.execute.assert_not_awaited()
+
+    await record_status_change(db, affiliate, "active")
+    assert "deactivations" in _compiled(db.execute.call_args.args[0]).split("DO UPDATE")[1]
+
+
+async def test_dashboard_counts_inactive_status_not_every_non_active_member():
+    headcount = [SimpleNamespace(country_code="SV", members=10, active=6, inactive=1)]
+    results = [MagicMock(), MagicMock(), MagicMock()]
+    results[0].all.return_value = []
+    results[1].all.return_value = headcount
+    results[2].all.return_value = []
+    db = AsyncMock()
+    db.execute.side_effect = results
+
+    dashboard = await get_dashboard(db, date(2026, 3, 1), date(2026, 3, 31))
+
+    # The other 3 members are pending, suspended or cancelled
+    assert (dashboard.members, dashboard.active, dashboard.inactive) == (10, 6, 1)
+    assert dashboard.countries[0].inactive == 1
+    sql = _compiled(db.execute.call_args_list[1].args[0])
+    assert "sum(daily_network_rollup.inactivations - daily_network_rollup.inactive_exits)" in sql
+
+
+async def test_removing_an_active_affiliate_also_deactivates():
+    db = AsyncMock()
+    await record_removal(db, SimpleNamespace(status="active", country_code="GT"))
+    update = _compiled(db.execute.call_args.args[0]).split("DO UPDATE")[1]
+    assert "removals" in update and "deactivations" in update
+
+
+async def test_backfill_sales_groups_in_the_database():
+    db = AsyncMock()
+    db.execute.return_value = iter([])
+    await sales_rows(db, date(2026, 1, 1))
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert "GROUP BY date(timezone(" in sql
+    assert "count(DISTINCT orders.id)" in sql
+    assert "orders.paid_at)) >= %(date_2)s" in sql
+
+
+def _dashboard(**overrides):
+    values = dict(
+        date_from=date(2026, 3, 1),
+        date_to=date(2026, 3, 31),
+        enrollments=4,
+        members=10,
+        active=7,
+        inactive=3,
+        orders_paid=2,
+        sales_total=Decimal("150.00"),
+        average_ticket=Decimal("75.00"),
+        top_products=[],
+        countries=[],
+    )
+    return DashboardResponse(**(values | overrides))
+
+
+async def test_dashboard_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    override_db(AsyncMock())
+
+    with patch(
+        "app.api.v1.endpoints.dashboard.get_dashboard", AsyncMock(return_value=_dashboard())
+    ) as load:
+        resp = await client.get("/api/v1/dashboard?date_from=2026-03-01&date_to=2026-03-31")
+
+    assert resp.status_code == 200
+    assert resp.json()["average_ticket"] == "75.00"
+    assert load.call_args.args[1:] == (date(2026, 3, 1), date(2026, 3, 31))
+
+
+async def test_dashboard_rejects_inverted_range(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.get("/api/v1/dashboard?date_from=2026-03-31&date_to=2026-03-01")
+    assert resp.status_code == 422
+
+
+async def test_dashboard_requires_reports_permission(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(MagicMock())
+
+    resp = await client.get("/api/v1/dashboard")
+    assert resp.status_code == 403
@@ -46,6 +46,25 @@ def test_sponsor_requires_placement_side():
         enrollment(sponsor_id=uuid.uuid4(), placement_parent_id=uuid.uuid4())
 
 
+def test_placement_strategy_needs_only_sponsor():
+    """With a strategy the position is computed, so parent and side are optional."""
+    aff = enrollment(sponsor_id=uuid.uuid4(), placement_strategy="outer_left")
+    assert aff.placement_parent_id is None
+    assert aff.placement_side is None
+
+
+def test_placement_strategy_requires_sponsor():
+    with pytest.raises(ValidationError, match="placement_strategy requires sponsor_id"):
+        enrollment(placement_strategy="bfs_first_empty")
+
+
+def test_placement_strategy_rejects_explicit_side():
+    with pytest.raises(ValidationError, match="cannot be combined"):
+        enrollment(
+            sponsor_id=uuid.uuid4(), placement_strategy="outer_right", placement_side="left"
+        )
+
+
 def test_no_documents_fails():
     """At least one document (ID or tax) is required."""
     data = {**BASE_DATA}
@@ -0,0 +1,55 @@
+"""Serving profile — preloaded workers, per-process engines, warm-up and drain on shutdown."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+from app.core import background
+from app.db import session
+from app.main import app, lifespan
+from app.serve import gunicorn_options
+
+
+def test_gunicorn_profile_preloads_uvicorn_workers():
+    options = gunicorn_options(4, "0.0.0.0:8000", 30, 5, 1000)
+    assert options["preload_app"] is True
+    assert options["worker_class"] == "uvicorn.workers.UvicornWorker"
+    assert options["workers"] == 4
+    assert options["graceful_timeout"] == 30
+    assert options["timeout"] > options["graceful_timeout"]
+    assert options["max_requests_jitter"] == 100
+
+
+def test_forked_child_gets_its_own_engine(monkeypatch):
+    parent = session.engine
+    monkeypatch.setattr(session, "engine", parent)
+    try:
+        session._rebind_after_fork()
+        assert session.engine is not parent
+        assert session.async_session_factory.kw["bind"] is session.engine
+    finally:
+        session.async_session_factory.configure(bind=parent)
+
+
+async def test_drain_waits_for_spawned_tasks_then_cancels():
+    done = background.spawn(asyncio.sleep(0))
+    stuck = background.spawn(asyncio.sleep(60))
+
+    assert await background.drain(0.05) == 1
+    assert done.done() and not done.cancelled()
+    assert stuck.cancelled()
+    assert background.pending() == 0
+
+
+async def test_lifespan_warms_up_then_drains():
+    with (
+        patch("app.main.warm_pool", AsyncMock()) as warm_pool,
+        patch("app.main.response_cache.warm_up", AsyncMock()) as warm_cache,
+        patch("app.main.background.drain", AsyncMock(return_value=0)) as drain,
+        patch("app.main.dispose_engine", AsyncMock()) as dispose,
+    ):
+        async with lifespan(app):
+            warm_pool.assert_awaited_once()
+            warm_cache.assert_awaited_once()
+            drain.assert_not_awaited()
+        drain.assert_awaited_once()
+        dispose.assert_awaited_once()
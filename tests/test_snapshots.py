@@ -0,0 +1,210 @@
+"""Period snapshots — capture SQL, immutability guards, archived periods and historic reads."""
+
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.config import settings
+from app.core.cache import begin_invalidation_scope
+from app.services.periods import parse_period
+from app.services.snapshots import (
+    capture_period,
+    detach_period,
+    partition_name,
+    served_from_snapshot,
+    snapshot_group_volume,
+    snapshot_volume_query,
+)
+from app.services.tree import _to_columns
+from tests.conftest import make_fake_user
+
+CLOSED = parse_period("2026-03")
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def _statements(db) -> list[str]:
+    return [
+        c.args[0].text if hasattr(c.args[0], "text") else _sql(c.args[0])
+        for c in db.execute.call_args_list
+    ]
+
+
+def test_partition_name_per_period():
+    assert partition_name("2026-03") == "period_snapshots_2026_03"
+    assert partition_name("2026-W10") == "period_snapshots_2026_w10"
+
+
+async def test_capture_creates_partition_and_fills_it_in_one_statement():
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.get.return_value = None
+    db.execute.side_effect = [MagicMock(), MagicMock(rowcount=1200)]
+
+    snapshot = await capture_period(db, CLOSED)
+
+    create, fill = _statements(db)
+    assert create == (
+        "CREATE TABLE period_snapshots_2026_03 PARTITION OF period_snapshots FOR VALUES IN ('2026-03')"
+    )
+    assert fill.startswith("INSERT INTO period_snapshots (period, affiliate_id,")
+    assert "SELECT" in fill and "FROM affiliates" in fill
+    assert "affiliates.enrolled_at < %(enrolled_at_1)s" in fill
+    assert "pv_current_period" not in fill
+    assert snapshot.partition_name == "period_snapshots_2026_03"
+    assert snapshot.row_count == 1200
+    db.add.assert_called_once_with(snapshot)
+
+
+async def test_capture_discards_report_stored_from_live_data(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path))
+    stale = tmp_path / "volumes" / "2026-03.csv"
+    stale.parent.mkdir()
+    stale.write_bytes(b"live\n")
+    db = AsyncMock()
+    db.add = MagicMock()
+    db.get.return_value = None
+    db.execute.side_effect = [MagicMock(), MagicMock(rowcount=1)]
+
+    await capture_period(db, CLOSED)
+
+    assert not stale.exists()
+
+
+async def test_capture_refuses_open_and_captured_periods():
+    db = AsyncMock()
+    open_period = parse_period(f"{datetime.now(timezone.utc).year + 1}-01")
+    with pytest.raises(ValueError, match="still open"):
+        await capture_period(db, open_period)
+
+    db.get.return_value = SimpleNamespace(period="2026-03")
+    with pytest.raises(ValueError, match="immutable"):
+        await capture_period(db, CLOSED)
+    db.execute.assert_not_called()
+
+
+async def test_detach_moves_partition_to_tablespace():
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(partition_name="period_snapshots_2026_03", detached_at=None)
+
+    snapshot = await detach_period(db, "2026-03", tablespace="cold")
+
+    assert _statements(db) == [
+        "ALTER TABLE period_snapshots DETACH PARTITION period_snapshots_2026_03",
+        "ALTER TABLE period_snapshots_2026_03 SET TABLESPACE cold",
+    ]
+    assert snapshot.detached_at is not None
+
+
+async def test_detach_evicts_cached_snapshot_reads():
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(
+        period="2026-03", partition_name="period_snapshots_2026_03", detached_at=None
+    )
+    stale = begin_invalidation_scope()
+
+    await detach_period(db, "2026-03")
+
+    assert stale == {"snapshot:2026-03"}
+
+
+async def test_detach_rejects_unsafe_tablespace():
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(partition_name="period_snapshots_2026_03", detached_at=None)
+    with pytest.raises(ValueError, match="Invalid tablespace"):
+        await detach_period(db, "2026-03", tablespace="cold; DROP TABLE users")
+    db.execute.assert_not_called()
+
+
+async def test_served_from_snapshot():
+    db = AsyncMock()
+    db.get.return_value = None
+    assert await served_from_snapshot(db, CLOSED) is False
+
+    db.get.return_value = SimpleNamespace(detached_at=None)
+    assert await served_from_snapshot(db, CLOSED) is True
+
+    db.get.return_value = SimpleNamespace(detached_at=datetime.now(timezone.utc))
+    with pytest.raises(HTTPException) as exc:
+        await served_from_snapshot(db, CLOSED)
+    assert exc.value.status_code == 410
+
+
+def test_snapshot_volume_query_reads_one_partition():
+    sql = _sql(snapshot_volume_query(CLOSED))
+    assert "FROM period_snapshots JOIN affiliates" in sql
+    assert "period_snapshots.period = %(period_1)s" in sql
+    assert "orders" not in sql
+
+
+async def test_snapshot_group_volume_keeps_input_order():
+    a, b = uuid.uuid4(), uuid.uuid4()
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = [(a, Decimal("5"), Decimal("4"), Decimal("3"), Decimal("2"))]
+    db.execute.return_value = result
+
+    volumes = await snapshot_group_volume(db, [b, a], CLOSED)
+
+    assert [v.affiliate_id for v in volumes] == [b, a]
+    assert volumes[0].left_pv == 0
+    assert (volumes[1].left_pv, volumes[1].left_bv, volumes[1].right_bv) == (5, 4, 2)
+
+
+def _flat_tree(root):
+    row = SimpleNamespace(
+        id=root,
+        placement_parent_id=None,
+        placement_side=None,
+        level=0,
+        affiliate_code="GH1",
+        first_name="Ana",
+        last_name="Diaz",
+        status="active",
+        current_rank="silver",
+        pv_current_period=Decimal("100.00"),
+        bv_left_total=Decimal("0"),
+        bv_right_total=Decimal("0"),
+        enrolled_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+    )
+    return _to_columns(root, [row], truncated=False)
+
+
+async def test_tree_endpoint_reads_period_snapshot(client, override_auth, override_db):
+    root = uuid.uuid4()
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(detached_at=None)
+    override_db(db)
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+
+    with patch(
+        "app.api.v1.endpoints.affiliates.get_snapshot_tree", AsyncMock(return_value=_flat_tree(root))
+    ) as load:
+        response = await client.get(f"/api/v1/affiliates/{root}/tree", params={"period": "2026-03"})
+
+    assert response.status_code == 200
+    assert response.json()["current_rank"] == "silver"
+    assert load.call_args.args[1:4] == ("2026-03", root, 3)
+
+
+async def test_tree_endpoint_without_or_archived_snapshot(client, override_auth, override_db):
+    root = uuid.uuid4()
+    db = AsyncMock()
+    override_db(db)
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+
+    db.get.return_value = None
+    response = await client.get(f"/api/v1/affiliates/{root}/tree", params={"period": "2026-03"})
+    assert response.status_code == 404
+
+    db.get.return_value = SimpleNamespace(detached_at=datetime.now(timezone.utc))
+    response = await client.get(f"/api/v1/affiliates/{root}/tree", params={"period": "2026-02"})
+    assert response.status_code == 410
@@ -0,0 +1,85 @@
+"""Sponsor (unilevel) tree: generation counts, keyset paging and cursor handling."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.services.sponsor_tree import decode_cursor, encode_cursor, get_sponsor_tree
+
+ROOT = uuid.uuid4()
+BASE = datetime(2026, 3, 1, tzinfo=timezone.utc)
+
+
+def _count(generation, n):
+    return SimpleNamespace(kind="count", generation=generation, member_count=n)
+
+
+def _member(i):
+    return SimpleNamespace(
+        kind="member",
+        generation=1,
+        member_count=None,
+        id=uuid.uuid4(),
+        affiliate_code=f"GH-SV-{i:06d}",
+        first_name="Nombre",
+        last_name=str(i),
+        status="active",
+        current_rank="affiliate",
+        sponsor_id=ROOT,
+        enrolled_at=BASE + timedelta(days=i),
+        active_directs=i % 2,
+    )
+
+
+def _db(rows):
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    db.execute.return_value = result
+    return db
+
+
+async def test_counts_and_first_page():
+    members = [_member(i) for i in range(3)]
+    db = _db([_count(0, 1), _count(2, 40), _count(1, 3), *reversed(members)])
+
+    tree = await get_sponsor_tree(db, ROOT, max_generations=5, limit=2)
+
+    assert [(g.generation, g.count) for g in tree.generations] == [(1, 3), (2, 40)]
+    assert [m.affiliate_code for m in tree.members] == ["GH-SV-000000", "GH-SV-000001"]
+    assert tree.members[1].active_directs == 1
+    assert decode_cursor(tree.next_cursor) == (members[1].enrolled_at, members[1].id)
+
+
+async def test_last_page_has_no_cursor():
+    db = _db([_count(0, 1), _count(1, 1), _member(0)])
+    tree = await get_sponsor_tree(db, ROOT, max_generations=5, limit=2)
+    assert tree.next_cursor is None
+
+
+async def test_missing_root_returns_none():
+    assert await get_sponsor_tree(_db([]), ROOT, max_generations=5) is None
+
+
+async def test_single_statement_with_depth_cap_and_keyset():
+    db = _db([_count(0, 1)])
+    cursor = encode_cursor(BASE, uuid.uuid4())
+    await get_sponsor_tree(db, ROOT, max_generations=7, generation=2, after=cursor)
+
+    assert db.execute.await_count == 1
+    stmt = db.execute.await_args.args[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "WITH RECURSIVE sponsor_downline" in sql
+    assert "sponsor_downline.generation <" in sql
+    assert "UNION ALL" in sql
+
+
+def test_bad_cursor_is_rejected():
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("garbage")
+    assert exc.value.status_code == 422
@@ -0,0 +1,151 @@
+"""Subtree move tests — volume/counter re-attribution, validation and path locking."""
+
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import ANY, AsyncMock, MagicMock, call, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.dialects import postgresql
+
+from app.services.subtree_move import lock_paths, move_subtree, reattach, shift_upline_bv
+from tests.conftest import make_affiliate, make_fake_user
+
+
+def _moving_node():
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        tenant_id=uuid.uuid4(),
+        status="active",
+        deleted_at=None,
+        placement_parent_id=uuid.uuid4(),
+        placement_side="left",
+        bv_left_total=Decimal("300.00"),
+        bv_right_total=Decimal("200.00"),
+        left_leg_count=4,
+        right_leg_count=2,
+        left_active_count=3,
+        right_active_count=1,
+    )
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+async def test_reattach_moves_subtree_totals_between_uplines():
+    node = _moving_node()
+    old_parent, new_parent = node.placement_parent_id, uuid.uuid4()
+
+    with (
+        patch("app.services.subtree_move.own_credited_bv", AsyncMock(return_value=Decimal("100.00"))),
+        patch("app.services.subtree_move.shift_upline_bv", AsyncMock()) as bv,
+        patch("app.services.subtree_move.shift_upline", AsyncMock()) as counters,
+    ):
+        moved = await reattach(AsyncMock(), node, new_parent, "right")
+
+    assert bv.call_args_list == [
+        call(ANY, old_parent, "left", Decimal("-600.00")),
+        call(ANY, new_parent, "right", Decimal("600.00")),
+    ]
+    assert [c.kwargs for c in counters.call_args_list] == [
+        {"legs": -7, "actives": -5},
+        {"legs": 7, "actives": 5},
+    ]
+    assert (node.placement_parent_id, node.placement_side) == (new_parent, "right")
+    assert moved == {"bv_moved": "600.00", "nodes_moved": 7}
+
+
+async def test_bv_shift_walks_through_deleted_ancestors():
+    db = AsyncMock()
+    await shift_upline_bv(db, uuid.uuid4(), "left", Decimal("10"))
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert "bv_left_total=(affiliates.bv_left_total + CASE" in sql
+    assert "deleted_at" not in sql
+
+
+async def test_paths_are_locked_in_id_order():
+    db = AsyncMock()
+    db.execute.return_value = MagicMock()
+    await lock_paths(db, (uuid.uuid4(), "left"), (uuid.uuid4(), "right"))
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert "path_0" in sql and "path_1" in sql
+    assert sql.rstrip().endswith("ORDER BY affiliates.id FOR UPDATE")
+
+
+def _result(*, scalar=None, first=None):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = scalar
+    result.first.return_value = first
+    return result
+
+
+async def test_cannot_move_under_own_downline():
+    node = _moving_node()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result(scalar=node),  # affiliate
+        _result(scalar=uuid.uuid4()),  # new parent exists
+        _result(first=(node.id,)),  # affiliate found on the new parent's upline
+    ]
+
+    with pytest.raises(HTTPException) as exc:
+        await move_subtree(db, node.id, uuid.uuid4(), "left", uuid.uuid4())
+    assert exc.value.status_code == 422
+
+
+async def test_taken_position_is_a_conflict():
+    node = _moving_node()
+    db = AsyncMock()
+    db.execute.side_effect = [
+        _result(scalar=node),
+        _result(scalar=uuid.uuid4()),
+        _result(first=None),  # no cycle
+        MagicMock(scalars=MagicMock(return_value=[])),  # path locks
+        _result(first=(uuid.uuid4(),)),  # someone already there
+    ]
+
+    with pytest.raises(HTTPException) as exc:
+        await move_subtree(db, node.id, uuid.uuid4(), "right", uuid.uuid4())
+    assert exc.value.status_code == 409
+
+
+async def test_same_position_is_rejected():
+    node = _moving_node()
+    db = AsyncMock()
+    db.execute.return_value = _result(scalar=node)
+
+    with pytest.raises(HTTPException) as exc:
+        await move_subtree(db, node.id, node.placement_parent_id, "left", uuid.uuid4())
+    assert exc.value.status_code == 422
+
+
+async def test_move_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:update"}))
+    override_db(AsyncMock())
+    affiliate = make_affiliate()
+
+    with patch(
+        "app.api.v1.endpoints.affiliates.move_subtree", AsyncMock(return_value=affiliate)
+    ) as move:
+        resp = await client.post(
+            f"/api/v1/affiliates/{affiliate.id}/move",
+            json={"new_parent_id": str(affiliate.placement_parent_id), "new_side": "left"},
+        )
+
+    assert resp.status_code == 200
+    assert move.call_args.args[3] == "left"
+
+
+async def test_move_endpoint_requires_update_permission(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.post(
+        f"/api/v1/affiliates/{uuid.uuid4()}/move",
+        json={"new_parent_id": str(uuid.uuid4()), "new_side": "left"},
+    )
+    assert resp.status_code == 403
@@ -0,0 +1,367 @@
+"""Binary tree service tests — flat layout, nesting and single-flight coalescing."""
+
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.deps import get_network_scope
+from app.core.singleflight import DistributedSingleFlight, SingleFlight
+from app.schemas.affiliate import FlatTreeResponse
+from app.services.tree import (
+    _build_flat_tree,
+    _dump_tree,
+    _load_tree,
+    _to_columns,
+    get_binary_tree,
+    get_flat_tree,
+    get_frontier,
+    get_upline,
+    nest_flat_tree,
+    subtree_query,
+)
+from tests.conftest import make_fake_user
+
+ENROLLED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _row(id, parent, side, level, code):
+    return SimpleNamespace(
+        id=id,
+        placement_parent_id=parent,
+        placement_side=side,
+        level=level,
+        affiliate_code=code,
+        first_name="Nombre",
+        last_name=code,
+        status="active",
+        current_rank="affiliate",
+        pv_current_period=Decimal("100.00"),
+        bv_left_total=Decimal("0"),
+        bv_right_total=Decimal("0"),
+        enrolled_at=ENROLLED,
+    )
+
+
+def _sample_rows():
+    """A with children B (left) and C (right); D is B's right child.
+
+    Rows come back out of side order, as the database may return them.
+    """
+    a, b, c, d = (uuid.uuid4() for _ in range(4))
+    return [
+        _row(a, None, None, 0, "A"),
+        _row(c, a, "right", 1, "C"),
+        _row(b, a, "left", 1, "B"),
+        _row(d, b, "right", 2, "D"),
+    ]
+
+
+def _node(**overrides) -> FlatTreeResponse:
+    return _to_columns(uuid.uuid4(), _sample_rows(), False)
+
+
+# ── Flat layout ──────────────────────────────────────────────────────────
+
+def test_columns_are_ordered_by_level_parent_and_side():
+    rows = _sample_rows()
+    flat = _to_columns(rows[0].id, rows, False)
+
+    assert flat.nodes.affiliate_code == ["A", "B", "C", "D"]
+    assert flat.nodes.parent_index == [-1, 0, 0, 1]
+    assert flat.nodes.side == [None, "left", "right", "right"]
+    assert flat.nodes.level == [0, 1, 1, 2]
+    assert flat.depth == 2
+    assert flat.frontier == [rows[3].id]
+
+
+def test_nested_is_built_from_flat():
+    rows = _sample_rows()
+    tree = nest_flat_tree(_to_columns(rows[0].id, rows, False))
+
+    assert tree.affiliate_code == "A"
+    assert tree.left_child.affiliate_code == "B"
+    assert tree.right_child.affiliate_code == "C"
+    assert tree.left_child.left_child is None
+    assert tree.left_child.right_child.affiliate_code == "D"
+
+
+async def test_max_nodes_keeps_whole_levels_only():
+    rows = _sample_rows()
+    rows = [rows[0], rows[2], rows[1], rows[3]]
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows  # max_nodes=2 -> 3 rows fetched, cut at level 1
+    db.execute.return_value = result
+
+    flat = await _build_flat_tree(db, rows[0].id, 5, max_nodes=2)
+
+    assert flat.truncated is True
+    assert flat.nodes.affiliate_code == ["A"]
+    assert flat.frontier == [rows[0].id]
+
+
+def test_subtree_query_is_a_single_recursive_cte():
+    sql = str(subtree_query([uuid.uuid4()], 30).select().compile(dialect=postgresql.dialect()))
+    assert "WITH RECURSIVE subtree" in sql
+    assert "deleted_at IS NULL" in sql
+
+
+async def test_nested_depth_over_limit_is_rejected(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.get(f"/api/v1/affiliates/{uuid.uuid4()}/tree?depth=20")
+    assert resp.status_code == 422
+
+
+async def test_flat_format_endpoint(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+    rows = _sample_rows()
+    flat = _to_columns(rows[0].id, rows, False)
+
+    with patch("app.api.v1.endpoints.affiliates.get_flat_tree", AsyncMock(return_value=flat)):
+        resp = await client.get(f"/api/v1/affiliates/{rows[0].id}/tree?format=flat&depth=30")
+
+    assert resp.status_code == 200
+    assert resp.json()["nodes"]["parent_index"] == [-1, 0, 0, 1]
+
+
+# ── Frontier expansion ───────────────────────────────────────────────────
+
+def _frontier_db(rows):
+    for r in rows:
+        r.has_left = r.affiliate_code == "B"
+        r.has_right = False
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    db.execute.return_value = result
+    return db
+
+
+async def test_frontier_excludes_seeds_and_flags_children():
+    rows = _sample_rows()
+    frontier = await get_frontier(_frontier_db(rows), [rows[0].id], levels=2)
+
+    assert frontier.ids == [rows[0].id]
+    assert frontier.nodes.affiliate_code == ["B", "C", "D"]
+    assert frontier.nodes.parent_id == [rows[0].id, rows[0].id, rows[2].id]
+    assert frontier.nodes.has_left == [True, False, False]
+
+
+async def test_frontier_etag_returns_304_when_unchanged(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    rows = _sample_rows()
+    override_db(_frontier_db(rows))
+    url = f"/api/v1/affiliates/tree/frontier?ids={rows[0].id}&levels=2"
+
+    first = await client.get(url)
+    second = await client.get(url, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+
+
+async def test_frontier_is_limited_to_the_distributors_downline(app, client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    rows = _sample_rows()
+    override_db(_frontier_db(rows))
+    scope_id = uuid.uuid4()
+    app.dependency_overrides[get_network_scope] = lambda: scope_id
+    visible = AsyncMock(return_value=[rows[0].id])
+
+    with patch("app.api.v1.endpoints.affiliates.visible_affiliates", visible):
+        inside = await client.get(f"/api/v1/affiliates/tree/frontier?ids={rows[0].id}")
+        outside = await client.get(f"/api/v1/affiliates/tree/frontier?ids={rows[0].id},{uuid.uuid4()}")
+
+    assert inside.status_code == 200
+    assert outside.status_code == 404
+    assert visible.call_args.args[2] == scope_id
+
+
+async def test_frontier_rejects_bad_ids(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    override_db(AsyncMock())
+
+    resp = await client.get("/api/v1/affiliates/tree/frontier?ids=not-a-uuid")
+    assert resp.status_code == 422
+
+
+# ── Single-flight ────────────────────────────────────────────────────────
+
+
+async def test_concurrent_identical_reads_build_once():
+    root = _node()
+    calls = 0
+
+    async def fake_build(db, root_id, depth, max_nodes):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return root
+
+    with patch("app.services.tree._build_flat_tree", fake_build):
+        results = await asyncio.gather(*[get_flat_tree(None, root.root_id, 10) for _ in range(20)])
+
+    assert calls == 1
+    assert all(r is root for r in results)
+
+
+async def test_different_depths_are_not_coalesced():
+    root = _node()
+    calls = 0
+
+    async def fake_build(db, root_id, depth, max_nodes):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return root
+
+    with patch("app.services.tree._build_flat_tree", fake_build):
+        await asyncio.gather(
+            get_binary_tree(None, root.root_id, 3), get_binary_tree(None, root.root_id, 4)
+        )
+
+    assert calls == 2
+
+
+async def test_new_data_version_starts_new_flight(fresh_cache):
+    root = _node()
+    calls = 0
+
+    async def fake_build(db, root_id, depth, max_nodes):
+        nonlocal calls
+        calls += 1
+        return root
+
+    with patch("app.services.tree._build_flat_tree", fake_build):
+        await get_binary_tree(None, root.root_id, 3)
+        await fresh_cache.invalidate("tree")
+        await get_binary_tree(None, root.root_id, 3)
+
+    assert calls == 2
+
+
+async def test_leader_error_is_shared_with_waiters():
+    flight: SingleFlight[int] = SingleFlight()
+    calls = 0
+
+    async def boom():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        raise ValueError("db down")
+
+    results = await asyncio.gather(*[flight.do("k", boom) for _ in range(5)], return_exceptions=True)
+
+    assert calls == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert flight.inflight_count() == 0
+
+
+async def test_waiter_takes_over_when_leader_is_cancelled():
+    flight: SingleFlight[str] = SingleFlight()
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+        return "leader"
+
+    leader = asyncio.create_task(flight.do("k", slow))
+    await started.wait()
+    waiter = asyncio.create_task(flight.do("k", lambda: asyncio.sleep(0, result="waiter")))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert await waiter == "waiter"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_distributed_flight_reuses_published_result():
+    flight = DistributedSingleFlight("tree", dumps=_dump_tree, loads=_load_tree)
+    root = _node()
+    calls = 0
+
+    async def build():
+        nonlocal calls
+        calls += 1
+        return root
+
+    first = await flight.do(("a", 3, 0), build)
+    # A second worker (fresh in-process state) finds the published result
+    other_worker = DistributedSingleFlight("tree", dumps=_dump_tree, loads=_load_tree)
+    second = await other_worker.do(("a", 3, 0), build)
+
+    assert calls == 1
+    assert second == first
+
+
+# ── Upline ───────────────────────────────────────────────────────────────
+
+def _upline_rows(*codes_and_sides):
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            own_side=side,
+            distance=i,
+            affiliate_code=code,
+            first_name="Nombre",
+            last_name=code,
+            status="active",
+            current_rank="affiliate",
+        )
+        for i, (code, side) in enumerate(codes_and_sides)
+    ]
+
+
+def _rows_db(rows):
+    db = AsyncMock()
+    result = MagicMock()
+    result.all.return_value = rows
+    db.execute.return_value = result
+    return db
+
+
+async def test_upline_reports_the_leg_of_each_ancestor():
+    rows = _upline_rows(("D", "right"), ("B", "left"), ("A", None))
+    upline = await get_upline(_rows_db(rows), rows[0].id, "placement")
+
+    assert [a.affiliate_code for a in upline.ancestors] == ["B", "A"]
+    assert [a.side for a in upline.ancestors] == ["right", "left"]
+    assert [a.distance for a in upline.ancestors] == [1, 2]
+    assert upline.cut_at_viewer is False
+
+
+async def test_upline_stops_at_viewer():
+    rows = _upline_rows(("D", "right"), ("B", "left"))
+    upline = await get_upline(_rows_db(rows), rows[0].id, "sponsor", stop_at=rows[1].id)
+
+    assert [a.affiliate_code for a in upline.ancestors] == ["B"]
+    assert upline.ancestors[0].side is None
+    assert upline.cut_at_viewer is True
+
+
+async def test_upline_outside_viewer_network_is_hidden():
+    rows = _upline_rows(("D", "right"), ("B", "left"), ("A", None))
+    assert await get_upline(_rows_db(rows), rows[0].id, stop_at=uuid.uuid4()) is None
+
+
+async def test_upline_sql_stops_recursion_at_viewer():
+    db = _rows_db([])
+    viewer = uuid.uuid4()
+    await get_upline(db, uuid.uuid4(), "sponsor", stop_at=viewer)
+
+    sql = str(db.execute.await_args.args[0].compile(dialect=postgresql.dialect()))
+    assert "WITH RECURSIVE upline" in sql
+    assert "sponsor_id" in sql
+    assert "upline.id != " in sql
@@ -0,0 +1,93 @@
+"""Unilevel bonus tests — per-generation sums, payouts and the period job."""
+
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from app.jobs.unilevel_bonus import replace_period, unilevel_bonus, unilevel_step
+from app.services.periods import parse_period
+from app.services.unilevel import generation_volume, paid_depths, rate_units, unilevel_payouts
+from app.services.network_snapshot import NO_SIDE
+from tests.conftest import make_network
+
+# 0 <- 1 <- 2 <- 3, and 0 <- 4 (sponsor chain; placement is irrelevant here)
+SPONSORS = [-1, 0, 1, 2, 0]
+
+
+def _net(active=(1, 1, 1, 1, 1), ranks=None):
+    nodes = [(-1, NO_SIDE, s, 1, a) for s, a in zip(SPONSORS, active)]
+    extra = {"current_rank": ranks or ["affiliate"] * len(SPONSORS), "tenant_id": [None] * len(SPONSORS)}
+    return make_network(nodes, **extra)
+
+
+def test_generation_sums_match_upline_walk():
+    own_bv = [0, 1000, 2000, 3000, 500]
+    volume = generation_volume(SPONSORS, own_bv, 3)
+    assert list(volume[0]) == [1500, 2000, 3000, 0, 0]
+    assert list(volume[1]) == [2000, 3000, 0, 0, 0]
+    assert list(volume[2]) == [3000, 0, 0, 0, 0]
+
+
+def test_payouts_respect_depth_and_round_half_up():
+    volume = generation_volume(SPONSORS, [0, 1000, 2000, 3000, 500], 2)
+    rates = rate_units([Decimal("0.05"), Decimal("0.0333")])
+    payouts = set(unilevel_payouts(volume, rates, [1, 2, 0, 0, 0]))
+    assert payouts == {(0, 1, 1500, 75), (1, 1, 2000, 100), (1, 2, 3000, 100)}
+
+
+def test_only_active_members_at_min_pv_are_paid():
+    net = _net(active=(1, 0, 1, 1, 1), ranks=["gold", "affiliate", "affiliate", "bronze", "bronze"])
+    depths = paid_depths(net, [100, 100, 0, 100, 100], 5, min_pv=50, depth_by_rank={"bronze": 2, "gold": 9})
+    assert list(depths) == [5, 0, 0, 2, 2]
+
+
+async def test_replace_period_refuses_locked_period():
+    db = AsyncMock()
+    locked = MagicMock()
+    locked.scalar_one.return_value = 3
+    db.execute.return_value = locked
+    assert await replace_period(db, parse_period("2026-03"), [{"id": 1}]) is False
+    assert db.execute.await_count == 1
+
+
+async def test_job_writes_one_row_per_payee_generation():
+    net = _net()
+    own_bv = [0, 1000, 2000, 3000, 500]
+    db = AsyncMock()
+    settings = SimpleNamespace(
+        UNILEVEL_RATES=[Decimal("0.05"), Decimal("0.04")],
+        UNILEVEL_MIN_PV=Decimal("0"),
+        UNILEVEL_DEPTH_BY_RANK={},
+    )
+    with (
+        patch("app.jobs.unilevel_bonus.settings", settings),
+        patch("app.jobs.unilevel_bonus.load_network", AsyncMock(return_value=net)),
+        patch("app.jobs.unilevel_bonus.load_order_volume", AsyncMock(return_value=([0] * 5, own_bv))),
+        patch("app.jobs.unilevel_bonus.replace_period", AsyncMock(return_value=True)) as replace,
+    ):
+        report = await unilevel_bonus(db, parse_period("2026-03"))
+
+    rows = replace.await_args.args[2]
+    by_key = {(r["affiliate_id"], r["generation"]): r for r in rows}
+    assert by_key[net.ids[0], 1]["amount"] == Decimal("0.75")
+    assert by_key[net.ids[0], 2]["amount"] == Decimal("0.80")
+    assert by_key[net.ids[0], 2]["rate"] == Decimal("0.04")
+    assert report["rows"] == len(rows) == 5
+    assert report["total"] == "5.25"
+    db.commit.assert_awaited_once()
+
+
+async def test_job_step_leaves_the_commit_to_the_runner():
+    db = AsyncMock()
+    job = SimpleNamespace(params={"period": "2026-03"}, result=None)
+    settings = SimpleNamespace(UNILEVEL_RATES=[Decimal("0.05")], UNILEVEL_MIN_PV=Decimal("0"), UNILEVEL_DEPTH_BY_RANK={})
+    with (
+        patch("app.jobs.unilevel_bonus.settings", settings),
+        patch("app.jobs.unilevel_bonus.load_network", AsyncMock(return_value=_net())),
+        patch("app.jobs.unilevel_bonus.load_order_volume", AsyncMock(return_value=([0] * 5, [0] * 5))),
+        patch("app.jobs.unilevel_bonus.replace_period", AsyncMock(return_value=True)),
+    ):
+        assert await unilevel_step(db, job) is True
+
+    assert job.result["written"] is True
+    db.commit.assert_not_awaited()
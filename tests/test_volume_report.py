@@ -0,0 +1,261 @@
+"""Volume report tests — periods, closure-table upkeep, rendering and the streamed endpoint."""
+
+import uuid
+from array import array
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.jobs.evaluate_ranks import fold_legs
+from app.models.ancestry import AffiliateAncestor
+from app.services.ancestry import all_ancestry_rows, attach_ancestry, detach_ancestry
+from app.services.periods import current_period, parse_period
+from app.services.volume_report import (
+    COLUMNS,
+    discard_stored_reports,
+    render_csv,
+    volume_report,
+    volume_report_query,
+    write_through,
+)
+from app.services.network_snapshot import LEFT, NO_SIDE, RIGHT
+from tests.conftest import make_fake_user, make_network
+
+
+def _compiled(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+def test_month_and_week_periods():
+    march = parse_period("2026-03")
+    assert (march.start.day, march.end.month) == (1, 4)
+    assert parse_period("2026-12").end.year == 2027
+
+    week = parse_period("2026-W10")
+    assert week.start.isoweekday() == 1
+    assert (week.end - week.start).days == 7
+
+
+@pytest.mark.parametrize("key", ["2026-13", "2026-W60", "March"])
+def test_invalid_periods(key):
+    with pytest.raises(ValueError):
+        parse_period(key)
+
+
+def test_current_period_is_open_and_past_ones_closed():
+    assert not current_period().closed
+    assert parse_period("2020-01").closed
+    # 02:00 UTC on April 1st is still March in El Salvador
+    assert current_period(datetime(2026, 4, 1, 2, tzinfo=timezone.utc)).key == "2026-03"
+
+
+async def test_attach_links_subtree_to_new_path():
+    db = AsyncMock()
+    await attach_ancestry(db, uuid.uuid4(), uuid.uuid4(), "left")
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert sql.startswith("INSERT INTO affiliate_ancestors")
+    assert "path.depth + subtree.depth" in sql
+    assert "JOIN (SELECT" in sql and "ON true" in sql
+
+
+async def test_attach_without_parent_is_a_noop():
+    db = AsyncMock()
+    await attach_ancestry(db, uuid.uuid4(), None, None)
+    db.execute.assert_not_awaited()
+
+
+async def test_incremental_closure_matches_the_full_pass_fold():
+    # 0 <- 1 (left) <- 3 (no side) <- 4 (right); 0 <- 2 (right) <- 5 (no side) <- 6 (left)
+    nodes = [(-1, NO_SIDE), (0, LEFT), (0, RIGHT), (1, NO_SIDE), (3, RIGHT), (2, NO_SIDE), (5, LEFT)]
+    net = make_network([(parent, side, -1, 1, 1) for parent, side in nodes])
+    own_bv = [1, 10, 20, 300, 4000, 50_000, 600_000]
+    sides = {LEFT: "left", RIGHT: "right", NO_SIDE: None}
+
+    engine = create_engine("sqlite://")
+    AffiliateAncestor.__table__.create(engine)
+    with Session(engine) as session:
+        db = AsyncMock()
+        db.execute.side_effect = session.execute
+        # Enrollment order, then move 3 (with 4 below it) under 5 without a side
+        for i, (parent, side) in enumerate(nodes):
+            await attach_ancestry(db, net.ids[i], net.ids[parent] if parent >= 0 else None, sides[side])
+        await detach_ancestry(db, net.ids[3])
+        await attach_ancestry(db, net.ids[3], net.ids[5], None)
+        net.parent[3] = 5
+        closure = session.execute(
+            select(AffiliateAncestor.ancestor_id, AffiliateAncestor.descendant_id, AffiliateAncestor.side)
+        ).all()
+    engine.dispose()
+
+    n = len(nodes)
+    left, right, through = array("q", [0] * n), array("q", [0] * n), array("q", [0] * n)
+    order = [0, 1, 2, 5, 6, 3, 4]  # parents before children after the move
+    fold_legs(net.parent, net.side, own_bv, order, left, right, through)
+
+    legs = {(i, side): 0 for i in range(n) for side in ("left", "right", None)}
+    for ancestor_id, descendant_id, side in closure:
+        legs[net.index[ancestor_id], side] += own_bv[net.index[descendant_id]]
+    assert [legs[i, "left"] for i in range(n)] == list(left)
+    assert [legs[i, "right"] for i in range(n)] == list(right)
+    assert [legs[i, None] for i in range(n)] == list(through)
+
+
+async def test_detach_only_drops_links_above_the_subtree():
+    db = AsyncMock()
+    await detach_ancestry(db, uuid.uuid4())
+
+    sql = _compiled(db.execute.call_args.args[0])
+    assert sql.startswith("DELETE FROM affiliate_ancestors")
+    assert "affiliate_ancestors.ancestor_id IN (SELECT" in sql
+
+
+def test_rebuild_walks_every_placement_link():
+    sql = _compiled(all_ancestry_rows())
+    assert "WITH RECURSIVE links" in sql
+    assert "affiliates.placement_parent_id IS NOT NULL" in sql
+
+
+def test_report_joins_window_orders_to_ancestors():
+    sql = _compiled(volume_report_query(parse_period("2026-03")))
+    assert "JOIN orders ON orders.affiliate_id = affiliate_ancestors.descendant_id" in sql
+    assert "orders.paid_at >= %(paid_at_1)s AND orders.paid_at < %(paid_at_2)s" in sql
+    assert "GROUP BY affiliate_ancestors.ancestor_id" in sql
+    assert "affiliates.deleted_at IS NULL" in sql
+
+
+async def _batches(*batches):
+    for batch in batches:
+        yield batch
+
+
+def _row(code):
+    return (uuid.uuid4(), code, "Ana", "Pérez", "active", *([Decimal("1.50")] * 9))
+
+
+async def test_csv_is_rendered_batch_by_batch():
+    chunks = [c async for c in render_csv(_batches([_row("A1"), _row("A2")], [_row("A3")]))]
+
+    assert chunks[0].decode().strip() == ",".join(COLUMNS)
+    assert len(chunks) == 3
+    assert chunks[2].decode().count("\n") == 1
+    assert "Pérez" in chunks[1].decode()
+
+
+async def test_write_through_keeps_file_only_when_complete(tmp_path):
+    target = tmp_path / "volumes" / "2026-03.csv"
+    assert [c async for c in write_through(_batches(b"a,", b"b"), target)] == [b"a,", b"b"]
+    assert target.read_bytes() == b"a,b"
+
+    async def failing():
+        yield b"x"
+        raise RuntimeError("cursor lost")
+
+    other = tmp_path / "volumes" / "2026-04.csv"
+    with pytest.raises(RuntimeError):
+        async for _ in write_through(failing(), other):
+            pass
+    assert not other.exists()
+    assert [p.name for p in target.parent.iterdir()] == ["2026-03.csv"]
+
+
+async def test_endpoint_streams_open_period(client, override_auth):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+
+    with patch(
+        "app.api.v1.endpoints.reports.volume_report", return_value=_batches(b"h\n", b"r\n")
+    ) as report:
+        resp = await client.get("/api/v1/reports/volumes")
+
+    assert resp.status_code == 200
+    assert resp.content == b"h\nr\n"
+    assert resp.headers["cache-control"] == "no-store"
+    assert report.call_args.args[0].key == current_period().key
+
+
+async def test_endpoint_serves_stored_closed_period(client, override_auth, tmp_path, monkeypatch):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path))
+    (tmp_path / "volumes").mkdir()
+    (tmp_path / "volumes" / "2020-01.csv").write_bytes(b"stored\n")
+
+    with (
+        patch("app.api.v1.endpoints.reports.served_from_snapshot", AsyncMock(return_value=True)),
+        patch("app.api.v1.endpoints.reports.volume_report") as report,
+    ):
+        resp = await client.get("/api/v1/reports/volumes?period=2020-01")
+
+    assert resp.content == b"stored\n"
+    assert "immutable" in resp.headers["cache-control"]
+    report.assert_not_called()
+
+
+async def test_endpoint_recomputes_closed_period_without_snapshot(client, override_auth, tmp_path, monkeypatch):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path))
+    (tmp_path / "volumes").mkdir()
+    (tmp_path / "volumes" / "2020-01.csv").write_bytes(b"stale\n")
+
+    with (
+        patch("app.api.v1.endpoints.reports.served_from_snapshot", AsyncMock(return_value=False)),
+        patch("app.api.v1.endpoints.reports.volume_report", return_value=_batches(b"live\n")) as report,
+    ):
+        resp = await client.get("/api/v1/reports/volumes?period=2020-01")
+
+    assert resp.content == b"live\n"
+    assert resp.headers["cache-control"] == "no-store"
+    assert len(report.call_args.args) == 2  # computed, not stored
+
+
+async def test_endpoint_archived_period_is_gone_despite_stored_file(
+    client, override_auth, tmp_path, monkeypatch
+):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path))
+    (tmp_path / "volumes").mkdir()
+    (tmp_path / "volumes" / "2020-01.csv").write_bytes(b"stored\n")
+    gone = HTTPException(status_code=410, detail="archived")
+
+    with patch("app.api.v1.endpoints.reports.served_from_snapshot", AsyncMock(side_effect=gone)):
+        resp = await client.get("/api/v1/reports/volumes?period=2020-01")
+
+    assert resp.status_code == 410
+
+
+def test_only_snapshot_reports_are_stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "REPORTS_DIR", str(tmp_path))
+    closed = parse_period("2020-01")
+    (tmp_path / "volumes").mkdir()
+    (tmp_path / "volumes" / "2020-01.csv").write_bytes(b"stale\n")
+
+    assert volume_report(closed, "csv").__qualname__.startswith("render_csv")
+    assert volume_report(closed, "csv", volume_report_query(closed)).__qualname__.startswith("write_through")
+
+    discard_stored_reports(closed)
+    assert not (tmp_path / "volumes" / "2020-01.csv").exists()
+
+
+async def test_endpoint_rejects_bad_period(client, override_auth):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    resp = await client.get("/api/v1/reports/volumes?period=2026-3")
+    assert resp.status_code == 422
+
+
+async def test_arrow_needs_pyarrow(client, override_auth):
+    override_auth(make_fake_user(permissions={"reports:read"}))
+    with patch("app.api.v1.endpoints.reports.arrow_available", return_value=False):
+        resp = await client.get("/api/v1/reports/volumes?format=arrow")
+    assert resp.status_code == 501
+
+
+async def test_report_requires_permission(client, override_auth):
+    override_auth(make_fake_user(permissions={"affiliates:read"}))
+    resp = await client.get("/api/v1/reports/volumes")
+    assert resp.status_code == 403
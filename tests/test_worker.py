@@ -0,0 +1,166 @@
+"""Job runner tests — claim order, retries, visibility timeouts, queue slots and the /jobs API."""
+
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError
+
+from app.services.background_jobs import claim_job, claimable, run_job
+from app.worker import JobKind, Worker
+from tests.conftest import make_fake_user
+
+
+def _factory(job=None):
+    @asynccontextmanager
+    async def factory():
+        db = AsyncMock()
+        db.get.return_value = job
+        yield db
+
+    return factory
+
+
+def _claimed(job):
+    result = MagicMock()
+    result.scalar_one_or_none.return_value = job
+    return result
+
+
+def test_claim_is_per_queue_by_priority_without_blocking():
+    sql = str(claimable("engines", ["unilevel_bonus"]).compile(dialect=postgresql.dialect()))
+    assert "background_jobs.queue = %(queue_1)s" in sql
+    assert "background_jobs.run_after IS NULL OR background_jobs.run_after <= now()" in sql
+    assert "background_jobs.heartbeat_at < now() - background_jobs.visibility_timeout * interval '1 second'" in sql
+    assert "ORDER BY background_jobs.priority DESC, background_jobs.created_at" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+async def test_stale_job_out_of_attempts_fails_and_next_is_claimed():
+    stale = SimpleNamespace(id=1, status="running", attempts=3, max_attempts=3, visibility_timeout=300)
+    queued = SimpleNamespace(id=2, status="queued", attempts=0, max_attempts=3, started_at=None)
+    db = AsyncMock()
+    db.execute.side_effect = [_claimed(stale), _claimed(queued)]
+
+    assert await claim_job(db, "default", ["k"]) is queued
+    assert stale.status == "failed"
+    assert "No heartbeat for 300s" in stale.error
+    assert (queued.status, queued.attempts, queued.run_after) == ("running", 1, None)
+    assert queued.claim_token is not None
+
+
+async def test_failed_step_is_retried_after_backoff():
+    token = uuid.uuid4()
+    job = SimpleNamespace(claim_token=token, status="running", cancel_requested=False, attempts=2, max_attempts=3)
+    before = datetime.now(timezone.utc)
+
+    with patch("app.services.background_jobs.settings", SimpleNamespace(JOB_RETRY_BACKOFF=10.0)):
+        outcome = await run_job(_factory(job), uuid.uuid4(), token, AsyncMock(side_effect=OSError("timeout")))
+
+    assert outcome == "retrying"
+    assert job.status == "queued"
+    assert job.claim_token is None
+    assert 19 <= (job.run_after - before).total_seconds() <= 21
+    assert "timeout" in job.error
+
+
+async def test_worker_serves_each_queue_until_empty():
+    step = AsyncMock()
+    kinds = {"io": JobKind(step, queue="reports"), "cpu": JobKind(step, queue="engines", cpu=True)}
+    jobs = {
+        "reports": [SimpleNamespace(id=1, claim_token="t1", kind="io"), None],
+        "engines": [SimpleNamespace(id=2, claim_token="t2", kind="cpu"), None],
+    }
+    claim = AsyncMock(side_effect=lambda db, queue, names: jobs[queue].pop(0))
+    worker = Worker(_factory(), {"reports": 1, "engines": 1}, processes=0, poll_interval=0)
+    worker._pool = ThreadPoolExecutor(max_workers=1)
+
+    with (
+        patch("app.worker.KINDS", kinds),
+        patch("app.worker.claim_job", claim),
+        patch("app.worker.run_job", AsyncMock(return_value="completed")) as in_loop,
+        patch("app.worker.run_in_process", return_value="completed") as in_pool,
+    ):
+        for queue in ("reports", "engines"):
+            await worker._serve(queue, once=True)
+
+    assert worker.finished == {"completed": 2}
+    assert in_loop.await_args.args[1:] == (1, "t1", step)
+    in_pool.assert_called_once_with("2", "t2", "cpu")
+
+
+async def test_enqueue_uses_the_kinds_queue(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    db = AsyncMock()
+    db.add = MagicMock()
+
+    async def flush():
+        job = db.add.call_args.args[0]
+        job.id = uuid.uuid4()
+        job.created_at = datetime.now(timezone.utc)
+
+    @asynccontextmanager
+    async def savepoint():
+        yield
+
+    db.flush.side_effect = flush
+    db.begin_nested = MagicMock(side_effect=savepoint)
+    override_db(db)
+
+    resp = await client.post(
+        "/api/v1/jobs", json={"kind": "unilevel_bonus", "params": {"period": "2026-03"}, "priority": 5}
+    )
+
+    assert resp.status_code == 202
+    body = resp.json()
+    assert (body["queue"], body["priority"], body["status"], body["attempts"]) == ("engines", 5, "queued", 0)
+    assert db.add.call_args.args[0].visibility_timeout == 1800
+
+
+async def test_enqueue_rejects_unknown_kind(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    override_db(AsyncMock())
+    resp = await client.post("/api/v1/jobs", json={"kind": "rm_rf"})
+    assert resp.status_code == 422
+
+
+async def test_enqueue_rejects_params_the_kind_cannot_run(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    db = AsyncMock()
+    override_db(db)
+
+    for kind, params in (
+        ("unilevel_bonus", {}),
+        ("unilevel_bonus", {"period": "2026-13"}),
+        ("liquidation_preview", {"period": 202603}),
+        ("rank_full_pass", {"workers": 0}),
+    ):
+        resp = await client.post("/api/v1/jobs", json={"kind": kind, "params": params})
+        assert resp.status_code == 422, (kind, params)
+        assert "period" in resp.json()["detail"] or "workers" in resp.json()["detail"]
+
+    db.add.assert_not_called()
+
+
+async def test_retry_refused_while_the_period_has_another_unfinished_job(client, override_auth, override_db):
+    override_auth(make_fake_user(permissions={"system:manage"}))
+    db = AsyncMock()
+    db.get.return_value = SimpleNamespace(kind="unilevel_bonus", status="failed", params={"period": "2026-03"})
+
+    @asynccontextmanager
+    async def savepoint():
+        yield
+
+    db.begin_nested = MagicMock(side_effect=savepoint)
+    db.flush.side_effect = IntegrityError("UPDATE background_jobs", {}, Exception("duplicate key"))
+    override_db(db)
+
+    resp = await client.post(f"/api/v1/jobs/{uuid.uuid4()}/retry")
+
+    assert resp.status_code == 409
+    assert "2026-03" in resp.json()["detail"]
+    db.refresh.assert_awaited_once()